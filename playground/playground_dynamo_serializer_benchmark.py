@@ -0,0 +1,99 @@
+# ======================================================================
+# MODULE DETAILS
+# This section provides metadata about the module, including its
+# creation date, author, copyright information, and a brief description
+# of the module's purpose and functionality.
+# ======================================================================
+
+#   __|    \    _ \  |      _ \   __| __ __| __ __|
+#  (      _ \     /  |     (   | (_ |    |      |
+# \___| _/  _\ _|_\ ____| \___/ \___|   _|     _|
+
+# test/playground_dynamo_serializer_benchmark.py
+# Created 10/18/26 - 10:12 AM UK Time (London) by carlogtt
+
+"""
+Microbenchmark of the DynamoDbSerializer dispatch table fast paths
+against the full isinstance / type descriptor chains.
+"""
+
+# ======================================================================
+# EXCEPTIONS
+# This section documents any exceptions made code or quality rules.
+# These exceptions may be necessary due to specific coding requirements
+# or to bypass false positives.
+# ======================================================================
+# flake8: noqa
+# mypy: ignore-errors
+
+# ======================================================================
+# IMPORTS
+# Importing required libraries and modules for the application.
+# ======================================================================
+
+# Standard Library Imports
+import decimal
+import timeit
+
+# My Library Imports
+from carlogtt_library.database.database_dynamo import DynamoDbSerializer
+
+# END IMPORTS
+# ======================================================================
+
+
+# List of public names in the module
+# __all__ = []
+
+# Type aliases
+#
+
+
+ITEM = {
+    'product_id': 'ab12-cd34-ef56',
+    'product_name': 'Something to sell',
+    'product_price': 12.99,
+    'product_quantity': 42,
+    'product_weight': decimal.Decimal('1.25'),
+    'product_active': True,
+    'product_deleted_at': None,
+    'product_thumbnail': b'\x89PNG',
+    'product_tags': ['new', 'sale', 'summer'],
+    'product_dimensions': {'height': 10, 'width': 20, 'depth': 5},
+}
+
+fast = DynamoDbSerializer()
+
+full = DynamoDbSerializer()
+full._serializers = {}
+full._deserializers = {}
+
+ITEM_SER = {key: fast.serialize_att(value) for key, value in ITEM.items()}
+
+
+def bench(label, func, number=50_000):
+    secs = min(timeit.repeat(func, number=number, repeat=5))
+    print(f"{label:<40} {secs / number * 1_000_000:8.2f} us/item")
+
+    return secs
+
+
+def main():
+    slow_ser = bench(
+        "serialize full chain", lambda: {k: full.serialize_att(v) for k, v in ITEM.items()}
+    )
+    fast_ser = bench(
+        "serialize dispatch", lambda: {k: fast.serialize_att(v) for k, v in ITEM.items()}
+    )
+    slow_deser = bench(
+        "deserialize full chain",
+        lambda: {k: full.deserialize_att(v) for k, v in ITEM_SER.items()},
+    )
+    fast_deser = bench("deserialize_item dispatch", lambda: fast.deserialize_item(ITEM_SER))
+
+    print(f"serialize speedup:   {slow_ser / fast_ser:.2f}x")
+    print(f"deserialize speedup: {slow_deser / fast_deser:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -331,3 +331,151 @@ def create_presigned_post_for_file(
 
         except Exception as ex:
             raise exceptions.S3Error(str(ex)) from None
+
+    def create_multipart_upload(
+        self, bucket: str, filename: str, **kwargs
+    ) -> type_defs.CreateMultipartUploadOutputTypeDef:
+        """
+        Initiate a multipart upload, to store a file in Amazon S3 in
+        parts uploaded one at a time.
+
+        :param bucket: The name of the S3 bucket.
+        :param filename: The name of the file to store.
+        :param kwargs: Any other param passed to the underlying boto3.
+        :return: S3 create multipart upload response syntax, holding
+                 the UploadId.
+        :raise S3Error: If operation fails.
+        """
+
+        create_upload_payload: type_defs.CreateMultipartUploadRequestTypeDef = {
+            'Bucket': bucket,
+            'Key': filename,
+            **kwargs,  # type: ignore
+        }
+
+        try:
+            s3_response = self._client.create_multipart_upload(**create_upload_payload)
+
+            return s3_response
+
+        except botocore.exceptions.ClientError as ex:
+            raise exceptions.S3Error(str(ex.response)) from None
+
+        except Exception as ex:
+            raise exceptions.S3Error(str(ex)) from None
+
+    def upload_part(
+        self,
+        bucket: str,
+        filename: str,
+        upload_id: str,
+        part_number: int,
+        body: Union[bytes, IO[Any]],
+        **kwargs,
+    ) -> type_defs.UploadPartOutputTypeDef:
+        """
+        Upload a part of a multipart upload.
+        Every part but the last must be at least 5 MiB.
+
+        :param bucket: The name of the S3 bucket.
+        :param filename: The name of the file to store.
+        :param upload_id: The UploadId of the multipart upload.
+        :param part_number: The number of the part, from 1 to 10,000.
+        :param body: The body of the part in bytes.
+        :param kwargs: Any other param passed to the underlying boto3.
+        :return: S3 upload part response syntax, holding the ETag.
+        :raise S3Error: If operation fails.
+        """
+
+        upload_part_payload: type_defs.UploadPartRequestTypeDef = {
+            'Bucket': bucket,
+            'Key': filename,
+            'UploadId': upload_id,
+            'PartNumber': part_number,
+            'Body': body,
+            **kwargs,  # type: ignore
+        }
+
+        try:
+            s3_response = self._client.upload_part(**upload_part_payload)
+
+            return s3_response
+
+        except botocore.exceptions.ClientError as ex:
+            raise exceptions.S3Error(str(ex.response)) from None
+
+        except Exception as ex:
+            raise exceptions.S3Error(str(ex)) from None
+
+    def complete_multipart_upload(
+        self,
+        bucket: str,
+        filename: str,
+        upload_id: str,
+        parts: list[type_defs.CompletedPartTypeDef],
+        **kwargs,
+    ) -> type_defs.CompleteMultipartUploadOutputTypeDef:
+        """
+        Complete a multipart upload, assembling the parts uploaded into
+        the stored file.
+
+        :param bucket: The name of the S3 bucket.
+        :param filename: The name of the file to store.
+        :param upload_id: The UploadId of the multipart upload.
+        :param parts: The parts uploaded, in order.
+               i.e. [{"ETag": "etag", "PartNumber": 1}, ...]
+        :param kwargs: Any other param passed to the underlying boto3.
+        :return: S3 complete multipart upload response syntax.
+        :raise S3Error: If operation fails.
+        """
+
+        complete_upload_payload: type_defs.CompleteMultipartUploadRequestTypeDef = {
+            'Bucket': bucket,
+            'Key': filename,
+            'UploadId': upload_id,
+            'MultipartUpload': {'Parts': parts},
+            **kwargs,  # type: ignore
+        }
+
+        try:
+            s3_response = self._client.complete_multipart_upload(**complete_upload_payload)
+
+            return s3_response
+
+        except botocore.exceptions.ClientError as ex:
+            raise exceptions.S3Error(str(ex.response)) from None
+
+        except Exception as ex:
+            raise exceptions.S3Error(str(ex)) from None
+
+    def abort_multipart_upload(
+        self, bucket: str, filename: str, upload_id: str, **kwargs
+    ) -> type_defs.AbortMultipartUploadOutputTypeDef:
+        """
+        Abort a multipart upload, deleting the parts uploaded.
+
+        :param bucket: The name of the S3 bucket.
+        :param filename: The name of the file to store.
+        :param upload_id: The UploadId of the multipart upload.
+        :param kwargs: Any other param passed to the underlying boto3.
+        :return: S3 abort multipart upload response syntax.
+        :raise S3Error: If operation fails.
+        """
+
+        abort_upload_payload: type_defs.AbortMultipartUploadRequestTypeDef = {
+            'Bucket': bucket,
+            'Key': filename,
+            'UploadId': upload_id,
+            **kwargs,  # type: ignore
+        }
+
+        try:
+            s3_response = self._client.abort_multipart_upload(**abort_upload_payload)
+
+            return s3_response
+
+        except botocore.exceptions.ClientError as ex:
+            raise exceptions.S3Error(str(ex.response)) from None
+
+        except Exception as ex:
+            raise exceptions.S3Error(str(ex)) from None
@@ -30,12 +30,39 @@
 # ======================================================================
 
 # Standard Library Imports
+import base64
+import bisect
+import collections
+import concurrent.futures
+import csv
 import decimal
+import functools
+import gzip
+import heapq
+import io
+import itertools
+import json
 import logging
+import multiprocessing
 import numbers
+import os
+import pathlib
+import queue
+import random
+import re
+import threading
 import time
-from collections.abc import Generator, Iterable, Mapping, MutableMapping, Sequence
-from typing import Any, Optional, TypedDict, Union
+import zlib
+from collections.abc import (
+    Callable,
+    Generator,
+    Iterable,
+    Iterator,
+    Mapping,
+    MutableMapping,
+    Sequence,
+)
+from typing import Any, Literal, Optional, TypedDict, TypeVar, Union
 
 # Third Party Library Imports
 import botocore.config
@@ -53,6 +80,11 @@
 # List of public names in the module
 __all__ = [
     'DynamoDB',
+    'DynamoDbAttribute',
+    'DynamoDbBufferedWriter',
+    'DynamoDbCondition',
+    'DynamoDbLazyItem',
+    'DynamoDbUpdatePlan',
 ]
 
 # Setting up logger for current module
@@ -60,6 +92,8 @@
 
 # Type aliases
 DynamoDBClient = mypy_boto3_dynamodb.client.DynamoDBClient
+T = TypeVar("T")
+R = TypeVar("R")
 
 # Placeholder, replace Any with AttributeValue later
 DynamoDbList = Sequence[Any]
@@ -69,6 +103,7 @@
 
 PartitionKeyValue = Union[bytes, str, float]
 SortKeyValue = Union[bytes, str, float]
+SortKeyCondition = Literal['=', '<', '<=', '>', '>=', 'begins_with', 'between']
 
 AttributeValue = Union[
     str,
@@ -124,6 +159,328 @@
 PartitionKeyItem = dict[str, PartitionKeyTypeDef]
 Item = dict[str, type_defs.AttributeValueTypeDef]
 
+KeySchemaMetadata = TypedDict(
+    "KeySchemaMetadata",
+    {
+        "PartitionKeyKey": str,
+        "PartitionKeyType": str,
+        "SortKeyKey": Optional[str],
+        "SortKeyType": Optional[str],
+    },
+)
+
+TableMetadata = TypedDict(
+    "TableMetadata",
+    {
+        "TableName": str,
+        "PartitionKeyKey": str,
+        "PartitionKeyType": str,
+        "SortKeyKey": Optional[str],
+        "SortKeyType": Optional[str],
+        "GlobalSecondaryIndexes": dict[str, KeySchemaMetadata],
+        "LocalSecondaryIndexes": dict[str, KeySchemaMetadata],
+        "WriteShards": int,
+    },
+)
+
+CapacityLimit = TypedDict(
+    "CapacityLimit",
+    {
+        "ReadCapacityUnits": float,
+        "WriteCapacityUnits": float,
+    },
+    total=False,
+)
+
+LatencyHistogram = dict[str, int]
+
+OperationMetrics = TypedDict(
+    "OperationMetrics",
+    {
+        "Calls": int,
+        "Errors": int,
+        "Throttles": int,
+        "Pages": int,
+        "Items": int,
+        "Bytes": int,
+        "ReadCapacityUnits": float,
+        "WriteCapacityUnits": float,
+        "LatencySecs": float,
+        "LatencyHistogram": LatencyHistogram,
+    },
+)
+
+CallMetrics = TypedDict(
+    "CallMetrics",
+    {
+        "Table": str,
+        "Operation": str,
+        "LatencySecs": float,
+        "ReadCapacityUnits": float,
+        "WriteCapacityUnits": float,
+        "Items": int,
+        "Bytes": int,
+        "Error": Optional[str],
+    },
+)
+
+ItemCacheStats = TypedDict(
+    "ItemCacheStats",
+    {
+        "Hits": int,
+        "Misses": int,
+        "Evictions": int,
+        "Expirations": int,
+        "Invalidations": int,
+        "Items": int,
+        "Bytes": int,
+    },
+)
+
+BufferedWriterStats = TypedDict(
+    "BufferedWriterStats",
+    {
+        "Put": int,
+        "Delete": int,
+        "Coalesced": int,
+        "Flushes": int,
+        "Failed": int,
+        "Buffered": int,
+    },
+)
+
+ExportStats = TypedDict(
+    "ExportStats",
+    {
+        "Items": int,
+        "Files": list[str],
+        "Bytes": int,
+        "ElapsedSecs": float,
+        "ItemsPerSec": float,
+    },
+)
+
+CopyTableVerification = TypedDict(
+    "CopyTableVerification",
+    {
+        "SourceCount": int,
+        "DestinationCount": int,
+        "Sampled": int,
+        "Mismatched": list[dict[str, Any]],
+        "Passed": bool,
+    },
+)
+
+CopyTableStats = TypedDict(
+    "CopyTableStats",
+    {
+        "Scanned": int,
+        "Written": int,
+        "Skipped": int,
+        "Failed": list[dict[str, Any]],
+        "ElapsedSecs": float,
+        "Verification": Optional[CopyTableVerification],
+    },
+)
+
+CompressionPolicy = TypedDict(
+    "CompressionPolicy",
+    {
+        "MinSizeBytes": int,
+        "Attributes": Sequence[str],
+        "Level": int,
+    },
+    total=False,
+)
+
+ItemSizeEstimate = TypedDict(
+    "ItemSizeEstimate",
+    {
+        "SizeBytes": int,
+        "CompressedSizeBytes": int,
+        "ReadCapacityUnits": int,
+        "CompressedReadCapacityUnits": int,
+        "WriteCapacityUnits": int,
+        "CompressedWriteCapacityUnits": int,
+    },
+)
+
+# BatchGetItem accepts at most 100 keys per request
+_BATCH_GET_ITEM_MAX_KEYS = 100
+
+# BatchWriteItem accepts at most 25 put or delete requests
+_BATCH_WRITE_ITEM_MAX_REQUESTS = 25
+
+# Maximum number of attempts to get all the unprocessed items of a
+# batch operation processed
+_BATCH_MAX_ATTEMPTS = 8
+_NORMALIZED_KEY_CACHE_SIZE = 1024
+_UPDATE_TEMPLATE_CACHE_SIZE = 256
+_ITEM_CACHE_DEFAULT_TTL_SECS = 60.0
+
+# Default of the optional arguments for which None is a valid value
+_MISSING: Any = object()
+
+# Maximum number of shards of a sharded partition key queried at the
+# same time
+_SHARDED_QUERY_MAX_WORKERS = 16
+
+# Size of the parts of the S3 multipart uploads of the exports, every
+# part but the last must be at least 5 MiB
+_EXPORT_S3_PART_SIZE = 8 * 1024 * 1024
+
+# Compressed attributes are stored as binary values starting with this
+# prefix, followed by b'S' or b'B' for the original type and the zlib
+# compressed value
+_COMPRESSED_ATTRIBUTE_PREFIX = b'\x00DDBZ\x01'
+_COMPRESSION_DEFAULT_MIN_SIZE_BYTES = 1024
+_COMPRESSION_DEFAULT_LEVEL = 6
+
+# Upper bounds in milliseconds of the latency histogram buckets
+_LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# Error codes DynamoDB returns when a request is throttled
+_THROTTLING_ERROR_CODES = frozenset({
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+})
+
+# An attribute path is a dot separated list of attribute names, each
+# optionally followed by list indexes i.e. "info.tags[0].name"
+_ATTRIBUTE_PATH_ELEMENT_REGEX = re.compile(r'^([^.\[\]]+)((?:\[\d+\])*)$')
+
+
+class DynamoDbCondition:
+    """
+    A condition on one or more item attributes, used to filter the items
+    read from DynamoDB on the server side.
+
+    Conditions are created from a DynamoDbAttribute and can be combined
+    with the & (AND), | (OR) and ~ (NOT) operators.
+
+    i.e.
+        >>> cond = DynamoDbAttribute('status').eq('active') & ~(
+        ...     DynamoDbAttribute('price').gt(100)
+        ... )
+
+    :param operator: The operator of the condition.
+    :param operands: The operands of the operator, attribute paths,
+        values or other conditions.
+    """
+
+    def __init__(self, operator: str, *operands: Any) -> None:
+        self.operator = operator
+        self.operands = operands
+
+    def __and__(self, other: 'DynamoDbCondition') -> 'DynamoDbCondition':
+        return DynamoDbCondition('AND', self, other)
+
+    def __or__(self, other: 'DynamoDbCondition') -> 'DynamoDbCondition':
+        return DynamoDbCondition('OR', self, other)
+
+    def __invert__(self) -> 'DynamoDbCondition':
+        return DynamoDbCondition('NOT', self)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.operator!r}, *{self.operands!r})"
+
+
+class DynamoDbAttribute:
+    """
+    An item attribute to build filter conditions with.
+
+    :param path: The path of the attribute, nested attributes are
+        separated by a dot and list elements are selected with their
+        index i.e. "info.tags[0]".
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def eq(self, value: AttributeValue) -> DynamoDbCondition:
+        return DynamoDbCondition('=', self.path, value)
+
+    def ne(self, value: AttributeValue) -> DynamoDbCondition:
+        return DynamoDbCondition('<>', self.path, value)
+
+    def lt(self, value: AttributeValue) -> DynamoDbCondition:
+        return DynamoDbCondition('<', self.path, value)
+
+    def lte(self, value: AttributeValue) -> DynamoDbCondition:
+        return DynamoDbCondition('<=', self.path, value)
+
+    def gt(self, value: AttributeValue) -> DynamoDbCondition:
+        return DynamoDbCondition('>', self.path, value)
+
+    def gte(self, value: AttributeValue) -> DynamoDbCondition:
+        return DynamoDbCondition('>=', self.path, value)
+
+    def between(self, low_value: AttributeValue, high_value: AttributeValue) -> DynamoDbCondition:
+        return DynamoDbCondition('BETWEEN', self.path, low_value, high_value)
+
+    def is_in(self, values: Iterable[AttributeValue]) -> DynamoDbCondition:
+        return DynamoDbCondition('IN', self.path, *values)
+
+    def begins_with(self, value: Union[str, bytes]) -> DynamoDbCondition:
+        return DynamoDbCondition('begins_with', self.path, value)
+
+    def contains(self, value: AttributeValue) -> DynamoDbCondition:
+        return DynamoDbCondition('contains', self.path, value)
+
+    def exists(self) -> DynamoDbCondition:
+        return DynamoDbCondition('attribute_exists', self.path)
+
+    def not_exists(self) -> DynamoDbCondition:
+        return DynamoDbCondition('attribute_not_exists', self.path)
+
+
+class DynamoDbLazyItem(Mapping[str, Any]):
+    """
+    Read-only mapping over a raw DynamoDB item, deserializing each
+    attribute only the first time it is accessed.
+
+    Useful when only a few attributes of large items are needed, as
+    the attributes never accessed are never deserialized. dict(item)
+    deserializes all the attributes and returns a plain dictionary.
+
+    :param ddb_item: The raw DynamoDB item.
+        i.e. {"id": {"S": "string"}, "count": {"N": "1"}}
+    :param deserialize_att: The function deserializing an attribute.
+    """
+
+    __slots__ = ('_ddb_item', '_deserialize_att', '_deserialized')
+
+    def __init__(
+        self,
+        ddb_item: Mapping[str, Any],
+        deserialize_att: Callable[[Any], AttributeValueDeserialized],
+    ) -> None:
+        self._ddb_item = ddb_item
+        self._deserialize_att = deserialize_att
+        self._deserialized: dict[str, AttributeValueDeserialized] = {}
+
+    def __getitem__(self, key: str) -> AttributeValueDeserialized:
+        try:
+            return self._deserialized[key]
+
+        except KeyError:
+            value = self._deserialized[key] = self._deserialize_att(self._ddb_item[key])
+
+            return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._ddb_item)
+
+    def __len__(self) -> int:
+        return len(self._ddb_item)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._ddb_item
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({dict(self)!r})"
+
 
 class DynamoDB(aws_boto3.aws_service_base.AwsServiceBase[DynamoDBClient]):
     """
@@ -159,6 +516,55 @@ class DynamoDB(aws_boto3.aws_service_base.AwsServiceBase[DynamoDBClient]):
            of API calls. Default is False.
     :param client_parameters: A key-value pair object of parameters that
            will be passed to the low-level service client.
+    :param auto_generate_block_size: If set, auto generated partition
+           key values are allocated in blocks: a single conditional
+           update reserves this many counter values in the
+           '<table>_SysItems' table, which are then handed out in
+           process without further calls. This turns every auto
+           generated put into a plain conditional put, at the cost of
+           gaps in the sequence when a process stops before using its
+           whole block. Default is None, which means the counter is
+           read and incremented in the same transaction of every put.
+    :param table_metadata_ttl: The number of seconds the key schema of
+           a table, read with describe_table, is cached for. None means
+           the metadata never expires. Default is 300 seconds.
+    :param item_cache_max_items: If set, enables an in-process LRU
+           cache of the get_item results holding at most this many
+           items. Writes made through this instance invalidate the
+           cached items they touch, writes made by anyone else are only
+           seen once the cached item expires. Default is None, which
+           means get_item always reads from DynamoDB.
+    :param item_cache_max_bytes: The maximum size of the cached items,
+           estimated with the DynamoDB item size rules. Requires
+           item_cache_max_items. Default is None, which means only
+           item_cache_max_items applies.
+    :param item_cache_ttl: The number of seconds an item is cached for.
+           None means the items never expire. Requires
+           item_cache_max_items. Default is 60 seconds.
+    :param capacity_limits: The maximum read and write capacity units
+           per second this instance consumes on each table, shared by
+           all the threads using it, as dict of
+           {table: {'ReadCapacityUnits': float,
+           'WriteCapacityUnits': float}}. The rate adapts to the
+           capacity actually consumed and slows down on throttling, see
+           set_capacity_limit. Default is None, which means no limit.
+    :param metrics: If True, every DynamoDB call requests its consumed
+           capacity and is timed, and the call counts, pages, items,
+           bytes, capacity units and latency histograms are aggregated
+           per table and operation, see get_metrics. Default is False.
+    :param metrics_callback: A callable receiving the metrics of every
+           DynamoDB call as it completes, i.e. to forward them to a
+           monitoring system. Passing it enables metrics. Default is
+           None.
+    :param write_shards: The number of shards the partition keys of
+           each table are split into, as dict of {table: shards}, see
+           set_write_shards. Default is None, which means no table is
+           sharded.
+    :param compression: The policies of the large string and binary
+           attributes compressed on write, as dict of
+           {table: {'MinSizeBytes': int, 'Attributes': [attribute
+           names], 'Level': int}}, see set_compression. Default is
+           None, which means no attribute is compressed.
     """
 
     def __init__(
@@ -171,6 +577,16 @@ def __init__(
         aws_session_token: Optional[str] = None,
         caching: bool = False,
         client_parameters: Optional[dict[str, Any]] = None,
+        auto_generate_block_size: Optional[int] = None,
+        table_metadata_ttl: Optional[float] = 300.0,
+        item_cache_max_items: Optional[int] = None,
+        item_cache_max_bytes: Optional[int] = None,
+        item_cache_ttl: Optional[float] = _MISSING,
+        capacity_limits: Optional[Mapping[str, CapacityLimit]] = None,
+        metrics: bool = False,
+        metrics_callback: Optional[Callable[[CallMetrics], None]] = None,
+        write_shards: Optional[Mapping[str, int]] = None,
+        compression: Optional[Mapping[str, CompressionPolicy]] = None,
     ) -> None:
         super().__init__(
             aws_region_name=aws_region_name,
@@ -185,6 +601,68 @@ def __init__(
         )
         self._serializer = DynamoDbSerializer()
 
+        if auto_generate_block_size is not None and auto_generate_block_size < 1:
+            raise exceptions.DynamoDBError("auto_generate_block_size must be greater than 0.")
+
+        self._pk_value_allocator = (
+            _PartitionKeyValueAllocator(
+                block_size=auto_generate_block_size,
+                reserve_block=self._reserve_atomic_counter_block,
+            )
+            if auto_generate_block_size is not None
+            else None
+        )
+        self._table_metadata_cache = _TableMetadataCache(ttl_secs=table_metadata_ttl)
+
+        if item_cache_max_items is not None and item_cache_max_items < 1:
+            raise exceptions.DynamoDBError("item_cache_max_items must be greater than 0.")
+
+        if item_cache_max_bytes is not None and item_cache_max_bytes < 1:
+            raise exceptions.DynamoDBError("item_cache_max_bytes must be greater than 0.")
+
+        if item_cache_max_items is None and (
+            item_cache_max_bytes is not None or item_cache_ttl is not _MISSING
+        ):
+            raise exceptions.DynamoDBError(
+                "item_cache_max_bytes and item_cache_ttl require item_cache_max_items."
+            )
+
+        if item_cache_ttl is _MISSING:
+            item_cache_ttl = _ITEM_CACHE_DEFAULT_TTL_SECS
+
+        self._capacity_limiters: dict[tuple[str, str], _CapacityLimiter] = {}
+        self._capacity_limiters_lock = threading.Lock()
+        for limited_table, capacity_limit in (capacity_limits or {}).items():
+            self.set_capacity_limit(
+                table=limited_table,
+                read_capacity_units=capacity_limit.get('ReadCapacityUnits'),
+                write_capacity_units=capacity_limit.get('WriteCapacityUnits'),
+            )
+
+        self._metrics = (
+            _MetricsAggregator(callback=metrics_callback)
+            if metrics or metrics_callback is not None
+            else None
+        )
+
+        self._item_cache = (
+            _ItemCache(
+                max_items=item_cache_max_items,
+                max_bytes=item_cache_max_bytes,
+                ttl_secs=item_cache_ttl,
+            )
+            if item_cache_max_items is not None
+            else None
+        )
+
+        self._write_shards: dict[str, int] = {}
+        for sharded_table, shards in (write_shards or {}).items():
+            self.set_write_shards(table=sharded_table, shards=shards)
+
+        self._compression: dict[str, CompressionPolicy] = {}
+        for compressed_table, policy in (compression or {}).items():
+            self.set_compression(table=compressed_table, policy=policy)
+
     @utils.retry(exception_to_check=exceptions.DynamoDBError, delay_secs=1)
     def get_tables(self) -> list[str]:
         """
@@ -213,1813 +691,7076 @@ def get_tables(self) -> list[str]:
 
         return response
 
-    def get_items(self, table: str) -> Generator[dict[str, AttributeValueDeserialized], None, None]:
+    def get_table_metadata(self, table: str) -> TableMetadata:
         """
-        Returns an Iterable of deserialized items in the table.
+        Returns the key schema of the table and of its secondary
+        indexes.
+
+        The metadata is read with describe_table the first time and
+        then served from a per-instance cache until it expires.
 
         :param table: DynamoDB table name.
-        :return: Generator of deserialized items.
-            Iterable of dictionaries of all the columns in DynamoDB
-            i.e. {dynamodb_column_name: column_value, ...}
+        :return: The table metadata.
+            schema = {
+            'TableName': "string DynamoDB Table Name",
+            'PartitionKeyKey': "string of the PartitionKey key",
+            'PartitionKeyType': "'S' | 'N' | 'B'",
+            'SortKeyKey': "string of the SortKey key or None",
+            'SortKeyType': "'S' | 'N' | 'B' or None",
+            'GlobalSecondaryIndexes': "dict of {index name: schema}",
+            'LocalSecondaryIndexes': "dict of {index name: schema}",
+            }
         :raise DynamoDBError: If retrieval fails.
         """
 
-        ddb_scan_args: type_defs.ScanInputTypeDef = {'TableName': table}
+        return self._table_metadata_cache.get(table=table, loader=self._describe_table_metadata)
 
-        try:
-            while True:
-                try:
-                    with utils.retry(exception_to_check=Exception, delay_secs=1) as retryer:
-                        ddb_response = retryer(self._client.scan, **ddb_scan_args)
+    def warm_table_metadata(self, tables: Iterable[str], max_workers: int = 8) -> None:
+        """
+        Loads the metadata of the tables into the cache, so that the
+        first request to each table doesn't pay the describe_table
+        latency.
+
+        :param tables: DynamoDB table names.
+        :param max_workers: The maximum number of tables described at
+            the same time. Default is 8.
+        :return: None.
+        :raise DynamoDBError: If retrieval fails.
+        """
 
-                except botocore.exceptions.ClientError as ex:
-                    raise exceptions.DynamoDBError(str(ex.response))
+        for _ in _map_concurrently(
+            func=self.get_table_metadata, iterable=tables, max_workers=max_workers
+        ):
+            pass
 
-                except Exception as ex:
-                    raise exceptions.DynamoDBError(str(ex))
-
-                if ddb_response.get('Items') and len(ddb_response['Items']) > 0:
-                    # Convert the DynamoDB attribute values to
-                    # deserialized values
-                    deser_items = (
-                        {
-                            key: self._serializer.deserialize_att(value)
-                            for key, value in ddb_item.items()
-                        }
-                        for ddb_item in ddb_response['Items']
-                    )
+    def invalidate_table_metadata(self, table: Optional[str] = None) -> None:
+        """
+        Clears the cached metadata of a table, or of all the tables,
+        forcing it to be described again on the next access.
+        Useful after the key schema or the indexes of a table change.
 
-                    yield from deser_items
+        :param table: DynamoDB table name. Default is None, which means
+            the metadata of all the tables is cleared.
+        :return: None.
+        """
 
-                else:
-                    # Nothing to yield
-                    yield from ()
+        self._table_metadata_cache.invalidate(table=table)
 
-                # If LastEvaluatedKey is present then we need to scan
-                # for more items
-                if ddb_response.get('LastEvaluatedKey'):
-                    ddb_scan_args['ExclusiveStartKey'] = ddb_response['LastEvaluatedKey']
+    def get_item_cache_stats(self) -> ItemCacheStats:
+        """
+        Returns the statistics of the get_item cache.
 
-                # If no LastEvaluatedKey then break out of the while
-                # loop as we're done
-                else:
-                    break
+        :return: The cache statistics.
+            schema = {
+            'Hits': "int number of get_item served from the cache",
+            'Misses': "int number of get_item read from DynamoDB",
+            'Evictions': "int number of items evicted to make room",
+            'Expirations': "int number of items expired",
+            'Invalidations': "int number of items removed by writes",
+            'Items': "int number of items in the cache",
+            'Bytes': "int estimated size of the items in the cache",
+            }
+        :raise DynamoDBError: If the item cache is not enabled.
+        """
 
-        except Exception as ex:
-            raise exceptions.DynamoDBError(str(ex)) from None
+        if self._item_cache is None:
+            raise exceptions.DynamoDBError(
+                "Item cache is not enabled, pass item_cache_max_items to enable it."
+            )
 
-    def get_items_count(self, table: str) -> int:
-        """
-        Returns the number of items in a table.
+        return self._item_cache.stats()
 
-        :param table: DynamoDB table name.
-        :return: Item count.
-        :raise DynamoDBError: If count fails.
+    def invalidate_item_cache(self, table: Optional[str] = None) -> None:
         """
+        Clears the cached items of a table, or of all the tables.
+        Useful when the items are known to be changed by another
+        process.
 
-        running_total = 0
-
-        for _ in self.get_items(table):
-            running_total += 1
+        :param table: DynamoDB table name. Default is None, which means
+            the items of all the tables are cleared.
+        :return: None.
+        """
 
-        return running_total
+        if self._item_cache is not None:
+            self._item_cache.clear(table=table)
 
-    def get_item(
+    def set_capacity_limit(
         self,
         table: str,
-        partition_key_key: str,
-        partition_key_value: PartitionKeyValue,
-        sort_key_key: Optional[str] = None,
-        sort_key_value: Optional[SortKeyValue] = None,
-    ) -> Optional[dict[str, AttributeValueDeserialized]]:
+        read_capacity_units: Optional[float] = None,
+        write_capacity_units: Optional[float] = None,
+    ) -> None:
         """
-        The get_item_from_table operation returns a dictionary of
-        deserialized attribute values for the item with the given
-        primary key. If there is no matching item, get_item_from_table
-        returns None.
+        Limits the read and write capacity units per second that this
+        instance consumes on the table.
+
+        Every request to the table waits for enough capacity in a token
+        bucket refilled at the limit rate, and is charged the
+        ConsumedCapacity DynamoDB returns. When a request is throttled
+        the rate is halved, then it recovers linearly up to the limit,
+        so concurrent jobs settle at the rate the table can sustain
+        instead of retrying in bursts.
 
         :param table: DynamoDB table name.
-        :param partition_key_key: The key of the partition key.
-        :param partition_key_value: The value of the partition key.:
-        :param sort_key_key: The key of the sort key.
-        :param sort_key_value: The value of the sort key.
-        :return: Deserialized item or None.
-        :raise DynamoDBError: If retrieval fails.
+        :param read_capacity_units: The read capacity units per second.
+            Default is None, which means reads are not limited.
+        :param write_capacity_units: The write capacity units per
+            second. Default is None, which means writes are not
+            limited.
+        :return: None.
+        :raise DynamoDBError: If a limit is not greater than 0.
         """
 
-        pk = self._serializer.serialize_p_key(
-            pk_key=partition_key_key,
-            pk_value=partition_key_value,
-            sk_key=sort_key_key,
-            sk_value=sort_key_value,
-        )
+        for capacity, capacity_units in (
+            ('read', read_capacity_units),
+            ('write', write_capacity_units),
+        ):
+            if capacity_units is not None and capacity_units <= 0:
+                raise exceptions.DynamoDBError(f"{capacity} capacity units must be greater than 0.")
+
+        with self._capacity_limiters_lock:
+            for capacity, capacity_units in (
+                ('read', read_capacity_units),
+                ('write', write_capacity_units),
+            ):
+                if capacity_units is None:
+                    self._capacity_limiters.pop((table, capacity), None)
+                else:
+                    self._capacity_limiters[(table, capacity)] = _CapacityLimiter(
+                        rate=capacity_units
+                    )
 
-        try:
-            with utils.retry(exception_to_check=Exception, delay_secs=1) as retryer:
-                ddb_response = retryer(self._client.get_item, TableName=table, Key=pk)
+    def set_write_shards(self, table: str, shards: Optional[int]) -> None:
+        """
+        Splits every logical partition key of the table into shards, to
+        spread the writes to a hot partition key over several
+        partitions.
+
+        An item of logical partition key value 'pk' is stored under
+        'pk#<n>', where n is the crc32 of its sort key modulo the
+        number of shards, or a random shard if the table has no sort
+        key. put_item, update_item, upsert_item, delete_item,
+        delete_item_att, get_item, batch_write_items, buffered_writer
+        and atomic_writes take and return the logical partition key
+        values and route the item to its shard. query_items reads all
+        the shards of a partition key concurrently and merges them by
+        sort key, and get_items returns the logical partition key
+        values.
+
+        The partition key of a sharded table must be a string. Items of
+        a table without sort key can only be put and queried, as their
+        shard can't be derived from the key. The shard count of a table
+        holding items must not change, as items would move shard. The
+        shard count is reported as WriteShards in the table metadata.
 
-        except botocore.exceptions.ClientError as ex:
-            raise exceptions.DynamoDBError(str(ex.response)) from None
+        :param table: DynamoDB table name.
+        :param shards: The number of shards. None or 1 means the table
+            is not sharded.
+        :return: None.
+        :raise DynamoDBError: If shards is less than 1.
+        """
 
-        except Exception as ex:
-            raise exceptions.DynamoDBError(str(ex)) from None
+        if shards is not None and shards < 1:
+            raise exceptions.DynamoDBError("shards must be greater than 0.")
 
-        ddb_item = ddb_response.get('Item')
+        if shards is None or shards == 1:
+            self._write_shards.pop(table, None)
+        else:
+            self._write_shards[table] = shards
 
-        if not ddb_item:
-            return None
+        self.invalidate_table_metadata(table=table)
 
-        # Convert the DynamoDB attribute values to deserialized values
-        response = {key: self._serializer.deserialize_att(value) for key, value in ddb_item.items()}
+    def set_compression(self, table: str, policy: Optional[CompressionPolicy]) -> None:
+        """
+        Compresses the large string and binary attributes of the items
+        written to the table, to reduce the storage and the write
+        capacity units they consume.
+
+        The attributes put or updated by put_item, update_item,
+        upsert_item, batch_write_items, buffered_writer and
+        atomic_writes that are at least MinSizeBytes long are stored
+        zlib compressed as binary attributes, tagged so the reads of
+        the table decompress them back to their original value. Only
+        the tables and the attributes the policy compresses are
+        decompressed on read, so the binary values of the other
+        tables are never altered, and the values compressed under a
+        previous policy are read back compressed. The key attributes
+        of the table and of its indexes are never compressed.
+        Compressed attributes can't be used in filters, conditions or
+        projections of nested paths, and are unreadable to clients
+        other than this library.
 
-        return response
+        :param table: DynamoDB table name.
+        :param policy: The compression policy as dict of
+            {'MinSizeBytes': int, 'Attributes': [attribute names],
+            'Level': int}. MinSizeBytes defaults to 1024, Attributes
+            to all the attributes and Level, the zlib level from 1 to
+            9, to 6. None means the table is not compressed.
+        :return: None.
+        :raise DynamoDBError: If the policy is not valid.
+        """
 
-    def put_item(
-        self,
-        table: str,
-        partition_key_key: str,
-        partition_key_value: Optional[PartitionKeyValue] = None,
-        sort_key_key: Optional[str] = None,
-        sort_key_value: Optional[SortKeyValue] = None,
-        auto_generate_partition_key_value: Optional[bool] = False,
-        **items: AttributeValue,
-    ) -> dict[str, AttributeValueDeserialized]:
+        if policy is None:
+            self._compression.pop(table, None)
+            return
+
+        if policy.get('MinSizeBytes', _COMPRESSION_DEFAULT_MIN_SIZE_BYTES) < 1:
+            raise exceptions.DynamoDBError("MinSizeBytes must be greater than 0.")
+
+        if not 1 <= policy.get('Level', _COMPRESSION_DEFAULT_LEVEL) <= 9:
+            raise exceptions.DynamoDBError("Level must be between 1 and 9.")
+
+        self._compression[table] = policy
+
+    def estimate_item_size(
+        self, table: str, item: Mapping[str, AttributeValue]
+    ) -> ItemSizeEstimate:
         """
-        Creates a new item. If an item that has the same primary key as
-        the new item already exists in the specified table, the
-        operation will fail.
+        Estimates the size of an item and the capacity units a write
+        and a strongly consistent read of it consume, before and after
+        the compression policy of the table is applied.
 
         :param table: DynamoDB table name.
-        :param partition_key_key: The key of the partition key.
-        :param partition_key_value: The value of the partition key.
-        :param sort_key_key: The key of the sort key.
-        :param sort_key_value: The value of the sort key.
-        :param auto_generate_partition_key_value: If set to True, this
-            option instructs DynamoDB to automatically generate a
-            partition key value based on a counter mechanism.
-            For this to work, your table must contain a special item
-            with its partition key value set to '__PK_VALUE_COUNTER__'.
-            This item should have a numerical attribute named
-            'current_counter_value', which will be used and incremented
-            as the basis for generating new partition key values.
-        :param items: Additional items to add.
-        :return: The stored DynamoDB Item deserialized.
+        :param item: The item as dict of all the columns including the
+            primary key i.e. {column_name: column_value, ...}
+        :return: The estimate as dict of
+            schema = {
+            'SizeBytes': "size of the item uncompressed",
+            'CompressedSizeBytes': "size of the item as stored",
+            'ReadCapacityUnits': "read units uncompressed",
+            'CompressedReadCapacityUnits': "read units as stored",
+            'WriteCapacityUnits': "write units uncompressed",
+            'CompressedWriteCapacityUnits': "write units as stored",
+            }
         :raise DynamoDBError: If operation fails.
-        :raise DynamoDBConflictError: If put item fails due to a
-            conflict.
         """
 
-        if partition_key_value is not None and auto_generate_partition_key_value is True:
-            raise exceptions.DynamoDBError(
-                "If auto_generate_partition_key_value is enabled, a partition_key_value MUST NOT be"
-                " passed in."
-            )
+        item_ser = self._serializer.serialize_put_items(**item)
+        size = self._serializer.estimate_item_size(item_ser)
+        compressed_size = self._serializer.estimate_item_size(
+            self._compress_item(table=table, item_ser=item_ser)
+        )
 
-        elif partition_key_value is None and auto_generate_partition_key_value is False:
-            raise exceptions.DynamoDBError(
-                "If auto_generate_partition_key_value is disabled, a partition_key_value MUST be"
-                " passed in."
-            )
+        return {
+            'SizeBytes': size,
+            'CompressedSizeBytes': compressed_size,
+            'ReadCapacityUnits': max(1, -(-size // 4096)),
+            'CompressedReadCapacityUnits': max(1, -(-compressed_size // 4096)),
+            'WriteCapacityUnits': max(1, -(-size // 1024)),
+            'CompressedWriteCapacityUnits': max(1, -(-compressed_size // 1024)),
+        }
 
-        elif partition_key_value is not None and auto_generate_partition_key_value is False:
-            # If we don't need to increment the counter we just put the
-            # item in the table
-            try:
-                item_put = self._put_single_item(
-                    table=table,
-                    partition_key_key=partition_key_key,
-                    partition_key_value=partition_key_value,
-                    sort_key_key=sort_key_key,
-                    sort_key_value=sort_key_value,
-                    **items,
-                )
+    def get_metrics(self) -> dict[str, dict[str, OperationMetrics]]:
+        """
+        Returns a snapshot of the metrics of the DynamoDB calls made by
+        this instance, aggregated per table and operation.
 
-            except Exception as ex:
-                raise exceptions.DynamoDBError(str(ex)) from None
+        :return: The metrics as dict of {table: {operation: metrics}}.
+            schema = {
+            'Calls': "int number of attempts, retries included",
+            'Errors': "int number of attempts failed",
+            'Throttles': "int number of attempts throttled",
+            'Pages': "int number of scan and query pages",
+            'Items': "int number of items returned",
+            'Bytes': "int estimated size of the items returned",
+            'ReadCapacityUnits': "float read capacity consumed",
+            'WriteCapacityUnits': "float write capacity consumed",
+            'LatencySecs': "float total latency of the attempts",
+            'LatencyHistogram': "dict of {'<=1ms': int, ...}",
+            }
+        :raise DynamoDBError: If metrics are not enabled.
+        """
 
-        elif partition_key_value is None and auto_generate_partition_key_value is True:
-            # If we need to increment the counter we do it with an
-            # atomic write
-            # Put new item
-            put_in_db: list[dict[str, AttributeValue]] = [
-                {
-                    'TableName': table,
-                    'PartitionKeyKey': partition_key_key,
-                    'AutoGeneratePartitionKeyValue': True,
-                    'Items': items,
-                },
-            ]
+        if self._metrics is None:
+            raise exceptions.DynamoDBError("Metrics are not enabled, pass metrics=True to enable.")
 
-            atomic_write_response = self.atomic_writes(put=put_in_db)
+        return self._metrics.snapshot()
 
-            # If we get here it means that the item has been added
-            # successfully therefore we return it
-            item_put = atomic_write_response['Put'][0]
+    def reset_metrics(self) -> None:
+        """
+        Clears the metrics aggregated so far.
 
-        else:
-            raise exceptions.DynamoDBError(
-                "Unable to determine a valid operation with the provided 'partition_key_value' and"
-                " 'auto_generate_partition_key_value'."
-            )
+        :return: None.
+        """
 
-        return item_put
+        if self._metrics is not None:
+            self._metrics.reset()
 
-    def update_item(
+    def _call_client(
         self,
-        table: str,
-        partition_key: dict[str, PartitionKeyValue],
-        sort_key: Optional[dict[str, SortKeyValue]] = None,
-        condition_attribute: Optional[dict[str, Any]] = None,
-        **items: AttributeValue,
-    ) -> dict[str, AttributeValueDeserialized]:
+        operation: str,
+        capacity: Literal['read', 'write'],
+        capacity_limiter: Optional["_CapacityLimiter"] = None,
+        **ddb_args: Any,
+    ) -> Any:
+        """
+        Call the DynamoDB client operation with retries, rate limited
+        if a capacity limit is set for the table, and measured if
+        metrics are enabled.
+
+        :param operation: The name of the DynamoDB client method.
+        :param capacity: Whether the operation consumes read or write
+            capacity.
+        :param capacity_limiter: The limiter to use in place of the
+            capacity limit of the table, i.e. the capacity budget of a
+            copy. Default is None.
+        :param ddb_args: The arguments to pass to the DynamoDB call.
+        :return: The DynamoDB response.
+        :raise Exception: The exception raised by the last attempt.
         """
-        Performs a strict update on an existing item in DynamoDB.
 
-        This method enforces that the item with the specified partition
-        key must already exist before updating. If the item does not
-        exist, or if any specified condition does not match, the update
-        fails with a `DynamoDBConflictError`. No new item is created in
-        this scenario.
+        if 'TableName' in ddb_args:
+            tables = [ddb_args['TableName']]
+        elif 'RequestItems' in ddb_args:
+            tables = list(ddb_args['RequestItems'])
+        else:
+            tables = list(
+                dict.fromkeys(
+                    request['TableName']
+                    for transact_item in ddb_args['TransactItems']
+                    for request in transact_item.values()
+                )
+            )
 
-        Edits an existing item’s attributes. If
-        condition_attribute_value is passed, the item will be updated
-        only if condition_attribute_value is a match with the value
-        stored in DynamoDB.
+        # Requests spanning more than one table are not rate limited
+        limiter = None
+        if len(tables) == 1:
+            limiter = capacity_limiter or self._capacity_limiters.get((tables[0], capacity))
+        client_operation = getattr(self._client, operation)
 
-        :param table: DynamoDB table name.
-        :param partition_key: DynamoDB partition key as dict of
-            partition_key {key: value}.
-        :param sort_key: DynamoDB sort key as dict of sort_key
-            {key: value}.
-        :param condition_attribute: DynamoDB attribute to matched as
-            dict of attribute_to_match {key: value}. When sent to
-            DynamoDB, the attribute will be as a condition to match.
-        :param items: Values for items to be updated.
-        :return: The updated DynamoDB Item deserialized.
-        :raise DynamoDBError: If update fails.
-        :raise DynamoDBConflictError: If update fails due to a conflict.
-        """
+        if limiter is not None or self._metrics is not None:
+            ddb_args.setdefault('ReturnConsumedCapacity', 'TOTAL')
 
-        # items is an optional parameter by default as using the **
-        # However, if no values are passed as **items we raise an
-        # exception as there is nothing to update
-        if not items:
-            raise exceptions.DynamoDBError(
-                "No values to update were passed to the DynamoDB update_item_in_table method."
+        # The metrics wrap the client call only, so the latency doesn't
+        # include the time spent waiting for capacity
+        if self._metrics is not None:
+            client_operation = functools.partial(
+                self._metrics.call, client_operation, operation, tables, capacity
             )
 
-        # Initialize a dictionary with all the arguments to pass into
-        # the DynamoDB update_item call
-        ddb_update_item_args: dict[str, Any] = {
-            'TableName': table,
-            'ReturnValues': 'ALL_OLD',
-        }
+        if limiter is not None:
+            client_operation = functools.partial(limiter.call, client_operation, tables[0])
 
-        # Serialize partition key
-        pk_key, pk_value = next(iter(partition_key.items()))
-        sk_key, sk_value = next(iter(sort_key.items())) if sort_key is not None else (None, None)
+        with utils.retry(exception_to_check=Exception, delay_secs=1) as retryer:
+            return retryer(client_operation, **ddb_args)
 
-        pk_ser = self._serializer.serialize_p_key(
-            pk_key=pk_key, pk_value=pk_value, sk_key=sk_key, sk_value=sk_value
-        )
+    def _describe_table_metadata(self, table: str) -> TableMetadata:
+        """
+        Describe the table and extract its key schema and the key
+        schema of its secondary indexes.
 
-        # Serialize attributes
-        exp, exp_att_names, exp_att_values = self._serializer.serialize_update_items(**items)
+        :param table: DynamoDB table name.
+        :return: The table metadata.
+        :raise DynamoDBError: If operation fails.
+        """
 
-        # Build a condition expression for “strict update”
-        ddb_update_item_args.update({'ConditionExpression': f"attribute_exists(#{pk_key})"})
-        exp_att_names.update({f"#{pk_key}": pk_key})
+        try:
+            with utils.retry(exception_to_check=Exception, delay_secs=1) as retryer:
+                ddb_response = retryer(self._client.describe_table, TableName=table)
 
-        # Check if a condition is required
-        if condition_attribute is not None:
-            # Unpack condition attribute dictionary
-            # We cant mutate the original dictionary because of the
-            # retry decorator will need to run through it again in case
-            # of failure
-            cond_att_key, cond_att_value = next(iter(condition_attribute.items()))
+        except botocore.exceptions.ClientError as ex:
+            raise exceptions.DynamoDBError(str(ex.response))
 
-            # If condition attribute exists pass it to the DynamoDB call
-            ddb_update_item_args.update({
-                'ConditionExpression': (
-                    f"{ddb_update_item_args['ConditionExpression']} AND"
-                    f" #{cond_att_key} = :condition_attribute_value_placeholder"
-                )
-            })
+        except Exception as ex:
+            raise exceptions.DynamoDBError(str(ex))
 
-            # #condition_attribute_key has to be passed
-            # along the ExpressionAttributeNames because is used by the
-            # ConditionExpression
-            exp_att_names[f"#{cond_att_key}"] = cond_att_key
+        table_description = ddb_response['Table']
+        attribute_types = {
+            attribute['AttributeName']: attribute['AttributeType']
+            for attribute in table_description.get('AttributeDefinitions', [])
+        }
 
-            # :condition_attribute_value_placeholder has to be passed
-            # along the ExpressionAttributeValues because is used by the
-            # ConditionExpression
-            exp_att_values[':condition_attribute_value_placeholder'] = (
-                self._serializer.serialize_att(cond_att_value)
-            )
+        def _key_schema(key_schema: Iterable[Mapping[str, Any]]) -> KeySchemaMetadata:
+            key_names = {key['KeyType']: key['AttributeName'] for key in key_schema}
 
-        # Update DynamoDB call arguments
-        ddb_update_item_args['Key'] = pk_ser
-        ddb_update_item_args['UpdateExpression'] = exp
-        ddb_update_item_args['ExpressionAttributeNames'] = exp_att_names
-        ddb_update_item_args['ExpressionAttributeValues'] = exp_att_values
+            if 'HASH' not in key_names:
+                raise exceptions.DynamoDBError(f"PartitionKey Key not found for table: {table!r}")
 
-        module_logger.debug(ddb_update_item_args)
+            return {
+                'PartitionKeyKey': key_names['HASH'],
+                'PartitionKeyType': attribute_types.get(key_names['HASH'], ''),
+                'SortKeyKey': key_names.get('RANGE'),
+                'SortKeyType': attribute_types.get(key_names.get('RANGE', '')),
+            }
 
-        try:
-            with utils.retry(exception_to_check=Exception, delay_secs=1) as retryer:
-                ddb_response = retryer(self._client.update_item, **ddb_update_item_args)
+        table_key_schema = _key_schema(table_description.get('KeySchema', []))
 
-        except botocore.exceptions.ClientError as ex:
-            if "ConditionalCheckFailed" in str(ex):
-                raise exceptions.DynamoDBConflictError(str(ex.response)) from None
-            else:
-                raise exceptions.DynamoDBError(str(ex.response)) from None
+        table_metadata: TableMetadata = {
+            'TableName': table,
+            'PartitionKeyKey': table_key_schema['PartitionKeyKey'],
+            'PartitionKeyType': table_key_schema['PartitionKeyType'],
+            'SortKeyKey': table_key_schema['SortKeyKey'],
+            'SortKeyType': table_key_schema['SortKeyType'],
+            'GlobalSecondaryIndexes': {
+                index['IndexName']: _key_schema(index['KeySchema'])
+                for index in table_description.get('GlobalSecondaryIndexes', [])
+            },
+            'LocalSecondaryIndexes': {
+                index['IndexName']: _key_schema(index['KeySchema'])
+                for index in table_description.get('LocalSecondaryIndexes', [])
+            },
+            'WriteShards': self._write_shards.get(table, 1),
+        }
 
-        except Exception as ex:
-            raise exceptions.DynamoDBError(str(ex)) from None
+        return table_metadata
 
-        # If we get here it means that the item has been updated
-        # successfully therefore we return it
-        item = ddb_response.get('Attributes', {})
-        item_deser = {key: self._serializer.deserialize_att(value) for key, value in item.items()}
-        pk_key, pk_value, sk_key, sk_value = self._serializer.deserialize_p_key(pk_ser)
-        updated_item = {**item_deser, **items, **{pk_key: pk_value}}
-        if sk_key is not None:
-            updated_item.update({sk_key: sk_value})
+    def _get_key_schema(self, table: str, index_name: Optional[str] = None) -> KeySchemaMetadata:
+        """
+        Return the key schema of the table, or of one of its secondary
+        indexes, from the table metadata cache.
 
-        # Because the **items in the updated_item dict is not serialized
-        # we need to normalize the whole dict before returning a dict of
-        # type dict[str, AttributeValueDeserialized]
-        updated_item_deser = self._serializer.normalize_item(updated_item)
+        :param table: DynamoDB table name.
+        :param index_name: The name of a global or local secondary
+            index. Default is None, which means the table.
+        :return: The key schema.
+        :raise DynamoDBError: If the index doesn't exist or the
+            retrieval fails.
+        """
 
-        return updated_item_deser
+        table_metadata = self.get_table_metadata(table=table)
 
-    def upsert_item(
+        if index_name is None:
+            return {
+                'PartitionKeyKey': table_metadata['PartitionKeyKey'],
+                'PartitionKeyType': table_metadata['PartitionKeyType'],
+                'SortKeyKey': table_metadata['SortKeyKey'],
+                'SortKeyType': table_metadata['SortKeyType'],
+            }
+
+        indexes = {
+            **table_metadata['GlobalSecondaryIndexes'],
+            **table_metadata['LocalSecondaryIndexes'],
+        }
+
+        try:
+            return indexes[index_name]
+
+        except KeyError:
+            raise exceptions.DynamoDBError(
+                f"Index: {index_name!r} not found in table: {table!r}"
+            ) from None
+
+    def get_items(
         self,
         table: str,
-        partition_key: dict[str, PartitionKeyValue],
-        sort_key: Optional[dict[str, SortKeyValue]] = None,
-        condition_attribute: Optional[dict[str, Any]] = None,
-        **items: AttributeValue,
-    ) -> dict[str, AttributeValueDeserialized]:
+        *,
+        total_segments: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        projection: Optional[Iterable[str]] = None,
+        filter: Optional[DynamoDbCondition] = None,
+        prefetch: int = 0,
+        lazy: bool = False,
+        schema: Optional[Sequence[str]] = None,
+        item_transform: Optional[Callable[[Any], Any]] = None,
+        processes: Optional[int] = None,
+        resume_token: Optional[str] = None,
+        on_checkpoint: Optional[Callable[[str], None]] = None,
+        checkpoint_file: Optional[Union[str, pathlib.Path]] = None,
+    ) -> Generator[dict[str, AttributeValueDeserialized], None, None]:
         """
-        Upsert-like operation.
+        Returns an Iterable of deserialized items in the table.
 
-        1. Tries to update an existing item (strict update).
-        2. If that update fails because the item does not exist, it
-            puts a brand-new item.
+        By default, the table is scanned sequentially one page at a
+        time. If total_segments is passed in, the table is split into
+        that many segments which are scanned in parallel on a thread
+        pool, and the items of all the segments are yielded through the
+        same generator as soon as their page is received. When scanning
+        in parallel the items are not yielded in table order.
+
+        A scan can be resumed where it stopped with a resume token,
+        which records the LastEvaluatedKey of every segment. A new
+        token is produced every time all the items of a page have been
+        yielded, and passed to on_checkpoint and/or saved to
+        checkpoint_file. Items of a page only partially consumed are
+        yielded again when resuming.
 
         :param table: DynamoDB table name.
-        :param partition_key: DynamoDB partition key as dict of
-            partition_key {key: value}.
-        :param sort_key: DynamoDB sort key as dict of sort_key
-            {key: value}.
-        :param condition_attribute: DynamoDB attribute to matched as
-            dict of attribute_to_match {key: value}. When sent to
-            DynamoDB, the attribute will be as a condition to match.
-        :param items: Values for items to be updated.
-        :return: The updated DynamoDB Item deserialized.
-        :raise DynamoDBError: If update fails.
-        :raise DynamoDBConflictError: If update fails due to a conflict.
+        :param total_segments: The number of segments to split the
+            table into for a parallel scan. Default is None, which
+            means the table is scanned sequentially.
+        :param max_workers: The maximum number of segments scanned at
+            the same time, which is also the maximum number of pages
+            buffered in memory waiting to be consumed. Only used when
+            total_segments is passed in. Default is None, which means
+            one worker per segment.
+        :param projection: The attribute paths to read, i.e.
+            ["id", "info.tags[0]"]. Default is None, which means all
+            the attributes are read.
+        :param filter: A DynamoDbCondition the items must satisfy,
+            evaluated server side after the items are read, so it
+            reduces the data transferred but not the capacity consumed.
+            Default is None, which means all the items are returned.
+        :param prefetch: The number of pages fetched ahead on a
+            background thread while the current page is consumed,
+            which is also the maximum number of pages buffered in
+            memory. When scanning in parallel the buffer holds at least
+            one page per worker. Default is 0, which means the next
+            page is requested only once the current one is consumed.
+        :param lazy: If True, yield DynamoDbLazyItem read-only mappings
+            that deserialize each attribute only when first accessed.
+            Default is False.
+        :param schema: The attribute names to read, in order. If passed
+            in, yield compact named tuple rows of those attributes
+            instead of dictionaries, with None for the attributes
+            missing from an item. Unless projection is passed in, only
+            the schema attributes are read. Default is None.
+        :param item_transform: A callable applied to every deserialized
+            item, or row, whose result is yielded in its place. When
+            processes is passed in, it must be picklable, i.e. a
+            function of a module the spawned workers can import, and so
+            must its results. Default is None.
+        :param processes: The number of worker processes the pages are
+            deserialized, and transformed, on, so that large scans are
+            not bound to a single core by the GIL. Items are still
+            yielded in the order the pages are received. Can't be used
+            with lazy. Default is None, which means the pages are
+            deserialized on the calling thread.
+        :param resume_token: A token produced by a previous scan of the
+            same table with the same total_segments, to resume from.
+            Default is None, which means the scan starts from the
+            beginning, unless checkpoint_file holds a token.
+        :param on_checkpoint: A callable receiving the resume token
+            every time a page has been fully consumed.
+        :param checkpoint_file: The path of a file where the resume
+            token is saved every time a page has been fully consumed.
+            If the file exists when the scan starts, and resume_token
+            is not passed in, the scan resumes from the token it holds.
+            The file is deleted once the scan completes.
+        :return: Generator of deserialized items.
+            Iterable of dictionaries of all the columns in DynamoDB
+            i.e. {dynamodb_column_name: column_value, ...}
+        :raise DynamoDBError: If retrieval fails or the resume token is
+            not valid.
         """
 
-        # items is an optional parameter by default as using the **
-        # However, if no values are passed as **items we raise an
-        # exception as there is nothing to update
-        if not items:
-            raise exceptions.DynamoDBError(
-                "No values to update were passed to the DynamoDB update_item_in_table method."
-            )
-
-        # Initialize a dictionary with all the arguments to pass into
-        # the DynamoDB update_item call
-        ddb_update_item_args: dict[str, Any] = {
+        ddb_scan_args: dict[str, Any] = {
             'TableName': table,
-            'ReturnValues': 'ALL_OLD',
+            **self._serializer.serialize_read_expressions(
+                projection=_schema_projection(projection=projection, schema=schema),
+                filter_condition=filter,
+            ),
         }
 
-        # Serialize partition key
-        pk_key, pk_value = next(iter(partition_key.items()))
-        sk_key, sk_value = next(iter(sort_key.items())) if sort_key is not None else (None, None)
+        if resume_token is None and checkpoint_file is not None:
+            resume_token = _read_checkpoint_file(path=checkpoint_file)
 
-        pk_ser = self._serializer.serialize_p_key(
-            pk_key=pk_key, pk_value=pk_value, sk_key=sk_key, sk_value=sk_value
+        scan_state = _load_scan_state(
+            table=table, total_segments=total_segments, resume_token=resume_token
         )
+        deserialize_item = self._item_deserializer(lazy=lazy, schema=schema)
 
-        # Serialize attributes
-        exp, exp_att_names, exp_att_values = self._serializer.serialize_update_items(**items)
-
-        # Check if a condition is required
-        if condition_attribute is not None:
-            # Unpack condition attribute dictionary
-            # We cant mutate the original dictionary because of the
-            # retry decorator will need to run through it again in case
-            # of failure
-            cond_att_key, cond_att_value = next(iter(condition_attribute.items()))
+        if processes is not None and lazy:
+            raise exceptions.DynamoDBError("lazy and processes can't be used together.")
 
-            # If condition attribute exists pass it to the DynamoDB call
-            ddb_update_item_args.update(
-                {'ConditionExpression': f"#{cond_att_key} = :condition_attribute_value_placeholder"}
+        try:
+            pages = self._iter_scan_pages(
+                ddb_scan_args=ddb_scan_args,
+                total_segments=total_segments,
+                max_workers=max_workers,
+                prefetch=prefetch,
+                segments_start={
+                    segment: segment_state.get('ExclusiveStartKey')
+                    for segment, segment_state in enumerate(scan_state['Segments'])
+                    if not segment_state.get('Done')
+                },
             )
 
-            # #condition_attribute_key has to be passed
-            # along the ExpressionAttributeNames because is used by the
-            # ConditionExpression
-            exp_att_names[f"#{cond_att_key}"] = cond_att_key
+            if table in self._write_shards:
+                pages = _unshard_scan_pages(
+                    pages=pages,
+                    partition_key_key=self._get_key_schema(table=table)['PartitionKeyKey'],
+                )
 
-            # :condition_attribute_value_placeholder has to be passed
-            # along the ExpressionAttributeValues because is used by the
-            # ConditionExpression
-            exp_att_values[':condition_attribute_value_placeholder'] = (
-                self._serializer.serialize_att(cond_att_value)
-            )
+            for segment, ddb_response, items in self._iter_deserialized_pages(
+                pages=pages,
+                deserialize_item=deserialize_item,
+                schema=schema,
+                item_transform=item_transform,
+                processes=processes,
+            ):
+                yield from items
+
+                # All the items of the page have been consumed, so the
+                # segment can resume after the page
+                _advance_scan_state(
+                    scan_state=scan_state,
+                    segment=segment,
+                    ddb_response=ddb_response,
+                    on_checkpoint=on_checkpoint,
+                    checkpoint_file=checkpoint_file,
+                )
 
-        # Update DynamoDB call arguments
-        ddb_update_item_args['Key'] = pk_ser
-        ddb_update_item_args['UpdateExpression'] = exp
-        ddb_update_item_args['ExpressionAttributeNames'] = exp_att_names
-        ddb_update_item_args['ExpressionAttributeValues'] = exp_att_values
+            if checkpoint_file is not None:
+                pathlib.Path(checkpoint_file).unlink(missing_ok=True)
 
-        module_logger.debug(ddb_update_item_args)
+        except Exception as ex:
+            raise exceptions.DynamoDBError(str(ex)) from None
 
-        try:
-            with utils.retry(exception_to_check=Exception, delay_secs=1) as retryer:
-                ddb_response = retryer(self._client.update_item, **ddb_update_item_args)
+    def query_items(
+        self,
+        table: str,
+        partition_key_key: str,
+        partition_key_value: PartitionKeyValue,
+        sort_key_key: Optional[str] = None,
+        sort_key_condition: Optional[SortKeyCondition] = None,
+        sort_key_value: Optional[Union[SortKeyValue, Sequence[SortKeyValue]]] = None,
+        index_name: Optional[str] = None,
+        ascending: bool = True,
+        projection: Optional[Iterable[str]] = None,
+        filter: Optional[DynamoDbCondition] = None,
+        prefetch: int = 0,
+        lazy: bool = False,
+        schema: Optional[Sequence[str]] = None,
+    ) -> Generator[dict[str, AttributeValueDeserialized], None, None]:
+        """
+        Returns an Iterable of deserialized items matching the given
+        partition key, and optionally a condition on the sort key.
 
-        except botocore.exceptions.ClientError as ex:
-            if "ConditionalCheckFailed" in str(ex):
-                raise exceptions.DynamoDBConflictError(str(ex.response)) from None
-            else:
-                raise exceptions.DynamoDBError(str(ex.response)) from None
+        Unlike get_items, which reads the whole table, this only reads
+        the items stored under a single partition key value.
 
-        except Exception as ex:
-            raise exceptions.DynamoDBError(str(ex)) from None
+        :param table: DynamoDB table name.
+        :param partition_key_key: The key of the partition key of the
+            table, or of the index if index_name is passed in.
+        :param partition_key_value: The value of the partition key.
+        :param sort_key_key: The key of the sort key. Default is None,
+            which means that if sort_key_condition is passed in the key
+            is taken from the table metadata.
+        :param sort_key_condition: The comparison to apply to the sort
+            key. One of '=', '<', '<=', '>', '>=', 'begins_with' or
+            'between'.
+        :param sort_key_value: The value to compare the sort key with.
+            For 'between' pass a sequence of the two inclusive bounds
+            i.e. (lower_bound, upper_bound).
+        :param index_name: The name of a global or local secondary index
+            to query instead of the table.
+        :param ascending: The order in which items are returned, sorted
+            by sort key. Default is True.
+        :param projection: The attribute paths to read, i.e.
+            ["id", "info.tags[0]"]. Default is None, which means all
+            the attributes are read.
+        :param filter: A DynamoDbCondition the items must satisfy,
+            evaluated server side after the key condition. Default is
+            None, which means all the matching items are returned.
+        :param prefetch: The number of pages fetched ahead on a
+            background thread while the current page is consumed,
+            which is also the maximum number of pages buffered in
+            memory. On a sharded table it applies to every shard.
+            Default is 0, which means the next page is requested only
+            once the current one is consumed.
+        :param lazy: If True, yield DynamoDbLazyItem read-only mappings
+            that deserialize each attribute only when first accessed.
+            Default is False.
+        :param schema: The attribute names to read, in order. If passed
+            in, yield compact named tuple rows of those attributes
+            instead of dictionaries, with None for the attributes
+            missing from an item. Unless projection is passed in, only
+            the schema attributes are read. Default is None.
+        :return: Generator of deserialized items.
+            Iterable of dictionaries of all the columns in DynamoDB
+            i.e. {dynamodb_column_name: column_value, ...}
+        :raise DynamoDBError: If retrieval fails.
+        """
 
-        # If we get here it means that the item has been updated
-        # successfully therefore we return it
-        item = ddb_response.get('Attributes', {})
-        item_deser = {key: self._serializer.deserialize_att(value) for key, value in item.items()}
-        pk_key, pk_value, sk_key, sk_value = self._serializer.deserialize_p_key(pk_ser)
-        updated_item = {**item_deser, **items, **{pk_key: pk_value}}
-        if sk_key is not None:
-            updated_item.update({sk_key: sk_value})
+        deserialize_item = self._item_deserializer(lazy=lazy, schema=schema)
+
+        # The shards of a sharded partition key are queried
+        # concurrently and merged by sort key
+        if table in self._write_shards and index_name is None:
+            merge_key = sort_key_key or self._get_key_schema(table=table)['SortKeyKey']
+            shard_projection = _schema_projection(projection=projection, schema=schema)
+
+            # The items are merged by sort key, so the sort key is
+            # always read and removed afterwards if not requested
+            strip_merge_key = False
+            if merge_key is not None and shard_projection is not None:
+                shard_projection = list(shard_projection)
+                if merge_key not in shard_projection:
+                    shard_projection.append(merge_key)
+                    strip_merge_key = True
+
+            ddb_items = self._iter_fan_out_ddb_items(
+                ddb_query_args_list=[
+                    self._build_query_args(
+                        table=table,
+                        partition_key_key=partition_key_key,
+                        partition_key_value=shard_partition_key_value,
+                        sort_key_key=sort_key_key,
+                        sort_key_condition=sort_key_condition,
+                        sort_key_value=sort_key_value,
+                        ascending=ascending,
+                        projection=shard_projection,
+                        filter=filter,
+                    )
+                    for shard_partition_key_value in self._shard_partition_key_values(
+                        table=table, partition_key_value=partition_key_value
+                    )
+                ],
+                sort_key_key=merge_key,
+                ascending=ascending,
+                max_workers=min(self._write_shards[table], _SHARDED_QUERY_MAX_WORKERS),
+                prefetch=prefetch,
+            )
 
-        # Because the **items in the updated_item dict is not serialized
-        # we need to normalize the whole dict before returning a dict of
-        # type dict[str, AttributeValueDeserialized]
-        updated_item_deser = self._serializer.normalize_item(updated_item)
+            try:
+                for ddb_item in ddb_items:
+                    ddb_item = _unshard_ddb_item(ddb_item, partition_key_key)
 
-        return updated_item_deser
+                    if strip_merge_key:
+                        ddb_item = {k: v for k, v in ddb_item.items() if k != merge_key}
 
-    def delete_item(
+                    yield deserialize_item(ddb_item)
+
+            except Exception as ex:
+                raise exceptions.DynamoDBError(str(ex)) from None
+
+            finally:
+                ddb_items.close()
+
+            return
+
+        ddb_query_args = self._build_query_args(
+            table=table,
+            partition_key_key=partition_key_key,
+            partition_key_value=partition_key_value,
+            sort_key_key=sort_key_key,
+            sort_key_condition=sort_key_condition,
+            sort_key_value=sort_key_value,
+            index_name=index_name,
+            ascending=ascending,
+            projection=_schema_projection(projection=projection, schema=schema),
+            filter=filter,
+        )
+
+        module_logger.debug(ddb_query_args)
+
+        try:
+            for ddb_response in self._iter_prefetched_pages(
+                operation='query', ddb_args=ddb_query_args, prefetch=prefetch
+            ):
+                # Convert the DynamoDB attribute values to deserialized
+                # values
+                yield from (
+                    deserialize_item(ddb_item) for ddb_item in ddb_response.get('Items', [])
+                )
+
+        except Exception as ex:
+            raise exceptions.DynamoDBError(str(ex)) from None
+
+    def get_items_columns(
         self,
         table: str,
-        partition_key_key: str,
-        partition_key_value: Union[PartitionKeyValue, Iterable[PartitionKeyValue]],
-        sort_key_key: Optional[str] = None,
-        sort_key_value: Optional[Union[SortKeyValue, Iterable[SortKeyValue]]] = None,
-    ) -> list[dict[str, AttributeValueDeserialized]]:
+        schema: Sequence[str],
+        *,
+        batch_size: int = 10_000,
+        total_segments: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        filter: Optional[DynamoDbCondition] = None,
+        prefetch: int = 0,
+    ) -> Generator[dict[str, list[AttributeValueDeserialized]], None, None]:
         """
-        Deletes item(s) in a table by primary key.
+        Returns an Iterable of column-oriented batches of the items in
+        the table.
 
-        If a single partition key value is provided, it deletes the
-        corresponding item. If multiple partition key values are
-        provided, it deletes all the corresponding items.
+        Each batch holds one list per schema attribute, where the value
+        at the same position of every list belongs to the same item.
+        Only the schema attributes are read.
 
         :param table: DynamoDB table name.
-        :param partition_key_key: The key of the partition key.
-        :param partition_key_value: The value or an iterable of values
-            of the partition key of the item or items to delete from
-            DynamoDB.
-        :param sort_key_key: The key of the sort key.
-        :param sort_key_value: The value or an iterable of values
-            of the sort key of the item or items to delete from
-            DynamoDB.
-        :return: A list of deleted DynamoDB Items deserialized.
-        :raise DynamoDBError: If deletion fails.
+        :param schema: The attribute names to read, in order.
+            i.e. ["id", "count"]
+        :param batch_size: The maximum number of items in a batch.
+            Default is 10,000.
+        :param total_segments: The number of segments to split the
+            table into for a parallel scan. Default is None, which
+            means the table is scanned sequentially.
+        :param max_workers: The maximum number of segments scanned at
+            the same time. Default is None, which means one worker per
+            segment.
+        :param filter: A DynamoDbCondition the items must satisfy.
+            Default is None, which means all the items are returned.
+        :param prefetch: The number of pages fetched ahead on a
+            background thread. Default is 0.
+        :return: Generator of column-oriented batches.
+            i.e. {"id": ["a", "b"], "count": [1, None]}
+        :raise DynamoDBError: If retrieval fails.
         """
 
-        if (sort_key_key is None) ^ (sort_key_value is None):
-            raise exceptions.DynamoDBError(
-                "Both sort_key_key and sort_key_value must be provided or both must be None."
-            )
-        has_sk = sort_key_key is not None and sort_key_value is not None
+        if batch_size < 1:
+            raise exceptions.DynamoDBError(f"batch_size must be at least 1, got {batch_size!r}")
+
+        schema = tuple(schema)
+        rows = self.get_items(
+            table,
+            total_segments=total_segments,
+            max_workers=max_workers,
+            filter=filter,
+            prefetch=prefetch,
+            schema=schema,
+        )
 
-        # Check if it's only one item to delete or many
-        pk_values: list[PartitionKeyValue] = []
-        if isinstance(partition_key_value, (str, bytes, int, float)):
-            pk_values.append(partition_key_value)
-        else:
-            pk_values.extend(partition_key_value)
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
 
-        sk_values: list[Optional[SortKeyValue]] = []
-        if has_sk:
-            assert sort_key_value is not None
-            if isinstance(sort_key_value, (str, bytes, int, float)):
-                sk_values.append(sort_key_value)
-            else:
-                sk_values.extend(sort_key_value)
-        else:
-            sk_values.extend([None] * len(pk_values))
+            if not batch:
+                return
 
-        if len(pk_values) != len(sk_values):
-            raise exceptions.DynamoDBError(
-                "The number of partition key values and sort key values must be the same."
-            )
+            yield {key: list(column) for key, column in zip(schema, zip(*batch))}
 
-        # Prepare response list
-        response: list[dict[str, AttributeValueDeserialized]] = []
+    def _iter_deserialized_pages(
+        self,
+        pages: Iterator[tuple[int, dict[str, Any]]],
+        deserialize_item: Callable[[Mapping[str, Any]], Any],
+        schema: Optional[Sequence[str]] = None,
+        item_transform: Optional[Callable[[Any], Any]] = None,
+        processes: Optional[int] = None,
+    ) -> Generator[tuple[int, dict[str, Any], Iterable[Any]], None, None]:
+        """
+        Deserialize, and transform, the items of the raw scan pages,
+        and yield the pages in the order they are received.
+
+        If processes is passed in, the pages are deserialized on a
+        process pool, with up to two pages per process in flight, and
+        the pages yielded only hold LastEvaluatedKey, so the raw items
+        can be released as soon as they are sent to a worker.
+
+        :param pages: The tuples of segment and raw scan page.
+        :param deserialize_item: The item deserializer used on the
+            calling thread.
+        :param schema: The schema of the rows, if any.
+        :param item_transform: A callable applied to every deserialized
+            item. Default is None.
+        :param processes: The number of worker processes. Default is
+            None, which means the items are deserialized lazily on the
+            calling thread as they are consumed.
+        :return: Generator of tuples of segment, raw DynamoDB response
+            page and items.
+        :raise DynamoDBError: If processes is not valid or the
+            deserialization fails.
+        """
 
-        for pk_val, sk_val in zip(pk_values, sk_values):
-            pk_ser = self._serializer.serialize_p_key(
-                pk_key=partition_key_key, pk_value=pk_val, sk_key=sort_key_key, sk_value=sk_val
-            )
+        if processes is None:
+            for segment, ddb_response in pages:
+                items: Iterable[Any] = map(deserialize_item, ddb_response.get('Items', []))
 
-            # Initialize a dictionary with all the arguments to pass
-            # into the DynamoDB delete_item call
-            ddb_delete_item_args: dict[str, Any] = {
-                'TableName': table,
-                'Key': pk_ser,
-                'ReturnValues': 'ALL_OLD',
-            }
+                if item_transform is not None:
+                    items = map(item_transform, items)
 
-            try:
-                with utils.retry(exception_to_check=Exception, delay_secs=1) as retryer:
-                    ddb_response = retryer(self._client.delete_item, **ddb_delete_item_args)
+                yield segment, ddb_response, items
 
-            except botocore.exceptions.ClientError as ex:
-                raise exceptions.DynamoDBError(str(ex.response)) from None
+            return
 
-            except Exception as ex:
-                raise exceptions.DynamoDBError(str(ex)) from None
+        if processes < 1:
+            raise exceptions.DynamoDBError("processes must be greater than 0.")
 
-            # If we get here it means that the item has been deleted
-            # successfully therefore we return it
-            item = ddb_response.get('Attributes', {})
-            item_deser = {
-                key: self._serializer.deserialize_att(value) for key, value in item.items()
-            }
-            pk_key, pk_value, sk_key, sk_value = self._serializer.deserialize_p_key(pk_ser)
-            deleted_item = {**item_deser, **{pk_key: pk_value}}
-            if sk_key is not None:
-                deleted_item.update({sk_key: sk_value})
+        if schema is not None:
+            schema = tuple(schema)
 
-            response.append(deleted_item)
+        # Rows are sent back as plain tuples, as the row class is
+        # created at runtime and can't be pickled
+        row_type = _row_type(schema) if schema is not None and item_transform is None else None
+        pending: collections.deque[
+            tuple[int, dict[str, Any], concurrent.futures.Future[list[Any]]]
+        ] = collections.deque()
 
-        return response
+        def _next_page() -> tuple[int, dict[str, Any], Iterable[Any]]:
+            segment, ddb_response, future = pending.popleft()
+            page_items: Iterable[Any] = future.result()
 
-    def delete_item_att(
+            if row_type is not None:
+                page_items = map(row_type._make, page_items)
+
+            return segment, ddb_response, page_items
+
+        # The scan and prefetch threads are already running, and forking
+        # a multi-threaded process can deadlock the children on the
+        # locks those threads hold, so the workers are spawned
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=processes, mp_context=multiprocessing.get_context('spawn')
+        )
+
+        try:
+            for segment, ddb_response in pages:
+                future = executor.submit(
+                    _deserialize_page, ddb_response.get('Items', []), schema, item_transform
+                )
+                pending.append((
+                    segment,
+                    {
+                        key: value
+                        for key, value in ddb_response.items()
+                        if key == 'LastEvaluatedKey'
+                    },
+                    future,
+                ))
+
+                # Bound the pages in flight, so memory doesn't grow
+                # when the consumer is slower than the scan
+                if len(pending) >= processes * 2:
+                    yield _next_page()
+
+            while pending:
+                yield _next_page()
+
+        finally:
+            if isinstance(pages, Generator):
+                pages.close()
+
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def export_items(
         self,
         table: str,
-        partition_key_key: str,
-        partition_key_value: PartitionKeyValue,
-        attributes_to_delete: Iterable[str],
-        sort_key_key: Optional[str] = None,
-        sort_key_value: Optional[SortKeyValue] = None,
-    ) -> dict[str, AttributeValueDeserialized]:
+        destination: str,
+        *,
+        format: Literal['jsonl', 'csv'] = 'jsonl',
+        fields: Optional[Sequence[str]] = None,
+        query: Optional[Mapping[str, Any]] = None,
+        filter: Optional[DynamoDbCondition] = None,
+        total_segments: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        prefetch: int = 0,
+        max_file_bytes: Optional[int] = None,
+        compress: bool = False,
+        s3: Optional[aws_boto3.S3] = None,
+        s3_bucket: Optional[str] = None,
+        progress_interval_secs: float = 10.0,
+    ) -> ExportStats:
         """
-        Deletes item specific values in a table by primary key.
+        Export the items of a table, or of a query, to JSON Lines or
+        CSV files.
+
+        The items are streamed from the scan to the files, so memory
+        stays constant regardless of the table size. The files are
+        named after destination and their sequence number, i.e.
+        "<destination>-00000.jsonl.gz", and a new file is started
+        every time max_file_bytes is reached. If s3 is passed in, the
+        files are stored in s3_bucket through multipart uploads, with
+        destination as the key prefix, instead of on the local disk.
+
+        Progress and throughput are logged every
+        progress_interval_secs, and once the export completes.
+
+        Values that are not JSON types are exported as JSON strings,
+        sets as lists and binary values as base64 strings. In CSV
+        files, lists and maps are exported as JSON text and missing
+        attributes as empty fields.
 
         :param table: DynamoDB table name.
-        :param partition_key_key: The key of the partition key.
-        :param partition_key_value: The value of the partition key.
-        :param sort_key_key: The key of the sort key.
-        :param sort_key_value: The value of the sort key.
-        :param attributes_to_delete: An iterable of specific attributes
-            that are to be deleted from DynamoDB.
-        :return: The updated DynamoDB Item deserialized.
-        :raise DynamoDBError: If deletion fails.
+        :param destination: The path, or the S3 key, prefix of the
+            files.
+        :param format: The format of the files, 'jsonl' or 'csv'.
+            Default is 'jsonl'.
+        :param fields: The attribute names to export, in order. Required
+            for CSV, where they are the header. Default is None, which
+            means all the attributes are exported.
+        :param query: The arguments of query_items to export the items
+            of a query instead of the whole table.
+            i.e. {"partition_key_key": "id", "partition_key_value": 1}
+        :param filter: A DynamoDbCondition the items must satisfy.
+            Default is None, which means all the items are exported.
+        :param total_segments: The number of segments to split the
+            table into for a parallel scan. Not used for queries.
+        :param max_workers: The maximum number of segments scanned at
+            the same time. Not used for queries.
+        :param prefetch: The number of pages fetched ahead on a
+            background thread. Default is 0.
+        :param max_file_bytes: The size of the uncompressed content
+            after which a new file is started. Default is None, which
+            means all the items are exported to a single file.
+        :param compress: If True, gzip the files. Default is False.
+        :param s3: The S3 instance to store the files with. Default is
+            None, which means the files are written to the local disk.
+        :param s3_bucket: The name of the S3 bucket. Required with s3.
+        :param progress_interval_secs: The interval in seconds between
+            progress logs. Default is 10.
+        :return: The export statistics, with the names of the files
+            written.
+        :raise DynamoDBError: If the arguments are not valid, the
+            retrieval fails or the files can't be written.
         """
 
-        pk_ser = self._serializer.serialize_p_key(
-            pk_key=partition_key_key,
-            pk_value=partition_key_value,
-            sk_key=sort_key_key,
-            sk_value=sort_key_value,
-        )
+        if format not in ('jsonl', 'csv'):
+            raise exceptions.DynamoDBError(f"format must be 'jsonl' or 'csv', got {format!r}")
 
-        att_updates: dict[str, type_defs.AttributeValueUpdateTypeDef] = {
-            item_value: {'Action': "DELETE"} for item_value in attributes_to_delete
-        }
+        if format == 'csv' and not fields:
+            raise exceptions.DynamoDBError("fields must be passed in to export to CSV.")
 
-        ddb_update_item_args: dict[str, Any] = {
-            'TableName': table,
-            'Key': pk_ser,
-            'AttributeUpdates': att_updates,
-            'ReturnValues': 'ALL_NEW',
+        if (s3 is None) != (s3_bucket is None):
+            raise exceptions.DynamoDBError("s3 and s3_bucket must be passed in together.")
+
+        if max_file_bytes is not None and max_file_bytes < 1:
+            raise exceptions.DynamoDBError("max_file_bytes must be greater than 0.")
+
+        # CSV rows are read as schema rows, which are already ordered as
+        # the header
+        read_args: dict[str, Any] = {'filter': filter, 'prefetch': prefetch}
+        read_args['schema' if format == 'csv' else 'projection'] = fields
+
+        if query is not None:
+            items: Iterable[Any] = self.query_items(table, **query, **read_args)
+        else:
+            items = self.get_items(
+                table, total_segments=total_segments, max_workers=max_workers, **read_args
+            )
+
+        extension = format + ('.gz' if compress else '')
+        csv_buffer = io.StringIO()
+        csv_writer = csv.writer(csv_buffer, lineterminator='\n')
+        header = b''
+
+        if format == 'csv':
+            csv_writer.writerow(fields)  # type: ignore
+            header = csv_buffer.getvalue().encode()
+            csv_buffer.seek(0)
+            csv_buffer.truncate()
+
+        stats: ExportStats = {
+            'Items': 0,
+            'Files': [],
+            'Bytes': 0,
+            'ElapsedSecs': 0.0,
+            'ItemsPerSec': 0.0,
         }
+        sink: Optional[Union[_FileExportSink, _S3ExportSink]] = None
+        stream: Any = None
+        file_bytes = 0
+        start_time = last_progress_time = time.monotonic()
+
+        def _update_throughput() -> None:
+            stats['ElapsedSecs'] = time.monotonic() - start_time
+            stats['ItemsPerSec'] = stats['Items'] / stats['ElapsedSecs'] if stats['Items'] else 0.0
 
         try:
-            with utils.retry(exception_to_check=Exception, delay_secs=1) as retryer:
-                ddb_response = retryer(self._client.update_item, **ddb_update_item_args)
+            for item in items:
+                # Files are only started when there is an item to write,
+                # so an export never ends with an empty file
+                if sink is None:
+                    name = f"{destination}-{len(stats['Files']):05d}.{extension}"
+                    if s3 is not None:
+                        sink = _S3ExportSink(s3=s3, bucket=s3_bucket, key=name)  # type: ignore
+                    else:
+                        sink = _FileExportSink(path=name)
+                    stream = sink
+                    if compress:
+                        stream = gzip.GzipFile(fileobj=sink, mode='wb')  # type: ignore
+                    stream.write(header)
+                    file_bytes = len(header)
+
+                if format == 'csv':
+                    csv_writer.writerow(_export_csv_value(value) for value in item)
+                    line = csv_buffer.getvalue()
+                    csv_buffer.seek(0)
+                    csv_buffer.truncate()
+                else:
+                    line = json.dumps(item, default=_export_json_default, separators=(',', ':'))
+                    line += '\n'
+
+                data = line.encode()
+                stream.write(data)
+                file_bytes += len(data)
+                stats['Items'] += 1
+
+                if max_file_bytes is not None and file_bytes >= max_file_bytes:
+                    if stream is not sink:
+                        stream.close()
+                    sink.finish()
+                    stats['Files'].append(sink.name)
+                    stats['Bytes'] += sink.bytes_written
+                    sink = stream = None
+
+                if time.monotonic() - last_progress_time >= progress_interval_secs:
+                    last_progress_time = time.monotonic()
+                    _update_throughput()
+                    module_logger.info(
+                        f"Exporting {table!r}: {stats['Items']} items,"
+                        f" {len(stats['Files'])} files completed,"
+                        f" {stats['ItemsPerSec']:.0f} items/s"
+                    )
 
-        except botocore.exceptions.ClientError as ex:
-            if "ConditionalCheckFailed" in str(ex):
-                raise exceptions.DynamoDBConflictError(str(ex.response)) from None
-            else:
-                raise exceptions.DynamoDBError(str(ex.response)) from None
+            if sink is not None:
+                if stream is not sink:
+                    stream.close()
+                sink.finish()
+                stats['Files'].append(sink.name)
+                stats['Bytes'] += sink.bytes_written
+                sink = None
 
         except Exception as ex:
+            if sink is not None:
+                sink.abort()
+
             raise exceptions.DynamoDBError(str(ex)) from None
 
-        # If we get here it means that the item has been updated
-        # successfully therefore we return it
-        item = ddb_response.get('Attributes', {})
-        item_deser = {key: self._serializer.deserialize_att(value) for key, value in item.items()}
+        _update_throughput()
+        module_logger.info(
+            f"Exported {table!r}: {stats['Items']} items to {len(stats['Files'])} files,"
+            f" {stats['Bytes']} bytes in {stats['ElapsedSecs']:.1f}s,"
+            f" {stats['ItemsPerSec']:.0f} items/s"
+        )
 
-        return item_deser
+        return stats
 
-    def atomic_writes(
+    def copy_table(
         self,
-        put: Optional[Iterable[dict[str, AttributeValue]]] = None,
-        update: Optional[Iterable[dict[str, AttributeValue]]] = None,
-        upsert: Optional[Iterable[dict[str, AttributeValue]]] = None,
-        delete: Optional[Iterable[dict[str, AttributeValue]]] = None,
-        condition_check: Optional[Iterable[dict[str, AttributeValue]]] = None,
-        **kwargs,
-    ) -> dict[str, list[dict[str, AttributeValueDeserialized]]]:
+        source_table: str,
+        destination_table: str,
+        *,
+        transform: Optional[Callable[[dict[str, Any]], Optional[Mapping[str, Any]]]] = None,
+        total_segments: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        write_workers: int = 8,
+        read_capacity_units: Optional[float] = None,
+        write_capacity_units: Optional[float] = None,
+        resume_token: Optional[str] = None,
+        on_checkpoint: Optional[Callable[[str], None]] = None,
+        checkpoint_file: Optional[Union[str, pathlib.Path]] = None,
+        verify: bool = False,
+        verify_sample_size: int = 100,
+        progress_interval_secs: float = 10.0,
+    ) -> CopyTableStats:
+        """
+        Copy all the items of a table into another table, optionally
+        transforming them.
+
+        The source table is scanned, in parallel if total_segments is
+        passed in, and the items of every page are written to the
+        destination with BatchWriteItem on write_workers threads, while
+        the next pages are already being read. Items are copied without
+        being deserialized, unless a transform is passed in, but with
+        the compression policy and the write shards of the destination
+        applied like in put_item. Existing items with the same primary
+        key are overwritten.
+
+        A resume token is produced every time all the items of a page
+        have been written, so an interrupted copy can be resumed from
+        the last page written, like get_items.
+
+        If verify is True, once the copy completes the items of both
+        tables are counted, and a random sample of the items written is
+        read back from the destination and compared.
+
+        :param source_table: The DynamoDB table to copy from.
+        :param destination_table: The DynamoDB table to copy to.
+        :param transform: A callable receiving every deserialized item
+            and returning the item to write, or None to skip it. The
+            attribute names it returns are written as they are.
+            Default is None, which means the items are copied as they
+            are.
+        :param total_segments: The number of segments to split the
+            source table into for a parallel scan. Default is None,
+            which means the table is scanned sequentially.
+        :param max_workers: The maximum number of segments scanned at
+            the same time. Default is None, which means one worker per
+            segment.
+        :param write_workers: The maximum number of BatchWriteItem
+            requests sent at the same time. Default is 8.
+        :param read_capacity_units: The read capacity units per second
+            the copy can consume on the source table, in place of the
+            capacity limit of the table. Default is None, which means
+            the reads are only limited by set_capacity_limit.
+        :param write_capacity_units: The write capacity units per second
+            the copy can consume on the destination table, in place of
+            the capacity limit of the table. Default is None, which
+            means the writes are only limited by set_capacity_limit.
+        :param resume_token: A token produced by a previous copy of the
+            same source table with the same total_segments, to resume
+            from.
+        :param on_checkpoint: A callable receiving the resume token
+            every time the items of a page have been written.
+        :param checkpoint_file: The path of a file where the resume
+            token is saved, read when the copy starts and deleted once
+            it completes.
+        :param verify: If True, verify the destination once the copy
+            completes. Default is False.
+        :param verify_sample_size: The number of items written read
+            back when verifying. Default is 100.
+        :param progress_interval_secs: The interval in seconds between
+            progress logs. Default is 10.
+        :return: The copy statistics, with the failed writes and the
+            verification result.
+        :raise DynamoDBError: If the arguments are not valid, or the
+            scan or the verification fails.
         """
-        A synchronous write operation that groups up to 100 action
-        requests. These actions can target items in different tables.
-        The actions are completed atomically so that either all of them
-        succeed, or all of them fail.
 
-        :param put: Initiates a PutItem operation to write a new item.
-            schema = {
-            'TableName': "string DynamoDB Table Name",
-            'PartitionKeyKey': "string of the PartitionKey key",
-            'PartitionKeyValue': "OPTIONAL - partition key value",
-            'SortKeyKey': "OPTIONAL - string of the SortKey key",
-            'SortKeyValue': "OPTIONAL - sort key value",
-            'AutoGeneratePartitionKeyValue': "OPTIONAL - bool",
-            'Items': "dict containing all the items to put in DynamoDB",
+        if write_workers < 1:
+            raise exceptions.DynamoDBError("write_workers must be greater than 0.")
+
+        if verify_sample_size < 0:
+            raise exceptions.DynamoDBError("verify_sample_size must not be negative.")
+
+        # The capacity budget has its own limiters, used only by the
+        # reads and writes of the copy
+        capacity_limiters: dict[str, Optional[_CapacityLimiter]] = {}
+        for capacity, capacity_units in (
+            ('read', read_capacity_units),
+            ('write', write_capacity_units),
+        ):
+            if capacity_units is not None and capacity_units <= 0:
+                raise exceptions.DynamoDBError(f"{capacity} capacity units must be greater than 0.")
+
+            capacity_limiters[capacity] = (
+                _CapacityLimiter(rate=capacity_units) if capacity_units is not None else None
+            )
+
+        if resume_token is None and checkpoint_file is not None:
+            resume_token = _read_checkpoint_file(path=checkpoint_file)
+
+        scan_state = _load_scan_state(
+            table=source_table, total_segments=total_segments, resume_token=resume_token
+        )
+
+        destination_metadata = self.get_table_metadata(table=destination_table)
+        key_keys = [destination_metadata['PartitionKeyKey']]
+        if destination_metadata['SortKeyKey'] is not None:
+            key_keys.append(destination_metadata['SortKeyKey'])
+
+        stats: CopyTableStats = {
+            'Scanned': 0,
+            'Written': 0,
+            'Skipped': 0,
+            'Failed': [],
+            'ElapsedSecs': 0.0,
+            'Verification': None,
+        }
+        # Reservoir sample of the items written, bounded whatever the
+        # table size
+        sample: list[dict[str, Any]] = []
+        sampler = random.Random()
+        start_time = last_progress_time = time.monotonic()
+
+        write_chunk = functools.partial(
+            self._batch_write_chunk,
+            table=destination_table,
+            key_keys=key_keys,
+            capacity_limiter=capacity_limiters['write'],
+        )
+        source_pk_key = (
+            self.get_table_metadata(table=source_table)['PartitionKeyKey']
+            if source_table in self._write_shards
+            else None
+        )
+
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=write_workers) as executor:
+                pages = self._iter_scan_pages(
+                    ddb_scan_args={'TableName': source_table},
+                    total_segments=total_segments,
+                    max_workers=max_workers,
+                    # The next page is read while the current one is
+                    # written
+                    prefetch=1,
+                    segments_start={
+                        segment: segment_state.get('ExclusiveStartKey')
+                        for segment, segment_state in enumerate(scan_state['Segments'])
+                        if not segment_state.get('Done')
+                    },
+                    capacity_limiter=capacity_limiters['read'],
+                )
+
+                # The items are read decompressed and with the logical
+                # partition key value of the source
+                if source_pk_key is not None:
+                    pages = _unshard_scan_pages(pages=pages, partition_key_key=source_pk_key)
+
+                for segment, ddb_response in pages:
+                    write_requests = []
+
+                    for ddb_item in ddb_response.get('Items', []):
+                        stats['Scanned'] += 1
+
+                        if transform is not None:
+                            item = transform(self._serializer.deserialize_item(ddb_item))
+
+                            if item is None:
+                                stats['Skipped'] += 1
+                                continue
+
+                            # The attribute names returned by the
+                            # transform are kept as they are
+                            ddb_item = {
+                                key: self._serializer.serialize_att(value)
+                                for key, value in item.items()
+                            }
+
+                        # Compressed and routed to its shard like
+                        # put_item does
+                        ddb_item = self._shard_item_ser(
+                            table=destination_table,
+                            item_ser=self._compress_item(
+                                table=destination_table, item_ser=ddb_item
+                            ),
+                            random_shard=True,
+                        )
+
+                        write_requests.append({'PutRequest': {'Item': ddb_item}})
+
+                        if len(sample) < verify_sample_size:
+                            sample.append(ddb_item)
+                        elif verify_sample_size:
+                            position = sampler.randrange(stats['Scanned'] - stats['Skipped'])
+                            if position < verify_sample_size:
+                                sample[position] = ddb_item
+
+                    # The page is checkpointed only once all its items
+                    # are written, so a resumed copy never misses one
+                    for processed, failed in executor.map(
+                        write_chunk, _chunked(write_requests, _BATCH_WRITE_ITEM_MAX_REQUESTS)
+                    ):
+                        stats['Written'] += processed['Put']
+                        stats['Failed'].extend(failed)
+
+                    _advance_scan_state(
+                        scan_state=scan_state,
+                        segment=segment,
+                        ddb_response=ddb_response,
+                        on_checkpoint=on_checkpoint,
+                        checkpoint_file=checkpoint_file,
+                    )
+
+                    if time.monotonic() - last_progress_time >= progress_interval_secs:
+                        last_progress_time = time.monotonic()
+                        module_logger.info(
+                            f"Copying {source_table!r} to {destination_table!r}:"
+                            f" {stats['Scanned']} items scanned, {stats['Written']} written,"
+                            f" {len(stats['Failed'])} failed"
+                        )
+
+            if checkpoint_file is not None:
+                pathlib.Path(checkpoint_file).unlink(missing_ok=True)
+
+        except Exception as ex:
+            raise exceptions.DynamoDBError(str(ex)) from None
+
+        stats['ElapsedSecs'] = time.monotonic() - start_time
+
+        if stats['Failed']:
+            module_logger.warning(
+                f"Copy of {source_table!r} to {destination_table!r} failed for"
+                f" {len(stats['Failed'])} items."
+            )
+
+        if verify:
+            # The items whose write failed are not in the destination,
+            # the failures report their logical primary key
+            failed_keys = {
+                tuple(failure['Item'].get(key) for key in key_keys) for failure in stats['Failed']
             }
-        :param update: Initiates an UpdateItem operation to update an
-            existing item.
-            schema = {
-            'TableName': "string DynamoDB Table Name",
-            'PartitionKey': "The partition key as dict of partition_key
-            {key: value}",
-            'SortKey': "OPTIONAL - The sort key as dict of sort_key
-            {key: value}",
-            'Items': "dict containing all the values for items to be
-            updated",
-            'ConditionAttribute': "OPTIONAL - attribute to matched
-            as dict of attribute_to_match {key: value}",
+            sample = [
+                ddb_item
+                for ddb_item in sample
+                if tuple(
+                    self._unshard_item(
+                        table=destination_table,
+                        partition_key_key=key_keys[0],
+                        item=self._serializer.deserialize_item(ddb_item),
+                    ).get(key)
+                    for key in key_keys
+                )
+                not in failed_keys
+            ]
+
+            stats['Verification'] = self._verify_copy(
+                source_table=source_table,
+                destination_table=destination_table,
+                key_keys=key_keys,
+                sample=sample,
+                skipped=stats['Skipped'],
+                total_segments=total_segments,
+                max_workers=max_workers,
+            )
+
+        module_logger.info(
+            f"Copied {source_table!r} to {destination_table!r}: {stats['Scanned']} items"
+            f" scanned, {stats['Written']} written, {stats['Skipped']} skipped,"
+            f" {len(stats['Failed'])} failed in {stats['ElapsedSecs']:.1f}s"
+        )
+
+        return stats
+
+    def _verify_copy(
+        self,
+        source_table: str,
+        destination_table: str,
+        key_keys: Sequence[str],
+        sample: Sequence[dict[str, Any]],
+        skipped: int,
+        total_segments: Optional[int] = None,
+        max_workers: Optional[int] = None,
+    ) -> CopyTableVerification:
+        """
+        Verify a table copy, comparing the item counts of both tables
+        and the sampled items with the items read back from the
+        destination.
+
+        The counts match when the destination holds as many items as
+        the source minus the items skipped, which doesn't hold if the
+        destination already had other items.
+
+        :param source_table: The DynamoDB table copied from.
+        :param destination_table: The DynamoDB table copied to.
+        :param key_keys: The keys of the primary key of the destination.
+        :param sample: The raw DynamoDB items written to sample, as
+            stored in the destination.
+        :param skipped: The number of items skipped by the transform.
+        :param total_segments: The number of segments of the counts.
+        :param max_workers: The maximum number of segments counted at
+            the same time.
+        :return: The verification result.
+        :raise DynamoDBError: If the counts or the reads fail.
+        """
+
+        source_count = self.get_items_count(
+            source_table, total_segments=total_segments, max_workers=max_workers
+        )
+        destination_count = self.get_items_count(
+            destination_table, total_segments=total_segments, max_workers=max_workers
+        )
+
+        # The items are read back by the physical primary key they were
+        # written with, so the items written to a random shard are found
+        # too, and compared as they are stored
+        expected_items: dict[tuple[Any, ...], dict[str, Any]] = {}
+        for ddb_item in sample:
+            item = self._serializer.deserialize_item(ddb_item)
+            expected_items[tuple(item.get(key) for key in key_keys)] = item
+
+        actual_items: dict[tuple[Any, ...], dict[str, Any]] = {}
+        try:
+            for ddb_items in _map_concurrently(
+                func=functools.partial(
+                    self._batch_get_chunk,
+                    table=destination_table,
+                    consistent_read=True,
+                    read_args={},
+                    shard_keys=False,
+                ),
+                iterable=_chunked(
+                    [dict(zip(key_keys, item_key)) for item_key in expected_items],
+                    _BATCH_GET_ITEM_MAX_KEYS,
+                ),
+                max_workers=8,
+            ):
+                for ddb_item in ddb_items:
+                    item = self._serializer.deserialize_item(ddb_item)
+                    actual_items[tuple(item.get(key) for key in key_keys)] = item
+
+        except Exception as ex:
+            raise exceptions.DynamoDBError(str(ex)) from None
+
+        mismatched = [
+            self._unshard_item(
+                table=destination_table,
+                partition_key_key=key_keys[0],
+                item=dict(zip(key_keys, item_key)),
+            )
+            for item_key, item in expected_items.items()
+            if actual_items.get(item_key) != item
+        ]
+
+        return {
+            'SourceCount': source_count,
+            'DestinationCount': destination_count,
+            'Sampled': len(expected_items),
+            'Mismatched': mismatched,
+            'Passed': destination_count == source_count - skipped and not mismatched,
+        }
+
+    def _shard_partition_key_value(
+        self,
+        table: str,
+        partition_key_value: PartitionKeyValue,
+        sort_key_value: Optional[SortKeyValue] = None,
+        random_shard: bool = False,
+    ) -> PartitionKeyValue:
+        """
+        Return the physical partition key value of an item, with the
+        shard suffix if the table is sharded.
+
+        :param table: DynamoDB table name.
+        :param partition_key_value: The logical partition key value.
+        :param sort_key_value: The sort key value of the item, which
+            selects the shard.
+        :param random_shard: If True, an item without sort key value is
+            stored in a random shard.
+        :return: The partition key value to store the item under.
+        :raise DynamoDBError: If the partition key value is not a
+            string, or the shard can't be selected.
+        """
+
+        shards = self._write_shards.get(table)
+
+        if shards is None:
+            return partition_key_value
+
+        if not isinstance(partition_key_value, str):
+            raise exceptions.DynamoDBError(
+                f"The partition key of sharded table: {table!r} must be a string, got"
+                f" {partition_key_value!r}"
+            )
+
+        if sort_key_value is not None:
+            shard = _shard_number(sort_key_value=sort_key_value, shards=shards)
+
+        elif random_shard:
+            shard = random.randrange(shards)
+
+        else:
+            raise exceptions.DynamoDBError(
+                f"The items of sharded table: {table!r} without sort key can't be located by"
+                " primary key."
+            )
+
+        return f"{partition_key_value}#{shard}"
+
+    def _shard_partition_key_values(
+        self, table: str, partition_key_value: PartitionKeyValue
+    ) -> list[str]:
+        """
+        Return the physical partition key values of all the shards of a
+        logical partition key value.
+
+        :param table: DynamoDB table name, which must be sharded.
+        :param partition_key_value: The logical partition key value.
+        :return: The partition key values of the shards.
+        :raise DynamoDBError: If the partition key value is not a
+            string.
+        """
+
+        if not isinstance(partition_key_value, str):
+            raise exceptions.DynamoDBError(
+                f"The partition key of sharded table: {table!r} must be a string, got"
+                f" {partition_key_value!r}"
+            )
+
+        return [f"{partition_key_value}#{shard}" for shard in range(self._write_shards[table])]
+
+    def _shard_item_ser(self, table: str, item_ser: Item, random_shard: bool = False) -> Item:
+        """
+        Return a serialized item or primary key with the physical
+        partition key value, if the table is sharded.
+
+        :param table: DynamoDB table name.
+        :param item_ser: The serialized item or primary key. An item
+            missing a key attribute is returned unchanged, for the
+            caller to reject.
+        :param random_shard: If True, an item of a table without sort
+            key is stored in a random shard.
+        :return: The item with the partition key value of its shard.
+        :raise DynamoDBError: If the partition key value is not a
+            string, or the shard can't be selected.
+        """
+
+        if table not in self._write_shards:
+            return item_ser
+
+        table_metadata = self.get_table_metadata(table=table)
+        pk_key = table_metadata['PartitionKeyKey']
+        sk_key = table_metadata['SortKeyKey']
+
+        if pk_key not in item_ser or (sk_key is not None and sk_key not in item_ser):
+            return item_ser
+
+        pk_value = self._serializer.deserialize_att(item_ser[pk_key])
+        sk_value = self._serializer.deserialize_att(item_ser[sk_key]) if sk_key else None
+        assert isinstance(pk_value, (str, bytes, int, float))
+        assert sk_value is None or isinstance(sk_value, (str, bytes, int, float))
+
+        return {
+            **item_ser,
+            pk_key: self._serializer.serialize_att(
+                self._shard_partition_key_value(
+                    table=table,
+                    partition_key_value=pk_value,
+                    sort_key_value=sk_value,
+                    random_shard=random_shard,
+                )
+            ),
+        }
+
+    def _unshard_item(
+        self, table: str, partition_key_key: str, item: dict[str, Any]
+    ) -> dict[str, Any]:
+        """
+        Replace the physical partition key value of a deserialized item
+        of a sharded table with the logical one.
+
+        :param table: DynamoDB table name.
+        :param partition_key_key: The key of the partition key.
+        :param item: The deserialized item, modified in place.
+        :return: The item.
+        """
+
+        if table in self._write_shards and isinstance(item.get(partition_key_key), str):
+            item[partition_key_key] = item[partition_key_key].rpartition('#')[0]
+
+        return item
+
+    def _item_deserializer(
+        self, lazy: bool, schema: Optional[Sequence[str]]
+    ) -> Callable[[Mapping[str, Any]], dict[str, Any]]:
+        """
+        Return the function converting the raw items read into the
+        items yielded by get_items and query_items.
+
+        :param lazy: If True, return lazily deserialized items.
+        :param schema: If passed in, return named tuple rows of these
+            attributes.
+        :return: The item deserializer.
+        :raise DynamoDBError: If both lazy and schema are passed in, or
+            the schema is not valid.
+        """
+
+        if schema is None:
+            # Lazy items are returned in place of dictionaries, as they
+            # are read-only mappings with the same content
+            if lazy:
+                return self._serializer.deserialize_item_lazy  # type: ignore
+
+            return self._serializer.deserialize_item
+
+        if lazy:
+            raise exceptions.DynamoDBError("lazy and schema can't be used together.")
+
+        schema = tuple(schema)
+        # Fail fast on an invalid schema, before any read
+        _row_type(schema)
+
+        return functools.partial(self._serializer.deserialize_row, schema=schema)  # type: ignore
+
+    def query_items_fan_out(
+        self,
+        table: str,
+        partition_key_key: str,
+        partition_key_values: Iterable[PartitionKeyValue],
+        sort_key_key: Optional[str] = None,
+        sort_key_condition: Optional[SortKeyCondition] = None,
+        sort_key_value: Optional[Union[SortKeyValue, Sequence[SortKeyValue]]] = None,
+        index_name: Optional[str] = None,
+        ascending: bool = True,
+        projection: Optional[Iterable[str]] = None,
+        filter: Optional[DynamoDbCondition] = None,
+        *,
+        ordered: bool = True,
+        limit: Optional[int] = None,
+        max_workers: int = 8,
+    ) -> Generator[dict[str, AttributeValueDeserialized], None, None]:
+        """
+        Returns an Iterable of deserialized items matching any of the
+        given partition key values, and optionally a condition on the
+        sort key, querying the partition keys concurrently.
+
+        If ordered is True, the items of all the partition keys are
+        merged by sort key, as if they were all stored under the same
+        partition key. The first page of every partition key is
+        requested upfront, and the next page of a partition key as soon
+        as its current page starts being consumed.
+        If ordered is False, the items are yielded as soon as their
+        page is received, which gives the highest throughput.
+
+        Once limit items have been yielded, or if the generator is
+        closed early, the queries still outstanding are cancelled.
+
+        :param table: DynamoDB table name.
+        :param partition_key_key: The key of the partition key of the
+            table, or of the index if index_name is passed in.
+        :param partition_key_values: The values of the partition key to
+            query. Duplicate values are queried once.
+        :param sort_key_key: The key of the sort key. Default is None,
+            which means the key is taken from the table metadata when
+            needed.
+        :param sort_key_condition: The comparison to apply to the sort
+            key, as in query_items.
+        :param sort_key_value: The value to compare the sort key with,
+            as in query_items.
+        :param index_name: The name of a global or local secondary index
+            to query instead of the table.
+        :param ascending: The order of the items, sorted by sort key.
+            Default is True.
+        :param projection: The attribute paths to read. When ordered is
+            True it must include the sort key. Default is None, which
+            means all the attributes are read.
+        :param filter: A DynamoDbCondition the items must satisfy.
+            Default is None.
+        :param ordered: If True, merge the items by sort key, otherwise
+            yield them in the order they are received. Default is True.
+        :param limit: The maximum number of items to yield. Default is
+            None, which means all the matching items are yielded.
+        :param max_workers: The maximum number of queries sent at the
+            same time. Default is 8.
+        :return: Generator of deserialized items.
+            Iterable of dictionaries of all the columns in DynamoDB
+            i.e. {dynamodb_column_name: column_value, ...}
+        :raise DynamoDBError: If the arguments are not valid, or the
+            retrieval fails.
+        """
+
+        if max_workers < 1:
+            raise exceptions.DynamoDBError("max_workers must be greater than 0.")
+
+        if limit is not None and limit < 1:
+            raise exceptions.DynamoDBError("limit must be greater than 0.")
+
+        if sort_key_key is None and (ordered or sort_key_condition is not None):
+            sort_key_key = self._get_key_schema(table=table, index_name=index_name)['SortKeyKey']
+
+            if sort_key_key is None and ordered:
+                raise exceptions.DynamoDBError(
+                    f"ordered fan-out query needs a SortKey, but {index_name or table!r} has none."
+                )
+
+        ddb_query_args_list = []
+        for partition_key_value in dict.fromkeys(partition_key_values):
+            ddb_query_args = self._build_query_args(
+                table=table,
+                partition_key_key=partition_key_key,
+                partition_key_value=partition_key_value,
+                sort_key_key=sort_key_key if sort_key_condition is not None else None,
+                sort_key_condition=sort_key_condition,
+                sort_key_value=sort_key_value,
+                index_name=index_name,
+                ascending=ascending,
+                projection=projection,
+                filter=filter,
+            )
+
+            # No partition key contributes more than limit items, so
+            # larger pages would only be read to be discarded
+            if limit is not None:
+                ddb_query_args['Limit'] = limit
+
+            ddb_query_args_list.append(ddb_query_args)
+
+        if not ddb_query_args_list:
+            return
+
+        ddb_items = self._iter_fan_out_ddb_items(
+            ddb_query_args_list=ddb_query_args_list,
+            sort_key_key=sort_key_key if ordered else None,
+            ascending=ascending,
+            max_workers=max_workers,
+        )
+
+        try:
+            yield from map(self._serializer.deserialize_item, itertools.islice(ddb_items, limit))
+
+        except Exception as ex:
+            raise exceptions.DynamoDBError(str(ex)) from None
+
+        finally:
+            ddb_items.close()
+
+    def _iter_fan_out_ddb_items(
+        self,
+        ddb_query_args_list: Sequence[dict[str, Any]],
+        sort_key_key: Optional[str],
+        ascending: bool,
+        max_workers: int,
+        prefetch: int = 0,
+    ) -> Generator[dict[str, Any], None, None]:
+        """
+        Run the queries concurrently and yield their raw items, merged
+        by sort key if sort_key_key is passed in, otherwise as soon as
+        their page is received.
+
+        When merging, every query is paginated on a thread pool one
+        page ahead of the merge, and the first page of all the queries
+        is requested upfront, so the merge doesn't wait for the queries
+        one by one.
+
+        :param ddb_query_args_list: The arguments of the queries, each
+            returning items sorted by sort key.
+        :param sort_key_key: The key of the sort key to merge by, or
+            None to yield the items unordered.
+        :param ascending: The order of the items of the queries.
+        :param max_workers: The maximum number of pages requested at the
+            same time.
+        :param prefetch: The number of pages of every query buffered
+            ahead of the merge, on top of the page being requested.
+            Default is 0.
+        :return: Generator of raw DynamoDB items.
+        :raise DynamoDBError: If prefetch is not valid or any of the
+            queries fail.
+        """
+
+        if prefetch < 0:
+            raise exceptions.DynamoDBError("prefetch must be greater than or equal to 0.")
+
+        if sort_key_key is None:
+            for ddb_response in _iter_concurrently(
+                sources=[
+                    functools.partial(self._iter_pages, operation='query', ddb_args=ddb_args)
+                    for ddb_args in ddb_query_args_list
+                ],
+                max_workers=max_workers,
+                max_buffered=max_workers + prefetch * len(ddb_query_args_list),
+            ):
+                yield from ddb_response.get('Items', [])
+
+            return
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+
+        def _query_items(
+            pages: Iterator[dict[str, Any]],
+            future: concurrent.futures.Future[Optional[dict[str, Any]]],
+        ) -> Generator[dict[str, Any], None, None]:
+            while True:
+                ddb_response = future.result()
+
+                if ddb_response is None:
+                    return
+
+                # Request the next page while this one is merged
+                future = executor.submit(next, pages, None)
+
+                yield from ddb_response.get('Items', [])
+
+        deserialize_att = self._serializer.deserialize_att
+
+        try:
+            streams = []
+            for ddb_query_args in ddb_query_args_list:
+                pages = self._iter_prefetched_pages(
+                    operation='query', ddb_args=ddb_query_args, prefetch=prefetch
+                )
+                streams.append(_query_items(pages, executor.submit(next, pages, None)))
+
+            # Only the sort key is deserialized to merge
+            yield from heapq.merge(
+                *streams,
+                key=lambda ddb_item: deserialize_att(ddb_item[sort_key_key]),  # type: ignore
+                reverse=not ascending,
+            )
+
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _build_query_args(
+        self,
+        table: str,
+        partition_key_key: str,
+        partition_key_value: PartitionKeyValue,
+        sort_key_key: Optional[str] = None,
+        sort_key_condition: Optional[SortKeyCondition] = None,
+        sort_key_value: Optional[Union[SortKeyValue, Sequence[SortKeyValue]]] = None,
+        index_name: Optional[str] = None,
+        ascending: bool = True,
+        projection: Optional[Iterable[str]] = None,
+        filter: Optional[DynamoDbCondition] = None,
+    ) -> dict[str, Any]:
+        """
+        Build the arguments of a DynamoDB query call.
+
+        The arguments are the same as query_items.
+
+        :return: The arguments to pass to the DynamoDB query call.
+        :raise DynamoDBError: If the arguments are not valid.
+        """
+
+        # If only the sort key condition is passed in, the sort key key
+        # is looked up in the table metadata
+        if sort_key_key is None and sort_key_condition is not None:
+            sort_key_key = self._get_key_schema(table=table, index_name=index_name)['SortKeyKey']
+
+            if sort_key_key is None:
+                raise exceptions.DynamoDBError(
+                    f"sort_key_condition passed in but {index_name or table!r} has no SortKey."
+                )
+
+        key_exp, exp_att_names, exp_att_values = self._serializer.serialize_key_condition(
+            pk_key=partition_key_key,
+            pk_value=partition_key_value,
+            sk_key=sort_key_key,
+            sk_condition=sort_key_condition,
+            sk_value=sort_key_value,
+        )
+
+        ddb_query_args: dict[str, Any] = {
+            'TableName': table,
+            'KeyConditionExpression': key_exp,
+            'ExpressionAttributeNames': exp_att_names,
+            'ExpressionAttributeValues': exp_att_values,
+            'ScanIndexForward': ascending,
+        }
+
+        if index_name is not None:
+            ddb_query_args['IndexName'] = index_name
+
+        read_args = self._serializer.serialize_read_expressions(
+            projection=projection, filter_condition=filter
+        )
+        ddb_query_args['ExpressionAttributeNames'].update(
+            read_args.pop('ExpressionAttributeNames', {})
+        )
+        ddb_query_args['ExpressionAttributeValues'].update(
+            read_args.pop('ExpressionAttributeValues', {})
+        )
+        ddb_query_args.update(read_args)
+
+        return ddb_query_args
+
+    def _iter_pages(
+        self,
+        operation: Literal['scan', 'query'],
+        ddb_args: dict[str, Any],
+        capacity_limiter: Optional["_CapacityLimiter"] = None,
+    ) -> Generator[dict[str, Any], None, None]:
+        """
+        Call the DynamoDB scan or query operation and yield every raw
+        response page, following LastEvaluatedKey until the operation
+        is exhausted.
+
+        :param operation: The DynamoDB read operation to paginate.
+        :param ddb_args: The arguments to pass to the DynamoDB call.
+            The dictionary is copied and never mutated.
+        :param capacity_limiter: The limiter to use in place of the
+            capacity limit of the table. Default is None.
+        :return: Generator of raw DynamoDB response pages, with the
+            items of a compressed table decompressed.
+        :raise DynamoDBError: If any of the DynamoDB calls fail.
+        """
+
+        ddb_args = dict(ddb_args)
+        decompress_item = self._item_decompressor(table=ddb_args['TableName'])
+
+        while True:
+            try:
+                ddb_response = self._call_client(
+                    operation, 'read', capacity_limiter=capacity_limiter, **ddb_args
+                )
+
+            except botocore.exceptions.ClientError as ex:
+                raise exceptions.DynamoDBError(str(ex.response))
+
+            except Exception as ex:
+                raise exceptions.DynamoDBError(str(ex))
+
+            if decompress_item is not None and 'Items' in ddb_response:
+                ddb_response = {
+                    **ddb_response,
+                    'Items': [decompress_item(ddb_item) for ddb_item in ddb_response['Items']],
+                }
+
+            yield ddb_response
+
+            # If LastEvaluatedKey is present then we need to call again
+            # for more items
+            if ddb_response.get('LastEvaluatedKey'):
+                ddb_args['ExclusiveStartKey'] = ddb_response['LastEvaluatedKey']
+
+            # If no LastEvaluatedKey then we're done
+            else:
+                break
+
+    def _iter_prefetched_pages(
+        self,
+        operation: Literal['scan', 'query'],
+        ddb_args: dict[str, Any],
+        prefetch: int = 0,
+        capacity_limiter: Optional["_CapacityLimiter"] = None,
+    ) -> Generator[dict[str, Any], None, None]:
+        """
+        Same as _iter_pages, but the pages are requested on a background
+        thread up to prefetch pages ahead of the consumer, so the
+        network wait of the next page overlaps the processing of the
+        current one.
+
+        :param operation: The DynamoDB read operation to paginate.
+        :param ddb_args: The arguments to pass to the DynamoDB call.
+        :param prefetch: The maximum number of pages buffered ahead of
+            the consumer. Default is 0, which means no prefetch.
+        :param capacity_limiter: The limiter to use in place of the
+            capacity limit of the table. Default is None.
+        :return: Generator of raw DynamoDB response pages.
+        :raise DynamoDBError: If prefetch is not valid or any of the
+            DynamoDB calls fail.
+        """
+
+        if prefetch < 0:
+            raise exceptions.DynamoDBError("prefetch must be greater than or equal to 0.")
+
+        pages = functools.partial(
+            self._iter_pages,
+            operation=operation,
+            ddb_args=ddb_args,
+            capacity_limiter=capacity_limiter,
+        )
+
+        if prefetch == 0:
+            yield from pages()
+            return
+
+        yield from _iter_concurrently(
+            sources=[pages],
+            max_workers=1,
+            max_buffered=prefetch,
+        )
+
+    def _iter_scan_pages(
+        self,
+        ddb_scan_args: dict[str, Any],
+        total_segments: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        prefetch: int = 0,
+        segments_start: Optional[Mapping[int, Optional[dict[str, Any]]]] = None,
+        capacity_limiter: Optional["_CapacityLimiter"] = None,
+    ) -> Generator[tuple[int, dict[str, Any]], None, None]:
+        """
+        Scan the table and yield the raw response pages, each with the
+        segment it belongs to.
+
+        If total_segments is passed in, run a DynamoDB parallel scan
+        and yield the pages of all the segments as soon as they are
+        received, otherwise scan the table sequentially as segment 0.
+
+        :param ddb_scan_args: The arguments to pass to the DynamoDB scan
+            call, without Segment and TotalSegments.
+        :param total_segments: The number of segments to split the
+            table into. Default is None, which means the table is
+            scanned sequentially.
+        :param max_workers: The maximum number of segments scanned at
+            the same time. Default is None, which means one worker per
+            segment.
+        :param prefetch: The maximum number of pages buffered ahead of
+            the consumer. Default is 0, which means no prefetch when
+            scanning sequentially and one page per worker when scanning
+            in parallel.
+        :param segments_start: The segments to scan, each with the
+            ExclusiveStartKey to start from, or None to start from the
+            beginning. Default is None, which means all the segments
+            from the beginning.
+        :param capacity_limiter: The limiter to use in place of the
+            capacity limit of the table. Default is None.
+        :return: Generator of tuples of segment and raw DynamoDB
+            response page.
+        :raise DynamoDBError: If the arguments are not valid or any of
+            the DynamoDB calls fail.
+        """
+
+        if segments_start is None:
+            segments_start = dict.fromkeys(range(total_segments or 1))
+
+        def _segment_args(segment: int) -> dict[str, Any]:
+            segment_args = dict(ddb_scan_args)
+
+            if total_segments is not None:
+                segment_args['Segment'] = segment
+                segment_args['TotalSegments'] = total_segments
+
+            if segments_start[segment] is not None:
+                segment_args['ExclusiveStartKey'] = segments_start[segment]
+
+            return segment_args
+
+        def _segment_pages(segment: int) -> Generator[tuple[int, dict[str, Any]], None, None]:
+            for ddb_response in self._iter_pages(
+                operation='scan',
+                ddb_args=_segment_args(segment),
+                capacity_limiter=capacity_limiter,
+            ):
+                yield segment, ddb_response
+
+        if total_segments is None:
+            if 0 in segments_start:
+                for ddb_response in self._iter_prefetched_pages(
+                    operation='scan',
+                    ddb_args=_segment_args(0),
+                    prefetch=prefetch,
+                    capacity_limiter=capacity_limiter,
+                ):
+                    yield 0, ddb_response
+            return
+
+        if prefetch < 0:
+            raise exceptions.DynamoDBError("prefetch must be greater than or equal to 0.")
+
+        if total_segments < 1:
+            raise exceptions.DynamoDBError("total_segments must be greater than 0.")
+
+        if max_workers is not None and max_workers < 1:
+            raise exceptions.DynamoDBError("max_workers must be greater than 0.")
+
+        workers = min(max_workers or total_segments, total_segments)
+
+        segment_sources = [
+            functools.partial(_segment_pages, segment) for segment in sorted(segments_start)
+        ]
+
+        yield from _iter_concurrently(
+            sources=segment_sources, max_workers=workers, max_buffered=max(workers, prefetch)
+        )
+
+    def get_items_count(
+        self,
+        table: str,
+        *,
+        total_segments: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        approximate: bool = False,
+    ) -> int:
+        """
+        Returns the number of items in a table.
+
+        The items are counted server side with a COUNT scan, so no item
+        is transferred or deserialized, although the scan still
+        consumes read capacity for the whole table.
+
+        If approximate is True, the count is read from the table
+        description instead, which consumes no read capacity but is
+        only refreshed by DynamoDB approximately every six hours.
+
+        :param table: DynamoDB table name.
+        :param total_segments: The number of segments to split the
+            table into for a parallel count. Default is None, which
+            means the table is counted sequentially.
+        :param max_workers: The maximum number of segments counted at
+            the same time. Default is None, which means one worker per
+            segment.
+        :param approximate: If True, return the approximate ItemCount
+            from describe_table. Default is False.
+        :return: Item count.
+        :raise DynamoDBError: If count fails.
+        """
+
+        if approximate:
+            try:
+                with utils.retry(exception_to_check=Exception, delay_secs=1) as retryer:
+                    ddb_response = retryer(self._client.describe_table, TableName=table)
+
+            except botocore.exceptions.ClientError as ex:
+                raise exceptions.DynamoDBError(str(ex.response)) from None
+
+            except Exception as ex:
+                raise exceptions.DynamoDBError(str(ex)) from None
+
+            return int(ddb_response['Table'].get('ItemCount', 0))
+
+        ddb_scan_args: dict[str, Any] = {'TableName': table, 'Select': 'COUNT'}
+
+        running_total = 0
+
+        try:
+            for _, ddb_response in self._iter_scan_pages(
+                ddb_scan_args=ddb_scan_args,
+                total_segments=total_segments,
+                max_workers=max_workers,
+            ):
+                running_total += ddb_response.get('Count', 0)
+
+        except Exception as ex:
+            raise exceptions.DynamoDBError(str(ex)) from None
+
+        return running_total
+
+    def get_item(
+        self,
+        table: str,
+        partition_key_key: str,
+        partition_key_value: PartitionKeyValue,
+        sort_key_key: Optional[str] = None,
+        sort_key_value: Optional[SortKeyValue] = None,
+        projection: Optional[Iterable[str]] = None,
+    ) -> Optional[dict[str, AttributeValueDeserialized]]:
+        """
+        The get_item_from_table operation returns a dictionary of
+        deserialized attribute values for the item with the given
+        primary key. If there is no matching item, get_item_from_table
+        returns None.
+
+        :param table: DynamoDB table name.
+        :param partition_key_key: The key of the partition key.
+        :param partition_key_value: The value of the partition key.:
+        :param sort_key_key: The key of the sort key.
+        :param sort_key_value: The value of the sort key.
+        :param projection: The attribute paths to read, i.e.
+            ["id", "info.tags[0]"]. Default is None, which means all
+            the attributes are read.
+        :return: Deserialized item or None.
+        :raise DynamoDBError: If retrieval fails.
+        """
+
+        pk = self._serializer.serialize_p_key(
+            pk_key=partition_key_key,
+            pk_value=self._shard_partition_key_value(
+                table=table, partition_key_value=partition_key_value, sort_key_value=sort_key_value
+            ),
+            sk_key=sort_key_key,
+            sk_value=sort_key_value,
+        )
+
+        # Projected reads return partial items, so they bypass the
+        # item cache
+        use_item_cache = self._item_cache is not None and projection is None
+
+        if use_item_cache:
+            assert self._item_cache is not None
+            cache_key = (table, _item_identity(pk))
+            cached_item = self._item_cache.get(cache_key)
+
+            if cached_item is not None:
+                return self._unshard_item(
+                    table=table,
+                    partition_key_key=partition_key_key,
+                    item=self._serializer.deserialize_item(cached_item),
+                )
+
+            # Taken before the read, so an item invalidated by a write
+            # while it is being read is not cached
+            cache_generation = self._item_cache.generation
+
+        read_args = self._serializer.serialize_read_expressions(projection=projection)
+
+        try:
+            ddb_response = self._call_client(
+                'get_item', 'read', TableName=table, Key=pk, **read_args
+            )
+
+        except botocore.exceptions.ClientError as ex:
+            raise exceptions.DynamoDBError(str(ex.response)) from None
+
+        except Exception as ex:
+            raise exceptions.DynamoDBError(str(ex)) from None
+
+        ddb_item = ddb_response.get('Item')
+
+        if not ddb_item:
+            return None
+
+        # Decompressed once, before caching, so the cache hits don't
+        # decompress the item again
+        ddb_item = self._decompress_item(table=table, item_ser=ddb_item)
+
+        if use_item_cache:
+            assert self._item_cache is not None
+            self._item_cache.put(key=cache_key, item=ddb_item, generation=cache_generation)
+
+        # Convert the DynamoDB attribute values to deserialized values
+        response = self._serializer.deserialize_item(ddb_item)
+
+        return self._unshard_item(table=table, partition_key_key=partition_key_key, item=response)
+
+    def batch_get_items(
+        self,
+        table: str,
+        keys: Iterable[Mapping[str, Union[PartitionKeyValue, SortKeyValue]]],
+        *,
+        consistent_read: bool = False,
+        max_workers: int = 8,
+        projection: Optional[Iterable[str]] = None,
+    ) -> Generator[dict[str, AttributeValueDeserialized], None, None]:
+        """
+        Returns an Iterable of deserialized items for the given primary
+        keys, using BatchGetItem.
+
+        The keys are split into chunks of 100, the maximum allowed by
+        DynamoDB, and the chunks are requested concurrently. Keys that
+        DynamoDB returns as UnprocessedKeys are requested again with a
+        jittered exponential backoff. Duplicate keys within a chunk are
+        requested only once.
+        The items are yielded as soon as their chunk completes, so they
+        are not returned in the same order as the keys, and keys that
+        don't match any item are simply missing from the result.
+
+        :param table: DynamoDB table name.
+        :param keys: An iterable of primary keys, each as a dict of
+            {partition_key_key: value} or
+            {partition_key_key: value, sort_key_key: value}. The keys
+            of a sharded table hold the logical partition key value.
+        :param consistent_read: If True, use strongly consistent reads.
+            Default is False.
+        :param max_workers: The maximum number of chunks requested at
+            the same time. Default is 8.
+        :param projection: The attribute paths to read, i.e.
+            ["id", "info.tags[0]"]. Default is None, which means all
+            the attributes are read.
+        :return: Generator of deserialized items.
+            Iterable of dictionaries of all the columns in DynamoDB
+            i.e. {dynamodb_column_name: column_value, ...}
+        :raise DynamoDBError: If retrieval fails.
+        """
+
+        if max_workers < 1:
+            raise exceptions.DynamoDBError("max_workers must be greater than 0.")
+
+        read_args = self._serializer.serialize_read_expressions(projection=projection)
+
+        try:
+            pk_key = (
+                self.get_table_metadata(table=table)['PartitionKeyKey']
+                if table in self._write_shards
+                else None
+            )
+            decompress_item = self._item_decompressor(table=table)
+
+            for ddb_items in _map_concurrently(
+                func=functools.partial(
+                    self._batch_get_chunk,
+                    table=table,
+                    consistent_read=consistent_read,
+                    read_args=read_args,
+                ),
+                iterable=_chunked(keys, _BATCH_GET_ITEM_MAX_KEYS),
+                max_workers=max_workers,
+            ):
+                if pk_key is not None:
+                    ddb_items = [_unshard_ddb_item(ddb_item, pk_key) for ddb_item in ddb_items]
+
+                if decompress_item is not None:
+                    ddb_items = [decompress_item(ddb_item) for ddb_item in ddb_items]
+
+                # Convert the DynamoDB attribute values to deserialized
+                # values
+                yield from (self._serializer.deserialize_item(ddb_item) for ddb_item in ddb_items)
+
+        except Exception as ex:
+            raise exceptions.DynamoDBError(str(ex)) from None
+
+    def _batch_get_chunk(
+        self,
+        keys: Sequence[Mapping[str, Union[PartitionKeyValue, SortKeyValue]]],
+        table: str,
+        consistent_read: bool,
+        read_args: Mapping[str, Any],
+        shard_keys: bool = True,
+    ) -> list[dict[str, Any]]:
+        """
+        Read up to 100 items with a single BatchGetItem request and
+        request again any UnprocessedKeys until all of them are read.
+
+        :param keys: The primary keys to read, at most 100.
+        :param table: DynamoDB table name.
+        :param consistent_read: If True, use strongly consistent reads.
+        :param read_args: The ProjectionExpression and its
+            ExpressionAttributeNames, if any.
+        :param shard_keys: If True, the keys hold the logical partition
+            key value and are routed to their shard, otherwise they
+            hold the physical one. Default is True.
+        :return: The raw DynamoDB items read.
+        :raise DynamoDBError: If retrieval fails or some keys are still
+            unprocessed after the maximum number of attempts.
+        """
+
+        # Serialize the keys and drop the duplicates, as DynamoDB
+        # rejects the whole request if a key is repeated
+        keys_ser: dict[tuple[Any, ...], PartitionKeyItem] = {}
+        for key in keys:
+            if not 1 <= len(key) <= 2:
+                raise exceptions.DynamoDBError(
+                    f"Key {key!r} must contain the partition key and optionally the sort key."
+                )
+            key_ser: PartitionKeyItem = {
+                k: self._serializer.serialize_att(v) for k, v in key.items()  # type: ignore
+            }
+            # The items of a sharded table are read from their shard
+            if shard_keys:
+                key_ser = self._shard_item_ser(table=table, item_ser=key_ser)  # type: ignore
+            keys_ser.setdefault(_item_identity(key_ser), key_ser)
+
+        request_items: dict[str, Any] = {
+            table: {
+                'Keys': list(keys_ser.values()),
+                'ConsistentRead': consistent_read,
+                **read_args,
+            }
+        }
+        ddb_items: list[dict[str, Any]] = []
+
+        for attempt in range(_BATCH_MAX_ATTEMPTS):
+            try:
+                ddb_response = self._call_client(
+                    'batch_get_item', 'read', RequestItems=request_items
+                )
+
+            except botocore.exceptions.ClientError as ex:
+                raise exceptions.DynamoDBError(str(ex.response))
+
+            except Exception as ex:
+                raise exceptions.DynamoDBError(str(ex))
+
+            ddb_items.extend(ddb_response.get('Responses', {}).get(table, []))
+
+            request_items = ddb_response.get('UnprocessedKeys') or {}
+            if not request_items:
+                return ddb_items
+
+            module_logger.debug(
+                f"BatchGetItem on table: {table!r} returned"
+                f" {len(request_items[table]['Keys'])} unprocessed keys, retrying."
+            )
+            time.sleep(_backoff_delay(attempt))
+
+        raise exceptions.DynamoDBError(
+            f"BatchGetItem on table: {table!r} still had {len(request_items[table]['Keys'])}"
+            f" unprocessed keys after {_BATCH_MAX_ATTEMPTS} attempts."
+        )
+
+    def batch_write_items(
+        self,
+        table: str,
+        put: Optional[Iterable[Mapping[str, AttributeValue]]] = None,
+        delete: Optional[Iterable[Mapping[str, Union[PartitionKeyValue, SortKeyValue]]]] = None,
+        *,
+        max_workers: int = 8,
+    ) -> dict[str, Any]:
+        """
+        Puts and deletes many items using BatchWriteItem.
+
+        The requests are split into chunks of 25, the maximum allowed by
+        DynamoDB, and the chunks are sent concurrently. Requests that
+        DynamoDB returns as UnprocessedItems are sent again with a
+        jittered exponential backoff.
+        Unlike put_item, an item that already exists is overwritten, and
+        unlike atomic_writes, the writes are not transactional: a
+        failure is reported per item and doesn't stop the other writes.
+        DynamoDB rejects a chunk that contains the same primary key
+        more than once, so when a key is repeated within a chunk only
+        its last write is sent.
+
+        :param table: DynamoDB table name.
+        :param put: An iterable of items to put, each as a dict of all
+            the columns including the primary key
+            i.e. {column_name: column_value, ...}
+            The keys are normalized like in put_item.
+        :param delete: An iterable of primary keys to delete, each as a
+            dict of {partition_key_key: value} or
+            {partition_key_key: value, sort_key_key: value}.
+        :param max_workers: The maximum number of chunks sent at the
+            same time. Default is 8.
+        :return: A report of the writes.
+            schema = {
+            'Put': "number of items put",
+            'Delete': "number of items deleted",
+            'Failed': "list of the failed writes, each as dict of
+            {'Operation': 'Put' | 'Delete', 'Item': item or key
+            deserialized, 'Error': error message}",
+            }
+        :raise DynamoDBError: If the arguments are not valid.
+        """
+
+        if max_workers < 1:
+            raise exceptions.DynamoDBError("max_workers must be greater than 0.")
+
+        write_requests = itertools.chain(
+            (
+                {
+                    'PutRequest': {
+                        'Item': self._shard_item_ser(
+                            table=table,
+                            item_ser=self._compress_item(
+                                table=table, item_ser=self._serializer.serialize_put_items(**item)
+                            ),
+                            random_shard=True,
+                        )
+                    }
+                }
+                for item in put or []
+            ),
+            (
+                {
+                    'DeleteRequest': {
+                        'Key': self._shard_item_ser(
+                            table=table,
+                            item_ser={k: self._serializer.serialize_att(v) for k, v in key.items()},
+                        )
+                    }
+                }
+                for key in delete or []
+            ),
+        )
+
+        table_metadata = self.get_table_metadata(table=table)
+        key_keys = [table_metadata['PartitionKeyKey']]
+        if table_metadata['SortKeyKey'] is not None:
+            key_keys.append(table_metadata['SortKeyKey'])
+
+        report: dict[str, Any] = {'Put': 0, 'Delete': 0, 'Failed': []}
+
+        for processed, failed in _map_concurrently(
+            func=functools.partial(self._batch_write_chunk, table=table, key_keys=key_keys),
+            iterable=_chunked(write_requests, _BATCH_WRITE_ITEM_MAX_REQUESTS),
+            max_workers=max_workers,
+        ):
+            report['Put'] += processed['Put']
+            report['Delete'] += processed['Delete']
+            report['Failed'].extend(failed)
+
+        if report['Failed']:
+            module_logger.warning(
+                f"BatchWriteItem on table: {table!r} failed for {len(report['Failed'])} items."
+            )
+
+        return report
+
+    def _batch_write_chunk(
+        self,
+        write_requests: Sequence[dict[str, Any]],
+        table: str,
+        key_keys: Sequence[str],
+        capacity_limiter: Optional["_CapacityLimiter"] = None,
+    ) -> tuple[dict[str, int], list[dict[str, Any]]]:
+        """
+        Write up to 25 items with a single BatchWriteItem request and
+        send again any UnprocessedItems until all of them are written.
+
+        :param write_requests: The serialized PutRequest and
+            DeleteRequest to send, at most 25.
+        :param table: DynamoDB table name.
+        :param key_keys: The keys of the primary key of the table, used
+            to keep only the last write of a repeated key.
+        :param capacity_limiter: The limiter to use in place of the
+            capacity limit of the table. Default is None.
+        :return: A tuple with the number of items put and deleted as
+            dict of {'Put': int, 'Delete': int}, and the list of the
+            failed writes, including the writes missing a primary key
+            attribute.
+        """
+
+        processed = {'Put': 0, 'Delete': 0}
+        invalid_writes: list[dict[str, Any]] = []
+
+        # DynamoDB rejects the whole request if a key is repeated, so
+        # only the last write of each key is sent, as the previous ones
+        # would be overwritten anyway
+        latest_writes: dict[tuple[Any, ...], dict[str, Any]] = {}
+        keys_ser: list[dict[str, Any]] = []
+        for write_request in write_requests:
+            item_ser = write_request.get('PutRequest', {}).get('Item') or write_request.get(
+                'DeleteRequest', {}
+            ).get('Key', {})
+
+            # A write without its full primary key would share the
+            # identity of the other incomplete writes and replace them
+            missing_keys = [key for key in key_keys if key not in item_ser]
+            if missing_keys:
+                invalid_writes.extend(
+                    self._batch_write_failures(
+                        [write_request],
+                        f"Primary key attributes: {missing_keys} missing.",
+                        table=table,
+                    )
+                )
+                continue
+
+            key_ser = {key: item_ser[key] for key in key_keys}
+            keys_ser.append(key_ser)
+            write_key = _item_identity(key_ser)
+
+            if write_key in latest_writes:
+                superseded = latest_writes.pop(write_key)
+                processed['Put' if 'PutRequest' in superseded else 'Delete'] += 1
+
+            latest_writes[write_key] = write_request
+
+        pending = list(latest_writes.values())
+
+        if not pending:
+            return processed, invalid_writes
+
+        try:
+            for attempt in range(_BATCH_MAX_ATTEMPTS):
+                try:
+                    ddb_response = self._call_client(
+                        'batch_write_item',
+                        'write',
+                        capacity_limiter=capacity_limiter,
+                        RequestItems={table: pending},
+                    )
+
+                except botocore.exceptions.ClientError as ex:
+                    return processed, invalid_writes + self._batch_write_failures(
+                        pending, str(ex.response), table=table
+                    )
+
+                except Exception as ex:
+                    return processed, invalid_writes + self._batch_write_failures(
+                        pending, str(ex), table=table
+                    )
+
+                unprocessed = ddb_response.get('UnprocessedItems', {}).get(table, [])
+
+                for write_request in pending:
+                    if write_request not in unprocessed:
+                        processed['Put' if 'PutRequest' in write_request else 'Delete'] += 1
+
+                if not unprocessed:
+                    return processed, invalid_writes
+
+                module_logger.debug(
+                    f"BatchWriteItem on table: {table!r} returned {len(unprocessed)} unprocessed"
+                    " items, retrying."
+                )
+                pending = unprocessed
+                time.sleep(_backoff_delay(attempt))
+
+            return processed, invalid_writes + self._batch_write_failures(
+                pending, f"Still unprocessed after {_BATCH_MAX_ATTEMPTS} attempts.", table=table
+            )
+
+        finally:
+            # Whether the writes succeed or not, the cached items may
+            # be stale, they are invalidated once the writes are done
+            # so a read made while they are in flight is not cached
+            self._invalidate_cached_keys(table=table, keys_ser=keys_ser)
+
+    def _batch_write_failures(
+        self, write_requests: Iterable[dict[str, Any]], error: str, table: str
+    ) -> list[dict[str, Any]]:
+        """
+        Build the failure report of the given write requests.
+
+        :param write_requests: The serialized PutRequest and
+            DeleteRequest that failed.
+        :param error: The error message.
+        :param table: DynamoDB table name, used to report the logical
+            partition key values of a sharded table.
+        :return: A list of failed writes.
+        """
+
+        failures: list[dict[str, Any]] = []
+        pk_key = (
+            self.get_table_metadata(table=table)['PartitionKeyKey']
+            if table in self._write_shards
+            else None
+        )
+        decompress_item = self._item_decompressor(table=table)
+
+        for write_request in write_requests:
+            if 'PutRequest' in write_request:
+                operation, item_ser = 'Put', write_request['PutRequest']['Item']
+            else:
+                operation, item_ser = 'Delete', write_request['DeleteRequest']['Key']
+
+            if decompress_item is not None:
+                item_ser = decompress_item(item_ser)
+
+            item = self._serializer.deserialize_item(item_ser)
+            if pk_key is not None:
+                self._unshard_item(table=table, partition_key_key=pk_key, item=item)
+
+            failures.append({'Operation': operation, 'Item': item, 'Error': error})
+
+        return failures
+
+    def buffered_writer(
+        self,
+        table: str,
+        *,
+        flush_items: int = 100,
+        max_age_secs: float = 1.0,
+        max_buffered_items: int = 10_000,
+        max_workers: int = 4,
+        on_failure: Optional[Callable[[list[dict[str, Any]]], None]] = None,
+    ) -> "DynamoDbBufferedWriter":
+        """
+        Returns a write-behind writer that buffers puts and deletes and
+        writes them to the table with BatchWriteItem on a background
+        thread, so the callers don't wait for DynamoDB.
+
+        See DynamoDbBufferedWriter.
+
+        :param table: DynamoDB table name.
+        :param flush_items: The number of buffered writes that triggers
+            a flush. Default is 100.
+        :param max_age_secs: The maximum time in seconds a write waits
+            in the buffer. Default is 1.
+        :param max_buffered_items: The number of buffered writes above
+            which put and delete block until the buffer is flushed.
+            Default is 10,000.
+        :param max_workers: The maximum number of BatchWriteItem
+            requests sent at the same time. Default is 4.
+        :param on_failure: A callable receiving the failed writes of
+            every flush. Default is None, which means close raises if
+            any write failed.
+        :return: The buffered writer, to be used as a context manager
+            or closed explicitly.
+        :raise DynamoDBError: If the arguments are not valid or the
+            table metadata can't be retrieved.
+        """
+
+        return DynamoDbBufferedWriter(
+            dynamodb=self,
+            table=table,
+            flush_items=flush_items,
+            max_age_secs=max_age_secs,
+            max_buffered_items=max_buffered_items,
+            max_workers=max_workers,
+            on_failure=on_failure,
+        )
+
+    def prepare_update(
+        self,
+        table: str,
+        partition_key_key: str,
+        attributes: Sequence[str],
+        *,
+        sort_key_key: Optional[str] = None,
+        condition_attribute_key: Optional[str] = None,
+        upsert: bool = False,
+    ) -> "DynamoDbUpdatePlan":
+        """
+        Returns a prepared update of a fixed set of attributes, for hot
+        paths updating the same attributes of many items.
+
+        The UpdateExpression, ExpressionAttributeNames and
+        ConditionExpression are built once, and every execution of the
+        plan only serializes the key and the values. See
+        DynamoDbUpdatePlan.
+
+        :param table: DynamoDB table name.
+        :param partition_key_key: The key of the partition key.
+        :param attributes: The names of the attributes to update.
+        :param sort_key_key: The key of the sort key.
+        :param condition_attribute_key: The name of the attribute that
+            must match the condition value passed to every execution.
+            Default is None, which means no condition.
+        :param upsert: If True, the plan behaves like upsert_item and
+            creates the items that don't exist, otherwise like
+            update_item. Default is False.
+        :return: The update plan.
+        :raise DynamoDBError: If no attributes are passed.
+        """
+
+        return DynamoDbUpdatePlan(
+            dynamodb=self,
+            table=table,
+            partition_key_key=partition_key_key,
+            attributes=attributes,
+            sort_key_key=sort_key_key,
+            condition_attribute_key=condition_attribute_key,
+            upsert=upsert,
+        )
+
+    def put_item(
+        self,
+        table: str,
+        partition_key_key: str,
+        partition_key_value: Optional[PartitionKeyValue] = None,
+        sort_key_key: Optional[str] = None,
+        sort_key_value: Optional[SortKeyValue] = None,
+        auto_generate_partition_key_value: Optional[bool] = False,
+        **items: AttributeValue,
+    ) -> dict[str, AttributeValueDeserialized]:
+        """
+        Creates a new item. If an item that has the same primary key as
+        the new item already exists in the specified table, the
+        operation will fail.
+
+        :param table: DynamoDB table name.
+        :param partition_key_key: The key of the partition key.
+        :param partition_key_value: The value of the partition key.
+        :param sort_key_key: The key of the sort key.
+        :param sort_key_value: The value of the sort key.
+        :param auto_generate_partition_key_value: If set to True, this
+            option instructs DynamoDB to automatically generate a
+            partition key value based on a counter mechanism.
+            For this to work, your table must contain a special item
+            with its partition key value set to '__PK_VALUE_COUNTER__'.
+            This item should have a numerical attribute named
+            'current_counter_value', which will be used and incremented
+            as the basis for generating new partition key values.
+        :param items: Additional items to add.
+        :return: The stored DynamoDB Item deserialized.
+        :raise DynamoDBError: If operation fails.
+        :raise DynamoDBConflictError: If put item fails due to a
+            conflict.
+        """
+
+        if partition_key_value is not None and auto_generate_partition_key_value is True:
+            raise exceptions.DynamoDBError(
+                "If auto_generate_partition_key_value is enabled, a partition_key_value MUST NOT be"
+                " passed in."
+            )
+
+        elif table in self._write_shards and auto_generate_partition_key_value is True:
+            raise exceptions.DynamoDBError(
+                "auto_generate_partition_key_value can't be used with a sharded table."
+            )
+
+        elif partition_key_value is None and auto_generate_partition_key_value is False:
+            raise exceptions.DynamoDBError(
+                "If auto_generate_partition_key_value is disabled, a partition_key_value MUST be"
+                " passed in."
+            )
+
+        elif partition_key_value is not None and auto_generate_partition_key_value is False:
+            # If we don't need to increment the counter we just put the
+            # item in the table
+            try:
+                item_put = self._put_single_item(
+                    table=table,
+                    partition_key_key=partition_key_key,
+                    partition_key_value=self._shard_partition_key_value(
+                        table=table,
+                        partition_key_value=partition_key_value,
+                        sort_key_value=sort_key_value,
+                        random_shard=sort_key_key is None,
+                    ),
+                    sort_key_key=sort_key_key,
+                    sort_key_value=sort_key_value,
+                    **items,
+                )
+
+            except Exception as ex:
+                raise exceptions.DynamoDBError(str(ex)) from None
+
+        elif (
+            partition_key_value is None
+            and auto_generate_partition_key_value is True
+            and self._pk_value_allocator is not None
+        ):
+            # If the counter values are allocated in blocks we take the
+            # next value of the block and just put the item in the
+            # table
+            try:
+                item_put = self._put_single_item(
+                    table=table,
+                    partition_key_key=partition_key_key,
+                    partition_key_value=self._next_auto_generated_pk_value(table=table),
+                    sort_key_key=sort_key_key,
+                    sort_key_value=sort_key_value,
+                    **items,
+                )
+
+            except Exception as ex:
+                raise exceptions.DynamoDBError(str(ex)) from None
+
+        elif partition_key_value is None and auto_generate_partition_key_value is True:
+            # If we need to increment the counter we do it with an
+            # atomic write
+            # Put new item
+            put_in_db: list[dict[str, AttributeValue]] = [
+                {
+                    'TableName': table,
+                    'PartitionKeyKey': partition_key_key,
+                    'AutoGeneratePartitionKeyValue': True,
+                    'Items': items,
+                },
+            ]
+
+            atomic_write_response = self.atomic_writes(put=put_in_db)
+
+            # If we get here it means that the item has been added
+            # successfully therefore we return it
+            item_put = atomic_write_response['Put'][0]
+
+        else:
+            raise exceptions.DynamoDBError(
+                "Unable to determine a valid operation with the provided 'partition_key_value' and"
+                " 'auto_generate_partition_key_value'."
+            )
+
+        return self._unshard_item(table=table, partition_key_key=partition_key_key, item=item_put)
+
+    def update_item(
+        self,
+        table: str,
+        partition_key: dict[str, PartitionKeyValue],
+        sort_key: Optional[dict[str, SortKeyValue]] = None,
+        condition_attribute: Optional[dict[str, Any]] = None,
+        **items: AttributeValue,
+    ) -> dict[str, AttributeValueDeserialized]:
+        """
+        Performs a strict update on an existing item in DynamoDB.
+
+        This method enforces that the item with the specified partition
+        key must already exist before updating. If the item does not
+        exist, or if any specified condition does not match, the update
+        fails with a `DynamoDBConflictError`. No new item is created in
+        this scenario.
+
+        Edits an existing item’s attributes. If
+        condition_attribute_value is passed, the item will be updated
+        only if condition_attribute_value is a match with the value
+        stored in DynamoDB.
+
+        :param table: DynamoDB table name.
+        :param partition_key: DynamoDB partition key as dict of
+            partition_key {key: value}.
+        :param sort_key: DynamoDB sort key as dict of sort_key
+            {key: value}.
+        :param condition_attribute: DynamoDB attribute to matched as
+            dict of attribute_to_match {key: value}. When sent to
+            DynamoDB, the attribute will be as a condition to match.
+        :param items: Values for items to be updated.
+        :return: The updated DynamoDB Item deserialized.
+        :raise DynamoDBError: If update fails.
+        :raise DynamoDBConflictError: If update fails due to a conflict.
+        """
+
+        # items is an optional parameter by default as using the **
+        # However, if no values are passed as **items we raise an
+        # exception as there is nothing to update
+        if not items:
+            raise exceptions.DynamoDBError(
+                "No values to update were passed to the DynamoDB update_item_in_table method."
+            )
+
+        # Initialize a dictionary with all the arguments to pass into
+        # the DynamoDB update_item call
+        ddb_update_item_args: dict[str, Any] = {
+            'TableName': table,
+            'ReturnValues': 'ALL_OLD',
+        }
+
+        # Serialize partition key
+        pk_key, pk_value = next(iter(partition_key.items()))
+        sk_key, sk_value = next(iter(sort_key.items())) if sort_key is not None else (None, None)
+        pk_value = self._shard_partition_key_value(
+            table=table, partition_key_value=pk_value, sort_key_value=sk_value
+        )
+
+        pk_ser = self._serializer.serialize_p_key(
+            pk_key=pk_key, pk_value=pk_value, sk_key=sk_key, sk_value=sk_value
+        )
+
+        # Serialize attributes
+        exp, exp_att_names, exp_att_values = self._serializer.serialize_update_items(**items)
+        exp_att_values = self._compress_update_values(table=table, exp_att_values=exp_att_values)
+
+        # Build a condition expression for “strict update”
+        ddb_update_item_args.update({'ConditionExpression': f"attribute_exists(#{pk_key})"})
+        exp_att_names.update({f"#{pk_key}": pk_key})
+
+        # Check if a condition is required
+        if condition_attribute is not None:
+            # Unpack condition attribute dictionary
+            # We cant mutate the original dictionary because of the
+            # retry decorator will need to run through it again in case
+            # of failure
+            cond_att_key, cond_att_value = next(iter(condition_attribute.items()))
+
+            # If condition attribute exists pass it to the DynamoDB call
+            ddb_update_item_args.update({
+                'ConditionExpression': (
+                    f"{ddb_update_item_args['ConditionExpression']} AND"
+                    f" #{cond_att_key} = :condition_attribute_value_placeholder"
+                )
+            })
+
+            # #condition_attribute_key has to be passed
+            # along the ExpressionAttributeNames because is used by the
+            # ConditionExpression
+            exp_att_names[f"#{cond_att_key}"] = cond_att_key
+
+            # :condition_attribute_value_placeholder has to be passed
+            # along the ExpressionAttributeValues because is used by the
+            # ConditionExpression
+            exp_att_values[':condition_attribute_value_placeholder'] = (
+                self._serializer.serialize_att(cond_att_value)
+            )
+
+        # Update DynamoDB call arguments
+        ddb_update_item_args['Key'] = pk_ser
+        ddb_update_item_args['UpdateExpression'] = exp
+        ddb_update_item_args['ExpressionAttributeNames'] = exp_att_names
+        ddb_update_item_args['ExpressionAttributeValues'] = exp_att_values
+
+        return self._send_update_item(
+            table=table, ddb_update_item_args=ddb_update_item_args, items=items
+        )
+
+    def upsert_item(
+        self,
+        table: str,
+        partition_key: dict[str, PartitionKeyValue],
+        sort_key: Optional[dict[str, SortKeyValue]] = None,
+        condition_attribute: Optional[dict[str, Any]] = None,
+        **items: AttributeValue,
+    ) -> dict[str, AttributeValueDeserialized]:
+        """
+        Upsert-like operation.
+
+        1. Tries to update an existing item (strict update).
+        2. If that update fails because the item does not exist, it
+            puts a brand-new item.
+
+        :param table: DynamoDB table name.
+        :param partition_key: DynamoDB partition key as dict of
+            partition_key {key: value}.
+        :param sort_key: DynamoDB sort key as dict of sort_key
+            {key: value}.
+        :param condition_attribute: DynamoDB attribute to matched as
+            dict of attribute_to_match {key: value}. When sent to
+            DynamoDB, the attribute will be as a condition to match.
+        :param items: Values for items to be updated.
+        :return: The updated DynamoDB Item deserialized.
+        :raise DynamoDBError: If update fails.
+        :raise DynamoDBConflictError: If update fails due to a conflict.
+        """
+
+        # items is an optional parameter by default as using the **
+        # However, if no values are passed as **items we raise an
+        # exception as there is nothing to update
+        if not items:
+            raise exceptions.DynamoDBError(
+                "No values to update were passed to the DynamoDB update_item_in_table method."
+            )
+
+        # Initialize a dictionary with all the arguments to pass into
+        # the DynamoDB update_item call
+        ddb_update_item_args: dict[str, Any] = {
+            'TableName': table,
+            'ReturnValues': 'ALL_OLD',
+        }
+
+        # Serialize partition key
+        pk_key, pk_value = next(iter(partition_key.items()))
+        sk_key, sk_value = next(iter(sort_key.items())) if sort_key is not None else (None, None)
+        pk_value = self._shard_partition_key_value(
+            table=table, partition_key_value=pk_value, sort_key_value=sk_value
+        )
+
+        pk_ser = self._serializer.serialize_p_key(
+            pk_key=pk_key, pk_value=pk_value, sk_key=sk_key, sk_value=sk_value
+        )
+
+        # Serialize attributes
+        exp, exp_att_names, exp_att_values = self._serializer.serialize_update_items(**items)
+        exp_att_values = self._compress_update_values(table=table, exp_att_values=exp_att_values)
+
+        # Check if a condition is required
+        if condition_attribute is not None:
+            # Unpack condition attribute dictionary
+            # We cant mutate the original dictionary because of the
+            # retry decorator will need to run through it again in case
+            # of failure
+            cond_att_key, cond_att_value = next(iter(condition_attribute.items()))
+
+            # If condition attribute exists pass it to the DynamoDB call
+            ddb_update_item_args.update(
+                {'ConditionExpression': f"#{cond_att_key} = :condition_attribute_value_placeholder"}
+            )
+
+            # #condition_attribute_key has to be passed
+            # along the ExpressionAttributeNames because is used by the
+            # ConditionExpression
+            exp_att_names[f"#{cond_att_key}"] = cond_att_key
+
+            # :condition_attribute_value_placeholder has to be passed
+            # along the ExpressionAttributeValues because is used by the
+            # ConditionExpression
+            exp_att_values[':condition_attribute_value_placeholder'] = (
+                self._serializer.serialize_att(cond_att_value)
+            )
+
+        # Update DynamoDB call arguments
+        ddb_update_item_args['Key'] = pk_ser
+        ddb_update_item_args['UpdateExpression'] = exp
+        ddb_update_item_args['ExpressionAttributeNames'] = exp_att_names
+        ddb_update_item_args['ExpressionAttributeValues'] = exp_att_values
+
+        return self._send_update_item(
+            table=table, ddb_update_item_args=ddb_update_item_args, items=items
+        )
+
+    def _send_update_item(
+        self,
+        table: str,
+        ddb_update_item_args: dict[str, Any],
+        items: Mapping[str, AttributeValue],
+    ) -> dict[str, AttributeValueDeserialized]:
+        """
+        Send an UpdateItem request built by update_item, upsert_item or
+        an update plan, and return the updated item.
+
+        :param table: DynamoDB table name.
+        :param ddb_update_item_args: The arguments of the update_item
+            call, including the serialized Key.
+        :param items: Values for items updated.
+        :return: The updated DynamoDB Item deserialized.
+        :raise DynamoDBError: If update fails.
+        :raise DynamoDBConflictError: If update fails due to a conflict.
+        """
+
+        pk_ser = ddb_update_item_args['Key']
+
+        module_logger.debug(ddb_update_item_args)
+
+        try:
+            ddb_response = self._call_client('update_item', 'write', **ddb_update_item_args)
+
+        except botocore.exceptions.ClientError as ex:
+            if "ConditionalCheckFailed" in str(ex):
+                raise exceptions.DynamoDBConflictError(str(ex.response)) from None
+            else:
+                raise exceptions.DynamoDBError(str(ex.response)) from None
+
+        except Exception as ex:
+            raise exceptions.DynamoDBError(str(ex)) from None
+
+        finally:
+            # A failed write may still have been applied, so the cached
+            # items are invalidated whatever the outcome
+            self._invalidate_cached_keys(table=table, keys_ser=[pk_ser])
+
+        # If we get here it means that the item has been updated
+        # successfully therefore we return it
+        item = self._decompress_item(table=table, item_ser=ddb_response.get('Attributes', {}))
+        item_deser = {key: self._serializer.deserialize_att(value) for key, value in item.items()}
+        pk_key, pk_value, sk_key, sk_value = self._serializer.deserialize_p_key(pk_ser)
+        updated_item = {**item_deser, **items, **{pk_key: pk_value}}
+        if sk_key is not None:
+            updated_item.update({sk_key: sk_value})
+
+        # Because the **items in the updated_item dict is not serialized
+        # we need to normalize the whole dict before returning a dict of
+        # type dict[str, AttributeValueDeserialized]
+        updated_item_deser = self._serializer.normalize_item(updated_item)
+
+        return self._unshard_item(table=table, partition_key_key=pk_key, item=updated_item_deser)
+
+    def delete_item(
+        self,
+        table: str,
+        partition_key_key: str,
+        partition_key_value: Union[PartitionKeyValue, Iterable[PartitionKeyValue]],
+        sort_key_key: Optional[str] = None,
+        sort_key_value: Optional[Union[SortKeyValue, Iterable[SortKeyValue]]] = None,
+    ) -> list[dict[str, AttributeValueDeserialized]]:
+        """
+        Deletes item(s) in a table by primary key.
+
+        If a single partition key value is provided, it deletes the
+        corresponding item. If multiple partition key values are
+        provided, it deletes all the corresponding items.
+
+        :param table: DynamoDB table name.
+        :param partition_key_key: The key of the partition key.
+        :param partition_key_value: The value or an iterable of values
+            of the partition key of the item or items to delete from
+            DynamoDB.
+        :param sort_key_key: The key of the sort key.
+        :param sort_key_value: The value or an iterable of values
+            of the sort key of the item or items to delete from
+            DynamoDB.
+        :return: A list of deleted DynamoDB Items deserialized.
+        :raise DynamoDBError: If deletion fails.
+        """
+
+        if (sort_key_key is None) ^ (sort_key_value is None):
+            raise exceptions.DynamoDBError(
+                "Both sort_key_key and sort_key_value must be provided or both must be None."
+            )
+        has_sk = sort_key_key is not None and sort_key_value is not None
+
+        # Check if it's only one item to delete or many
+        pk_values: list[PartitionKeyValue] = []
+        if isinstance(partition_key_value, (str, bytes, int, float)):
+            pk_values.append(partition_key_value)
+        else:
+            pk_values.extend(partition_key_value)
+
+        sk_values: list[Optional[SortKeyValue]] = []
+        if has_sk:
+            assert sort_key_value is not None
+            if isinstance(sort_key_value, (str, bytes, int, float)):
+                sk_values.append(sort_key_value)
+            else:
+                sk_values.extend(sort_key_value)
+        else:
+            sk_values.extend([None] * len(pk_values))
+
+        if len(pk_values) != len(sk_values):
+            raise exceptions.DynamoDBError(
+                "The number of partition key values and sort key values must be the same."
+            )
+
+        # Prepare response list
+        response: list[dict[str, AttributeValueDeserialized]] = []
+
+        for pk_val, sk_val in zip(pk_values, sk_values):
+            pk_val = self._shard_partition_key_value(
+                table=table, partition_key_value=pk_val, sort_key_value=sk_val
+            )
+            pk_ser = self._serializer.serialize_p_key(
+                pk_key=partition_key_key, pk_value=pk_val, sk_key=sort_key_key, sk_value=sk_val
+            )
+
+            # Initialize a dictionary with all the arguments to pass
+            # into the DynamoDB delete_item call
+            ddb_delete_item_args: dict[str, Any] = {
+                'TableName': table,
+                'Key': pk_ser,
+                'ReturnValues': 'ALL_OLD',
+            }
+
+            try:
+                ddb_response = self._call_client('delete_item', 'write', **ddb_delete_item_args)
+
+            except botocore.exceptions.ClientError as ex:
+                raise exceptions.DynamoDBError(str(ex.response)) from None
+
+            except Exception as ex:
+                raise exceptions.DynamoDBError(str(ex)) from None
+
+            finally:
+                # A failed write may still have been applied, so the
+                # cached items are invalidated whatever the outcome
+                self._invalidate_cached_keys(table=table, keys_ser=[pk_ser])
+
+            # If we get here it means that the item has been deleted
+            # successfully therefore we return it
+            item = self._decompress_item(table=table, item_ser=ddb_response.get('Attributes', {}))
+            item_deser = {
+                key: self._serializer.deserialize_att(value) for key, value in item.items()
+            }
+            pk_key, pk_value, sk_key, sk_value = self._serializer.deserialize_p_key(pk_ser)
+            deleted_item = {**item_deser, **{pk_key: pk_value}}
+            if sk_key is not None:
+                deleted_item.update({sk_key: sk_value})
+
+            response.append(
+                self._unshard_item(table=table, partition_key_key=pk_key, item=deleted_item)
+            )
+
+        return response
+
+    def delete_item_att(
+        self,
+        table: str,
+        partition_key_key: str,
+        partition_key_value: PartitionKeyValue,
+        attributes_to_delete: Iterable[str],
+        sort_key_key: Optional[str] = None,
+        sort_key_value: Optional[SortKeyValue] = None,
+    ) -> dict[str, AttributeValueDeserialized]:
+        """
+        Deletes item specific values in a table by primary key.
+
+        :param table: DynamoDB table name.
+        :param partition_key_key: The key of the partition key.
+        :param partition_key_value: The value of the partition key.
+        :param sort_key_key: The key of the sort key.
+        :param sort_key_value: The value of the sort key.
+        :param attributes_to_delete: An iterable of specific attributes
+            that are to be deleted from DynamoDB.
+        :return: The updated DynamoDB Item deserialized.
+        :raise DynamoDBError: If deletion fails.
+        """
+
+        pk_ser = self._serializer.serialize_p_key(
+            pk_key=partition_key_key,
+            pk_value=self._shard_partition_key_value(
+                table=table, partition_key_value=partition_key_value, sort_key_value=sort_key_value
+            ),
+            sk_key=sort_key_key,
+            sk_value=sort_key_value,
+        )
+
+        att_updates: dict[str, type_defs.AttributeValueUpdateTypeDef] = {
+            item_value: {'Action': "DELETE"} for item_value in attributes_to_delete
+        }
+
+        ddb_update_item_args: dict[str, Any] = {
+            'TableName': table,
+            'Key': pk_ser,
+            'AttributeUpdates': att_updates,
+            'ReturnValues': 'ALL_NEW',
+        }
+
+        try:
+            ddb_response = self._call_client('update_item', 'write', **ddb_update_item_args)
+
+        except botocore.exceptions.ClientError as ex:
+            if "ConditionalCheckFailed" in str(ex):
+                raise exceptions.DynamoDBConflictError(str(ex.response)) from None
+            else:
+                raise exceptions.DynamoDBError(str(ex.response)) from None
+
+        except Exception as ex:
+            raise exceptions.DynamoDBError(str(ex)) from None
+
+        finally:
+            # A failed write may still have been applied, so the cached
+            # items are invalidated whatever the outcome
+            self._invalidate_cached_keys(table=table, keys_ser=[pk_ser])
+
+        # If we get here it means that the item has been updated
+        # successfully therefore we return it
+        item = self._decompress_item(table=table, item_ser=ddb_response.get('Attributes', {}))
+        item_deser = {key: self._serializer.deserialize_att(value) for key, value in item.items()}
+
+        return self._unshard_item(table=table, partition_key_key=partition_key_key, item=item_deser)
+
+    def atomic_writes(
+        self,
+        put: Optional[Iterable[dict[str, AttributeValue]]] = None,
+        update: Optional[Iterable[dict[str, AttributeValue]]] = None,
+        upsert: Optional[Iterable[dict[str, AttributeValue]]] = None,
+        delete: Optional[Iterable[dict[str, AttributeValue]]] = None,
+        condition_check: Optional[Iterable[dict[str, AttributeValue]]] = None,
+        **kwargs,
+    ) -> dict[str, list[dict[str, AttributeValueDeserialized]]]:
+        """
+        A synchronous write operation that groups up to 100 action
+        requests. These actions can target items in different tables.
+        The actions are completed atomically so that either all of them
+        succeed, or all of them fail.
+
+        :param put: Initiates a PutItem operation to write a new item.
+            schema = {
+            'TableName': "string DynamoDB Table Name",
+            'PartitionKeyKey': "string of the PartitionKey key",
+            'PartitionKeyValue': "OPTIONAL - partition key value",
+            'SortKeyKey': "OPTIONAL - string of the SortKey key",
+            'SortKeyValue': "OPTIONAL - sort key value",
+            'AutoGeneratePartitionKeyValue': "OPTIONAL - bool",
+            'Items': "dict containing all the items to put in DynamoDB",
+            }
+        :param update: Initiates an UpdateItem operation to update an
+            existing item.
+            schema = {
+            'TableName': "string DynamoDB Table Name",
+            'PartitionKey': "The partition key as dict of partition_key
+            {key: value}",
+            'SortKey': "OPTIONAL - The sort key as dict of sort_key
+            {key: value}",
+            'Items': "dict containing all the values for items to be
+            updated",
+            'ConditionAttribute': "OPTIONAL - attribute to matched
+            as dict of attribute_to_match {key: value}",
+            }
+        :param upsert: Initiates an UpdateOrInsertItem operation to
+            update an existing item or insert if not in the table.
+            schema = {
+            'TableName': "string DynamoDB Table Name",
+            'PartitionKey': "The partition key as dict of partition_key
+            {key: value}",
+            'SortKey': "OPTIONAL - The sort key as dict of sort_key
+            {key: value}",
+            'Items': "dict containing all the values for items to be
+            updated",
+            'ConditionAttribute': "OPTIONAL - attribute to matched
+            as dict of attribute_to_match {key: value}",
+            }
+        :param delete: Initiates a DeleteItem operation to delete an
+            existing item.
+            schema = {
+            'TableName': "string DynamoDB Table Name",
+            'PartitionKey': "The partition key as dict of partition_key
+            {key: value}",
+            'SortKey': "OPTIONAL - The sort key as dict of sort_key
+            {key: value}",
+            }
+        :param condition_check: Applies a condition to an item that is
+            not being modified by the transaction. The condition must
+            be satisfied for the transaction to succeed.
+            schema = {
+            'TableName': "string DynamoDB Table Name",
+            'PartitionKey': "The partition key as dict of partition_key
+            {key: value}",
+            'SortKey': "OPTIONAL - The sort key as dict of sort_key
+            {key: value}",
+            }
+        :return: A dictionary with keys
+            'Put', 'Update', 'Delete', 'ConditionCheck',
+            and a list of items writes to the DynamoDB in the same
+            order as they were passed in.
+            schema = {
+            'Put': "list of items writes to DynamoDB",
+            'Update': "list of items writes to DynamoDB",
+            'Upsert': "list of items writes to DynamoDB",
+            'Delete': "list of items writes to DynamoDB",
+            'ConditionCheck': "list of items writes to DynamoDB",
+            }
+        :raise DynamoDBError: If atomic writes fail.
+        :raise DynamoDBConflictError: If atomic writes fail due to a
+            conflict.
+        """
+
+        # Initialize missing arguments
+        put = put or {}
+        update = update or {}
+        upsert = upsert or {}
+        delete = delete or {}
+        condition_check = condition_check or {}
+
+        # Prepare the list of transactional items to be passed to the
+        # DynamoDB call
+        transact_items: list[type_defs.TransactWriteItemTypeDef] = []
+
+        # Prepare the response object
+        response: dict[str, list[dict[str, AttributeValueDeserialized]]] = {
+            'Put': [],
+            'Update': [],
+            'Upsert': [],
+            'Delete': [],
+            'ConditionCheck': [],
+        }
+
+        module_logger.debug(
+            f"Atomic Writes in Table initial request - Put: {put}, Update: {update}, Delete:"
+            f" {delete}, ConditionCheck: {condition_check}"
+        )
+
+        transact_items, response = self._atomic_writes_put(
+            put=put,
+            transact_items=transact_items,
+            response=response,
+        )
+
+        transact_items, response = self._atomic_writes_update(
+            update=update,
+            transact_items=transact_items,
+            response=response,
+        )
+
+        transact_items, response = self._atomic_writes_upsert(
+            upsert=upsert,
+            transact_items=transact_items,
+            response=response,
+        )
+
+        transact_items, response = self._atomic_writes_delete(
+            delete=delete,
+            transact_items=transact_items,
+            response=response,
+        )
+
+        transact_items, response = self._atomic_writes_condition_check(
+            condition_check=condition_check,
+            transact_items=transact_items,
+            response=response,
+        )
+
+        module_logger.debug(f"Atomic Writes in Table serialized request - {transact_items}")
+
+        # Make the DynamoDB atomic api call
+        try:
+            self._call_client(
+                'transact_write_items', 'write', TransactItems=transact_items, **kwargs
+            )
+
+        except botocore.exceptions.ClientError as ex:
+            if "ConditionalCheckFailed" in str(ex):
+                raise exceptions.DynamoDBConflictError(str(ex.response)) from None
+            else:
+                raise exceptions.DynamoDBError(str(ex.response)) from None
+
+        except Exception as ex:
+            raise exceptions.DynamoDBError(str(ex)) from None
+
+        finally:
+            # A failed write may still have been applied, so the cached
+            # items are invalidated whatever the outcome
+            self._invalidate_cached_transact_items(transact_items)
+
+        return response
+
+    def _atomic_writes_put(
+        self,
+        put: Iterable[dict[str, AttributeValue]],
+        transact_items: list[type_defs.TransactWriteItemTypeDef],
+        response: dict[str, list[dict[str, AttributeValueDeserialized]]],
+    ) -> tuple[
+        list[type_defs.TransactWriteItemTypeDef],
+        dict[str, list[dict[str, AttributeValueDeserialized]]],
+    ]:
+        """
+        A helper method to prepare the atomic writes for put items.
+
+        :param put: A list of put items.
+        :param transact_items:
+        :param response:
+        :return:
+        """
+
+        # Normalize each put item in the list for DynamoDB
+        # transactional call
+        for el in put:
+            assert isinstance(el['TableName'], str)
+            assert isinstance(el['Items'], Mapping)
+            assert isinstance(el['PartitionKeyKey'], str)
+
+            pk_value = el.get('PartitionKeyValue')
+            ag_pk_value = el.get('AutoGeneratePartitionKeyValue', False)
+
+            if pk_value is not None and ag_pk_value is True:
+                raise exceptions.DynamoDBError(
+                    "If AutoGeneratePartitionKeyValue is enabled, a PartitionKeyValue MUST NOT be"
+                    " passed in."
+                )
+
+            elif el['TableName'] in self._write_shards and ag_pk_value is True:
+                raise exceptions.DynamoDBError(
+                    "AutoGeneratePartitionKeyValue can't be used with a sharded table."
+                )
+
+            elif pk_value is not None and ag_pk_value is False:
+                # This is the case where we use el['PartitionKeyValue']
+                # as 'PartitionKeyValue'
+                pass
+
+            elif pk_value is None and ag_pk_value is True and self._pk_value_allocator is not None:
+                # This is the case where we auto generate the
+                # PartitionKeyValue from the block reserved in process,
+                # so the counter doesn't need to be updated in the
+                # transaction
+                auto_generate_pk_value: PartitionKeyValue = self._next_auto_generated_pk_value(
+                    table=el['TableName']
+                )
+
+            elif pk_value is None and ag_pk_value is True:
+                # This is the case where we auto generate the
+                # PartitionKeyValue
+                cur_counter, last_mod_timestamp = self._get_atomic_counter(table=el['TableName'])
+                new_counter = cur_counter + 1
+
+                # Check what is the type of the PartitionKey key of
+                # the table
+                pk_type = self._get_pk_type(table=el['TableName'])
+
+                if issubclass(pk_type, str):
+                    auto_generate_pk_value = str(new_counter)
+
+                elif issubclass(pk_type, bytes):
+                    auto_generate_pk_value = str(new_counter).encode()
+
+                elif issubclass(pk_type, float):
+                    auto_generate_pk_value = new_counter
+
+            elif pk_value is None and ag_pk_value is False:
+                raise exceptions.DynamoDBError(
+                    "If AutoGeneratePartitionKeyValue is disabled, a PartitionKeyValue MUST be"
+                    " passed in."
+                )
+
+            else:
+                raise exceptions.DynamoDBError(
+                    "Unable to determine a valid operation with the provided PartitionKeyValue and"
+                    " AutoGeneratePartitionKeyValue."
+                )
+
+            pk_value_resolved = el.get('PartitionKeyValue') or auto_generate_pk_value
+            assert isinstance(pk_value_resolved, (str, bytes, int, float))
+
+            if (el.get('SortKeyKey') is None) ^ (el.get('SortKeyValue') is None):
+                raise exceptions.DynamoDBError(
+                    "Both SortKeyKey and SortKeyValue must be provided or both must be None."
+                )
+            has_sk = el.get('SortKeyKey') is not None and el.get('SortKeyValue') is not None
+
+            sk: dict[str, PartitionKeyValue] = {}
+            if has_sk:
+                sk_key = el['SortKeyKey']
+                sk_value = el['SortKeyValue']
+                assert isinstance(sk_key, str)
+                assert isinstance(sk_value, (str, bytes, int, float))
+                sk = {sk_key: sk_value}
+
+            pk: dict[str, PartitionKeyValue] = {
+                el['PartitionKeyKey']: self._shard_partition_key_value(
+                    table=el['TableName'],
+                    partition_key_value=pk_value_resolved,
+                    sort_key_value=next(iter(sk.values()), None),
+                    random_shard=not has_sk,
+                )
+            }
+
+            # If we don't need to increment the counter we just put the
+            # item in the table
+            el_item_ser = self._serializer.serialize_put_items(**pk, **sk, **el['Items'])
+            el_put_ser: type_defs.PutTypeDef = {
+                'TableName': el['TableName'],
+                'Item': self._compress_item(table=el['TableName'], item_ser=el_item_ser),
+                'ConditionExpression': f"attribute_not_exists({el['PartitionKeyKey']})",
+            }
+
+            # Append the 'put' item to the DynamoDB atomic call
+            transact_items.append({'Put': el_put_ser})
+
+            # Append the 'put' item to the return list
+            response['Put'].append(
+                self._unshard_item(
+                    table=el['TableName'],
+                    partition_key_key=el['PartitionKeyKey'],
+                    item={
+                        key: self._serializer.deserialize_att(value)  # type: ignore
+                        for key, value in el_item_ser.items()
+                    },
+                )
+            )
+
+            # If we need to increment the counter we update the counter
+            if ag_pk_value and self._pk_value_allocator is None:
+                # Update the counter
+                counter_update_ser = self._set_atomic_counter(
+                    table=el['TableName'],
+                    counter_value=new_counter,
+                    last_modified_timestamp=last_mod_timestamp,
+                )
+
+                # Append the 'update' item to the DynamoDB atomic call
+                transact_items.append({'Update': counter_update_ser})
+
+                # Append the 'update' item to the return list
+                updated_item: dict[str, Any] = {
+                    key[1:-12]: self._serializer.deserialize_att(value)  # type: ignore
+                    for key, value in counter_update_ser['ExpressionAttributeValues'].items()
+                }
+                del updated_item['condition_attribute_value']
+                # Ignoring sk because _set_atomic_counter is not
+                # using it
+                p_key_k, p_key_v, *_ = self._serializer.deserialize_p_key(
+                    counter_update_ser['Key']  # type: ignore
+                )
+                updated_item[p_key_k] = p_key_v
+                response['Update'].append(updated_item)
+
+        return transact_items, response
+
+    def _atomic_writes_update(
+        self,
+        update: Iterable[dict[str, AttributeValue]],
+        transact_items: list[type_defs.TransactWriteItemTypeDef],
+        response: dict[str, list[dict[str, AttributeValueDeserialized]]],
+    ) -> tuple[
+        list[type_defs.TransactWriteItemTypeDef],
+        dict[str, list[dict[str, AttributeValueDeserialized]]],
+    ]:
+        # Normalize each update item in the list for DynamoDB
+        # transactional call
+        for el in update:
+            assert isinstance(el['TableName'], str)
+            assert isinstance(el['Items'], Mapping)
+            assert isinstance(el['PartitionKey'], MutableMapping)
+
+            pk_key, pk_value = next(iter(el['PartitionKey'].items()))
+            assert isinstance(pk_value, (str, bytes, int, float))
+
+            # Check if a sort_key is passed in
+            if el.get('SortKey') is not None:
+                # Unpack sort_key attribute dictionary
+                assert isinstance(el['SortKey'], MutableMapping)
+                sk_key, sk_value = next(iter(el['SortKey'].items()))
+                assert isinstance(sk_value, (str, bytes, int, float))
+            else:
+                sk_key, sk_value = (None, None)
+
+            pk_ser = self._serializer.serialize_p_key(
+                pk_key=pk_key,
+                pk_value=self._shard_partition_key_value(
+                    table=el['TableName'], partition_key_value=pk_value, sort_key_value=sk_value
+                ),
+                sk_key=sk_key,
+                sk_value=sk_value,
+            )
+
+            exp, exp_att_names, update_values_ser = self._serializer.serialize_update_items(
+                **el['Items']
+            )
+            exp_att_values = self._compress_update_values(
+                table=el['TableName'], exp_att_values=update_values_ser
+            )
+
+            # Build a condition expression for “strict update”
+            cond_exp = f"attribute_exists(#{pk_key})"
+            exp_att_names.update({f"#{pk_key}": pk_key})
+
+            el_update_ser: type_defs.UpdateTypeDef = {
+                'TableName': el['TableName'],
+                'Key': pk_ser,
+                'ConditionExpression': cond_exp,
+                'UpdateExpression': exp,
+                'ExpressionAttributeNames': exp_att_names,
+                'ExpressionAttributeValues': exp_att_values,
+            }
+
+            # Check if a condition is passed in
+            if el.get('ConditionAttribute') is not None:
+                # Unpack condition attribute dictionary
+                assert isinstance(el['ConditionAttribute'], MutableMapping)
+                # We cant mutate the original dictionary because of the
+                # retry decorator will need to run through it again in
+                # case of failure
+                cond_att_key, cond_att_value = next(iter(el['ConditionAttribute'].items()))
+
+                # If condition attribute exists pass it to the DynamoDB
+                # call
+                el_update_ser.update({
+                    'ConditionExpression': (
+                        f"{el_update_ser['ConditionExpression']} AND"
+                        f" #{cond_att_key} = :condition_attribute_value_placeholder"
+                    )
+                })
+
+                # #condition_att_key has to be passed
+                # along the ExpressionAttributeNames because is used by
+                # the ConditionExpression
+                exp_att_names[f"#{cond_att_key}"] = cond_att_key
+
+                # :condition_attribute_value_placeholder has to be
+                # passed along the ExpressionAttributeValues because
+                # is used by the ConditionExpression
+                exp_att_values[':condition_attribute_value_placeholder'] = (
+                    self._serializer.serialize_att(cond_att_value)
+                )
+
+            # Append the 'update' item to the DynamoDB atomic call
+            transact_items.append({'Update': el_update_ser})
+
+            # Append the 'update' item to the return list
+            # The values returned are the ones before compression
+            updated_item = {
+                key[1:-12]: self._serializer.deserialize_att(value)
+                for key, value in update_values_ser.items()
+                if key != ':condition_attribute_value_placeholder'
             }
-        :param upsert: Initiates an UpdateOrInsertItem operation to
-            update an existing item or insert if not in the table.
-            schema = {
-            'TableName': "string DynamoDB Table Name",
-            'PartitionKey': "The partition key as dict of partition_key
-            {key: value}",
-            'SortKey': "OPTIONAL - The sort key as dict of sort_key
-            {key: value}",
-            'Items': "dict containing all the values for items to be
-            updated",
-            'ConditionAttribute': "OPTIONAL - attribute to matched
-            as dict of attribute_to_match {key: value}",
+            pk_key, pk_value, sk_key, sk_value = self._serializer.deserialize_p_key(pk_ser)
+            updated_item[pk_key] = pk_value
+            if sk_key is not None:
+                updated_item[sk_key] = sk_value
+            response['Update'].append(
+                self._unshard_item(
+                    table=el['TableName'], partition_key_key=pk_key, item=updated_item
+                )
+            )
+
+        return transact_items, response
+
+    def _atomic_writes_upsert(
+        self,
+        upsert: Iterable[dict[str, AttributeValue]],
+        transact_items: list[type_defs.TransactWriteItemTypeDef],
+        response: dict[str, list[dict[str, AttributeValueDeserialized]]],
+    ) -> tuple[
+        list[type_defs.TransactWriteItemTypeDef],
+        dict[str, list[dict[str, AttributeValueDeserialized]]],
+    ]:
+        # Normalize each upsert item in the list for DynamoDB
+        # transactional call
+        for el in upsert:
+            assert isinstance(el['TableName'], str)
+            assert isinstance(el['Items'], Mapping)
+            assert isinstance(el['PartitionKey'], MutableMapping)
+
+            pk_key, pk_value = next(iter(el['PartitionKey'].items()))
+            assert isinstance(pk_value, (str, bytes, int, float))
+
+            # Check if a sort_key is passed in
+            if el.get('SortKey') is not None:
+                # Unpack sort_key attribute dictionary
+                assert isinstance(el['SortKey'], MutableMapping)
+                sk_key, sk_value = next(iter(el['SortKey'].items()))
+                assert isinstance(sk_value, (str, bytes, int, float))
+            else:
+                sk_key, sk_value = (None, None)
+
+            pk_ser = self._serializer.serialize_p_key(
+                pk_key=pk_key,
+                pk_value=self._shard_partition_key_value(
+                    table=el['TableName'], partition_key_value=pk_value, sort_key_value=sk_value
+                ),
+                sk_key=sk_key,
+                sk_value=sk_value,
+            )
+
+            exp, exp_att_names, update_values_ser = self._serializer.serialize_update_items(
+                **el['Items']
+            )
+            exp_att_values = self._compress_update_values(
+                table=el['TableName'], exp_att_values=update_values_ser
+            )
+
+            el_upsert_ser: type_defs.UpdateTypeDef = {
+                'TableName': el['TableName'],
+                'Key': pk_ser,
+                'UpdateExpression': exp,
+                'ExpressionAttributeNames': exp_att_names,
+                'ExpressionAttributeValues': exp_att_values,
+            }
+
+            # Check if a condition is passed in
+            if el.get('ConditionAttribute') is not None:
+                # Unpack condition attribute dictionary
+                assert isinstance(el['ConditionAttribute'], MutableMapping)
+                # We cant mutate the original dictionary because of the
+                # retry decorator will need to run through it again in
+                # case of failure
+                cond_att_key, cond_att_value = next(iter(el['ConditionAttribute'].items()))
+
+                # If condition attribute exists pass it to the DynamoDB
+                # call
+                el_upsert_ser.update({
+                    'ConditionExpression': (
+                        f"#{cond_att_key} = :condition_attribute_value_placeholder"
+                    )
+                })
+
+                # #condition_att_key has to be passed
+                # along the ExpressionAttributeNames because is used by
+                # the ConditionExpression
+                exp_att_names[f"#{cond_att_key}"] = cond_att_key
+
+                # :condition_attribute_value_placeholder has to be
+                # passed along the ExpressionAttributeValues because
+                # is used by the ConditionExpression
+                exp_att_values[':condition_attribute_value_placeholder'] = (
+                    self._serializer.serialize_att(cond_att_value)
+                )
+
+            # Append the 'update' item to the DynamoDB atomic call
+            transact_items.append({'Update': el_upsert_ser})
+
+            # Append the 'upsert' item to the return list
+            # The values returned are the ones before compression
+            upsert_item = {
+                key[1:-12]: self._serializer.deserialize_att(value)
+                for key, value in update_values_ser.items()
+                if key != ':condition_attribute_value_placeholder'
+            }
+            pk_key, pk_value, sk_key, sk_value = self._serializer.deserialize_p_key(pk_ser)
+            upsert_item[pk_key] = pk_value
+            if sk_key is not None:
+                upsert_item[sk_key] = sk_value
+            response['Upsert'].append(
+                self._unshard_item(
+                    table=el['TableName'], partition_key_key=pk_key, item=upsert_item
+                )
+            )
+
+        return transact_items, response
+
+    def _atomic_writes_delete(
+        self,
+        delete: Iterable[dict[str, AttributeValue]],
+        transact_items: list[type_defs.TransactWriteItemTypeDef],
+        response: dict[str, list[dict[str, AttributeValueDeserialized]]],
+    ) -> tuple[
+        list[type_defs.TransactWriteItemTypeDef],
+        dict[str, list[dict[str, AttributeValueDeserialized]]],
+    ]:
+        # Normalize each delete item in the list for DynamoDB
+        # transactional call
+        for el in delete:
+            assert isinstance(el['TableName'], str)
+            assert isinstance(el['PartitionKey'], MutableMapping)
+
+            pk_key, pk_value = next(iter(el['PartitionKey'].items()))
+            assert isinstance(pk_value, (str, bytes, int, float))
+
+            # Check if a sort_key is passed in
+            if el.get('SortKey') is not None:
+                # Unpack sort_key attribute dictionary
+                assert isinstance(el['SortKey'], MutableMapping)
+                sk_key, sk_value = next(iter(el['SortKey'].items()))
+                assert isinstance(sk_value, (str, bytes, int, float))
+            else:
+                sk_key, sk_value = (None, None)
+
+            pk_ser = self._serializer.serialize_p_key(
+                pk_key=pk_key,
+                pk_value=self._shard_partition_key_value(
+                    table=el['TableName'], partition_key_value=pk_value, sort_key_value=sk_value
+                ),
+                sk_key=sk_key,
+                sk_value=sk_value,
+            )
+
+            el_delete_ser: type_defs.DeleteTypeDef = {
+                'TableName': el['TableName'],
+                'Key': pk_ser,
+            }
+
+            # Append the 'delete' item to the DynamoDB atomic call
+            transact_items.append({'Delete': el_delete_ser})
+
+            # Append the 'delete' item to the return list
+            deleted_item: dict[str, AttributeValueDeserialized] = {}
+            pk_key, pk_value, sk_key, sk_value = self._serializer.deserialize_p_key(pk_ser)
+            deleted_item[pk_key] = pk_value
+            if sk_key is not None:
+                deleted_item[sk_key] = sk_value
+            response['Delete'].append(
+                self._unshard_item(
+                    table=el['TableName'], partition_key_key=pk_key, item=deleted_item
+                )
+            )
+
+        return transact_items, response
+
+    def _atomic_writes_condition_check(
+        self,
+        condition_check: Iterable[dict[str, AttributeValue]],
+        transact_items: list[type_defs.TransactWriteItemTypeDef],
+        response: dict[str, list[dict[str, AttributeValueDeserialized]]],
+    ) -> tuple[
+        list[type_defs.TransactWriteItemTypeDef],
+        dict[str, list[dict[str, AttributeValueDeserialized]]],
+    ]:
+        # Normalize each conditional check item in the list for DynamoDB
+        # transactional call
+        for el in condition_check:
+            assert isinstance(el['TableName'], str)
+            assert isinstance(el['PartitionKey'], MutableMapping)
+
+            pk_key, pk_value = next(iter(el['PartitionKey'].items()))
+            assert isinstance(pk_value, (str, bytes, int, float))
+
+            # Check if a sort_key is passed in
+            if el.get('SortKey') is not None:
+                # Unpack sort_key attribute dictionary
+                assert isinstance(el['SortKey'], MutableMapping)
+                sk_key, sk_value = next(iter(el['SortKey'].items()))
+                assert isinstance(sk_value, (str, bytes, int, float))
+            else:
+                sk_key, sk_value = (None, None)
+
+            pk_ser = self._serializer.serialize_p_key(
+                pk_key=pk_key,
+                pk_value=self._shard_partition_key_value(
+                    table=el['TableName'], partition_key_value=pk_value, sort_key_value=sk_value
+                ),
+                sk_key=sk_key,
+                sk_value=sk_value,
+            )
+
+            el_cond_check_ser: type_defs.ConditionCheckTypeDef = {
+                'TableName': el['TableName'],
+                'Key': pk_ser,
+                # TODO(carlogtt): not sure how to use the below yet
+                'ConditionExpression': 'string',
+                'ExpressionAttributeNames': {'string': 'string'},
+                'ExpressionAttributeValues': {},
+            }
+
+            # Append the 'condition_check' item to the DynamoDB atomic
+            # call
+            transact_items.append({'ConditionCheck': el_cond_check_ser})
+
+            # Append the 'condition_check' item to the return list
+            cond_check_item: dict[str, AttributeValueDeserialized] = {}
+            pk_key, pk_value, sk_key, sk_value = self._serializer.deserialize_p_key(pk_ser)
+            cond_check_item[pk_key] = pk_value
+            if sk_key is not None:
+                cond_check_item[sk_key] = sk_value
+            response['ConditionCheck'].append(
+                self._unshard_item(
+                    table=el['TableName'], partition_key_key=pk_key, item=cond_check_item
+                )
+            )
+
+        return transact_items, response
+
+    @utils.retry(exception_to_check=exceptions.DynamoDBError, delay_secs=1)
+    def put_atomic_counter(
+        self,
+        table: str,
+    ):
+        """
+        In Amazon DynamoDB, there isn't an in-built auto-increment
+        functionality like in SQL databases for generating record IDs
+        (Primary Key values). However, we can achieve a similar outcome
+        by managing an atomic counter.
+        This method put the initial __PK_VALUE_COUNTER__ item in the
+        table and set the value to 0.
+        If the __PK_VALUE_COUNTER__ item already exists in the table
+        then it does nothing.
+
+        :param table: DynamoDB table name.
+        :return: None
+        :raise DynamoDBError: If operation fails.
+        """
+
+        # Using the tableName_SysItems table for lookup
+        sys_table = table + "_SysItems"
+        pk_ser = self._serializer.serialize_p_key(pk_key="pk_id", pk_value="__PK_VALUE_COUNTER__")
+
+        try:
+            ddb_response = self._client.get_item(TableName=sys_table, Key=pk_ser)
+            counter = ddb_response.get('Item')
+
+        except self._client.exceptions.ResourceNotFoundException:
+            module_logger.debug(f"Table: {sys_table} not found in DynamoDB, Creating it.")
+
+            # Initialize a dictionary with all the arguments to pass
+            # into the DynamoDB put_item call
+            ddb_create_table_args: dict[str, Any] = {
+                'TableName': sys_table,
+                'BillingMode': 'PAY_PER_REQUEST',
+                'AttributeDefinitions': [{
+                    'AttributeName': 'pk_id',
+                    'AttributeType': 'S',
+                }],
+                'KeySchema': [{
+                    'AttributeName': 'pk_id',
+                    'KeyType': 'HASH',
+                }],
+                'DeletionProtectionEnabled': True,
             }
-        :param delete: Initiates a DeleteItem operation to delete an
-            existing item.
-            schema = {
-            'TableName': "string DynamoDB Table Name",
-            'PartitionKey': "The partition key as dict of partition_key
-            {key: value}",
-            'SortKey': "OPTIONAL - The sort key as dict of sort_key
-            {key: value}",
+
+            try:
+                self._client.create_table(**ddb_create_table_args)
+
+                # Give it time to create the table
+                time.sleep(15)
+
+                # Setting the counter to None, so we can put the counter
+                # item in the newly created table
+                counter = None
+
+            except botocore.exceptions.ClientError as ex:
+                raise exceptions.DynamoDBError(str(ex.response))
+
+            except Exception as ex:
+                raise exceptions.DynamoDBError(str(ex))
+
+        except botocore.exceptions.ClientError as ex:
+            raise exceptions.DynamoDBError(str(ex.response)) from None
+
+        except Exception as ex:
+            raise exceptions.DynamoDBError(str(ex)) from None
+
+        if not counter:
+            self.put_item(
+                table=sys_table,
+                partition_key_key="pk_id",
+                partition_key_value="__PK_VALUE_COUNTER__",
+                current_counter_value=0,
+                last_modified_timestamp=time.time_ns(),
+            )
+
+    def _put_single_item(
+        self,
+        table: str,
+        partition_key_key: str,
+        partition_key_value: PartitionKeyValue,
+        sort_key_key: Optional[str] = None,
+        sort_key_value: Optional[SortKeyValue] = None,
+        **items: AttributeValue,
+    ) -> dict[str, AttributeValueDeserialized]:
+        """
+        Put the item in the table.
+
+        :param table: DynamoDB table name.
+        :param partition_key_key: The key of the partition key.
+        :param partition_key_value: The value of the partition key.
+        :param sort_key_key: The key of the sort key.
+        :param sort_key_value: The value of the sort key.
+        :param items: Additional items to add.
+        :return: The stored DynamoDB Item deserialized.
+        :raise DynamoDBError: If operation fails.
+        :raise DynamoDBConflictError: If put item fails due to a
+            conflict.
+        """
+
+        pk_ser = self._serializer.serialize_p_key(
+            pk_key=partition_key_key,
+            pk_value=partition_key_value,
+            sk_key=sort_key_key,
+            sk_value=sort_key_value,
+        )
+        additional_items = self._serializer.serialize_put_items(**items)
+        items_ser = {**self._compress_item(table=table, item_ser=additional_items), **pk_ser}
+
+        # Initialize a dictionary with all the arguments to pass into
+        # the DynamoDB put_item call
+        ddb_put_item_args: dict[str, Any] = {
+            'TableName': table,
+            'Item': items_ser,
+            'ConditionExpression': f"attribute_not_exists({partition_key_key})",
+        }
+
+        try:
+            self._call_client('put_item', 'write', **ddb_put_item_args)
+
+        except botocore.exceptions.ClientError as ex:
+            if "ConditionalCheckFailed" in str(ex):
+                raise exceptions.DynamoDBConflictError(str(ex.response))
+            else:
+                raise exceptions.DynamoDBError(str(ex.response))
+
+        except Exception as ex:
+            raise exceptions.DynamoDBError(str(ex))
+
+        finally:
+            # A failed write may still have been applied, so the cached
+            # items are invalidated whatever the outcome
+            self._invalidate_cached_keys(table=table, keys_ser=[pk_ser])
+
+        # If we get here it means that the item has been added
+        # successfully therefore we return it, with the values before
+        # compression
+        item_put = {
+            key: self._serializer.deserialize_att(value)
+            for key, value in {**additional_items, **pk_ser}.items()
+        }
+
+        return item_put
+
+    def _get_atomic_counter(self, table: str) -> tuple[int, int]:
+        """
+        This method will get the value of the atomic counter.
+
+        :param table: DynamoDB table name.
+        :return: Counter value and last_modified_timestamp as tuple.
+        :raise DynamoDBError: If counter not found.
+        """
+
+        # Using the tableName_SysItems table for lookup
+        sys_table = table + "_SysItems"
+
+        try:
+            # The counter is read straight from DynamoDB, as a cached
+            # value would fail the condition on last_modified_timestamp
+            # of every put once the counter is moved by someone else
+            try:
+                ddb_response = self._call_client(
+                    'get_item',
+                    'read',
+                    TableName=sys_table,
+                    Key=self._serializer.serialize_p_key(
+                        pk_key="pk_id", pk_value="__PK_VALUE_COUNTER__"
+                    ),
+                )
+
+            except botocore.exceptions.ClientError as ex:
+                raise exceptions.DynamoDBError(str(ex.response)) from None
+
+            except Exception as ex:
+                raise exceptions.DynamoDBError(str(ex)) from None
+
+            ddb_item = ddb_response.get('Item')
+            assert ddb_item
+
+            item = self._serializer.deserialize_item(ddb_item)
+
+            current_counter_value = item['current_counter_value']
+            assert isinstance(current_counter_value, int)
+
+            last_modified_timestamp = item['last_modified_timestamp']
+            assert isinstance(last_modified_timestamp, int)
+
+        except AssertionError:
+            raise exceptions.DynamoDBError(
+                f"table: {table!r} doesn't have the '__PK_VALUE_COUNTER__' item, call"
+                f" '{self.put_atomic_counter.__name__}' to create one."
+            )
+
+        except (TypeError, KeyError):
+            raise exceptions.DynamoDBError(
+                f"Item '__PK_VALUE_COUNTER__' in table: {table!r} is missing some or all of the"
+                " mandatory attributes: 'current_counter_value' and 'last_modified_timestamp'."
+            )
+
+        except Exception as ex:
+            if "ResourceNotFoundException" in str(ex):
+                raise exceptions.DynamoDBError(
+                    f"'__PK_VALUE_COUNTER__' not found as table: '{table}_SysItems' doesn't exists,"
+                    f" call '{self.put_atomic_counter.__name__}('{table}')' to create one."
+                )
+
+            else:
+                raise
+
+        return current_counter_value, last_modified_timestamp
+
+    def _set_atomic_counter(
+        self, table: str, counter_value: int, last_modified_timestamp: int
+    ) -> type_defs.UpdateTypeDef:
+        """
+        This method will prepare an atomic update dictionary.
+
+        :param table: DynamoDB table name.
+        :param counter_value: The new value to se to the counter.
+        :param last_modified_timestamp: The last modified timestamp to
+            use as condition expression.
+        :return: An atomic update dictionary.
+        :raise DynamoDBError: If operation fails.
+        """
+
+        # Using the tableName_SysItems table for lookup
+        sys_table = table + "_SysItems"
+
+        # Update the counter
+        exp, exp_att_names, exp_att_values = self._serializer.serialize_update_items(**{
+            'current_counter_value': counter_value,
+            'last_modified_timestamp': time.time_ns(),
+        })
+
+        # :condition_attribute_value_placeholder has to be
+        # passed along the ExpressionAttributeValues because
+        # is used by the ConditionExpression
+        exp_att_values[':condition_attribute_value_placeholder'] = self._serializer.serialize_att(
+            last_modified_timestamp
+        )
+
+        pk_ser = self._serializer.serialize_p_key(pk_key="pk_id", pk_value="__PK_VALUE_COUNTER__")
+
+        el_update_ser: type_defs.UpdateTypeDef = {
+            'TableName': sys_table,
+            'Key': pk_ser,
+            'UpdateExpression': exp,
+            'ExpressionAttributeNames': exp_att_names,
+            'ExpressionAttributeValues': exp_att_values,
+            'ConditionExpression': (
+                "#last_modified_timestamp = :condition_attribute_value_placeholder"
+            ),
+        }
+
+        return el_update_ser
+
+    def _next_auto_generated_pk_value(self, table: str) -> PartitionKeyValue:
+        """
+        Take the next counter value from the block reserved in process
+        and convert it to the type of the PartitionKey key of the table.
+
+        :param table: DynamoDB table name.
+        :return: The auto generated partition key value.
+        :raise DynamoDBError: If operation fails.
+        """
+
+        assert self._pk_value_allocator is not None
+
+        counter_value = self._pk_value_allocator.next_value(table=table)
+
+        # The type of the PartitionKey key comes from the table metadata
+        # cache so that the put doesn't need any other call
+        pk_type = self._get_pk_type(table=table)
+
+        if issubclass(pk_type, str):
+            return str(counter_value)
+
+        elif issubclass(pk_type, bytes):
+            return str(counter_value).encode()
+
+        else:
+            return counter_value
+
+    def _reserve_atomic_counter_block(self, table: str, block_size: int) -> int:
+        """
+        Reserve a block of counter values by incrementing the atomic
+        counter of the table by block_size with a single conditional
+        update.
+
+        :param table: DynamoDB table name.
+        :param block_size: The number of counter values to reserve.
+        :return: The last counter value of the reserved block. The
+            block goes from the returned value - block_size + 1 to the
+            returned value, both included.
+        :raise DynamoDBError: If the counter doesn't exist or the
+            operation fails.
+        """
+
+        # Using the tableName_SysItems table for lookup
+        sys_table = table + "_SysItems"
+
+        ddb_update_item_args: dict[str, Any] = {
+            'TableName': sys_table,
+            'Key': self._serializer.serialize_p_key(
+                pk_key="pk_id", pk_value="__PK_VALUE_COUNTER__"
+            ),
+            'UpdateExpression': (
+                "SET #current_counter_value = #current_counter_value + :block_size_placeholder,"
+                " #last_modified_timestamp = :last_modified_timestamp_placeholder"
+            ),
+            # Updating the last_modified_timestamp as well keeps the
+            # writers that are not allocating in blocks consistent, as
+            # they use it as optimistic lock on the counter
+            'ConditionExpression': (
+                "attribute_exists(#current_counter_value) AND"
+                " attribute_exists(#last_modified_timestamp)"
+            ),
+            'ExpressionAttributeNames': {
+                '#current_counter_value': 'current_counter_value',
+                '#last_modified_timestamp': 'last_modified_timestamp',
+            },
+            'ExpressionAttributeValues': {
+                ':block_size_placeholder': self._serializer.serialize_att(block_size),
+                ':last_modified_timestamp_placeholder': self._serializer.serialize_att(
+                    time.time_ns()
+                ),
+            },
+            'ReturnValues': 'UPDATED_NEW',
+        }
+
+        try:
+            ddb_response = self._call_client('update_item', 'write', **ddb_update_item_args)
+
+        except botocore.exceptions.ClientError as ex:
+            if "ConditionalCheckFailed" in str(ex):
+                raise exceptions.DynamoDBError(
+                    f"table: {table!r} doesn't have the '__PK_VALUE_COUNTER__' item, call"
+                    f" '{self.put_atomic_counter.__name__}' to create one."
+                )
+
+            elif "ResourceNotFoundException" in str(ex):
+                raise exceptions.DynamoDBError(
+                    f"'__PK_VALUE_COUNTER__' not found as table: '{table}_SysItems' doesn't exists,"
+                    f" call '{self.put_atomic_counter.__name__}('{table}')' to create one."
+                )
+
+            else:
+                raise exceptions.DynamoDBError(str(ex.response))
+
+        except Exception as ex:
+            raise exceptions.DynamoDBError(str(ex))
+
+        last_counter_value = self._serializer.deserialize_att(
+            ddb_response['Attributes']['current_counter_value']
+        )
+        assert isinstance(last_counter_value, int)
+
+        module_logger.debug(
+            f"Reserved counter values {last_counter_value - block_size + 1} to"
+            f" {last_counter_value} for table: {table!r}"
+        )
+
+        return last_counter_value
+
+    def _invalidate_cached_keys(self, table: str, keys_ser: Iterable[Mapping[str, Any]]) -> None:
+        """
+        Remove the items with the given primary keys from the item
+        cache, if enabled.
+
+        :param table: DynamoDB table name.
+        :param keys_ser: The serialized primary keys of the items.
+        """
+
+        if self._item_cache is None:
+            return
+
+        self._item_cache.invalidate(keys=[(table, _item_identity(key)) for key in keys_ser])
+
+    def _invalidate_cached_transact_items(
+        self, transact_items: Iterable[Mapping[str, Any]]
+    ) -> None:
+        """
+        Remove the items written by a TransactWriteItems request from
+        the item cache, if enabled.
+
+        :param transact_items: The TransactItems of the request.
+        """
+
+        if self._item_cache is None:
+            return
+
+        for transact_item in transact_items:
+            for operation, request in transact_item.items():
+                if operation in {'Update', 'Delete'}:
+                    self._invalidate_cached_keys(
+                        table=request['TableName'], keys_ser=[request['Key']]
+                    )
+
+                elif operation == 'Put':
+                    # A put carries the whole item, the primary key is
+                    # extracted using the table key schema
+                    key_schema = self._get_key_schema(table=request['TableName'])
+                    key_ser = {
+                        key: request['Item'][key]
+                        for key in (key_schema['PartitionKeyKey'], key_schema['SortKeyKey'])
+                        if key is not None and key in request['Item']
+                    }
+                    self._invalidate_cached_keys(table=request['TableName'], keys_ser=[key_ser])
+
+    def _get_pk_type(self, table: str) -> Union[type[bytes], type[str], type[float]]:
+        """
+        Return the type of the PartitionKeyItem Key, from the table
+        metadata cache.
+
+        :param table: DynamoDB table name.
+        :return: The type of the PartitionKey key.
+        :raise DynamoDBError: If operation fails.
+        """
+
+        pk_key_type = self.get_table_metadata(table=table)['PartitionKeyType']
+
+        # Convert to Python type and return
+        if pk_key_type == 'S':
+            return str
+
+        elif pk_key_type == 'B':
+            return bytes
+
+        elif pk_key_type == 'N':
+            return float
+
+        else:
+            raise exceptions.DynamoDBError("PartitionKey Key Type not found")
+
+    def _compress_item(self, table: str, item_ser: Item) -> Item:
+        """
+        Compress the attributes of a serialized item following the
+        compression policy of the table, if any.
+
+        :param table: DynamoDB table name.
+        :param item_ser: The serialized item.
+        :return: The item with the attributes compressed.
+        :raise DynamoDBError: If operation fails.
+        """
+
+        policy = self._compression.get(table)
+        if policy is None:
+            return item_ser
+
+        return self._serializer.compress_item(
+            item_ser, policy=policy, exclude=self._index_key_keys(table=table)
+        )
+
+    def _decompress_item(self, table: str, item_ser: Mapping[str, Any]) -> Item:
+        """
+        Decompress the attributes of a serialized item of the table
+        compressed by _compress_item, if the table has a compression
+        policy. The items of the other tables are returned unchanged,
+        whatever their binary values.
+
+        :param table: DynamoDB table name.
+        :param item_ser: The serialized item.
+        :return: The item with the attributes decompressed.
+        :raise DynamoDBError: If operation fails.
+        """
+
+        decompress_item = self._item_decompressor(table=table)
+        if decompress_item is None:
+            return item_ser  # type: ignore
+
+        return decompress_item(item_ser)
+
+    def _item_decompressor(self, table: str) -> Optional[Callable[[Mapping[str, Any]], Item]]:
+        """
+        Return the function decompressing the serialized items of the
+        table, to decompress many items with a single lookup of the
+        compression policy and of the key schema.
+
+        :param table: DynamoDB table name.
+        :return: The item decompressor, or None if the table has no
+            compression policy.
+        :raise DynamoDBError: If the table metadata can't be retrieved.
+        """
+
+        policy = self._compression.get(table)
+        if policy is None:
+            return None
+
+        return functools.partial(
+            self._serializer.decompress_item,
+            policy=policy,
+            exclude=self._index_key_keys(table=table),
+        )
+
+    def _index_key_keys(self, table: str) -> set[str]:
+        """
+        Return the key attributes of the table and of its indexes,
+        which are never compressed.
+
+        :param table: DynamoDB table name.
+        :return: The key attribute names.
+        :raise DynamoDBError: If the table metadata can't be retrieved.
+        """
+
+        table_metadata = self.get_table_metadata(table=table)
+        key_keys = set()
+        for key_schema in itertools.chain(
+            [table_metadata],
+            table_metadata['GlobalSecondaryIndexes'].values(),
+            table_metadata['LocalSecondaryIndexes'].values(),
+        ):
+            key_keys.add(key_schema['PartitionKeyKey'])
+            if key_schema['SortKeyKey'] is not None:
+                key_keys.add(key_schema['SortKeyKey'])
+
+        return key_keys
+
+    def _compress_update_values(self, table: str, exp_att_values: Item) -> Item:
+        """
+        Compress the ExpressionAttributeValues returned by
+        serialize_update_items following the compression policy of the
+        table, if any.
+
+        :param table: DynamoDB table name.
+        :param exp_att_values: The serialized values keyed by their
+            ':<attribute name>_placeholder' placeholders.
+        :return: The values with the attributes compressed.
+        :raise DynamoDBError: If operation fails.
+        """
+
+        if table not in self._compression:
+            return exp_att_values
+
+        item_ser = {
+            placeholder[1 : -len('_placeholder')]: value
+            for placeholder, value in exp_att_values.items()
+        }
+        item_compressed = self._compress_item(table=table, item_ser=item_ser)
+
+        return {f":{key}_placeholder": value for key, value in item_compressed.items()}
+
+
+class DynamoDbUpdatePlan:
+    """
+    Prepared update of a fixed set of attributes of the items of a
+    DynamoDB table.
+
+    The UpdateExpression, ExpressionAttributeNames and
+    ConditionExpression are built when the plan is prepared, so every
+    execution only serializes the key and the values of the attributes
+    and sends the update. An execution behaves exactly like update_item,
+    or upsert_item when the plan is an upsert, including write sharding,
+    compression and item cache invalidation. A plan holds no state
+    between executions and can be shared by many threads::
+
+        plan = dynamodb.prepare_update("users", "id", ["name", "age"])
+        for user_id, name, age in updates:
+            plan.execute(user_id, name=name, age=age)
+
+    :param dynamodb: The DynamoDB instance to update with.
+    :param table: DynamoDB table name.
+    :param partition_key_key: The key of the partition key.
+    :param attributes: The names of the attributes to update.
+    :param sort_key_key: The key of the sort key.
+    :param condition_attribute_key: The name of the attribute that must
+        match the condition value passed to every execution. Default is
+        None, which means no condition.
+    :param upsert: If True, the items that don't exist are created,
+        otherwise the update fails for them. Default is False.
+    :raise DynamoDBError: If no attributes are passed.
+    """
+
+    def __init__(
+        self,
+        dynamodb: DynamoDB,
+        table: str,
+        partition_key_key: str,
+        attributes: Sequence[str],
+        *,
+        sort_key_key: Optional[str] = None,
+        condition_attribute_key: Optional[str] = None,
+        upsert: bool = False,
+    ) -> None:
+        if not attributes:
+            raise exceptions.DynamoDBError("No attributes to update were passed to the plan.")
+
+        exp, exp_att_names, self._placeholders = dynamodb._serializer.serialize_update_template(
+            attributes
+        )
+
+        conditions = []
+
+        # Build a condition expression for “strict update”
+        if not upsert:
+            conditions.append(f"attribute_exists(#{partition_key_key})")
+            exp_att_names[f"#{partition_key_key}"] = partition_key_key
+
+        if condition_attribute_key is not None:
+            conditions.append(
+                f"#{condition_attribute_key} = :condition_attribute_value_placeholder"
+            )
+            exp_att_names[f"#{condition_attribute_key}"] = condition_attribute_key
+
+        self._ddb_update_item_args: dict[str, Any] = {
+            'TableName': table,
+            'ReturnValues': 'ALL_OLD',
+            'UpdateExpression': exp,
+            'ExpressionAttributeNames': exp_att_names,
+        }
+        if conditions:
+            self._ddb_update_item_args['ConditionExpression'] = " AND ".join(conditions)
+
+        self._dynamodb = dynamodb
+        self._table = table
+        self._partition_key_key = partition_key_key
+        self._sort_key_key = sort_key_key
+        self._condition_attribute_key = condition_attribute_key
+        self._attributes = tuple(attributes)
+
+    def execute(
+        self,
+        partition_key_value: PartitionKeyValue,
+        sort_key_value: Optional[SortKeyValue] = None,
+        condition_attribute_value: Any = _MISSING,
+        **items: AttributeValue,
+    ) -> dict[str, AttributeValueDeserialized]:
+        """
+        Update the attributes of the plan of an item.
+
+        :param partition_key_value: The value of the partition key.
+        :param sort_key_value: The value of the sort key, required if
+            the plan has a sort key.
+        :param condition_attribute_value: The value the condition
+            attribute must match, required if the plan has a condition
+            attribute.
+        :param items: Values for all and only the attributes of the
+            plan.
+        :return: The updated DynamoDB Item deserialized.
+        :raise DynamoDBError: If the arguments don't match the plan or
+            the update fails.
+        :raise DynamoDBConflictError: If update fails due to a conflict.
+        """
+
+        if len(items) != len(self._attributes):
+            raise exceptions.DynamoDBError(
+                f"The plan updates {list(self._attributes)}, got {list(items)}."
+            )
+
+        if (self._sort_key_key is None) != (sort_key_value is None):
+            raise exceptions.DynamoDBError(
+                "sort_key_value must be passed if and only if the plan has a sort key."
+            )
+
+        if (self._condition_attribute_key is None) != (condition_attribute_value is _MISSING):
+            raise exceptions.DynamoDBError(
+                "condition_attribute_value must be passed if and only if the plan has a condition"
+                " attribute."
+            )
+
+        serializer = self._dynamodb._serializer
+
+        try:
+            exp_att_values: Item = {
+                placeholder: serializer.serialize_att(items[key])
+                for placeholder, key in zip(self._placeholders, self._attributes)
             }
-        :param condition_check: Applies a condition to an item that is
-            not being modified by the transaction. The condition must
-            be satisfied for the transaction to succeed.
-            schema = {
-            'TableName': "string DynamoDB Table Name",
-            'PartitionKey': "The partition key as dict of partition_key
-            {key: value}",
-            'SortKey': "OPTIONAL - The sort key as dict of sort_key
-            {key: value}",
+
+        except KeyError:
+            raise exceptions.DynamoDBError(
+                f"The plan updates {list(self._attributes)}, got {list(items)}."
+            ) from None
+
+        exp_att_values = self._dynamodb._compress_update_values(
+            table=self._table, exp_att_values=exp_att_values
+        )
+
+        if condition_attribute_value is not _MISSING:
+            exp_att_values[':condition_attribute_value_placeholder'] = serializer.serialize_att(
+                condition_attribute_value
+            )
+
+        pk_ser = serializer.serialize_p_key(
+            pk_key=self._partition_key_key,
+            pk_value=self._dynamodb._shard_partition_key_value(
+                table=self._table,
+                partition_key_value=partition_key_value,
+                sort_key_value=sort_key_value,
+            ),
+            sk_key=self._sort_key_key,
+            sk_value=sort_key_value,
+        )
+
+        return self._dynamodb._send_update_item(
+            table=self._table,
+            ddb_update_item_args={
+                **self._ddb_update_item_args,
+                'Key': pk_ser,
+                'ExpressionAttributeValues': exp_att_values,
+            },
+            items=items,
+        )
+
+
+class DynamoDbBufferedWriter:
+    """
+    Write-behind writer buffering puts and deletes to a DynamoDB table
+    and writing them with BatchWriteItem on a background thread.
+
+    Repeated writes to the same primary key while it's buffered are
+    coalesced, so only the last one is sent. The buffer is flushed, in
+    chunks of 25 sent concurrently, when it holds flush_items writes or
+    its oldest write is max_age_secs old, and when the writer is
+    flushed or closed. Failed writes are passed to on_failure, or make
+    close raise. The items are removed from the item cache once their
+    batch is written.
+
+    Use it as a context manager, or call close once done, as the
+    writes still buffered are otherwise lost::
+
+        with dynamodb.buffered_writer("events") as writer:
+            for event in events:
+                writer.put(event)
+
+    :param dynamodb: The DynamoDB instance to write with.
+    :param table: DynamoDB table name.
+    :param flush_items: The number of buffered writes that triggers a
+        flush. Default is 100.
+    :param max_age_secs: The maximum time in seconds a write waits in
+        the buffer. Default is 1.
+    :param max_buffered_items: The number of buffered writes above
+        which put and delete block until the buffer is flushed.
+        Default is 10,000.
+    :param max_workers: The maximum number of BatchWriteItem requests
+        sent at the same time. Default is 4.
+    :param on_failure: A callable receiving the failed writes of every
+        flush, each as dict of {'Operation': 'Put' | 'Delete', 'Item':
+        item or key deserialized, 'Error': error message}. Default is
+        None, which means close raises if any write failed.
+    :raise DynamoDBError: If the arguments are not valid or the table
+        metadata can't be retrieved.
+    """
+
+    def __init__(
+        self,
+        dynamodb: DynamoDB,
+        table: str,
+        *,
+        flush_items: int = 100,
+        max_age_secs: float = 1.0,
+        max_buffered_items: int = 10_000,
+        max_workers: int = 4,
+        on_failure: Optional[Callable[[list[dict[str, Any]]], None]] = None,
+    ) -> None:
+        if flush_items < 1 or max_buffered_items < flush_items:
+            raise exceptions.DynamoDBError(
+                "flush_items must be greater than 0 and not greater than max_buffered_items."
+            )
+
+        if max_age_secs <= 0:
+            raise exceptions.DynamoDBError("max_age_secs must be greater than 0.")
+
+        if max_workers < 1:
+            raise exceptions.DynamoDBError("max_workers must be greater than 0.")
+
+        table_metadata = dynamodb.get_table_metadata(table=table)
+        self._key_keys = [table_metadata['PartitionKeyKey']]
+        if table_metadata['SortKeyKey'] is not None:
+            self._key_keys.append(table_metadata['SortKeyKey'])
+
+        self._dynamodb = dynamodb
+        self._table = table
+        self._flush_items = flush_items
+        self._max_age_secs = max_age_secs
+        self._max_buffered_items = max_buffered_items
+        self._max_workers = max_workers
+        self._on_failure = on_failure
+
+        self._condition = threading.Condition()
+        self._buffer: collections.OrderedDict[tuple[Any, ...], dict[str, Any]] = (
+            collections.OrderedDict()
+        )
+        self._oldest_write_time: Optional[float] = None
+        self._in_flight = 0
+        self._flush_requested = False
+        self._closed = False
+        self._failures: list[dict[str, Any]] = []
+        self._stats: BufferedWriterStats = {
+            'Put': 0,
+            'Delete': 0,
+            'Coalesced': 0,
+            'Flushes': 0,
+            'Failed': 0,
+            'Buffered': 0,
+        }
+
+        self._thread = threading.Thread(
+            target=self._run, name=f"DynamoDbBufferedWriter-{table}", daemon=True
+        )
+        self._thread.start()
+
+    def __enter__(self) -> "DynamoDbBufferedWriter":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    @property
+    def failures(self) -> list[dict[str, Any]]:
+        """
+        The writes that failed so far, when there is no on_failure.
+        """
+
+        with self._condition:
+            return list(self._failures)
+
+    def put(self, item: Mapping[str, AttributeValue]) -> None:
+        """
+        Buffer an item to put, overwriting the existing item with the
+        same primary key.
+
+        :param item: The item as a dict of all the columns including
+            the primary key i.e. {column_name: column_value, ...}
+            The keys are normalized like in put_item.
+        :return: None.
+        :raise DynamoDBError: If the writer is closed or the item has
+            no primary key.
+        """
+
+        item_ser = self._dynamodb._shard_item_ser(
+            table=self._table,
+            item_ser=self._dynamodb._compress_item(
+                table=self._table, item_ser=self._dynamodb._serializer.serialize_put_items(**item)
+            ),
+            random_shard=True,
+        )
+        self._add(write_request={'PutRequest': {'Item': item_ser}}, item_ser=item_ser)
+
+    def delete(self, key: Mapping[str, Union[PartitionKeyValue, SortKeyValue]]) -> None:
+        """
+        Buffer the primary key of an item to delete.
+
+        :param key: The primary key as a dict of
+            {partition_key_key: value} or
+            {partition_key_key: value, sort_key_key: value}.
+        :return: None.
+        :raise DynamoDBError: If the writer is closed or the key is not
+            complete.
+        """
+
+        key_ser = self._dynamodb._shard_item_ser(
+            table=self._table,
+            item_ser={k: self._dynamodb._serializer.serialize_att(v) for k, v in key.items()},
+        )
+        self._add(write_request={'DeleteRequest': {'Key': key_ser}}, item_ser=key_ser)
+
+    def flush(self) -> None:
+        """
+        Write all the buffered writes and wait until they are written.
+
+        :return: None.
+        """
+
+        with self._condition:
+            while self._buffer or self._in_flight:
+                self._flush_requested = True
+                self._condition.notify_all()
+                self._condition.wait()
+
+    def close(self) -> None:
+        """
+        Write all the buffered writes and stop the background thread.
+        Closing a writer already closed has no effect.
+
+        :return: None.
+        :raise DynamoDBError: If any write failed and there is no
+            on_failure.
+        """
+
+        with self._condition:
+            if self._closed:
+                return
+
+            self._closed = True
+            self._condition.notify_all()
+
+        self._thread.join()
+
+        if self._failures:
+            raise exceptions.DynamoDBError(
+                f"{len(self._failures)} buffered writes to table: {self._table!r} failed,"
+                f" first error: {self._failures[0]['Error']}"
+            )
+
+    def get_stats(self) -> BufferedWriterStats:
+        """
+        Returns the statistics of the writer.
+
+        :return: The number of items put and deleted, of the writes
+            coalesced, of the flushes, of the failed writes, and of the
+            writes currently buffered.
+        """
+
+        with self._condition:
+            return {**self._stats, 'Buffered': len(self._buffer) + self._in_flight}
+
+    def _add(self, write_request: dict[str, Any], item_ser: Mapping[str, Any]) -> None:
+        """
+        Buffer a write request, replacing the buffered write to the
+        same primary key, if any.
+
+        :param write_request: The serialized PutRequest or
+            DeleteRequest.
+        :param item_ser: The serialized item or key of the request.
+        :raise DynamoDBError: If the writer is closed or the primary
+            key is not complete.
+        """
+
+        try:
+            key_ser = {key: item_ser[key] for key in self._key_keys}
+
+        except KeyError as ex:
+            raise exceptions.DynamoDBError(
+                f"Primary key attribute: {ex.args[0]!r} missing from the write."
+            ) from None
+
+        write_key = _item_identity(key_ser)
+
+        with self._condition:
+            # Bound the memory when the producers are faster than
+            # DynamoDB, unless the write replaces a buffered one
+            while (
+                not self._closed
+                and write_key not in self._buffer
+                and len(self._buffer) >= self._max_buffered_items
+            ):
+                self._condition.wait()
+
+            if self._closed:
+                raise exceptions.DynamoDBError("The buffered writer is closed.")
+
+            if write_key in self._buffer:
+                self._stats['Coalesced'] += 1
+            elif not self._buffer:
+                self._oldest_write_time = time.monotonic()
+                # Start the age countdown of the background thread
+                self._condition.notify_all()
+
+            self._buffer[write_key] = write_request
+
+            if len(self._buffer) >= self._flush_items:
+                self._condition.notify_all()
+
+    def _run(self) -> None:
+        """
+        Flush the buffer every time a threshold is reached, until the
+        writer is closed and the buffer is empty.
+        """
+
+        while True:
+            with self._condition:
+                while True:
+                    if not self._buffer:
+                        if self._closed:
+                            return
+
+                        self._condition.wait()
+                        continue
+
+                    age = time.monotonic() - (self._oldest_write_time or 0.0)
+
+                    if (
+                        self._closed
+                        or self._flush_requested
+                        or len(self._buffer) >= self._flush_items
+                        or age >= self._max_age_secs
+                    ):
+                        break
+
+                    self._condition.wait(timeout=self._max_age_secs - age)
+
+                write_requests = list(self._buffer.values())
+                self._buffer.clear()
+                self._oldest_write_time = None
+                self._flush_requested = False
+                self._in_flight = len(write_requests)
+                # Wake up the producers waiting for room in the buffer
+                self._condition.notify_all()
+
+            processed, failures = self._write(write_requests)
+
+            with self._condition:
+                self._in_flight = 0
+                self._stats['Put'] += processed['Put']
+                self._stats['Delete'] += processed['Delete']
+                self._stats['Flushes'] += 1
+                self._stats['Failed'] += len(failures)
+
+                if failures and self._on_failure is None:
+                    self._failures.extend(failures)
+
+                self._condition.notify_all()
+
+            if failures and self._on_failure is not None:
+                try:
+                    self._on_failure(failures)
+
+                except Exception as ex:
+                    module_logger.exception(f"on_failure of buffered writer raised: {ex!r}")
+
+    def _write(
+        self, write_requests: Sequence[dict[str, Any]]
+    ) -> tuple[dict[str, int], list[dict[str, Any]]]:
+        """
+        Write the buffered write requests in chunks of 25 sent
+        concurrently.
+
+        :param write_requests: The serialized PutRequest and
+            DeleteRequest to write.
+        :return: A tuple with the number of items put and deleted, and
+            the list of the failed writes.
+        """
+
+        processed = {'Put': 0, 'Delete': 0}
+        failures: list[dict[str, Any]] = []
+
+        try:
+            for chunk_processed, chunk_failed in _map_concurrently(
+                func=functools.partial(
+                    self._dynamodb._batch_write_chunk, table=self._table, key_keys=self._key_keys
+                ),
+                iterable=_chunked(write_requests, _BATCH_WRITE_ITEM_MAX_REQUESTS),
+                max_workers=self._max_workers,
+            ):
+                processed['Put'] += chunk_processed['Put']
+                processed['Delete'] += chunk_processed['Delete']
+                failures.extend(chunk_failed)
+
+        except Exception as ex:
+            failures = self._dynamodb._batch_write_failures(
+                write_requests, str(ex), table=self._table
+            )
+
+        return processed, failures
+
+
+class DynamoDbSerializer:
+    """
+    DynamoDbSerializer is a utility class for serializing and
+    deserializing Python data types to DynamoDB compatible formats and
+    vice versa.
+    It provides methods for converting Python objects to DynamoDB
+    attributes and for converting DynamoDB attributes back to Python
+    objects.
+
+    This class is useful for preparing data for storage in a DynamoDB
+    table, and for reading data back into Python objects.
+    """
+
+    def __init__(self):
+        self.string_utils = utils.StringUtils()
+
+        # Attribute names come from a small vocabulary, so the snake
+        # case normalization, which runs several regex substitutions,
+        # is computed once per name
+        self._normalize_key = functools.lru_cache(maxsize=_NORMALIZED_KEY_CACHE_SIZE)(
+            self.string_utils.snake_case_v2
+        )
+
+        # Hot update paths keep updating the same attribute sets, so the
+        # UpdateExpression and ExpressionAttributeNames are built once
+        # per set of attribute names
+        self._update_templates = functools.lru_cache(maxsize=_UPDATE_TEMPLATE_CACHE_SIZE)(
+            self._build_update_template
+        )
+
+        # Dispatch tables used by the fast paths, keyed by the exact
+        # Python type to serialize and by the DynamoDB type descriptor
+        # to deserialize
+        self._serializers: dict[type, Callable[[Any], type_defs.AttributeValueTypeDef]] = {
+            type(None): lambda value: {"NULL": True},
+            bool: lambda value: {"BOOL": value},
+            str: lambda value: {"S": value},
+            bytes: lambda value: {"B": value},
+            bytearray: lambda value: {"B": value},
+            int: lambda value: {"N": str(value)},
+            float: lambda value: {"N": str(value)},
+            decimal.Decimal: lambda value: {"N": str(value)},
+            list: lambda value: {"L": [self.serialize_att(el) for el in value]},
+            tuple: lambda value: {"L": [self.serialize_att(el) for el in value]},
+            dict: lambda value: {"M": {key: self.serialize_att(val) for key, val in value.items()}},
+        }
+        self._deserializers: dict[str, Callable[[Any], AttributeValueDeserialized]] = {
+            "NULL": lambda value: None,
+            "BOOL": bool,
+            "S": str,
+            "B": lambda value: value,
+            "N": _deserialize_number,
+            "SS": set,
+            "BS": set,
+            "NS": lambda value: (
+                {float(el) for el in value} if '.' in value[0] else {int(el) for el in value}
+            ),
+            "L": lambda value: [self.deserialize_att(el) for el in value],
+            "M": lambda value: {key: self.deserialize_att(val) for key, val in value.items()},
+        }
+
+    def serialize_att(self, attribute_value: AttributeValue) -> type_defs.AttributeValueTypeDef:
+        """
+        Serialize a Python data type into a format suitable for
+        AWS DynamoDB.
+        Transforms a Python data type into a format that is compatible
+        with AWS DynamoDB by mapping it into its corresponding DynamoDB
+        data type.
+
+        :param attribute_value: The attribute value to be serialized.
+        :return: A dictionary containing the serialized attribute and
+            its corresponding DynamoDB data type descriptor.
+            i.e. "string" -> {"S": "string"}
+        :raise DynamoDBError: If the provided attribute_value type is
+            not supported.
+        """
+
+        # Fast path, the exact type of the value is looked up in the
+        # dispatch table, subclasses and sets go through the full
+        # chain below
+        serializer = self._serializers.get(type(attribute_value))
+        if serializer is not None:
+            return serializer(attribute_value)
+
+        if attribute_value is None:
+            return {"NULL": True}
+
+        elif isinstance(attribute_value, bool):
+            return {"BOOL": attribute_value}
+
+        elif isinstance(attribute_value, str):
+            return {"S": attribute_value}
+
+        elif isinstance(attribute_value, bytes) or isinstance(attribute_value, bytearray):
+            return {"B": attribute_value}
+
+        elif isinstance(attribute_value, (numbers.Real, decimal.Decimal)):
+            return {"N": str(attribute_value)}
+
+        elif isinstance(attribute_value, set):
+            # Check the set contains at least one element
+            try:
+                set_el_sample = next(iter(attribute_value))
+
+            except StopIteration:
+                raise exceptions.DynamoDBError(
+                    f"Object of type {type(attribute_value)!r} for {attribute_value!r} is not"
+                    f" supported by DynamoDB serialization because {type(attribute_value)!r} empty."
+                )
+
+            # Check if set is homogeneous
+            if not all(isinstance(el, type(set_el_sample)) for el in attribute_value):
+                raise exceptions.DynamoDBError(
+                    f"Object of type {type(attribute_value)!r} for {attribute_value!r} is not"
+                    f" supported by DynamoDB serialization because {type(attribute_value)!r} must"
+                    " be homogeneous."
+                )
+
+            if isinstance(set_el_sample, str):
+                return {"SS": list(attribute_value)}  # type: ignore
+
+            elif isinstance(set_el_sample, bytes):
+                return {"BS": list(attribute_value)}  # type: ignore
+
+            elif isinstance(set_el_sample, (numbers.Real, decimal.Decimal)):
+                return {"NS": [str(el) for el in attribute_value]}
+
+            else:
+                raise exceptions.DynamoDBError(
+                    f"Object of type {type(attribute_value)!r} for {attribute_value!r} is not"
+                    f" supported by DynamoDB {type(attribute_value)!r}."
+                    f" {type(attribute_value)!r} must be homogeneous of [str | bytes | int | float]"
+                )
+
+        elif isinstance(attribute_value, Sequence):
+            list_value = list(attribute_value)
+            for idx, el in enumerate(list_value):
+                list_value[idx] = self.serialize_att(el)
+            return {"L": list_value}
+
+        elif isinstance(attribute_value, MutableMapping):
+            dict_value = dict(attribute_value)
+            for key, val in dict_value.items():
+                dict_value[key] = self.serialize_att(val)
+            return {"M": dict_value}
+
+        else:
+            raise exceptions.DynamoDBError(
+                f"Object of type {type(attribute_value)!r} for {attribute_value!r} is not supported"
+                " by DynamoDB serialization."
+            )
+
+    def deserialize_att(
+        self,
+        dynamodb_attribute: Union[type_defs.AttributeValueTypeDef, PartitionKeyTypeDef],
+    ) -> AttributeValueDeserialized:
+        """
+        Deserialize an AWS DynamoDB data type into its corresponding
+        Python data type. Transforms an AWS DynamoDB attribute into a
+        Python data type by identifying the DynamoDB data type
+        descriptor and mapping it to its corresponding Python data type.
+
+        :param dynamodb_attribute: The DynamoDB attribute to be
+            deserialized. It should be a dictionary containing the
+            DynamoDB data type descriptor and the attribute value.
+        :return: The deserialized Python data type.
+            i.e. i.e. {"S": "string"} -> "string"
+        :raise DynamoDBError: If the provided dynamodb_attribute is not
+            supported for deserialization.
+        """
+
+        # Fast path, a well formed attribute has exactly one type
+        # descriptor which is looked up in the dispatch table
+        if type(dynamodb_attribute) is dict and len(dynamodb_attribute) == 1:
+            ((tag, value),) = dynamodb_attribute.items()
+            deserializer = self._deserializers.get(tag)
+            if deserializer is not None:
+                return deserializer(value)
+
+        # The sentinel value is a unique object identifier used as a
+        # default fallback when querying dictionary keys during the
+        # deserialization process. The unique ensures that the
+        # sentinel is not accidentally found in `dynamodb_attribute`
+        # dictionary values. Utilizing sentinel helps in distinguishing
+        # between a None value and absence of a key. During the
+        # deserialization, if the `.get()` method returns the sentinel,
+        # it implies the key was not found in `dynamodb_attribute`;
+        # otherwise, it returns the actual value (which might be None
+        # or other falsy values) related to the looked-up key.
+        sentinel = object()
+
+        if dynamodb_attribute.get("NULL", sentinel) is not sentinel:
+            return None
+
+        elif dynamodb_attribute.get("BOOL", sentinel) is not sentinel:
+            return bool(dynamodb_attribute["BOOL"])  # type: ignore
+
+        elif dynamodb_attribute.get("S", sentinel) is not sentinel:
+            return str(dynamodb_attribute["S"])
+
+        elif dynamodb_attribute.get("B", sentinel) is not sentinel:
+            return dynamodb_attribute["B"]
+
+        elif dynamodb_attribute.get("N", sentinel) is not sentinel:
+            if '.' in dynamodb_attribute["N"]:
+                return float(dynamodb_attribute["N"])
+            else:
+                return int(dynamodb_attribute["N"])
+
+        elif dynamodb_attribute.get("SS", sentinel) is not sentinel:
+            return set(dynamodb_attribute["SS"])  # type: ignore
+
+        elif dynamodb_attribute.get("BS", sentinel) is not sentinel:
+            return set(dynamodb_attribute["BS"])  # type: ignore
+
+        elif dynamodb_attribute.get("NS", sentinel) is not sentinel:
+            if "." in dynamodb_attribute["NS"][0]:  # type: ignore
+                return {float(el) for el in dynamodb_attribute["NS"]}  # type: ignore
+            else:
+                return {int(el) for el in dynamodb_attribute["NS"]}  # type: ignore
+
+        elif dynamodb_attribute.get("L", sentinel) is not sentinel:
+            return [self.deserialize_att(el) for el in dynamodb_attribute["L"]]  # type: ignore
+
+        elif dynamodb_attribute.get("M", sentinel) is not sentinel:
+            return {
+                key: self.deserialize_att(val)
+                for key, val in dynamodb_attribute["M"].items()  # type: ignore
             }
-        :return: A dictionary with keys
-            'Put', 'Update', 'Delete', 'ConditionCheck',
-            and a list of items writes to the DynamoDB in the same
-            order as they were passed in.
-            schema = {
-            'Put': "list of items writes to DynamoDB",
-            'Update': "list of items writes to DynamoDB",
-            'Upsert': "list of items writes to DynamoDB",
-            'Delete': "list of items writes to DynamoDB",
-            'ConditionCheck': "list of items writes to DynamoDB",
+
+        else:
+            raise exceptions.DynamoDBError(
+                f"Object {dynamodb_attribute!r} of type {type(dynamodb_attribute)!r} is not"
+                " supported for DynamoDB deserialization."
+            )
+
+    def deserialize_item(self, dynamodb_item: Mapping[str, Any]) -> dict[str, Any]:
+        """
+        Deserialize a whole AWS DynamoDB item into a dictionary of
+        Python data types.
+        Same as calling deserialize_att on every attribute of the item,
+        but the flat attributes are deserialized inline without the
+        method call overhead.
+
+        :param dynamodb_item: The DynamoDB item to be deserialized.
+            i.e. {"id": {"S": "string"}, "count": {"N": "1"}}
+        :return: The deserialized item.
+            i.e. {"id": "string", "count": 1}
+        :raise DynamoDBError: If an attribute of the item is not
+            supported for deserialization.
+        """
+
+        deserializers = self._deserializers
+        deserialize_att = self.deserialize_att
+        item_deser = {}
+
+        for key, dynamodb_attribute in dynamodb_item.items():
+            if type(dynamodb_attribute) is dict and len(dynamodb_attribute) == 1:
+                ((tag, value),) = dynamodb_attribute.items()
+                deserializer = deserializers.get(tag)
+                if deserializer is not None:
+                    item_deser[key] = deserializer(value)
+                    continue
+
+            item_deser[key] = deserialize_att(dynamodb_attribute)
+
+        return item_deser
+
+    def deserialize_item_lazy(self, dynamodb_item: Mapping[str, Any]) -> DynamoDbLazyItem:
+        """
+        Wrap an AWS DynamoDB item into a read-only mapping that
+        deserializes each attribute only when first accessed.
+
+        :param dynamodb_item: The DynamoDB item to be deserialized.
+            i.e. {"id": {"S": "string"}, "count": {"N": "1"}}
+        :return: The lazily deserialized item.
+        """
+
+        return DynamoDbLazyItem(ddb_item=dynamodb_item, deserialize_att=self.deserialize_att)
+
+    def deserialize_row(
+        self, dynamodb_item: Mapping[str, Any], schema: Sequence[str]
+    ) -> tuple[Any, ...]:
+        """
+        Deserialize the attributes of an AWS DynamoDB item listed in
+        the schema into a compact named tuple row.
+
+        The row class is created once per schema and holds the values
+        positionally, so it takes a fraction of the memory of a
+        dictionary. Attribute names that are not valid Python
+        identifiers are only accessible by position.
+
+        :param dynamodb_item: The DynamoDB item to be deserialized.
+            i.e. {"id": {"S": "string"}, "count": {"N": "1"}}
+        :param schema: The attribute names of the row, in order.
+            i.e. ["id", "count"]
+        :return: The deserialized row, with None for the attributes
+            missing from the item.
+            i.e. DynamoDbRow(id="string", count=1)
+        :raise DynamoDBError: If an attribute of the item is not
+            supported for deserialization.
+        """
+
+        row_type = _row_type(tuple(schema))
+        deserializers = self._deserializers
+        deserialize_att = self.deserialize_att
+        values: list[Any] = []
+
+        for key in schema:
+            dynamodb_attribute: Any = dynamodb_item.get(key)
+
+            if dynamodb_attribute is None:
+                values.append(None)
+                continue
+
+            if type(dynamodb_attribute) is dict and len(dynamodb_attribute) == 1:
+                ((tag, value),) = dynamodb_attribute.items()
+                deserializer = deserializers.get(tag)
+                if deserializer is not None:
+                    values.append(deserializer(value))
+                    continue
+
+            values.append(deserialize_att(dynamodb_attribute))
+
+        row: tuple[Any, ...] = row_type._make(values)
+
+        return row
+
+    def compress_att(
+        self,
+        dynamodb_attribute: type_defs.AttributeValueTypeDef,
+        min_size_bytes: int = _COMPRESSION_DEFAULT_MIN_SIZE_BYTES,
+        level: int = _COMPRESSION_DEFAULT_LEVEL,
+    ) -> type_defs.AttributeValueTypeDef:
+        """
+        Compress a serialized string or binary attribute with zlib.
+
+        The compressed value is stored as a binary attribute tagged
+        with a prefix recording the original type, which
+        decompress_att uses to restore the original attribute.
+        Attributes of any other type, smaller than min_size_bytes or
+        that don't get smaller once compressed are returned unchanged.
+
+        :param dynamodb_attribute: The serialized attribute.
+            i.e. {"S": "string"}
+        :param min_size_bytes: The minimum size in bytes of the value
+            to compress. Default is 1024.
+        :param level: The zlib compression level, from 1 (fastest) to
+            9 (smallest). Default is 6.
+        :return: The compressed attribute, or the attribute unchanged.
+            i.e. {"B": b"\\x00DDBZ\\x01S..."}
+        """
+
+        if type(dynamodb_attribute) is not dict or len(dynamodb_attribute) != 1:
+            return dynamodb_attribute
+
+        value: Any
+        ((tag, value),) = dynamodb_attribute.items()
+
+        if tag == 'S':
+            original_type = b'S'
+            raw_value = value.encode()
+
+        elif tag == 'B':
+            original_type = b'B'
+            raw_value = bytes(value)
+
+        else:
+            return dynamodb_attribute
+
+        if len(raw_value) < min_size_bytes:
+            return dynamodb_attribute
+
+        compressed_value = (
+            _COMPRESSED_ATTRIBUTE_PREFIX + original_type + zlib.compress(raw_value, level)
+        )
+
+        if len(compressed_value) >= len(raw_value):
+            return dynamodb_attribute
+
+        return {"B": compressed_value}
+
+    def decompress_att(
+        self, dynamodb_attribute: type_defs.AttributeValueTypeDef
+    ) -> type_defs.AttributeValueTypeDef:
+        """
+        Decompress a serialized attribute compressed by compress_att
+        back to its original string or binary attribute.
+
+        Attributes that are not tagged as compressed are returned
+        unchanged.
+
+        :param dynamodb_attribute: The serialized attribute.
+            i.e. {"B": b"\\x00DDBZ\\x01S..."}
+        :return: The original attribute, or the attribute unchanged.
+            i.e. {"S": "string"}
+        :raise DynamoDBError: If the compressed value is corrupted.
+        """
+
+        if type(dynamodb_attribute) is not dict or len(dynamodb_attribute) != 1:
+            return dynamodb_attribute
+
+        value: Any = dynamodb_attribute.get('B')
+
+        if not isinstance(value, bytes) or not value.startswith(_COMPRESSED_ATTRIBUTE_PREFIX):
+            return dynamodb_attribute
+
+        original_type = value[
+            len(_COMPRESSED_ATTRIBUTE_PREFIX) : len(_COMPRESSED_ATTRIBUTE_PREFIX) + 1
+        ]
+
+        try:
+            raw_value = zlib.decompress(value[len(_COMPRESSED_ATTRIBUTE_PREFIX) + 1 :])
+
+        except zlib.error as ex:
+            raise exceptions.DynamoDBError(f"Unable to decompress attribute: {ex}") from None
+
+        if original_type == b'S':
+            return {"S": raw_value.decode()}
+
+        return {"B": raw_value}
+
+    def compress_item(
+        self,
+        dynamodb_item: Mapping[str, Any],
+        policy: CompressionPolicy,
+        exclude: Iterable[str] = (),
+    ) -> Item:
+        """
+        Compress the top level string and binary attributes of a
+        serialized AWS DynamoDB item following the compression policy,
+        see compress_att.
+
+        :param dynamodb_item: The serialized DynamoDB item.
+            i.e. {"id": {"S": "string"}, "body": {"S": "..."}}
+        :param policy: The compression policy as dict of
+            {'MinSizeBytes': int, 'Attributes': [attribute names],
+            'Level': int}. Only the attributes listed in Attributes are
+            compressed, all of them if Attributes is missing.
+        :param exclude: The attribute names never compressed, i.e. the
+            key attributes of the table and of its indexes.
+        :return: The item with the attributes compressed.
+        """
+
+        min_size_bytes = policy.get('MinSizeBytes', _COMPRESSION_DEFAULT_MIN_SIZE_BYTES)
+        level = policy.get('Level', _COMPRESSION_DEFAULT_LEVEL)
+        attributes = policy.get('Attributes')
+        included = set(attributes) if attributes is not None else None
+        excluded = set(exclude)
+
+        item_compressed: Item = {}
+
+        for key, dynamodb_attribute in dynamodb_item.items():
+            if key in excluded or (included is not None and key not in included):
+                item_compressed[key] = dynamodb_attribute
+            else:
+                item_compressed[key] = self.compress_att(
+                    dynamodb_attribute, min_size_bytes=min_size_bytes, level=level
+                )
+
+        return item_compressed
+
+    def decompress_item(
+        self,
+        dynamodb_item: Mapping[str, Any],
+        policy: CompressionPolicy,
+        exclude: Iterable[str] = (),
+    ) -> Item:
+        """
+        Decompress the top level attributes of a serialized AWS
+        DynamoDB item compressed by compress_item with the same policy,
+        see decompress_att.
+
+        Only the attributes the policy compresses are decompressed, so
+        the binary values of the other attributes are never altered.
+
+        :param dynamodb_item: The serialized DynamoDB item.
+        :param policy: The compression policy the item was compressed
+            with.
+        :param exclude: The attribute names never compressed.
+        :return: The item with the attributes decompressed.
+        :raise DynamoDBError: If a compressed value is corrupted.
+        """
+
+        attributes = policy.get('Attributes')
+        included = set(attributes) if attributes is not None else None
+        excluded = set(exclude)
+
+        item_decompressed: Item = {}
+
+        for key, dynamodb_attribute in dynamodb_item.items():
+            if key in excluded or (included is not None and key not in included):
+                item_decompressed[key] = dynamodb_attribute
+            else:
+                item_decompressed[key] = self.decompress_att(dynamodb_attribute)
+
+        return item_decompressed
+
+    def estimate_item_size(self, dynamodb_item: Mapping[str, Any]) -> int:
+        """
+        Estimate the size of a serialized AWS DynamoDB item in bytes,
+        following the DynamoDB item size rules used to compute the
+        consumed capacity units.
+
+        :param dynamodb_item: The serialized DynamoDB item.
+            i.e. {"id": {"S": "string"}, "count": {"N": "1"}}
+        :return: The estimated size in bytes.
+        """
+
+        return _estimate_item_size(dynamodb_item)
+
+    def serialize_p_key(
+        self,
+        pk_key: str,
+        pk_value: PartitionKeyValue,
+        sk_key: Optional[str] = None,
+        sk_value: Optional[SortKeyValue] = None,
+    ) -> PartitionKeyItem:
+        """
+        Return a serialized DynamoDB partition key.
+
+        :param pk_key: The key of the partition key.
+        :param pk_value: The value of the partition key.
+        :param sk_key: The key of the sort key.
+        :param sk_value: The value of the sort key.
+        :return: Serialized partition key.
+            i.e. {"id": {"S": "string"}, "sortKey": {"S": "string"}}
+        """
+
+        if (sk_key is None) ^ (sk_value is None):
+            raise exceptions.DynamoDBError(
+                "Both sort_key_key and sort_key_value must be provided or both must be None."
+            )
+        has_sk = sk_key is not None and sk_value is not None
+
+        pk_ser: PartitionKeyItem = {pk_key: self.serialize_att(pk_value)}
+
+        if has_sk:
+            assert sk_key is not None
+            pk_ser[sk_key] = self.serialize_att(sk_value)
+
+        return pk_ser
+
+    def deserialize_p_key(
+        self, pk_serialized: PartitionKeyItem
+    ) -> tuple[str, PartitionKeyValue, Optional[str], Optional[SortKeyValue]]:
+        """
+        Deserialize a serialized DynamoDB partition key.
+
+        :param pk_serialized: The serialized partition key.
+            i.e., {"id": {"S": "string"}, "sortKey": {"S": "string"}}.
+        :return: A tuple containing the partition key and its value.
+        """
+
+        iter_pk_ser = iter(pk_serialized.items())
+
+        pk_key, pk_value_ser = next(iter_pk_ser)
+        try:
+            sk_key, sk_value_ser = next(iter_pk_ser)
+        except StopIteration:
+            sk_key, sk_value_ser = (None, None)
+
+        pk_value = self.deserialize_att(pk_value_ser)
+        assert isinstance(pk_value, (str, bytes, int, float))
+
+        if sk_value_ser is not None:
+            sk_value = self.deserialize_att(sk_value_ser)
+            assert isinstance(sk_value, (str, bytes, int, float))
+        else:
+            sk_value = None
+
+        return pk_key, pk_value, sk_key, sk_value
+
+    def serialize_key_condition(
+        self,
+        pk_key: str,
+        pk_value: PartitionKeyValue,
+        sk_key: Optional[str] = None,
+        sk_condition: Optional[SortKeyCondition] = None,
+        sk_value: Optional[Union[SortKeyValue, Sequence[SortKeyValue]]] = None,
+    ) -> tuple[str, dict[str, str], Item]:
+        """
+        Returns a tuple containing the KeyConditionExpression, the
+        ExpressionAttributeNames and the ExpressionAttributeValues ready
+        to be passed to the DynamoDB query call.
+
+        :param pk_key: The key of the partition key.
+        :param pk_value: The value of the partition key.
+        :param sk_key: The key of the sort key.
+        :param sk_condition: The comparison to apply to the sort key.
+        :param sk_value: The value to compare the sort key with, or a
+            sequence of the lower and upper bounds for 'between'.
+        :return: A tuple with KeyConditionExpression,
+            ExpressionAttributeNames and ExpressionAttributeValues.
+        :raise DynamoDBError: If the sort key condition is not valid.
+        """
+
+        key_exp = "#partition_key_key = :partition_key_value_placeholder"
+        exp_att_names: dict[str, str] = {'#partition_key_key': pk_key}
+        exp_att_values: Item = {':partition_key_value_placeholder': self.serialize_att(pk_value)}
+
+        if sk_key is None and sk_condition is None and sk_value is None:
+            return key_exp, exp_att_names, exp_att_values
+
+        if sk_key is None or sk_condition is None or sk_value is None:
+            raise exceptions.DynamoDBError(
+                "sort_key_key, sort_key_condition and sort_key_value must be provided or all must"
+                " be None."
+            )
+
+        exp_att_names['#sort_key_key'] = sk_key
+
+        if sk_condition in {'=', '<', '<=', '>', '>='}:
+            key_exp += f" AND #sort_key_key {sk_condition} :sort_key_value_placeholder"
+            exp_att_values[':sort_key_value_placeholder'] = self.serialize_att(sk_value)
+
+        elif sk_condition == 'begins_with':
+            key_exp += " AND begins_with(#sort_key_key, :sort_key_value_placeholder)"
+            exp_att_values[':sort_key_value_placeholder'] = self.serialize_att(sk_value)
+
+        elif sk_condition == 'between':
+            if isinstance(sk_value, (str, bytes)) or not isinstance(sk_value, Sequence):
+                raise exceptions.DynamoDBError(
+                    "sort_key_value must be a sequence of (lower_bound, upper_bound) when"
+                    " sort_key_condition is 'between'."
+                )
+
+            if len(sk_value) != 2:
+                raise exceptions.DynamoDBError(
+                    "sort_key_value must contain exactly two values when sort_key_condition is"
+                    " 'between'."
+                )
+
+            key_exp += (
+                " AND #sort_key_key BETWEEN :sort_key_value_placeholder AND"
+                " :sort_key_value_upper_placeholder"
+            )
+            exp_att_values[':sort_key_value_placeholder'] = self.serialize_att(sk_value[0])
+            exp_att_values[':sort_key_value_upper_placeholder'] = self.serialize_att(sk_value[1])
+
+        else:
+            raise exceptions.DynamoDBError(
+                f"sort_key_condition {sk_condition!r} is not supported. Use one of: '=', '<',"
+                " '<=', '>', '>=', 'begins_with', 'between'."
+            )
+
+        return key_exp, exp_att_names, exp_att_values
+
+    def serialize_read_expressions(
+        self,
+        projection: Optional[Iterable[str]] = None,
+        filter_condition: Optional[DynamoDbCondition] = None,
+    ) -> dict[str, Any]:
+        """
+        Returns the ProjectionExpression and FilterExpression arguments
+        of a DynamoDB read call, with their ExpressionAttributeNames
+        and ExpressionAttributeValues.
+
+        Every attribute name is replaced by a placeholder, so reserved
+        words and special characters can be used in the paths.
+
+        :param projection: The attribute paths to read, nested
+            attributes separated by a dot and list elements selected
+            with their index i.e. ["id", "info.tags[0]"].
+        :param filter_condition: The condition the items must satisfy.
+        :return: A dict of the arguments to add to the read call, only
+            the arguments needed are present.
+            i.e. {"ProjectionExpression": "#att_0, #att_1",
+            "ExpressionAttributeNames": {"#att_0": "id", ...}}
+        :raise DynamoDBError: If a path or a condition is not valid.
+        """
+
+        names_placeholders: dict[str, str] = {}
+        exp_att_values: Item = {}
+
+        def _path(path: str) -> str:
+            path_elements = []
+
+            for path_element in path.split('.'):
+                match = _ATTRIBUTE_PATH_ELEMENT_REGEX.match(path_element)
+                if match is None:
+                    raise exceptions.DynamoDBError(f"Attribute path {path!r} is not valid.")
+
+                name, indexes = match.groups()
+                if name not in names_placeholders:
+                    names_placeholders[name] = f"#att_{len(names_placeholders)}"
+                path_elements.append(names_placeholders[name] + indexes)
+
+            return '.'.join(path_elements)
+
+        def _value(value: AttributeValue) -> str:
+            placeholder = f":att_value_{len(exp_att_values)}_placeholder"
+            exp_att_values[placeholder] = self.serialize_att(value)
+
+            return placeholder
+
+        def _condition(condition: DynamoDbCondition) -> str:
+            if not isinstance(condition, DynamoDbCondition):
+                raise exceptions.DynamoDBError(
+                    f"Object {condition!r} of type {type(condition)!r} is not a DynamoDbCondition."
+                )
+
+            operator, operands = condition.operator, condition.operands
+
+            if operator in {'AND', 'OR'}:
+                return f"({_condition(operands[0])} {operator} {_condition(operands[1])})"
+
+            elif operator == 'NOT':
+                return f"(NOT {_condition(operands[0])})"
+
+            elif operator in {'=', '<>', '<', '<=', '>', '>='}:
+                return f"{_path(operands[0])} {operator} {_value(operands[1])}"
+
+            elif operator == 'BETWEEN':
+                return (
+                    f"{_path(operands[0])} BETWEEN {_value(operands[1])} AND {_value(operands[2])}"
+                )
+
+            elif operator == 'IN':
+                # DynamoDB accepts from 1 up to 100 values in IN
+                if not 1 <= len(operands[1:]) <= 100:
+                    raise exceptions.DynamoDBError("IN condition requires from 1 to 100 values.")
+
+                values = ', '.join(_value(value) for value in operands[1:])
+                return f"{_path(operands[0])} IN ({values})"
+
+            elif operator in {'begins_with', 'contains'}:
+                return f"{operator}({_path(operands[0])}, {_value(operands[1])})"
+
+            elif operator in {'attribute_exists', 'attribute_not_exists'}:
+                return f"{operator}({_path(operands[0])})"
+
+            else:
+                raise exceptions.DynamoDBError(f"Condition operator {operator!r} is not supported.")
+
+        read_args: dict[str, Any] = {}
+
+        if projection is not None:
+            if isinstance(projection, str):
+                projection = [projection]
+
+            projection_exp = ', '.join(_path(path) for path in projection)
+            if not projection_exp:
+                raise exceptions.DynamoDBError("projection must contain at least one path.")
+
+            read_args['ProjectionExpression'] = projection_exp
+
+        if filter_condition is not None:
+            read_args['FilterExpression'] = _condition(filter_condition)
+
+        if names_placeholders:
+            read_args['ExpressionAttributeNames'] = {
+                placeholder: name for name, placeholder in names_placeholders.items()
             }
-        :raise DynamoDBError: If atomic writes fail.
-        :raise DynamoDBConflictError: If atomic writes fail due to a
-            conflict.
+
+        if exp_att_values:
+            read_args['ExpressionAttributeValues'] = exp_att_values
+
+        return read_args
+
+    def serialize_put_items(self, **items: AttributeValue) -> Item:
+        """
+        Returns a dictionary of additional items with keys and values
+        serialized for DynamoDB put_item call.
+
+        :param items: Key-value pairs to serialize.
+        :return: Items ready for put_item.
+            i.e. {"col1": {"S": "value1"}, "col2": {"S": "value2"},
+            "col3": {"S": "value3"}, ...}
+        """
+
+        additional_items: Item = {}
+
+        for key, value in items.items():
+            normalized_key = self._normalize_key(key)
+            ddb_attribute = self.serialize_att(value)
+
+            # Now add it to the additional_items serialized dictionary
+            additional_items[normalized_key] = ddb_attribute
+
+        return additional_items
+
+    def serialize_update_items(self, **items: AttributeValue) -> tuple[str, dict[str, str], Item]:
+        """
+        Returns a tuple containing the UpdateExpression and the
+        ExpressionAttributeValues ready to be passed to the DynamoDB
+        update_item call.
+
+        :param items: Key-value pairs to serialize.
+        :return: A tuple with UpdateExpression, ExpressionAttributeNames
+            and ExpressionAttributeValues.
+        """
+
+        update_exp, exp_att_names, placeholders = self.serialize_update_template(items)
+
+        # In DynamoDB API, the ExpressionAttributeValues dictionary is
+        # used to pass in placeholders for values that will be used in
+        # your UpdateExpression and ConditionExpression. The keys for
+        # these placeholders should start with a : and should not be
+        # confused with actual column names.
+        exp_att_values: Item = {
+            placeholder: self.serialize_att(value)
+            for placeholder, value in zip(placeholders, items.values())
+        }
+
+        return update_exp, exp_att_names, exp_att_values
+
+    def serialize_update_template(
+        self, keys: Iterable[str]
+    ) -> tuple[str, dict[str, str], tuple[str, ...]]:
+        """
+        Returns the UpdateExpression and the ExpressionAttributeNames
+        that set the attributes, and the ExpressionAttributeValues
+        placeholders their values are bound to, in the order of the
+        keys.
+        The template is built once per sequence of keys and cached.
+
+        :param keys: The names of the attributes to set.
+        :return: A tuple with UpdateExpression, ExpressionAttributeNames
+            and the placeholders of the values.
+            i.e. ("SET #col1 = :col1_placeholder", {"#col1": "col1"},
+            (":col1_placeholder",))
+        """
+
+        update_exp, exp_att_names, placeholders = self._update_templates(tuple(keys))
+
+        # The cached names are shared, callers get their own copy to
+        # add the names used by their conditions
+        return update_exp, dict(exp_att_names), placeholders
+
+    def _build_update_template(
+        self, keys: tuple[str, ...]
+    ) -> tuple[str, dict[str, str], tuple[str, ...]]:
+        """
+        Build the UpdateExpression, ExpressionAttributeNames and values
+        placeholders of serialize_update_template.
+
+        :param keys: The names of the attributes to set.
+        :return: A tuple with UpdateExpression, ExpressionAttributeNames
+            and the placeholders of the values.
+        """
+
+        update_exp = "SET "
+
+        # In DynamoDB operations(such as UpdateItem, Query, or Scan),
+        # you can use ExpressionAttributeNames to provide alternate
+        # names for attributes in your expressions.This is most
+        # commonly used to work around DynamoDB's reserved keywords or
+        # to use attribute names that contain special characters not
+        # allowed in expressions.
+        exp_att_names: dict[str, str] = {}
+        placeholders: list[str] = []
+
+        for key in keys:
+            normalized_key = self._normalize_key(key)
+
+            # Add to the update_expression string
+            update_exp += f"#{normalized_key} = :{normalized_key}_placeholder, "
+
+            # Add to the expression_attribute_names dict
+            exp_att_names[f"#{normalized_key}"] = normalized_key
+
+            placeholders.append(f":{normalized_key}_placeholder")
+
+        # Removing the trailing ", " from the update_expression string
+        update_exp = update_exp[:-2]
+
+        return update_exp, exp_att_names, tuple(placeholders)
+
+    def normalize_item(self, item: dict[str, Any]) -> dict[str, AttributeValueDeserialized]:
+        """
+        Serialize a Python item to DynamoDB format and then deserialize
+        it back to ensure a fully consistent DynamoDB-deserialized
+        structure.
+
+        :param item: A dict of Python data, possibly partially
+            deserialized or in raw Python format.
+        :return: A dict representing the item in full
+            DynamoDB-deserialized format
+            (i.e., matching AttributeValueDeserialized).
         """
 
-        # Initialize missing arguments
-        put = put or {}
-        update = update or {}
-        upsert = upsert or {}
-        delete = delete or {}
-        condition_check = condition_check or {}
+        item_ser = {key: self.serialize_att(value) for key, value in item.items()}
 
-        # Prepare the list of transactional items to be passed to the
-        # DynamoDB call
-        transact_items: list[type_defs.TransactWriteItemTypeDef] = []
+        item_deser = {key: self.deserialize_att(value) for key, value in item_ser.items()}
 
-        # Prepare the response object
-        response: dict[str, list[dict[str, AttributeValueDeserialized]]] = {
-            'Put': [],
-            'Update': [],
-            'Upsert': [],
-            'Delete': [],
-            'ConditionCheck': [],
-        }
+        return item_deser
 
-        module_logger.debug(
-            f"Atomic Writes in Table initial request - Put: {put}, Update: {update}, Delete:"
-            f" {delete}, ConditionCheck: {condition_check}"
-        )
 
-        transact_items, response = self._atomic_writes_put(
-            put=put,
-            transact_items=transact_items,
-            response=response,
-        )
+class _PartitionKeyValueAllocator:
+    """
+    Hands out auto generated partition key values from blocks of
+    counter values reserved in DynamoDB (hi/lo allocation).
 
-        transact_items, response = self._atomic_writes_update(
-            update=update,
-            transact_items=transact_items,
-            response=response,
-        )
+    A new block is reserved only when the current block of the table
+    is exhausted, so consecutive puts in the same process don't need
+    to read or update the counter.
 
-        transact_items, response = self._atomic_writes_upsert(
-            upsert=upsert,
-            transact_items=transact_items,
-            response=response,
-        )
+    :param block_size: The number of counter values reserved at a time.
+    :param reserve_block: A callable that reserves block_size counter
+        values for the given table and returns the last value of the
+        reserved block.
+    """
 
-        transact_items, response = self._atomic_writes_delete(
-            delete=delete,
-            transact_items=transact_items,
-            response=response,
-        )
+    def __init__(self, block_size: int, reserve_block: Callable[[str, int], int]) -> None:
+        self._block_size = block_size
+        self._reserve_block = reserve_block
+        self._blocks: dict[str, tuple[int, int]] = {}
+        self._lock = threading.Lock()
 
-        transact_items, response = self._atomic_writes_condition_check(
-            condition_check=condition_check,
-            transact_items=transact_items,
-            response=response,
+    def next_value(self, table: str) -> int:
+        """
+        Return the next counter value for the table, reserving a new
+        block if the current one is exhausted.
+
+        :param table: DynamoDB table name.
+        :return: The next counter value.
+        """
+
+        with self._lock:
+            next_value, last_value = self._blocks.get(table, (1, 0))
+
+            if next_value > last_value:
+                last_value = self._reserve_block(table, self._block_size)
+                next_value = last_value - self._block_size + 1
+
+            self._blocks[table] = (next_value + 1, last_value)
+
+            return next_value
+
+
+class _TableMetadataCache:
+    """
+    Thread safe cache of the table metadata, with a time to live.
+
+    :param ttl_secs: The number of seconds an entry is valid for. None
+        means the entries never expire.
+    """
+
+    def __init__(self, ttl_secs: Optional[float]) -> None:
+        self._ttl_secs = ttl_secs
+        self._entries: dict[str, tuple[float, TableMetadata]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, table: str, loader: Callable[[str], TableMetadata]) -> TableMetadata:
+        """
+        Return the metadata of the table, loading it if it is not
+        cached or expired.
+
+        :param table: DynamoDB table name.
+        :param loader: A callable returning the metadata of the table.
+        :return: The table metadata.
+        """
+
+        with self._lock:
+            entry = self._entries.get(table)
+
+        if entry is not None and (entry[0] > time.monotonic()):
+            return entry[1]
+
+        # Loading outside the lock, so a slow describe_table doesn't
+        # block the lookups of the other tables
+        table_metadata = loader(table)
+        expires_at = (
+            time.monotonic() + self._ttl_secs if self._ttl_secs is not None else float('inf')
         )
 
-        module_logger.debug(f"Atomic Writes in Table serialized request - {transact_items}")
+        with self._lock:
+            self._entries[table] = (expires_at, table_metadata)
 
-        # Make the DynamoDB atomic api call
-        try:
-            with utils.retry(exception_to_check=Exception, delay_secs=1) as retryer:
-                retryer(self._client.transact_write_items, TransactItems=transact_items, **kwargs)
+        return table_metadata
 
-        except botocore.exceptions.ClientError as ex:
-            if "ConditionalCheckFailed" in str(ex):
-                raise exceptions.DynamoDBConflictError(str(ex.response)) from None
+    def invalidate(self, table: Optional[str] = None) -> None:
+        """
+        Remove a table, or all the tables, from the cache.
+
+        :param table: DynamoDB table name. Default is None, which means
+            all the tables.
+        """
+
+        with self._lock:
+            if table is None:
+                self._entries.clear()
             else:
-                raise exceptions.DynamoDBError(str(ex.response)) from None
+                self._entries.pop(table, None)
 
-        except Exception as ex:
-            raise exceptions.DynamoDBError(str(ex)) from None
 
-        return response
+def _deserialize_number(number: str) -> Union[int, float]:
+    """
+    Convert a DynamoDB number, which is sent as string, to int or float.
 
-    def _atomic_writes_put(
-        self,
-        put: Iterable[dict[str, AttributeValue]],
-        transact_items: list[type_defs.TransactWriteItemTypeDef],
-        response: dict[str, list[dict[str, AttributeValueDeserialized]]],
-    ) -> tuple[
-        list[type_defs.TransactWriteItemTypeDef],
-        dict[str, list[dict[str, AttributeValueDeserialized]]],
-    ]:
+    :param number: The DynamoDB number. i.e. "1" or "1.5"
+    :return: The number as float if it has a decimal point, else int.
+    """
+
+    if '.' in number:
+        return float(number)
+    else:
+        return int(number)
+
+
+@functools.lru_cache(maxsize=128)
+def _row_type(schema: tuple[str, ...]) -> Any:
+    """
+    Return the named tuple class of the rows of a schema, created once
+    per schema.
+
+    :param schema: The attribute names of the row, in order.
+    :return: The named tuple class.
+    :raise DynamoDBError: If the schema is empty or has duplicate
+        attribute names.
+    """
+
+    if not schema or len(set(schema)) != len(schema):
+        raise exceptions.DynamoDBError(
+            f"schema must be a non-empty sequence of unique attribute names, got {schema!r}"
+        )
+
+    return collections.namedtuple('DynamoDbRow', schema, rename=True)  # type: ignore
+
+
+class _CapacityLimiter:
+    """
+    Thread safe token bucket limiting the capacity units consumed per
+    second, with an additive increase and multiplicative decrease of
+    the rate.
+
+    The bucket holds at most one second of capacity. Before a request
+    the expected consumption, the moving average of the previous
+    requests, is taken from the bucket, waiting for it to refill if
+    needed. After the request the difference with the capacity actually
+    consumed is settled, so the bucket can go below zero and delay the
+    next requests.
+
+    :param rate: The maximum capacity units per second.
+    :param min_rate_ratio: The lowest fraction of rate the throttling
+        can bring the rate down to.
+    :param recovery_secs: The seconds needed to recover from the lowest
+        rate to the maximum rate.
+    """
+
+    def __init__(self, rate: float, min_rate_ratio: float = 0.05, recovery_secs: float = 20.0):
+        self.max_rate = rate
+        self.rate = rate
+        self._min_rate = rate * min_rate_ratio
+        self._recovery_per_sec = rate / recovery_secs
+        self._tokens = rate
+        self._expected_units = 1.0
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def call(self, func: Callable[..., Any], table: str, **kwargs: Any) -> Any:
         """
-        A helper method to prepare the atomic writes for put items.
+        Call func rate limited, charging the ConsumedCapacity of the
+        response on the table.
 
-        :param put: A list of put items.
-        :param transact_items:
-        :param response:
-        :return:
+        :param func: The DynamoDB client method.
+        :param table: The DynamoDB table name to charge.
+        :param kwargs: The arguments to pass to func.
+        :return: The DynamoDB response.
         """
 
-        # Normalize each put item in the list for DynamoDB
-        # transactional call
-        for el in put:
-            assert isinstance(el['TableName'], str)
-            assert isinstance(el['Items'], Mapping)
-            assert isinstance(el['PartitionKeyKey'], str)
+        reserved_units = self._acquire()
 
-            pk_value = el.get('PartitionKeyValue')
-            ag_pk_value = el.get('AutoGeneratePartitionKeyValue', False)
+        try:
+            response = func(**kwargs)
 
-            if pk_value is not None and ag_pk_value is True:
-                raise exceptions.DynamoDBError(
-                    "If AutoGeneratePartitionKeyValue is enabled, a PartitionKeyValue MUST NOT be"
-                    " passed in."
-                )
+        except Exception as ex:
+            # A throttled request keeps its reservation, so the retry
+            # waits for the bucket to refill at the lowered rate
+            if (
+                isinstance(ex, botocore.exceptions.ClientError)
+                and ex.response.get('Error', {}).get('Code') in _THROTTLING_ERROR_CODES
+            ):
+                self._throttled()
+            else:
+                self._settle(reserved_units=reserved_units, consumed_units=0.0)
+            raise
 
-            elif pk_value is not None and ag_pk_value is False:
-                # This is the case where we use el['PartitionKeyValue']
-                # as 'PartitionKeyValue'
-                pass
+        self._settle(
+            reserved_units=reserved_units, consumed_units=_consumed_capacity(response, table)
+        )
 
-            elif pk_value is None and ag_pk_value is True:
-                # This is the case where we auto generate the
-                # PartitionKeyValue
-                cur_counter, last_mod_timestamp = self._get_atomic_counter(table=el['TableName'])
-                new_counter = cur_counter + 1
+        return response
 
-                # Check what is the type of the PartitionKey key of
-                # the table
-                pk_type = self._get_pk_type(table=el['TableName'])
+    def _refill(self) -> None:
+        # Must be called holding the lock
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self.rate = min(self.max_rate, self.rate + self._recovery_per_sec * elapsed)
+        self._tokens = min(self.rate, self._tokens + self.rate * elapsed)
 
-                if issubclass(pk_type, str):
-                    auto_generate_pk_value: PartitionKeyValue = str(new_counter)
+    def _acquire(self) -> float:
+        while True:
+            with self._lock:
+                self._refill()
+                # A request larger than the bucket waits for a full
+                # bucket rather than forever
+                reserved_units = min(self._expected_units, self.rate)
 
-                elif issubclass(pk_type, bytes):
-                    auto_generate_pk_value = str(new_counter).encode()
+                if self._tokens >= reserved_units:
+                    self._tokens -= reserved_units
+                    return reserved_units
 
-                elif issubclass(pk_type, float):
-                    auto_generate_pk_value = new_counter
+                wait_secs = (reserved_units - self._tokens) / self.rate
 
-            elif pk_value is None and ag_pk_value is False:
-                raise exceptions.DynamoDBError(
-                    "If AutoGeneratePartitionKeyValue is disabled, a PartitionKeyValue MUST be"
-                    " passed in."
-                )
+            time.sleep(wait_secs)
 
-            else:
-                raise exceptions.DynamoDBError(
-                    "Unable to determine a valid operation with the provided PartitionKeyValue and"
-                    " AutoGeneratePartitionKeyValue."
-                )
+    def _settle(self, reserved_units: float, consumed_units: float) -> None:
+        with self._lock:
+            self._tokens -= consumed_units - reserved_units
 
-            pk_value_resolved = el.get('PartitionKeyValue') or auto_generate_pk_value
-            assert isinstance(pk_value_resolved, (str, bytes, int, float))
-            pk: dict[str, PartitionKeyValue] = {el['PartitionKeyKey']: pk_value_resolved}
+            if consumed_units > 0:
+                self._expected_units = 0.8 * self._expected_units + 0.2 * consumed_units
 
-            if (el.get('SortKeyKey') is None) ^ (el.get('SortKeyValue') is None):
-                raise exceptions.DynamoDBError(
-                    "Both SortKeyKey and SortKeyValue must be provided or both must be None."
-                )
-            has_sk = el.get('SortKeyKey') is not None and el.get('SortKeyValue') is not None
+    def _throttled(self) -> None:
+        with self._lock:
+            self._refill()
+            self.rate = max(self._min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
 
-            sk: dict[str, PartitionKeyValue] = {}
-            if has_sk:
-                sk_key = el['SortKeyKey']
-                sk_value = el['SortKeyValue']
-                assert isinstance(sk_key, str)
-                assert isinstance(sk_value, (str, bytes, int, float))
-                sk = {sk_key: sk_value}
 
-            # If we don't need to increment the counter we just put the
-            # item in the table
-            el_put_ser: type_defs.PutTypeDef = {
-                'TableName': el['TableName'],
-                'Item': self._serializer.serialize_put_items(**pk, **sk, **el['Items']),
-                'ConditionExpression': f"attribute_not_exists({el['PartitionKeyKey']})",
-            }
+class _MetricsAggregator:
+    """
+    Thread safe aggregator of the metrics of the DynamoDB calls, per
+    table and operation.
 
-            # Append the 'put' item to the DynamoDB atomic call
-            transact_items.append({'Put': el_put_ser})
+    :param callback: A callable receiving the metrics of every call.
+    """
 
-            # Append the 'put' item to the return list
-            response['Put'].append({
-                key: self._serializer.deserialize_att(value)  # type: ignore
-                for key, value in el_put_ser['Item'].items()
-            })
+    def __init__(self, callback: Optional[Callable[[CallMetrics], None]] = None) -> None:
+        self._callback = callback
+        self._metrics: dict[str, dict[str, OperationMetrics]] = {}
+        self._lock = threading.Lock()
+        self._bucket_labels = [f"<={bound}ms" for bound in _LATENCY_BUCKETS_MS] + [
+            f">{_LATENCY_BUCKETS_MS[-1]}ms"
+        ]
 
-            # If we need to increment the counter we update the counter
-            if ag_pk_value:
-                # Update the counter
-                counter_update_ser = self._set_atomic_counter(
-                    table=el['TableName'],
-                    counter_value=new_counter,
-                    last_modified_timestamp=last_mod_timestamp,
-                )
+    def call(
+        self,
+        func: Callable[..., Any],
+        operation: str,
+        tables: Sequence[str],
+        capacity: Literal['read', 'write'],
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Call func and record its metrics on every table of the request.
+
+        :param func: The DynamoDB client method.
+        :param operation: The name of the DynamoDB operation.
+        :param tables: The tables the request reads or writes.
+        :param capacity: Whether the operation consumes read or write
+            capacity.
+        :param kwargs: The arguments to pass to func.
+        :return: The DynamoDB response.
+        """
 
-                # Append the 'update' item to the DynamoDB atomic call
-                transact_items.append({'Update': counter_update_ser})
+        start = time.perf_counter()
 
-                # Append the 'update' item to the return list
-                updated_item: dict[str, Any] = {
-                    key[1:-12]: self._serializer.deserialize_att(value)  # type: ignore
-                    for key, value in counter_update_ser['ExpressionAttributeValues'].items()
+        try:
+            response = func(**kwargs)
+
+        except Exception as ex:
+            latency_secs = time.perf_counter() - start
+            error_code = (
+                ex.response.get('Error', {}).get('Code', type(ex).__name__)
+                if isinstance(ex, botocore.exceptions.ClientError)
+                else type(ex).__name__
+            )
+            for table in tables:
+                self._record(table, operation, capacity, latency_secs, {}, error_code)
+            raise
+
+        latency_secs = time.perf_counter() - start
+        for table in tables:
+            self._record(table, operation, capacity, latency_secs, response, None)
+
+        return response
+
+    def snapshot(self) -> dict[str, dict[str, OperationMetrics]]:
+        """
+        Return a copy of the aggregated metrics.
+
+        :return: The metrics as dict of {table: {operation: metrics}}.
+        """
+
+        with self._lock:
+            return {
+                table: {
+                    operation: {  # type: ignore
+                        **metrics,
+                        'LatencyHistogram': dict(metrics['LatencyHistogram']),
+                    }
+                    for operation, metrics in operations.items()
                 }
-                del updated_item['condition_attribute_value']
-                # Ignoring sk because _set_atomic_counter is not
-                # using it
-                p_key_k, p_key_v, *_ = self._serializer.deserialize_p_key(
-                    counter_update_ser['Key']  # type: ignore
-                )
-                updated_item[p_key_k] = p_key_v
-                response['Update'].append(updated_item)
+                for table, operations in self._metrics.items()
+            }
 
-        return transact_items, response
+    def reset(self) -> None:
+        """
+        Clear the aggregated metrics.
+        """
 
-    def _atomic_writes_update(
+        with self._lock:
+            self._metrics.clear()
+
+    def _record(
         self,
-        update: Iterable[dict[str, AttributeValue]],
-        transact_items: list[type_defs.TransactWriteItemTypeDef],
-        response: dict[str, list[dict[str, AttributeValueDeserialized]]],
-    ) -> tuple[
-        list[type_defs.TransactWriteItemTypeDef],
-        dict[str, list[dict[str, AttributeValueDeserialized]]],
-    ]:
-        # Normalize each update item in the list for DynamoDB
-        # transactional call
-        for el in update:
-            assert isinstance(el['TableName'], str)
-            assert isinstance(el['Items'], Mapping)
-            assert isinstance(el['PartitionKey'], MutableMapping)
+        table: str,
+        operation: str,
+        capacity: Literal['read', 'write'],
+        latency_secs: float,
+        ddb_response: Mapping[str, Any],
+        error_code: Optional[str],
+    ) -> None:
+        if 'Items' in ddb_response:
+            ddb_items = ddb_response['Items']
+        elif 'Item' in ddb_response:
+            ddb_items = [ddb_response['Item']]
+        else:
+            ddb_items = ddb_response.get('Responses', {}).get(table, [])
+
+        consumed_units = _consumed_capacity(ddb_response, table)
+        call_metrics: CallMetrics = {
+            'Table': table,
+            'Operation': operation,
+            'LatencySecs': latency_secs,
+            'ReadCapacityUnits': consumed_units if capacity == 'read' else 0.0,
+            'WriteCapacityUnits': consumed_units if capacity == 'write' else 0.0,
+            'Items': len(ddb_items),
+            'Bytes': sum(_estimate_item_size(ddb_item) for ddb_item in ddb_items),
+            'Error': error_code,
+        }
+        bucket = self._bucket_labels[bisect.bisect_left(_LATENCY_BUCKETS_MS, latency_secs * 1000)]
+
+        with self._lock:
+            metrics = self._metrics.setdefault(table, {}).get(operation)
+
+            if metrics is None:
+                metrics = self._metrics[table][operation] = {
+                    'Calls': 0,
+                    'Errors': 0,
+                    'Throttles': 0,
+                    'Pages': 0,
+                    'Items': 0,
+                    'Bytes': 0,
+                    'ReadCapacityUnits': 0.0,
+                    'WriteCapacityUnits': 0.0,
+                    'LatencySecs': 0.0,
+                    'LatencyHistogram': dict.fromkeys(self._bucket_labels, 0),
+                }
+
+            metrics['Calls'] += 1
+            metrics['Errors'] += error_code is not None
+            metrics['Throttles'] += error_code in _THROTTLING_ERROR_CODES
+            metrics['Pages'] += operation in {'scan', 'query'} and error_code is None
+            metrics['Items'] += call_metrics['Items']
+            metrics['Bytes'] += call_metrics['Bytes']
+            metrics['ReadCapacityUnits'] += call_metrics['ReadCapacityUnits']
+            metrics['WriteCapacityUnits'] += call_metrics['WriteCapacityUnits']
+            metrics['LatencySecs'] += latency_secs
+            metrics['LatencyHistogram'][bucket] += 1
+
+        # The callback runs outside the lock, so a slow consumer
+        # doesn't block the other threads
+        if self._callback is not None:
+            self._callback(call_metrics)
+
+
+def _consumed_capacity(ddb_response: Mapping[str, Any], table: str) -> float:
+    """
+    Return the capacity units a DynamoDB response consumed on the table.
 
-            pk_key, pk_value = next(iter(el['PartitionKey'].items()))
-            assert isinstance(pk_value, (str, bytes, int, float))
+    :param ddb_response: The DynamoDB response, of a request made with
+        ReturnConsumedCapacity.
+    :param table: DynamoDB table name.
+    :return: The capacity units consumed.
+    """
 
-            # Check if a sort_key is passed in
-            if el.get('SortKey') is not None:
-                # Unpack sort_key attribute dictionary
-                assert isinstance(el['SortKey'], MutableMapping)
-                sk_key, sk_value = next(iter(el['SortKey'].items()))
-                assert isinstance(sk_value, (str, bytes, int, float))
-            else:
-                sk_key, sk_value = (None, None)
+    consumed_capacity = ddb_response.get('ConsumedCapacity') or []
 
-            pk_ser = self._serializer.serialize_p_key(
-                pk_key=pk_key, pk_value=pk_value, sk_key=sk_key, sk_value=sk_value
-            )
+    # Single item operations return a dict, batch operations a list
+    if isinstance(consumed_capacity, Mapping):
+        consumed_capacity = [consumed_capacity]
 
-            exp, exp_att_names, exp_att_values = self._serializer.serialize_update_items(
-                **el['Items']
-            )
+    return float(
+        sum(
+            table_capacity.get('CapacityUnits', 0.0)
+            for table_capacity in consumed_capacity
+            if table_capacity.get('TableName', table) == table
+        )
+    )
 
-            # Build a condition expression for “strict update”
-            cond_exp = f"attribute_exists(#{pk_key})"
-            exp_att_names.update({f"#{pk_key}": pk_key})
 
-            el_update_ser: type_defs.UpdateTypeDef = {
-                'TableName': el['TableName'],
-                'Key': pk_ser,
-                'ConditionExpression': cond_exp,
-                'UpdateExpression': exp,
-                'ExpressionAttributeNames': exp_att_names,
-                'ExpressionAttributeValues': exp_att_values,
-            }
+class _ItemCache:
+    """
+    Thread safe LRU cache of raw DynamoDB items, with a time to live
+    and an optional limit on the estimated size of the items.
+
+    Every invalidation increases the cache generation. A reader takes
+    the generation before reading from DynamoDB and the item is cached
+    only if the generation is unchanged, so an item written while it
+    is being read is never cached with its old value.
+
+    :param max_items: The maximum number of items cached.
+    :param max_bytes: The maximum estimated size of the items cached,
+        None for no limit.
+    :param ttl_secs: The number of seconds an item is valid for. None
+        means the items never expire.
+    """
 
-            # Check if a condition is passed in
-            if el.get('ConditionAttribute') is not None:
-                # Unpack condition attribute dictionary
-                assert isinstance(el['ConditionAttribute'], MutableMapping)
-                # We cant mutate the original dictionary because of the
-                # retry decorator will need to run through it again in
-                # case of failure
-                cond_att_key, cond_att_value = next(iter(el['ConditionAttribute'].items()))
+    def __init__(self, max_items: int, max_bytes: Optional[int], ttl_secs: Optional[float]) -> None:
+        self._max_items = max_items
+        self._max_bytes = max_bytes
+        self._ttl_secs = ttl_secs
+        self._entries: collections.OrderedDict[tuple[Any, ...], tuple[float, int, Item]] = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._generation = 0
+        self._stats = {'Hits': 0, 'Misses': 0, 'Evictions': 0, 'Expirations': 0, 'Invalidations': 0}
 
-                # If condition attribute exists pass it to the DynamoDB
-                # call
-                el_update_ser.update({
-                    'ConditionExpression': (
-                        f"{el_update_ser['ConditionExpression']} AND"
-                        f" #{cond_att_key} = :condition_attribute_value_placeholder"
-                    )
-                })
+    @property
+    def generation(self) -> int:
+        return self._generation
 
-                # #condition_att_key has to be passed
-                # along the ExpressionAttributeNames because is used by
-                # the ConditionExpression
-                exp_att_names[f"#{cond_att_key}"] = cond_att_key
+    def get(self, key: tuple[Any, ...]) -> Optional[Item]:
+        """
+        Return the cached item, or None if not cached or expired.
 
-                # :condition_attribute_value_placeholder has to be
-                # passed along the ExpressionAttributeValues because
-                # is used by the ConditionExpression
-                exp_att_values[':condition_attribute_value_placeholder'] = (
-                    self._serializer.serialize_att(cond_att_value)
-                )
+        :param key: The cache key, table name and primary key identity.
+        :return: The raw DynamoDB item or None.
+        """
 
-            # Append the 'update' item to the DynamoDB atomic call
-            transact_items.append({'Update': el_update_ser})
+        with self._lock:
+            entry = self._entries.get(key)
 
-            # Append the 'update' item to the return list
-            updated_item = {
-                key[1:-12]: self._serializer.deserialize_att(value)
-                for key, value in exp_att_values.items()
-            }
-            if el.get('ConditionAttribute') is not None:
-                del updated_item['condition_attribute_value']
-            pk_key, pk_value, sk_key, sk_value = self._serializer.deserialize_p_key(pk_ser)
-            updated_item[pk_key] = pk_value
-            if sk_key is not None:
-                updated_item[sk_key] = sk_value
-            response['Update'].append(updated_item)
+            if entry is None:
+                self._stats['Misses'] += 1
+                return None
 
-        return transact_items, response
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                self._stats['Expirations'] += 1
+                self._stats['Misses'] += 1
+                return None
 
-    def _atomic_writes_upsert(
-        self,
-        upsert: Iterable[dict[str, AttributeValue]],
-        transact_items: list[type_defs.TransactWriteItemTypeDef],
-        response: dict[str, list[dict[str, AttributeValueDeserialized]]],
-    ) -> tuple[
-        list[type_defs.TransactWriteItemTypeDef],
-        dict[str, list[dict[str, AttributeValueDeserialized]]],
-    ]:
-        # Normalize each upsert item in the list for DynamoDB
-        # transactional call
-        for el in upsert:
-            assert isinstance(el['TableName'], str)
-            assert isinstance(el['Items'], Mapping)
-            assert isinstance(el['PartitionKey'], MutableMapping)
+            self._entries.move_to_end(key)
+            self._stats['Hits'] += 1
 
-            pk_key, pk_value = next(iter(el['PartitionKey'].items()))
-            assert isinstance(pk_value, (str, bytes, int, float))
+            return entry[2]
 
-            # Check if a sort_key is passed in
-            if el.get('SortKey') is not None:
-                # Unpack sort_key attribute dictionary
-                assert isinstance(el['SortKey'], MutableMapping)
-                sk_key, sk_value = next(iter(el['SortKey'].items()))
-                assert isinstance(sk_value, (str, bytes, int, float))
-            else:
-                sk_key, sk_value = (None, None)
+    def put(self, key: tuple[Any, ...], item: Item, generation: int) -> None:
+        """
+        Cache the item, evicting the least recently used items if the
+        cache is full.
 
-            pk_ser = self._serializer.serialize_p_key(
-                pk_key=pk_key, pk_value=pk_value, sk_key=sk_key, sk_value=sk_value
-            )
+        :param key: The cache key, table name and primary key identity.
+        :param item: The raw DynamoDB item.
+        :param generation: The cache generation taken before the item
+            was read.
+        """
 
-            exp, exp_att_names, exp_att_values = self._serializer.serialize_update_items(
-                **el['Items']
-            )
+        item_size = _estimate_item_size(item)
 
-            el_upsert_ser: type_defs.UpdateTypeDef = {
-                'TableName': el['TableName'],
-                'Key': pk_ser,
-                'UpdateExpression': exp,
-                'ExpressionAttributeNames': exp_att_names,
-                'ExpressionAttributeValues': exp_att_values,
-            }
+        if self._max_bytes is not None and item_size > self._max_bytes:
+            return
 
-            # Check if a condition is passed in
-            if el.get('ConditionAttribute') is not None:
-                # Unpack condition attribute dictionary
-                assert isinstance(el['ConditionAttribute'], MutableMapping)
-                # We cant mutate the original dictionary because of the
-                # retry decorator will need to run through it again in
-                # case of failure
-                cond_att_key, cond_att_value = next(iter(el['ConditionAttribute'].items()))
+        expires_at = (
+            time.monotonic() + self._ttl_secs if self._ttl_secs is not None else float('inf')
+        )
 
-                # If condition attribute exists pass it to the DynamoDB
-                # call
-                el_upsert_ser.update({
-                    'ConditionExpression': (
-                        f"#{cond_att_key} = :condition_attribute_value_placeholder"
-                    )
-                })
+        with self._lock:
+            if generation != self._generation:
+                return
 
-                # #condition_att_key has to be passed
-                # along the ExpressionAttributeNames because is used by
-                # the ConditionExpression
-                exp_att_names[f"#{cond_att_key}"] = cond_att_key
+            self._remove(key)
+            self._entries[key] = (expires_at, item_size, item)
+            self._bytes += item_size
 
-                # :condition_attribute_value_placeholder has to be
-                # passed along the ExpressionAttributeValues because
-                # is used by the ConditionExpression
-                exp_att_values[':condition_attribute_value_placeholder'] = (
-                    self._serializer.serialize_att(cond_att_value)
-                )
+            while len(self._entries) > self._max_items or (
+                self._max_bytes is not None and self._bytes > self._max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+                self._stats['Evictions'] += 1
 
-            # Append the 'update' item to the DynamoDB atomic call
-            transact_items.append({'Update': el_upsert_ser})
+    def invalidate(self, keys: Iterable[tuple[Any, ...]]) -> None:
+        """
+        Remove the items from the cache.
 
-            # Append the 'upsert' item to the return list
-            upsert_item = {
-                key[1:-12]: self._serializer.deserialize_att(value)
-                for key, value in exp_att_values.items()
-            }
-            if el.get('ConditionAttribute') is not None:
-                del upsert_item['condition_attribute_value']
-            pk_key, pk_value, sk_key, sk_value = self._serializer.deserialize_p_key(pk_ser)
-            upsert_item[pk_key] = pk_value
-            if sk_key is not None:
-                upsert_item[sk_key] = sk_value
-            response['Upsert'].append(upsert_item)
+        :param keys: The cache keys of the items.
+        """
 
-        return transact_items, response
+        with self._lock:
+            self._generation += 1
 
-    def _atomic_writes_delete(
-        self,
-        delete: Iterable[dict[str, AttributeValue]],
-        transact_items: list[type_defs.TransactWriteItemTypeDef],
-        response: dict[str, list[dict[str, AttributeValueDeserialized]]],
-    ) -> tuple[
-        list[type_defs.TransactWriteItemTypeDef],
-        dict[str, list[dict[str, AttributeValueDeserialized]]],
-    ]:
-        # Normalize each delete item in the list for DynamoDB
-        # transactional call
-        for el in delete:
-            assert isinstance(el['TableName'], str)
-            assert isinstance(el['PartitionKey'], MutableMapping)
+            for key in keys:
+                if self._remove(key):
+                    self._stats['Invalidations'] += 1
 
-            pk_key, pk_value = next(iter(el['PartitionKey'].items()))
-            assert isinstance(pk_value, (str, bytes, int, float))
+    def clear(self, table: Optional[str] = None) -> None:
+        """
+        Remove all the items of a table, or all the items, from the
+        cache.
 
-            # Check if a sort_key is passed in
-            if el.get('SortKey') is not None:
-                # Unpack sort_key attribute dictionary
-                assert isinstance(el['SortKey'], MutableMapping)
-                sk_key, sk_value = next(iter(el['SortKey'].items()))
-                assert isinstance(sk_value, (str, bytes, int, float))
-            else:
-                sk_key, sk_value = (None, None)
+        :param table: DynamoDB table name. Default is None, which means
+            all the tables.
+        """
 
-            pk_ser = self._serializer.serialize_p_key(
-                pk_key=pk_key, pk_value=pk_value, sk_key=sk_key, sk_value=sk_value
-            )
+        with self._lock:
+            self._generation += 1
 
-            el_delete_ser: type_defs.DeleteTypeDef = {
-                'TableName': el['TableName'],
-                'Key': pk_ser,
+            for key in [key for key in self._entries if table is None or key[0] == table]:
+                self._remove(key)
+                self._stats['Invalidations'] += 1
+
+    def stats(self) -> ItemCacheStats:
+        """
+        Return the cache statistics.
+
+        :return: The cache statistics.
+        """
+
+        with self._lock:
+            return {
+                'Hits': self._stats['Hits'],
+                'Misses': self._stats['Misses'],
+                'Evictions': self._stats['Evictions'],
+                'Expirations': self._stats['Expirations'],
+                'Invalidations': self._stats['Invalidations'],
+                'Items': len(self._entries),
+                'Bytes': self._bytes,
             }
 
-            # Append the 'delete' item to the DynamoDB atomic call
-            transact_items.append({'Delete': el_delete_ser})
+    def _remove(self, key: tuple[Any, ...]) -> bool:
+        # Must be called holding the lock
+        entry = self._entries.pop(key, None)
 
-            # Append the 'delete' item to the return list
-            deleted_item: dict[str, AttributeValueDeserialized] = {}
-            pk_key, pk_value, sk_key, sk_value = self._serializer.deserialize_p_key(pk_ser)
-            deleted_item[pk_key] = pk_value
-            if sk_key is not None:
-                deleted_item[sk_key] = sk_value
-            response['Delete'].append(deleted_item)
+        if entry is None:
+            return False
 
-        return transact_items, response
+        self._bytes -= entry[1]
 
-    def _atomic_writes_condition_check(
-        self,
-        condition_check: Iterable[dict[str, AttributeValue]],
-        transact_items: list[type_defs.TransactWriteItemTypeDef],
-        response: dict[str, list[dict[str, AttributeValueDeserialized]]],
-    ) -> tuple[
-        list[type_defs.TransactWriteItemTypeDef],
-        dict[str, list[dict[str, AttributeValueDeserialized]]],
-    ]:
-        # Normalize each conditional check item in the list for DynamoDB
-        # transactional call
-        for el in condition_check:
-            assert isinstance(el['TableName'], str)
-            assert isinstance(el['PartitionKey'], MutableMapping)
+        return True
 
-            pk_key, pk_value = next(iter(el['PartitionKey'].items()))
-            assert isinstance(pk_value, (str, bytes, int, float))
 
-            # Check if a sort_key is passed in
-            if el.get('SortKey') is not None:
-                # Unpack sort_key attribute dictionary
-                assert isinstance(el['SortKey'], MutableMapping)
-                sk_key, sk_value = next(iter(el['SortKey'].items()))
-                assert isinstance(sk_value, (str, bytes, int, float))
-            else:
-                sk_key, sk_value = (None, None)
+def _estimate_item_size(item_ser: Mapping[str, Any]) -> int:
+    """
+    Estimate the size of a serialized DynamoDB item in bytes, following
+    the DynamoDB item size rules: the length of every attribute name
+    plus the size of its value.
 
-            pk_ser = self._serializer.serialize_p_key(
-                pk_key=pk_key, pk_value=pk_value, sk_key=sk_key, sk_value=sk_value
-            )
+    :param item_ser: The serialized DynamoDB item.
+    :return: The estimated size in bytes.
+    """
 
-            el_cond_check_ser: type_defs.ConditionCheckTypeDef = {
-                'TableName': el['TableName'],
-                'Key': pk_ser,
-                # TODO(carlogtt): not sure how to use the below yet
-                'ConditionExpression': 'string',
-                'ExpressionAttributeNames': {'string': 'string'},
-                'ExpressionAttributeValues': {},
-            }
+    def _value_size(attribute: Mapping[str, Any]) -> int:
+        ((tag, value),) = attribute.items()
 
-            # Append the 'condition_check' item to the DynamoDB atomic
-            # call
-            transact_items.append({'ConditionCheck': el_cond_check_ser})
+        if tag == 'S':
+            return len(value.encode())
 
-            # Append the 'condition_check' item to the return list
-            cond_check_item: dict[str, AttributeValueDeserialized] = {}
-            pk_key, pk_value, sk_key, sk_value = self._serializer.deserialize_p_key(pk_ser)
-            cond_check_item[pk_key] = pk_value
-            if sk_key is not None:
-                cond_check_item[sk_key] = sk_value
-            response['ConditionCheck'].append(cond_check_item)
+        elif tag == 'B':
+            return len(value)
 
-        return transact_items, response
+        elif tag == 'N':
+            # Numbers are stored with up to 38 significant digits, two
+            # digits per byte plus one byte
+            return len(value.lstrip('-').replace('.', '')) // 2 + 1
 
-    @utils.retry(exception_to_check=exceptions.DynamoDBError, delay_secs=1)
-    def put_atomic_counter(
-        self,
-        table: str,
-    ):
-        """
-        In Amazon DynamoDB, there isn't an in-built auto-increment
-        functionality like in SQL databases for generating record IDs
-        (Primary Key values). However, we can achieve a similar outcome
-        by managing an atomic counter.
-        This method put the initial __PK_VALUE_COUNTER__ item in the
-        table and set the value to 0.
-        If the __PK_VALUE_COUNTER__ item already exists in the table
-        then it does nothing.
+        elif tag in {'SS', 'BS', 'NS'}:
+            return sum(_value_size({tag[0]: el}) for el in value)
+
+        elif tag == 'L':
+            return 3 + sum(1 + _value_size(el) for el in value)
 
-        :param table: DynamoDB table name.
-        :return: None
-        :raise DynamoDBError: If operation fails.
-        """
+        elif tag == 'M':
+            return 3 + sum(1 + len(key.encode()) + _value_size(val) for key, val in value.items())
 
-        # Using the tableName_SysItems table for lookup
-        sys_table = table + "_SysItems"
-        pk_ser = self._serializer.serialize_p_key(pk_key="pk_id", pk_value="__PK_VALUE_COUNTER__")
+        else:
+            # NULL and BOOL
+            return 1
 
-        try:
-            ddb_response = self._client.get_item(TableName=sys_table, Key=pk_ser)
-            counter = ddb_response.get('Item')
+    return sum(len(key.encode()) + _value_size(value) for key, value in item_ser.items())
 
-        except self._client.exceptions.ResourceNotFoundException:
-            module_logger.debug(f"Table: {sys_table} not found in DynamoDB, Creating it.")
 
-            # Initialize a dictionary with all the arguments to pass
-            # into the DynamoDB put_item call
-            ddb_create_table_args: dict[str, Any] = {
-                'TableName': sys_table,
-                'BillingMode': 'PAY_PER_REQUEST',
-                'AttributeDefinitions': [{
-                    'AttributeName': 'pk_id',
-                    'AttributeType': 'S',
-                }],
-                'KeySchema': [{
-                    'AttributeName': 'pk_id',
-                    'KeyType': 'HASH',
-                }],
-                'DeletionProtectionEnabled': True,
-            }
+@functools.lru_cache(maxsize=1)
+def _process_serializer() -> DynamoDbSerializer:
+    """
+    Return the serializer of the current worker process, created once
+    per process.
 
-            try:
-                self._client.create_table(**ddb_create_table_args)
+    :return: The DynamoDbSerializer.
+    """
 
-                # Give it time to create the table
-                time.sleep(15)
+    return DynamoDbSerializer()
 
-                # Setting the counter to None, so we can put the counter
-                # item in the newly created table
-                counter = None
 
-            except botocore.exceptions.ClientError as ex:
-                raise exceptions.DynamoDBError(str(ex.response))
+def _deserialize_page(
+    ddb_items: list[dict[str, Any]],
+    schema: Optional[tuple[str, ...]],
+    item_transform: Optional[Callable[[Any], Any]],
+) -> list[Any]:
+    """
+    Deserialize, and transform, the items of a raw scan page on a
+    worker process.
+
+    :param ddb_items: The raw DynamoDB items of the page.
+    :param schema: If passed in, deserialize the items into rows of
+        these attributes.
+    :param item_transform: A callable applied to every deserialized
+        item.
+    :return: The deserialized items. Rows are returned as plain tuples
+        when there is no item_transform.
+    """
 
-            except Exception as ex:
-                raise exceptions.DynamoDBError(str(ex))
+    serializer = _process_serializer()
 
-        except botocore.exceptions.ClientError as ex:
-            raise exceptions.DynamoDBError(str(ex.response)) from None
+    if schema is None:
+        items: list[Any] = [serializer.deserialize_item(ddb_item) for ddb_item in ddb_items]
 
-        except Exception as ex:
-            raise exceptions.DynamoDBError(str(ex)) from None
+    elif item_transform is None:
+        return [tuple(serializer.deserialize_row(ddb_item, schema)) for ddb_item in ddb_items]
 
-        if not counter:
-            self.put_item(
-                table=sys_table,
-                partition_key_key="pk_id",
-                partition_key_value="__PK_VALUE_COUNTER__",
-                current_counter_value=0,
-                last_modified_timestamp=time.time_ns(),
-            )
+    else:
+        items = [serializer.deserialize_row(ddb_item, schema) for ddb_item in ddb_items]
 
-    def _put_single_item(
-        self,
-        table: str,
-        partition_key_key: str,
-        partition_key_value: PartitionKeyValue,
-        sort_key_key: Optional[str] = None,
-        sort_key_value: Optional[SortKeyValue] = None,
-        **items: AttributeValue,
-    ) -> dict[str, AttributeValueDeserialized]:
-        """
-        Put the item in the table.
+    if item_transform is not None:
+        items = [item_transform(item) for item in items]
 
-        :param table: DynamoDB table name.
-        :param partition_key_key: The key of the partition key.
-        :param partition_key_value: The value of the partition key.
-        :param sort_key_key: The key of the sort key.
-        :param sort_key_value: The value of the sort key.
-        :param items: Additional items to add.
-        :return: The stored DynamoDB Item deserialized.
-        :raise DynamoDBError: If operation fails.
-        :raise DynamoDBConflictError: If put item fails due to a
-            conflict.
-        """
+    return items
 
-        pk_ser = self._serializer.serialize_p_key(
-            pk_key=partition_key_key,
-            pk_value=partition_key_value,
-            sk_key=sort_key_key,
-            sk_value=sort_key_value,
-        )
-        additional_items = self._serializer.serialize_put_items(**items)
-        items_ser = {**additional_items, **pk_ser}
 
-        # Initialize a dictionary with all the arguments to pass into
-        # the DynamoDB put_item call
-        ddb_put_item_args: dict[str, Any] = {
-            'TableName': table,
-            'Item': items_ser,
-            'ConditionExpression': f"attribute_not_exists({partition_key_key})",
-        }
+class _FileExportSink:
+    """
+    Binary destination of an exported file on the local disk.
 
-        try:
-            with utils.retry(exception_to_check=Exception, delay_secs=1) as retryer:
-                retryer(self._client.put_item, **ddb_put_item_args)
+    :param path: The path of the file.
+    """
 
-        except botocore.exceptions.ClientError as ex:
-            if "ConditionalCheckFailed" in str(ex):
-                raise exceptions.DynamoDBConflictError(str(ex.response))
-            else:
-                raise exceptions.DynamoDBError(str(ex.response))
+    def __init__(self, path: str) -> None:
+        self.name = path
+        self.bytes_written = 0
+        self._file = open(path, 'wb')
 
-        except Exception as ex:
-            raise exceptions.DynamoDBError(str(ex))
+    def write(self, data: bytes) -> int:
+        self._file.write(data)
+        self.bytes_written += len(data)
 
-        # If we get here it means that the item has been added
-        # successfully therefore we return it
-        item_put = {
-            key: self._serializer.deserialize_att(value) for key, value in items_ser.items()
-        }
+        return len(data)
 
-        return item_put
+    def flush(self) -> None:
+        self._file.flush()
 
-    def _get_atomic_counter(self, table: str) -> tuple[int, int]:
-        """
-        This method will get the value of the atomic counter.
+    def finish(self) -> None:
+        self._file.close()
 
-        :param table: DynamoDB table name.
-        :return: Counter value and last_modified_timestamp as tuple.
-        :raise DynamoDBError: If counter not found.
-        """
+    def abort(self) -> None:
+        self._file.close()
+        pathlib.Path(self.name).unlink(missing_ok=True)
 
-        # Using the tableName_SysItems table for lookup
-        sys_table = table + "_SysItems"
 
+class _S3ExportSink:
+    """
+    Binary destination of an exported file stored on S3 through a
+    multipart upload, buffering at most one part in memory.
+
+    :param s3: The S3 instance to store the file with.
+    :param bucket: The name of the S3 bucket.
+    :param key: The key of the file.
+    :param part_size: The size of the parts uploaded.
+    """
+
+    def __init__(
+        self, s3: aws_boto3.S3, bucket: str, key: str, part_size: int = _EXPORT_S3_PART_SIZE
+    ) -> None:
+        self.name = key
+        self.bytes_written = 0
+        self._s3 = s3
+        self._bucket = bucket
+        self._part_size = part_size
+        self._buffer = bytearray()
+        self._parts: list[dict[str, Any]] = []
+        self._upload_id = s3.create_multipart_upload(bucket=bucket, filename=key)['UploadId']
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        self.bytes_written += len(data)
+
+        while len(self._buffer) >= self._part_size:
+            self._upload_part(bytes(self._buffer[: self._part_size]))
+            del self._buffer[: self._part_size]
+
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def finish(self) -> None:
+        # A multipart upload needs at least one part, which can be
+        # empty when it's the only one
+        if self._buffer or not self._parts:
+            self._upload_part(bytes(self._buffer))
+            self._buffer.clear()
+
+        self._s3.complete_multipart_upload(
+            bucket=self._bucket,
+            filename=self.name,
+            upload_id=self._upload_id,
+            parts=self._parts,  # type: ignore
+        )
+
+    def abort(self) -> None:
+        self._buffer.clear()
+        self._s3.abort_multipart_upload(
+            bucket=self._bucket, filename=self.name, upload_id=self._upload_id
+        )
+
+    def _upload_part(self, body: bytes) -> None:
+        part_number = len(self._parts) + 1
+        s3_response = self._s3.upload_part(
+            bucket=self._bucket,
+            filename=self.name,
+            upload_id=self._upload_id,
+            part_number=part_number,
+            body=body,
+        )
+        self._parts.append({'ETag': s3_response['ETag'], 'PartNumber': part_number})
+
+
+def _export_json_default(value: Any) -> Any:
+    """
+    Convert the deserialized values that are not JSON types for the
+    exports.
+
+    :param value: The value to convert.
+    :return: The JSON compatible value.
+    :raise TypeError: If the value can't be converted.
+    """
+
+    if isinstance(value, (set, frozenset)):
         try:
-            item = self.get_item(
-                table=sys_table,
-                partition_key_key="pk_id",
-                partition_key_value="__PK_VALUE_COUNTER__",
-            )
-            assert item is not None
+            return sorted(value)
 
-            current_counter_value = item['current_counter_value']
-            assert isinstance(current_counter_value, int)
+        except TypeError:
+            return list(value)
 
-            last_modified_timestamp = item['last_modified_timestamp']
-            assert isinstance(last_modified_timestamp, int)
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode()
 
-        except AssertionError:
-            raise exceptions.DynamoDBError(
-                f"table: {table!r} doesn't have the '__PK_VALUE_COUNTER__' item, call"
-                f" '{self.put_atomic_counter.__name__}' to create one."
-            )
+    if isinstance(value, decimal.Decimal):
+        return str(value)
 
-        except (TypeError, KeyError):
-            raise exceptions.DynamoDBError(
-                f"Item '__PK_VALUE_COUNTER__' in table: {table!r} is missing some or all of the"
-                " mandatory attributes: 'current_counter_value' and 'last_modified_timestamp'."
-            )
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
 
-        except Exception as ex:
-            if "ResourceNotFoundException" in str(ex):
-                raise exceptions.DynamoDBError(
-                    f"'__PK_VALUE_COUNTER__' not found as table: '{table}_SysItems' doesn't exists,"
-                    f" call '{self.put_atomic_counter.__name__}('{table}')' to create one."
-                )
 
-            else:
-                raise
+def _export_csv_value(value: Any) -> Any:
+    """
+    Convert a deserialized value into a CSV field for the exports.
 
-        return current_counter_value, last_modified_timestamp
+    :param value: The value to convert.
+    :return: The CSV field.
+    """
 
-    def _set_atomic_counter(
-        self, table: str, counter_value: int, last_modified_timestamp: int
-    ) -> type_defs.UpdateTypeDef:
-        """
-        This method will prepare an atomic update dictionary.
+    if value is None:
+        return ''
 
-        :param table: DynamoDB table name.
-        :param counter_value: The new value to se to the counter.
-        :param last_modified_timestamp: The last modified timestamp to
-            use as condition expression.
-        :return: An atomic update dictionary.
-        :raise DynamoDBError: If operation fails.
-        """
+    if isinstance(value, (str, int, float)):
+        return value
 
-        # Using the tableName_SysItems table for lookup
-        sys_table = table + "_SysItems"
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode()
 
-        # Update the counter
-        exp, exp_att_names, exp_att_values = self._serializer.serialize_update_items(**{
-            'current_counter_value': counter_value,
-            'last_modified_timestamp': time.time_ns(),
-        })
+    return json.dumps(value, default=_export_json_default, separators=(',', ':'))
 
-        # :condition_attribute_value_placeholder has to be
-        # passed along the ExpressionAttributeValues because
-        # is used by the ConditionExpression
-        exp_att_values[':condition_attribute_value_placeholder'] = self._serializer.serialize_att(
-            last_modified_timestamp
-        )
 
-        pk_ser = self._serializer.serialize_p_key(pk_key="pk_id", pk_value="__PK_VALUE_COUNTER__")
+def _shard_number(sort_key_value: SortKeyValue, shards: int) -> int:
+    """
+    Return the shard of an item of a sharded table, derived from its
+    sort key value so that the item is always found in the same shard.
 
-        el_update_ser: type_defs.UpdateTypeDef = {
-            'TableName': sys_table,
-            'Key': pk_ser,
-            'UpdateExpression': exp,
-            'ExpressionAttributeNames': exp_att_names,
-            'ExpressionAttributeValues': exp_att_values,
-            'ConditionExpression': (
-                "#last_modified_timestamp = :condition_attribute_value_placeholder"
-            ),
-        }
+    :param sort_key_value: The sort key value of the item.
+    :param shards: The number of shards of the table.
+    :return: The shard number, from 0 to shards - 1.
+    """
 
-        return el_update_ser
+    if isinstance(sort_key_value, bytes):
+        sort_key_bytes = sort_key_value
 
-    def _get_pk_type(self, table: str) -> Union[type[bytes], type[str], type[float]]:
-        """
-        Scan the table and return the type of the PartitionKeyItem Key.
+    elif isinstance(sort_key_value, str):
+        sort_key_bytes = sort_key_value.encode()
 
-        :param table: DynamoDB table name.
-        :return: The type of the PartitionKey key.
-        :raise DynamoDBError: If operation fails.
-        """
+    else:
+        # Numbers are hashed in their canonical form, so 1 and 1.0,
+        # which DynamoDB stores as the same number, share the shard
+        sort_key_bytes = str(decimal.Decimal(str(sort_key_value)).normalize()).encode()
 
-        # Initialize values to prevent UnboundLocalError
-        pk_key = ""
-        pk_key_type = ""
+    return zlib.crc32(sort_key_bytes) % shards
 
-        try:
-            with utils.retry(exception_to_check=Exception, delay_secs=1) as retryer:
-                ddb_response = retryer(self._client.describe_table, TableName=table)
 
-        except botocore.exceptions.ClientError as ex:
-            raise exceptions.DynamoDBError(str(ex.response))
+def _unshard_ddb_item(ddb_item: dict[str, Any], partition_key_key: str) -> dict[str, Any]:
+    """
+    Return a raw item of a sharded table with the logical partition
+    key value in place of the physical one.
 
-        except Exception as ex:
-            raise exceptions.DynamoDBError(str(ex))
+    :param ddb_item: The raw DynamoDB item.
+    :param partition_key_key: The key of the partition key.
+    :return: A copy of the item with the logical partition key value.
+    """
 
-        # Get the PartitionKey Key
-        for idx, schemas in enumerate(ddb_response['Table']['KeySchema']):
-            for k, v in schemas.items():
-                if k == 'KeyType' and v == 'HASH':
-                    pk_key = ddb_response['Table']['KeySchema'][idx]['AttributeName']
+    partition_key_att = ddb_item.get(partition_key_key)
 
-        # Get the PartitionKey Key Type
-        for idx, attributes in enumerate(ddb_response['Table']['AttributeDefinitions']):
-            for k, v in attributes.items():
-                if k == 'AttributeName' and v == pk_key:
-                    pk_key_type = ddb_response['Table']['AttributeDefinitions'][idx][
-                        'AttributeType'
-                    ]
+    if partition_key_att is None or 'S' not in partition_key_att:
+        return ddb_item
 
-        # Convert to Python type and return
-        if pk_key_type == 'S':
-            return str
+    return {**ddb_item, partition_key_key: {'S': partition_key_att['S'].rpartition('#')[0]}}
 
-        elif pk_key_type == 'B':
-            return bytes
 
-        elif pk_key_type == 'N':
-            return float
+def _unshard_scan_pages(
+    pages: Iterable[tuple[int, dict[str, Any]]], partition_key_key: str
+) -> Generator[tuple[int, dict[str, Any]], None, None]:
+    """
+    Replace the physical partition key values of the items of the scan
+    pages of a sharded table with the logical ones.
 
-        else:
-            raise exceptions.DynamoDBError("PartitionKey Key Type not found")
+    :param pages: The tuples of segment and raw scan page.
+    :param partition_key_key: The key of the partition key.
+    :return: Generator of tuples of segment and raw scan page.
+    """
+
+    for segment, ddb_response in pages:
+        yield segment, {
+            **ddb_response,
+            'Items': [
+                _unshard_ddb_item(ddb_item, partition_key_key)
+                for ddb_item in ddb_response.get('Items', [])
+            ],
+        }
 
 
-class DynamoDbSerializer:
+def _schema_projection(
+    projection: Optional[Iterable[str]], schema: Optional[Sequence[str]]
+) -> Optional[Iterable[str]]:
     """
-    DynamoDbSerializer is a utility class for serializing and
-    deserializing Python data types to DynamoDB compatible formats and
-    vice versa.
-    It provides methods for converting Python objects to DynamoDB
-    attributes and for converting DynamoDB attributes back to Python
-    objects.
+    Return the projection of a read, derived from the schema when only
+    the schema is passed in.
 
-    This class is useful for preparing data for storage in a DynamoDB
-    table, and for reading data back into Python objects.
+    :param projection: The projection passed in.
+    :param schema: The schema passed in.
+    :return: The projection to apply.
     """
 
-    def __init__(self):
-        self.string_utils = utils.StringUtils()
+    if projection is not None or schema is None:
+        return projection
 
-    def serialize_att(self, attribute_value: AttributeValue) -> type_defs.AttributeValueTypeDef:
-        """
-        Serialize a Python data type into a format suitable for
-        AWS DynamoDB.
-        Transforms a Python data type into a format that is compatible
-        with AWS DynamoDB by mapping it into its corresponding DynamoDB
-        data type.
+    # Attribute names that would be parsed as document paths can't be
+    # projected as top level attributes, so the whole item is read
+    if any('.' in key or '[' in key or ']' in key for key in schema):
+        return None
 
-        :param attribute_value: The attribute value to be serialized.
-        :return: A dictionary containing the serialized attribute and
-            its corresponding DynamoDB data type descriptor.
-            i.e. "string" -> {"S": "string"}
-        :raise DynamoDBError: If the provided attribute_value type is
-            not supported.
-        """
+    return schema
 
-        if attribute_value is None:
-            return {"NULL": True}
 
-        elif isinstance(attribute_value, bool):
-            return {"BOOL": attribute_value}
+def _load_scan_state(
+    table: str,
+    total_segments: Optional[int],
+    resume_token: Optional[str],
+) -> dict[str, Any]:
+    """
+    Return the state of a scan, decoded from the resume token or of a
+    new scan if no token is passed in.
+
+    :param table: DynamoDB table name.
+    :param total_segments: The number of segments of the scan, None for
+        a sequential scan.
+    :param resume_token: The token to resume from.
+    :return: The scan state, as dict of {'Table': str,
+        'TotalSegments': int | None, 'Segments': [segment state, ...]}
+        where every segment state is empty if the segment hasn't
+        started, {'ExclusiveStartKey': key} or {'Done': True}.
+    :raise DynamoDBError: If the token is not valid or doesn't match
+        the table and total_segments.
+    """
 
-        elif isinstance(attribute_value, str):
-            return {"S": attribute_value}
+    if resume_token is None:
+        return {
+            'Table': table,
+            'TotalSegments': total_segments,
+            'Segments': [{} for _ in range(total_segments or 1)],
+        }
 
-        elif isinstance(attribute_value, bytes) or isinstance(attribute_value, bytearray):
-            return {"B": attribute_value}
+    try:
+        scan_state: dict[str, Any] = json.loads(
+            base64.urlsafe_b64decode(resume_token.encode()),
+            object_hook=lambda obj: (
+                base64.b64decode(obj['__bytes__']) if set(obj) == {'__bytes__'} else obj
+            ),
+        )
 
-        elif isinstance(attribute_value, (numbers.Real, decimal.Decimal)):
-            return {"N": str(attribute_value)}
+    except (ValueError, TypeError) as ex:
+        raise exceptions.DynamoDBError(f"resume_token is not valid: {ex}") from None
 
-        elif isinstance(attribute_value, set):
-            # Check the set contains at least one element
-            try:
-                set_el_sample = next(iter(attribute_value))
+    if scan_state.get('Table') != table or scan_state.get('TotalSegments') != total_segments:
+        raise exceptions.DynamoDBError(
+            f"resume_token was produced by a scan of table: {scan_state.get('Table')!r} with"
+            f" total_segments: {scan_state.get('TotalSegments')!r}, it can't resume a scan of"
+            f" table: {table!r} with total_segments: {total_segments!r}."
+        )
 
-            except StopIteration:
-                raise exceptions.DynamoDBError(
-                    f"Object of type {type(attribute_value)!r} for {attribute_value!r} is not"
-                    f" supported by DynamoDB serialization because {type(attribute_value)!r} empty."
-                )
+    if len(scan_state.get('Segments', [])) != (total_segments or 1):
+        raise exceptions.DynamoDBError("resume_token is not valid: wrong number of segments.")
 
-            # Check if set is homogeneous
-            if not all(isinstance(el, type(set_el_sample)) for el in attribute_value):
-                raise exceptions.DynamoDBError(
-                    f"Object of type {type(attribute_value)!r} for {attribute_value!r} is not"
-                    f" supported by DynamoDB serialization because {type(attribute_value)!r} must"
-                    " be homogeneous."
-                )
+    return scan_state
 
-            if isinstance(set_el_sample, str):
-                return {"SS": list(attribute_value)}  # type: ignore
 
-            elif isinstance(set_el_sample, bytes):
-                return {"BS": list(attribute_value)}  # type: ignore
+def _read_checkpoint_file(path: Union[str, pathlib.Path]) -> Optional[str]:
+    """
+    Return the resume token saved in a checkpoint file.
 
-            elif isinstance(set_el_sample, (numbers.Real, decimal.Decimal)):
-                return {"NS": [str(el) for el in attribute_value]}
+    :param path: The path of the checkpoint file.
+    :return: The resume token, or None if the file doesn't exist or is
+        empty.
+    """
 
-            else:
-                raise exceptions.DynamoDBError(
-                    f"Object of type {type(attribute_value)!r} for {attribute_value!r} is not"
-                    f" supported by DynamoDB {type(attribute_value)!r}."
-                    f" {type(attribute_value)!r} must be homogeneous of [str | bytes | int | float]"
-                )
+    try:
+        return pathlib.Path(path).read_text().strip() or None
 
-        elif isinstance(attribute_value, Sequence):
-            list_value = list(attribute_value)
-            for idx, el in enumerate(list_value):
-                list_value[idx] = self.serialize_att(el)
-            return {"L": list_value}
+    except FileNotFoundError:
+        return None
 
-        elif isinstance(attribute_value, MutableMapping):
-            dict_value = dict(attribute_value)
-            for key, val in dict_value.items():
-                dict_value[key] = self.serialize_att(val)
-            return {"M": dict_value}
 
-        else:
-            raise exceptions.DynamoDBError(
-                f"Object of type {type(attribute_value)!r} for {attribute_value!r} is not supported"
-                " by DynamoDB serialization."
-            )
+def _advance_scan_state(
+    scan_state: dict[str, Any],
+    segment: int,
+    ddb_response: Mapping[str, Any],
+    on_checkpoint: Optional[Callable[[str], None]] = None,
+    checkpoint_file: Optional[Union[str, pathlib.Path]] = None,
+) -> None:
+    """
+    Record in the scan state that a page of a segment has been fully
+    processed, and checkpoint the new resume token if requested.
+
+    :param scan_state: The scan state, updated in place.
+    :param segment: The segment the page belongs to.
+    :param ddb_response: The raw DynamoDB response page.
+    :param on_checkpoint: A callable receiving the resume token.
+    :param checkpoint_file: The path of a file where the resume token
+        is saved.
+    :return: None.
+    """
 
-    def deserialize_att(
-        self,
-        dynamodb_attribute: Union[type_defs.AttributeValueTypeDef, PartitionKeyTypeDef],
-    ) -> AttributeValueDeserialized:
-        """
-        Deserialize an AWS DynamoDB data type into its corresponding
-        Python data type. Transforms an AWS DynamoDB attribute into a
-        Python data type by identifying the DynamoDB data type
-        descriptor and mapping it to its corresponding Python data type.
+    if ddb_response.get('LastEvaluatedKey'):
+        scan_state['Segments'][segment] = {'ExclusiveStartKey': ddb_response['LastEvaluatedKey']}
+    else:
+        scan_state['Segments'][segment] = {'Done': True}
 
-        :param dynamodb_attribute: The DynamoDB attribute to be
-            deserialized. It should be a dictionary containing the
-            DynamoDB data type descriptor and the attribute value.
-        :return: The deserialized Python data type.
-            i.e. i.e. {"S": "string"} -> "string"
-        :raise DynamoDBError: If the provided dynamodb_attribute is not
-            supported for deserialization.
-        """
+    if on_checkpoint is None and checkpoint_file is None:
+        return
 
-        # The sentinel value is a unique object identifier used as a
-        # default fallback when querying dictionary keys during the
-        # deserialization process. The unique ensures that the
-        # sentinel is not accidentally found in `dynamodb_attribute`
-        # dictionary values. Utilizing sentinel helps in distinguishing
-        # between a None value and absence of a key. During the
-        # deserialization, if the `.get()` method returns the sentinel,
-        # it implies the key was not found in `dynamodb_attribute`;
-        # otherwise, it returns the actual value (which might be None
-        # or other falsy values) related to the looked-up key.
-        sentinel = object()
+    token = _encode_resume_token(scan_state)
 
-        if dynamodb_attribute.get("NULL", sentinel) is not sentinel:
-            return None
+    if checkpoint_file is not None:
+        _write_checkpoint_file(path=checkpoint_file, token=token)
 
-        elif dynamodb_attribute.get("BOOL", sentinel) is not sentinel:
-            return bool(dynamodb_attribute["BOOL"])  # type: ignore
+    if on_checkpoint is not None:
+        on_checkpoint(token)
 
-        elif dynamodb_attribute.get("S", sentinel) is not sentinel:
-            return str(dynamodb_attribute["S"])
 
-        elif dynamodb_attribute.get("B", sentinel) is not sentinel:
-            return dynamodb_attribute["B"]
+def _encode_resume_token(scan_state: Mapping[str, Any]) -> str:
+    """
+    Encode the state of a scan to an opaque, url safe, resume token.
 
-        elif dynamodb_attribute.get("N", sentinel) is not sentinel:
-            if '.' in dynamodb_attribute["N"]:
-                return float(dynamodb_attribute["N"])
-            else:
-                return int(dynamodb_attribute["N"])
+    :param scan_state: The scan state.
+    :return: The resume token.
+    """
 
-        elif dynamodb_attribute.get("SS", sentinel) is not sentinel:
-            return set(dynamodb_attribute["SS"])  # type: ignore
+    def _default(obj: Any) -> Any:
+        # Binary key attributes are not JSON serializable
+        if isinstance(obj, (bytes, bytearray)):
+            return {'__bytes__': base64.b64encode(obj).decode()}
 
-        elif dynamodb_attribute.get("BS", sentinel) is not sentinel:
-            return set(dynamodb_attribute["BS"])  # type: ignore
+        raise TypeError(f"Object of type {type(obj)!r} is not JSON serializable")
 
-        elif dynamodb_attribute.get("NS", sentinel) is not sentinel:
-            if "." in dynamodb_attribute["NS"][0]:  # type: ignore
-                return {float(el) for el in dynamodb_attribute["NS"]}  # type: ignore
-            else:
-                return {int(el) for el in dynamodb_attribute["NS"]}  # type: ignore
+    scan_state_json = json.dumps(scan_state, default=_default, separators=(',', ':'))
 
-        elif dynamodb_attribute.get("L", sentinel) is not sentinel:
-            return [self.deserialize_att(el) for el in dynamodb_attribute["L"]]  # type: ignore
+    return base64.urlsafe_b64encode(scan_state_json.encode()).decode()
 
-        elif dynamodb_attribute.get("M", sentinel) is not sentinel:
-            return {
-                key: self.deserialize_att(val)
-                for key, val in dynamodb_attribute["M"].items()  # type: ignore
-            }
 
-        else:
-            raise exceptions.DynamoDBError(
-                f"Object {dynamodb_attribute!r} of type {type(dynamodb_attribute)!r} is not"
-                " supported for DynamoDB deserialization."
-            )
+def _write_checkpoint_file(path: Union[str, pathlib.Path], token: str) -> None:
+    """
+    Atomically replace the content of the checkpoint file with the
+    token, so a crash never leaves a truncated token behind.
 
-    def serialize_p_key(
-        self,
-        pk_key: str,
-        pk_value: PartitionKeyValue,
-        sk_key: Optional[str] = None,
-        sk_value: Optional[SortKeyValue] = None,
-    ) -> PartitionKeyItem:
-        """
-        Return a serialized DynamoDB partition key.
+    :param path: The path of the checkpoint file.
+    :param token: The resume token.
+    """
 
-        :param pk_key: The key of the partition key.
-        :param pk_value: The value of the partition key.
-        :param sk_key: The key of the sort key.
-        :param sk_value: The value of the sort key.
-        :return: Serialized partition key.
-            i.e. {"id": {"S": "string"}, "sortKey": {"S": "string"}}
-        """
+    tmp_path = pathlib.Path(f"{path}.tmp")
+    tmp_path.write_text(token)
+    os.replace(tmp_path, path)
 
-        if (sk_key is None) ^ (sk_value is None):
-            raise exceptions.DynamoDBError(
-                "Both sort_key_key and sort_key_value must be provided or both must be None."
-            )
-        has_sk = sk_key is not None and sk_value is not None
 
-        pk_ser: PartitionKeyItem = {pk_key: self.serialize_att(pk_value)}
+def _iter_concurrently(
+    sources: Sequence[Callable[[], Iterable[T]]],
+    max_workers: int,
+    max_buffered: int,
+) -> Generator[T, None, None]:
+    """
+    Drain each of the sources on a thread pool and yield their elements
+    as soon as they are produced.
+
+    At most max_buffered elements are held in memory waiting to be
+    consumed. When the buffer is full the workers block until the
+    consumer catches up, so memory stays flat regardless of how fast
+    the sources produce. If the generator is closed early, the workers
+    are stopped and the sources not yet started are cancelled.
+
+    :param sources: Callables returning the iterables to drain.
+    :param max_workers: The maximum number of sources drained at the
+        same time.
+    :param max_buffered: The maximum number of elements buffered.
+    :return: Generator of the elements of all the sources, in the order
+        they are produced.
+    :raise Exception: The first exception raised by any of the sources.
+    """
 
-        if has_sk:
-            assert sk_key is not None
-            pk_ser[sk_key] = self.serialize_att(sk_value)
+    buffer: queue.Queue[tuple[str, Any]] = queue.Queue(maxsize=max_buffered)
+    stop_event = threading.Event()
 
-        return pk_ser
+    def _put(entry: tuple[str, Any]) -> bool:
+        # Keep checking the stop event, so a worker blocked on a full
+        # buffer exits when the consumer goes away
+        while not stop_event.is_set():
+            try:
+                buffer.put(entry, timeout=0.1)
+                return True
 
-    def deserialize_p_key(
-        self, pk_serialized: PartitionKeyItem
-    ) -> tuple[str, PartitionKeyValue, Optional[str], Optional[SortKeyValue]]:
-        """
-        Deserialize a serialized DynamoDB partition key.
+            except queue.Full:
+                continue
 
-        :param pk_serialized: The serialized partition key.
-            i.e., {"id": {"S": "string"}, "sortKey": {"S": "string"}}.
-        :return: A tuple containing the partition key and its value.
-        """
+        return False
 
-        iter_pk_ser = iter(pk_serialized.items())
+    def _drain(source: Callable[[], Iterable[T]]) -> None:
+        if stop_event.is_set():
+            return
 
-        pk_key, pk_value_ser = next(iter_pk_ser)
         try:
-            sk_key, sk_value_ser = next(iter_pk_ser)
-        except StopIteration:
-            sk_key, sk_value_ser = (None, None)
+            for element in source():
+                if not _put(('element', element)):
+                    return
 
-        pk_value = self.deserialize_att(pk_value_ser)
-        assert isinstance(pk_value, (str, bytes, int, float))
+        except Exception as ex:
+            _put(('error', ex))
+            return
 
-        if sk_value_ser is not None:
-            sk_value = self.deserialize_att(sk_value_ser)
-            assert isinstance(sk_value, (str, bytes, int, float))
-        else:
-            sk_value = None
+        _put(('done', None))
 
-        return pk_key, pk_value, sk_key, sk_value
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
 
-    def serialize_put_items(self, **items: AttributeValue) -> Item:
-        """
-        Returns a dictionary of additional items with keys and values
-        serialized for DynamoDB put_item call.
+    try:
+        for source in sources:
+            executor.submit(_drain, source)
 
-        :param items: Key-value pairs to serialize.
-        :return: Items ready for put_item.
-            i.e. {"col1": {"S": "value1"}, "col2": {"S": "value2"},
-            "col3": {"S": "value3"}, ...}
-        """
+        remaining = len(sources)
 
-        additional_items: Item = {}
+        while remaining:
+            kind, payload = buffer.get()
 
-        for key, value in items.items():
-            normalized_key = self.string_utils.snake_case_v2(key)
-            ddb_attribute = self.serialize_att(value)
+            if kind == 'done':
+                remaining -= 1
 
-            # Now add it to the additional_items serialized dictionary
-            additional_items[normalized_key] = ddb_attribute
+            elif kind == 'error':
+                raise payload
 
-        return additional_items
+            else:
+                yield payload
 
-    def serialize_update_items(self, **items: AttributeValue) -> tuple[str, dict[str, str], Item]:
-        """
-        Returns a tuple containing the UpdateExpression and the
-        ExpressionAttributeValues ready to be passed to the DynamoDB
-        update_item call.
+    finally:
+        stop_event.set()
+        executor.shutdown(wait=True, cancel_futures=True)
 
-        :param items: Key-value pairs to serialize.
-        :return: A tuple with UpdateExpression, ExpressionAttributeNames
-            and ExpressionAttributeValues.
-        """
 
-        update_exp = "SET "
+def _map_concurrently(
+    func: Callable[[T], R],
+    iterable: Iterable[T],
+    max_workers: int,
+) -> Generator[R, None, None]:
+    """
+    Apply func to every element of the iterable on a thread pool and
+    yield the results as soon as they complete.
+
+    The iterable is consumed lazily and at most twice max_workers calls
+    are submitted at any time, so arbitrarily long iterables can be
+    processed with flat memory. If the generator is closed early, the
+    calls not yet started are cancelled.
+
+    :param func: The callable to apply to every element.
+    :param iterable: The elements to pass to func.
+    :param max_workers: The maximum number of calls run at the same
+        time.
+    :return: Generator of the results, in completion order.
+    :raise Exception: The first exception raised by any of the calls.
+    """
 
-        # In DynamoDB operations(such as UpdateItem, Query, or Scan),
-        # you can use ExpressionAttributeNames to provide alternate
-        # names for attributes in your expressions.This is most
-        # commonly used to work around DynamoDB's reserved keywords or
-        # to use attribute names that contain special characters not
-        # allowed in expressions.
-        exp_att_names: dict[str, str] = {}
+    in_flight: set[concurrent.futures.Future[R]] = set()
 
-        # In DynamoDB API, the ExpressionAttributeValues dictionary is
-        # used to pass in placeholders for values that will be used in
-        # your UpdateExpression and ConditionExpression. The keys for
-        # these placeholders should start with a : and should not be
-        # confused with actual column names.
-        exp_att_values: Item = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            for element in iterable:
+                in_flight.add(executor.submit(func, element))
 
-        for key, value in items.items():
-            normalized_key = self.string_utils.snake_case_v2(key)
-            ddb_attribute = self.serialize_att(value)
+                if len(in_flight) >= max_workers * 2:
+                    done, in_flight = concurrent.futures.wait(
+                        in_flight, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    for future in done:
+                        yield future.result()
 
-            # Add to the update_expression string
-            update_exp += f"#{normalized_key} = :{normalized_key}_placeholder, "
+            while in_flight:
+                done, in_flight = concurrent.futures.wait(
+                    in_flight, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    yield future.result()
 
-            # Add to the expression_attribute_names dict
-            exp_att_names[f"#{normalized_key}"] = normalized_key
+        finally:
+            for future in in_flight:
+                future.cancel()
 
-            # Add to the expression_attribute_values serialized dict
-            exp_att_values[f":{normalized_key}_placeholder"] = ddb_attribute
 
-        # Removing the trailing ", " from the update_expression string
-        update_exp = update_exp[:-2]
+def _chunked(iterable: Iterable[T], size: int) -> Generator[list[T], None, None]:
+    """
+    Split an iterable into lists of at most size elements, consuming
+    the iterable lazily.
 
-        return update_exp, exp_att_names, exp_att_values
+    :param iterable: The iterable to split.
+    :param size: The maximum number of elements of each chunk.
+    :return: Generator of chunks.
+    """
 
-    def normalize_item(self, item: dict[str, Any]) -> dict[str, AttributeValueDeserialized]:
-        """
-        Serialize a Python item to DynamoDB format and then deserialize
-        it back to ensure a fully consistent DynamoDB-deserialized
-        structure.
+    iterator = iter(iterable)
 
-        :param item: A dict of Python data, possibly partially
-            deserialized or in raw Python format.
-        :return: A dict representing the item in full
-            DynamoDB-deserialized format
-            (i.e., matching AttributeValueDeserialized).
-        """
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
 
-        item_ser = {key: self.serialize_att(value) for key, value in item.items()}
 
-        item_deser = {key: self.deserialize_att(value) for key, value in item_ser.items()}
+def _backoff_delay(attempt: int, base_secs: float = 0.05, max_secs: float = 5.0) -> float:
+    """
+    Return the seconds to wait before the next attempt, using an
+    exponential backoff with full jitter, so concurrent callers don't
+    retry in lockstep.
+
+    :param attempt: The number of attempts already made, from 0.
+    :param base_secs: The delay ceiling of the first attempt.
+    :param max_secs: The maximum delay ceiling.
+    :return: The delay in seconds.
+    """
 
-        return item_deser
+    return random.uniform(0, min(max_secs, base_secs * 2**attempt))
+
+
+def _item_identity(item_ser: Mapping[str, Any]) -> tuple[Any, ...]:
+    """
+    Return a hashable identity for a serialized primary key.
+
+    :param item_ser: A serialized primary key.
+        i.e. {"id": {"S": "string"}, "sortKey": {"N": "1"}}
+    :return: A tuple that is equal for equal keys.
+    """
+
+    return tuple(sorted((key, *next(iter(value.items()))) for key, value in item_ser.items()))
@@ -138,3 +138,37 @@ def test_create_presigned_post_for_file(mock_client, s3_instance):
     mock_client.generate_presigned_post.return_value = "https://s3.amazon.com/file1.txt"
     url = s3_instance.create_presigned_post_for_file("bucket", "file1.txt")
     assert url.startswith("https://")
+
+
+def test_multipart_upload(mock_client, s3_instance):
+    mock_client.create_multipart_upload.return_value = {"UploadId": "upload-id"}
+    mock_client.upload_part.return_value = {"ETag": "etag-1"}
+    mock_client.complete_multipart_upload.return_value = {"Key": "file1.txt"}
+
+    upload_id = s3_instance.create_multipart_upload("bucket", "file1.txt")["UploadId"]
+    etag = s3_instance.upload_part("bucket", "file1.txt", upload_id, 1, b"data")["ETag"]
+    result = s3_instance.complete_multipart_upload(
+        "bucket", "file1.txt", upload_id, [{"ETag": etag, "PartNumber": 1}]
+    )
+
+    assert result["Key"] == "file1.txt"
+    mock_client.upload_part.assert_called_once_with(
+        Bucket="bucket", Key="file1.txt", UploadId="upload-id", PartNumber=1, Body=b"data"
+    )
+    assert mock_client.complete_multipart_upload.call_args.kwargs["MultipartUpload"] == {
+        "Parts": [{"ETag": "etag-1", "PartNumber": 1}]
+    }
+
+
+def test_abort_multipart_upload(mock_client, s3_instance):
+    from carlogtt_python_library import exceptions
+
+    mock_client.abort_multipart_upload.return_value = {}
+    s3_instance.abort_multipart_upload("bucket", "file1.txt", "upload-id")
+    mock_client.abort_multipart_upload.assert_called_once_with(
+        Bucket="bucket", Key="file1.txt", UploadId="upload-id"
+    )
+
+    mock_client.upload_part.side_effect = Exception("boom")
+    with pytest.raises(exceptions.S3Error):
+        s3_instance.upload_part("bucket", "file1.txt", "upload-id", 1, b"data")
@@ -31,6 +31,11 @@
 # ======================================================================
 
 # Standard Library Imports
+import decimal
+import json
+import os
+import pathlib
+import time
 from unittest import mock
 
 # Third Party Library Imports
@@ -72,6 +77,36 @@ def mock_client():
         yield mock_client
 
 
+PK_ONLY_TABLE_DESCRIPTION = {
+    "Table": {
+        "KeySchema": [{"AttributeName": "pk", "KeyType": "HASH"}],
+        "AttributeDefinitions": [{"AttributeName": "pk", "AttributeType": "S"}],
+    }
+}
+
+PK_SK_TABLE_DESCRIPTION = {
+    "Table": {
+        "KeySchema": [
+            {"AttributeName": "pk", "KeyType": "HASH"},
+            {"AttributeName": "sk", "KeyType": "RANGE"},
+        ],
+        "AttributeDefinitions": [
+            {"AttributeName": "pk", "AttributeType": "S"},
+            {"AttributeName": "sk", "AttributeType": "N"},
+            {"AttributeName": "gsi_pk", "AttributeType": "S"},
+            {"AttributeName": "gsi_sk", "AttributeType": "S"},
+        ],
+        "GlobalSecondaryIndexes": [{
+            "IndexName": "gsi",
+            "KeySchema": [
+                {"AttributeName": "gsi_pk", "KeyType": "HASH"},
+                {"AttributeName": "gsi_sk", "KeyType": "RANGE"},
+            ],
+        }],
+    }
+}
+
+
 def test_client_caching(mock_boto3, dynamodb_instance):
     mock_session = mock.Mock()
     mock_client = mock.Mock()
@@ -378,3 +413,2154 @@ def test_delete_item_att_success(mock_client, dynamodb_instance):
     mock_client.update_item.assert_called_once()
     assert result["pk"] == {"S": "1"}
     assert "field" in result
+
+
+def test_query_items_pagination(mock_client, dynamodb_instance):
+    mock_client.query.side_effect = [
+        {
+            "Items": [{"pk": {"S": "a"}, "sk": {"N": "1"}}],
+            "LastEvaluatedKey": {"pk": {"S": "a"}, "sk": {"N": "1"}},
+        },
+        {
+            "Items": [{"pk": {"S": "a"}, "sk": {"N": "2"}}],
+        },
+    ]
+
+    items = list(dynamodb_instance.query_items("table", "pk", "a"))
+
+    assert items == [{"pk": "a", "sk": 1}, {"pk": "a", "sk": 2}]
+    assert mock_client.query.call_count == 2
+    second_call = mock_client.query.call_args_list[1].kwargs
+    assert second_call["ExclusiveStartKey"] == {"pk": {"S": "a"}, "sk": {"N": "1"}}
+
+
+def test_query_items_sort_key_condition(mock_client, dynamodb_instance):
+    mock_client.query.return_value = {"Items": []}
+
+    list(
+        dynamodb_instance.query_items(
+            "table",
+            "pk",
+            "a",
+            sort_key_key="sk",
+            sort_key_condition="begins_with",
+            sort_key_value="2025-",
+            index_name="gsi1",
+            ascending=False,
+        )
+    )
+
+    kwargs = mock_client.query.call_args.kwargs
+    assert (
+        kwargs["KeyConditionExpression"]
+        == "#partition_key_key = :partition_key_value_placeholder AND"
+        " begins_with(#sort_key_key, :sort_key_value_placeholder)"
+    )
+    assert kwargs["ExpressionAttributeNames"] == {"#partition_key_key": "pk", "#sort_key_key": "sk"}
+    assert kwargs["ExpressionAttributeValues"][":sort_key_value_placeholder"] == {"S": "2025-"}
+    assert kwargs["IndexName"] == "gsi1"
+    assert kwargs["ScanIndexForward"] is False
+
+
+def test_query_items_between(mock_client, dynamodb_instance):
+    mock_client.query.return_value = {"Items": []}
+
+    list(
+        dynamodb_instance.query_items(
+            "table",
+            "pk",
+            "a",
+            sort_key_key="sk",
+            sort_key_condition="between",
+            sort_key_value=(1, 5),
+        )
+    )
+
+    values = mock_client.query.call_args.kwargs["ExpressionAttributeValues"]
+    assert values[":sort_key_value_placeholder"] == {"N": "1"}
+    assert values[":sort_key_value_upper_placeholder"] == {"N": "5"}
+
+
+def test_query_items_invalid_sort_key_condition(mock_client, dynamodb_instance):
+    from carlogtt_python_library import exceptions
+
+    with pytest.raises(exceptions.DynamoDBError):
+        list(dynamodb_instance.query_items("table", "pk", "a", sort_key_key="sk"))
+
+    with pytest.raises(exceptions.DynamoDBError):
+        list(
+            dynamodb_instance.query_items(
+                "table",
+                "pk",
+                "a",
+                sort_key_key="sk",
+                sort_key_condition="between",
+                sort_key_value=1,
+            )
+        )
+
+
+def test_get_items_parallel_scan(mock_client, dynamodb_instance):
+    def fake_scan(**kwargs):
+        segment = kwargs["Segment"]
+        if "ExclusiveStartKey" not in kwargs:
+            return {
+                "Items": [{"id": {"S": f"{segment}-a"}}],
+                "LastEvaluatedKey": {"id": {"S": f"{segment}-a"}},
+            }
+        return {"Items": [{"id": {"S": f"{segment}-b"}}]}
+
+    mock_client.scan.side_effect = fake_scan
+
+    items = list(dynamodb_instance.get_items("table", total_segments=3, max_workers=2))
+
+    assert sorted(item["id"] for item in items) == ["0-a", "0-b", "1-a", "1-b", "2-a", "2-b"]
+    assert mock_client.scan.call_count == 6
+    assert {call.kwargs["TotalSegments"] for call in mock_client.scan.call_args_list} == {3}
+
+
+def test_get_items_parallel_scan_error(mock_client, dynamodb_instance):
+    from carlogtt_python_library import exceptions
+
+    mock_client.scan.side_effect = botocore.exceptions.ClientError(
+        {"Error": {"Code": "Validation", "Message": "bad"}}, "Scan"
+    )
+
+    with pytest.raises(exceptions.DynamoDBError):
+        list(dynamodb_instance.get_items("table", total_segments=4))
+
+
+def test_get_items_parallel_scan_early_close(mock_client, dynamodb_instance):
+    mock_client.scan.side_effect = lambda **kwargs: {
+        "Items": [{"id": {"S": str(kwargs["Segment"])}}],
+        "LastEvaluatedKey": {"id": {"S": "more"}},
+    }
+
+    items = dynamodb_instance.get_items("table", total_segments=2)
+    first = next(items)
+    items.close()
+
+    assert "id" in first
+
+
+def test_get_items_parallel_scan_invalid_segments(mock_client, dynamodb_instance):
+    from carlogtt_python_library import exceptions
+
+    with pytest.raises(exceptions.DynamoDBError):
+        list(dynamodb_instance.get_items("table", total_segments=0))
+
+
+def test_get_items_count_server_side(mock_client, dynamodb_instance):
+    mock_client.scan.side_effect = [
+        {"Count": 3, "ScannedCount": 3, "LastEvaluatedKey": {"id": {"S": "3"}}},
+        {"Count": 2, "ScannedCount": 2},
+    ]
+
+    count = dynamodb_instance.get_items_count("table")
+
+    assert count == 5
+    assert all(call.kwargs["Select"] == "COUNT" for call in mock_client.scan.call_args_list)
+
+
+def test_get_items_count_parallel(mock_client, dynamodb_instance):
+    mock_client.scan.side_effect = lambda **kwargs: {"Count": kwargs["Segment"] + 1}
+
+    count = dynamodb_instance.get_items_count("table", total_segments=4, max_workers=2)
+
+    assert count == 1 + 2 + 3 + 4
+
+
+def test_get_items_count_approximate(mock_client, dynamodb_instance):
+    mock_client.describe_table.return_value = {"Table": {"ItemCount": 42}}
+
+    count = dynamodb_instance.get_items_count("table", approximate=True)
+
+    assert count == 42
+    mock_client.scan.assert_not_called()
+
+
+def test_batch_get_items_chunks_and_dedupes(mock_client, dynamodb_instance):
+    def fake_batch_get_item(RequestItems):
+        keys = RequestItems["table"]["Keys"]
+        return {"Responses": {"table": [{"pk": key["pk"], "n": {"N": "1"}} for key in keys]}}
+
+    mock_client.batch_get_item.side_effect = fake_batch_get_item
+
+    keys = [{"pk": str(i)} for i in range(250)] + [{"pk": "249"}]
+    items = list(dynamodb_instance.batch_get_items("table", keys, max_workers=2))
+
+    assert mock_client.batch_get_item.call_count == 3
+    chunk_sizes = sorted(
+        len(call.kwargs["RequestItems"]["table"]["Keys"])
+        for call in mock_client.batch_get_item.call_args_list
+    )
+    assert chunk_sizes == [50, 100, 100]
+    assert sorted(item["pk"] for item in items) == sorted(str(i) for i in range(250))
+
+
+def test_batch_get_items_unprocessed_keys(mock_client, dynamodb_instance):
+    mock_client.batch_get_item.side_effect = [
+        {
+            "Responses": {"table": [{"pk": {"S": "1"}}]},
+            "UnprocessedKeys": {"table": {"Keys": [{"pk": {"S": "2"}}]}},
+        },
+        {"Responses": {"table": [{"pk": {"S": "2"}}]}},
+    ]
+
+    items = list(dynamodb_instance.batch_get_items("table", [{"pk": "1"}, {"pk": "2"}]))
+
+    assert sorted(item["pk"] for item in items) == ["1", "2"]
+    retry_request = mock_client.batch_get_item.call_args_list[1].kwargs["RequestItems"]
+    assert retry_request == {"table": {"Keys": [{"pk": {"S": "2"}}]}}
+
+
+def test_batch_get_items_unprocessed_keys_exhausted(mock_client, dynamodb_instance):
+    from carlogtt_python_library import exceptions
+
+    mock_client.batch_get_item.return_value = {
+        "Responses": {},
+        "UnprocessedKeys": {"table": {"Keys": [{"pk": {"S": "1"}}]}},
+    }
+
+    with mock.patch("carlogtt_python_library.database.database_dynamo.time.sleep"):
+        with pytest.raises(exceptions.DynamoDBError):
+            list(dynamodb_instance.batch_get_items("table", [{"pk": "1"}]))
+
+
+def test_batch_write_items_chunks(mock_client, dynamodb_instance):
+    mock_client.describe_table.return_value = PK_ONLY_TABLE_DESCRIPTION
+    mock_client.batch_write_item.return_value = {"UnprocessedItems": {}}
+
+    report = dynamodb_instance.batch_write_items(
+        "table",
+        put=({"pk": str(i), "someValue": i} for i in range(40)),
+        delete=[{"pk": "old-1"}, {"pk": "old-2"}],
+        max_workers=2,
+    )
+
+    assert report == {"Put": 40, "Delete": 2, "Failed": []}
+    assert mock_client.batch_write_item.call_count == 2
+    chunks = [
+        call.kwargs["RequestItems"]["table"] for call in mock_client.batch_write_item.call_args_list
+    ]
+    assert sorted(len(chunk) for chunk in chunks) == [17, 25]
+    put_request = next(r for r in chunks[0] if "PutRequest" in r)
+    assert "some_value" in put_request["PutRequest"]["Item"]
+
+
+def test_batch_write_items_unprocessed_items(mock_client, dynamodb_instance):
+    mock_client.describe_table.return_value = PK_ONLY_TABLE_DESCRIPTION
+    unprocessed = [{"PutRequest": {"Item": {"pk": {"S": "2"}}}}]
+    mock_client.batch_write_item.side_effect = [
+        {"UnprocessedItems": {"table": unprocessed}},
+        {"UnprocessedItems": {}},
+    ]
+
+    report = dynamodb_instance.batch_write_items("table", put=[{"pk": "1"}, {"pk": "2"}])
+
+    assert report == {"Put": 2, "Delete": 0, "Failed": []}
+    retry_request = mock_client.batch_write_item.call_args_list[1].kwargs["RequestItems"]
+    assert retry_request == {"table": unprocessed}
+
+
+def test_batch_write_items_reports_failures(mock_client, dynamodb_instance):
+    mock_client.describe_table.return_value = PK_ONLY_TABLE_DESCRIPTION
+    mock_client.batch_write_item.side_effect = botocore.exceptions.ClientError(
+        {"Error": {"Code": "ValidationException", "Message": "bad"}}, "BatchWriteItem"
+    )
+
+    report = dynamodb_instance.batch_write_items("table", put=[{"pk": "1"}], delete=[{"pk": "2"}])
+
+    assert report["Put"] == 0
+    assert report["Delete"] == 0
+    assert [(f["Operation"], f["Item"]) for f in report["Failed"]] == [
+        ("Put", {"pk": "1"}),
+        ("Delete", {"pk": "2"}),
+    ]
+
+
+def test_put_item_autogenerated_pk_block_allocation(mock_client):
+    from carlogtt_python_library.database.database_dynamo import DynamoDB
+
+    instance = DynamoDB(aws_region_name="us-east-1", caching=True, auto_generate_block_size=3)
+    mock_client.update_item.side_effect = [
+        {"Attributes": {"current_counter_value": {"N": "3"}}},
+        {"Attributes": {"current_counter_value": {"N": "6"}}},
+    ]
+    mock_client.describe_table.return_value = {
+        "Table": {
+            "KeySchema": [{"AttributeName": "pk", "KeyType": "HASH"}],
+            "AttributeDefinitions": [{"AttributeName": "pk", "AttributeType": "S"}],
+        }
+    }
+    mock_client.put_item.return_value = {}
+
+    items = [
+        instance.put_item("table", "pk", auto_generate_partition_key_value=True, name="x")
+        for _ in range(4)
+    ]
+
+    assert [item["pk"] for item in items] == ["1", "2", "3", "4"]
+    assert mock_client.update_item.call_count == 2
+    assert mock_client.describe_table.call_count == 1
+    assert mock_client.put_item.call_count == 4
+    mock_client.transact_write_items.assert_not_called()
+    reserve_args = mock_client.update_item.call_args.kwargs
+    assert reserve_args["TableName"] == "table_SysItems"
+    assert reserve_args["ExpressionAttributeValues"][":block_size_placeholder"] == {"N": "3"}
+
+
+def test_put_item_autogenerated_pk_block_allocation_missing_counter(mock_client):
+    from carlogtt_python_library import exceptions
+    from carlogtt_python_library.database.database_dynamo import DynamoDB
+
+    instance = DynamoDB(aws_region_name="us-east-1", caching=True, auto_generate_block_size=10)
+    mock_client.update_item.side_effect = botocore.exceptions.ClientError(
+        {"Error": {"Code": "ConditionalCheckFailedException", "Message": "fail"}}, "UpdateItem"
+    )
+
+    with pytest.raises(exceptions.DynamoDBError) as excinfo:
+        instance.put_item("table", "pk", auto_generate_partition_key_value=True, name="x")
+
+    assert "put_atomic_counter" in str(excinfo.value)
+
+
+def test_atomic_writes_autogenerated_pk_block_allocation(mock_client):
+    from carlogtt_python_library.database.database_dynamo import DynamoDB
+
+    instance = DynamoDB(aws_region_name="us-east-1", caching=True, auto_generate_block_size=100)
+    mock_client.update_item.return_value = {"Attributes": {"current_counter_value": {"N": "200"}}}
+    mock_client.describe_table.return_value = {
+        "Table": {
+            "KeySchema": [{"AttributeName": "pk", "KeyType": "HASH"}],
+            "AttributeDefinitions": [{"AttributeName": "pk", "AttributeType": "N"}],
+        }
+    }
+
+    response = instance.atomic_writes(
+        put=[{
+            "TableName": "table",
+            "PartitionKeyKey": "pk",
+            "AutoGeneratePartitionKeyValue": True,
+            "Items": {"name": "x"},
+        }]
+    )
+
+    transact_items = mock_client.transact_write_items.call_args.kwargs["TransactItems"]
+    assert [list(item) for item in transact_items] == [["Put"]]
+    assert response["Put"] == [{"pk": 101, "name": "x"}]
+    assert response["Update"] == []
+
+
+def test_get_table_metadata_cached(mock_client, dynamodb_instance):
+    mock_client.describe_table.return_value = PK_SK_TABLE_DESCRIPTION
+
+    metadata = dynamodb_instance.get_table_metadata("table")
+    dynamodb_instance.get_table_metadata("table")
+
+    assert mock_client.describe_table.call_count == 1
+    assert metadata["PartitionKeyKey"] == "pk"
+    assert metadata["PartitionKeyType"] == "S"
+    assert metadata["SortKeyKey"] == "sk"
+    assert metadata["SortKeyType"] == "N"
+    assert metadata["GlobalSecondaryIndexes"]["gsi"]["SortKeyKey"] == "gsi_sk"
+    assert metadata["LocalSecondaryIndexes"] == {}
+
+    dynamodb_instance.invalidate_table_metadata("table")
+    dynamodb_instance.get_table_metadata("table")
+
+    assert mock_client.describe_table.call_count == 2
+
+
+def test_get_table_metadata_expired(mock_client):
+    from carlogtt_python_library.database.database_dynamo import DynamoDB
+
+    instance = DynamoDB(aws_region_name="us-east-1", caching=True, table_metadata_ttl=0)
+    mock_client.describe_table.return_value = PK_ONLY_TABLE_DESCRIPTION
+
+    instance.get_table_metadata("table")
+    instance.get_table_metadata("table")
+
+    assert mock_client.describe_table.call_count == 2
+
+
+def test_warm_table_metadata(mock_client, dynamodb_instance):
+    mock_client.describe_table.return_value = PK_ONLY_TABLE_DESCRIPTION
+
+    dynamodb_instance.warm_table_metadata(["table1", "table2"])
+    dynamodb_instance.get_table_metadata("table1")
+
+    called_tables = {c.kwargs["TableName"] for c in mock_client.describe_table.call_args_list}
+    assert called_tables == {"table1", "table2"}
+    assert mock_client.describe_table.call_count == 2
+
+
+def test_query_items_infers_sort_key(mock_client, dynamodb_instance):
+    mock_client.describe_table.return_value = PK_SK_TABLE_DESCRIPTION
+    mock_client.query.return_value = {"Items": []}
+
+    list(
+        dynamodb_instance.query_items(
+            "table", "gsi_pk", "a", sort_key_condition="=", sort_key_value="b", index_name="gsi"
+        )
+    )
+
+    query_args = mock_client.query.call_args.kwargs
+    assert query_args["ExpressionAttributeNames"]["#sort_key_key"] == "gsi_sk"
+
+
+def test_query_items_infers_sort_key_missing(mock_client, dynamodb_instance):
+    from carlogtt_python_library import exceptions
+
+    mock_client.describe_table.return_value = PK_ONLY_TABLE_DESCRIPTION
+
+    with pytest.raises(exceptions.DynamoDBError):
+        list(
+            dynamodb_instance.query_items(
+                "table", "pk", "a", sort_key_condition="=", sort_key_value=1
+            )
+        )
+
+
+def test_batch_write_items_last_write_wins(mock_client, dynamodb_instance):
+    mock_client.describe_table.return_value = PK_SK_TABLE_DESCRIPTION
+    mock_client.batch_write_item.return_value = {"UnprocessedItems": {}}
+
+    report = dynamodb_instance.batch_write_items(
+        "table",
+        put=[
+            {"pk": "a", "sk": 1, "v": 1},
+            {"pk": "a", "sk": 2, "v": 2},
+            {"pk": "a", "sk": 1, "v": 3},
+        ],
+    )
+
+    assert report == {"Put": 3, "Delete": 0, "Failed": []}
+    sent = mock_client.batch_write_item.call_args.kwargs["RequestItems"]["table"]
+    assert [r["PutRequest"]["Item"]["v"] for r in sent] == [{"N": "2"}, {"N": "3"}]
+
+
+def test_batch_write_items_missing_key_fails(mock_client, dynamodb_instance):
+    mock_client.describe_table.return_value = PK_SK_TABLE_DESCRIPTION
+    mock_client.batch_write_item.return_value = {"UnprocessedItems": {}}
+
+    report = dynamodb_instance.batch_write_items(
+        "table",
+        put=[{"pk": "a", "v": 1}, {"pk": "a", "sortKey": 2, "v": 2}, {"pk": "a", "sk": 3}],
+    )
+
+    assert report["Put"] == 1
+    assert [f["Item"] for f in report["Failed"]] == [
+        {"pk": "a", "v": 1},
+        {"pk": "a", "sort_key": 2, "v": 2},
+    ]
+    sent = mock_client.batch_write_item.call_args.kwargs["RequestItems"]["table"]
+    assert [r["PutRequest"]["Item"]["sk"] for r in sent] == [{"N": "3"}]
+
+    mock_client.batch_write_item.reset_mock()
+    report = dynamodb_instance.batch_write_items("table", delete=[{"pk": "a"}])
+
+    assert report == {"Put": 0, "Delete": 0, "Failed": report["Failed"]}
+    assert len(report["Failed"]) == 1
+    mock_client.batch_write_item.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        None,
+        True,
+        "text",
+        b"bytes",
+        7,
+        1.5,
+        decimal.Decimal("2.25"),
+        {"a", "b"},
+        {1, 2},
+        [1, "two", [None, {"x": 1.5}]],
+        ("a", 1),
+        {"nested": {"list": [b"x", False], "set": {3.5}}},
+    ],
+)
+def test_serializer_fast_path_matches_full_chain(value):
+    from carlogtt_python_library.database.database_dynamo import DynamoDbSerializer
+
+    fast = DynamoDbSerializer()
+    full = DynamoDbSerializer()
+    full._serializers = {}
+    full._deserializers = {}
+
+    assert fast.serialize_att(value) == full.serialize_att(value)
+    att = full.serialize_att(value)
+    assert fast.deserialize_att(att) == full.deserialize_att(att)
+    assert fast.deserialize_item({"k": att}) == {"k": full.deserialize_att(att)}
+
+
+def test_deserialize_item_unsupported_attribute():
+    from carlogtt_python_library import exceptions
+    from carlogtt_python_library.database.database_dynamo import DynamoDbSerializer
+
+    with pytest.raises(exceptions.DynamoDBError):
+        DynamoDbSerializer().deserialize_item({"k": {"XX": "1"}})
+
+
+def test_serializer_normalizes_each_key_once():
+    from carlogtt_python_library.database.database_dynamo import DynamoDbSerializer
+
+    with mock.patch(
+        "carlogtt_python_library.utils.StringUtils.snake_case_v2",
+        autospec=True,
+        side_effect=lambda self, key: key.lower(),
+    ) as mock_snake_case:
+        serializer = DynamoDbSerializer()
+
+        for i in range(3):
+            assert serializer.serialize_put_items(ItemName="a", ItemCount=i) == {
+                "itemname": {"S": "a"},
+                "itemcount": {"N": str(i)},
+            }
+            serializer.serialize_update_items(ItemName="b")
+
+    assert mock_snake_case.call_count == 2
+
+
+def test_get_items_projection_and_filter(mock_client, dynamodb_instance):
+    from carlogtt_python_library.database.database_dynamo import DynamoDbAttribute
+
+    mock_client.scan.return_value = {"Items": [{"id": {"S": "1"}}]}
+
+    items = list(
+        dynamodb_instance.get_items(
+            "table",
+            projection=["id", "info.tags[0]"],
+            filter=DynamoDbAttribute("status").eq("active")
+            & ~DynamoDbAttribute("info.size").between(1, 10),
+        )
+    )
+
+    assert items == [{"id": "1"}]
+    scan_args = mock_client.scan.call_args.kwargs
+    assert scan_args["ProjectionExpression"] == "#att_0, #att_1.#att_2[0]"
+    assert (
+        scan_args["FilterExpression"]
+        == "(#att_3 = :att_value_0_placeholder AND (NOT #att_1.#att_4 BETWEEN"
+        " :att_value_1_placeholder AND :att_value_2_placeholder))"
+    )
+    assert scan_args["ExpressionAttributeNames"] == {
+        "#att_0": "id",
+        "#att_1": "info",
+        "#att_2": "tags",
+        "#att_3": "status",
+        "#att_4": "size",
+    }
+    assert scan_args["ExpressionAttributeValues"] == {
+        ":att_value_0_placeholder": {"S": "active"},
+        ":att_value_1_placeholder": {"N": "1"},
+        ":att_value_2_placeholder": {"N": "10"},
+    }
+
+
+def test_query_items_filter_merges_placeholders(mock_client, dynamodb_instance):
+    from carlogtt_python_library.database.database_dynamo import DynamoDbAttribute
+
+    mock_client.query.return_value = {"Items": []}
+
+    list(
+        dynamodb_instance.query_items(
+            "table",
+            "pk",
+            "a",
+            filter=DynamoDbAttribute("tags").contains("x") | DynamoDbAttribute("old").not_exists(),
+        )
+    )
+
+    query_args = mock_client.query.call_args.kwargs
+    assert (
+        query_args["FilterExpression"]
+        == "(contains(#att_0, :att_value_0_placeholder) OR attribute_not_exists(#att_1))"
+    )
+    assert query_args["ExpressionAttributeNames"] == {
+        "#partition_key_key": "pk",
+        "#att_0": "tags",
+        "#att_1": "old",
+    }
+    assert set(query_args["ExpressionAttributeValues"]) == {
+        ":partition_key_value_placeholder",
+        ":att_value_0_placeholder",
+    }
+    assert "ProjectionExpression" not in query_args
+
+
+def test_get_item_and_batch_get_items_projection(mock_client, dynamodb_instance):
+    mock_client.get_item.return_value = {"Item": {"id": {"S": "1"}}}
+    mock_client.batch_get_item.return_value = {"Responses": {"table": []}}
+
+    dynamodb_instance.get_item("table", "id", "1", projection=["id"])
+    list(dynamodb_instance.batch_get_items("table", [{"id": "1"}], projection="id"))
+
+    get_args = mock_client.get_item.call_args.kwargs
+    assert get_args["ProjectionExpression"] == "#att_0"
+    assert get_args["ExpressionAttributeNames"] == {"#att_0": "id"}
+    request = mock_client.batch_get_item.call_args.kwargs["RequestItems"]["table"]
+    assert request["ProjectionExpression"] == "#att_0"
+    assert request["ExpressionAttributeNames"] == {"#att_0": "id"}
+
+
+@pytest.mark.parametrize(
+    "projection, filter_condition",
+    [
+        (["bad..path"], None),
+        ([], None),
+        (None, "status = 1"),
+        (None, "IN"),
+    ],
+)
+def test_serialize_read_expressions_invalid(projection, filter_condition):
+    from carlogtt_python_library import exceptions
+    from carlogtt_python_library.database.database_dynamo import (
+        DynamoDbAttribute,
+        DynamoDbSerializer,
+    )
+
+    if filter_condition == "IN":
+        filter_condition = DynamoDbAttribute("status").is_in([])
+
+    with pytest.raises(exceptions.DynamoDBError):
+        DynamoDbSerializer().serialize_read_expressions(projection, filter_condition)
+
+
+def test_get_items_prefetch_keeps_page_order(mock_client, dynamodb_instance):
+    mock_client.scan.side_effect = [
+        {"Items": [{"id": {"S": "1"}}, {"id": {"S": "2"}}], "LastEvaluatedKey": {"id": {"S": "2"}}},
+        {"Items": [{"id": {"S": "3"}}], "LastEvaluatedKey": {"id": {"S": "3"}}},
+        {"Items": [{"id": {"S": "4"}}]},
+    ]
+
+    items = list(dynamodb_instance.get_items("table", prefetch=2))
+
+    assert [item["id"] for item in items] == ["1", "2", "3", "4"]
+    assert mock_client.scan.call_count == 3
+
+
+def test_get_items_prefetch_is_bounded(mock_client, dynamodb_instance):
+    import time
+
+    mock_client.scan.side_effect = lambda **kwargs: {
+        "Items": [{"id": {"S": "x"}}],
+        "LastEvaluatedKey": {"id": {"S": "x"}},
+    }
+
+    items = dynamodb_instance.get_items("table", prefetch=2)
+    next(items)
+    time.sleep(0.3)
+
+    # One page consumed, two buffered and one blocked on the full buffer
+    assert mock_client.scan.call_count <= 4
+    items.close()
+
+
+def test_query_items_prefetch(mock_client, dynamodb_instance):
+    from carlogtt_python_library import exceptions
+
+    mock_client.query.side_effect = [
+        {"Items": [{"id": {"S": "1"}}], "LastEvaluatedKey": {"id": {"S": "1"}}},
+        {"Items": [{"id": {"S": "2"}}]},
+    ]
+
+    items = list(dynamodb_instance.query_items("table", "pk", "a", prefetch=1))
+
+    assert [item["id"] for item in items] == ["1", "2"]
+    with pytest.raises(exceptions.DynamoDBError):
+        list(dynamodb_instance.query_items("table", "pk", "a", prefetch=-1))
+
+
+def test_get_items_resume_token(mock_client, dynamodb_instance):
+    pages = {
+        None: {"Items": [{"id": {"B": b"1"}}], "LastEvaluatedKey": {"id": {"B": b"1"}}},
+        b"1": {"Items": [{"id": {"B": b"2"}}], "LastEvaluatedKey": {"id": {"B": b"2"}}},
+        b"2": {"Items": [{"id": {"B": b"3"}}]},
+    }
+    mock_client.scan.side_effect = lambda **kwargs: pages[
+        kwargs.get("ExclusiveStartKey", {}).get("id", {}).get("B")
+    ]
+    tokens = []
+
+    items = dynamodb_instance.get_items("table", on_checkpoint=tokens.append)
+    assert next(items) == {"id": b"1"}
+    assert next(items) == {"id": b"2"}
+    items.close()
+
+    # Only the first page was fully consumed when the scan stopped
+    assert len(tokens) == 1
+    resumed = list(dynamodb_instance.get_items("table", resume_token=tokens[0]))
+
+    assert resumed == [{"id": b"2"}, {"id": b"3"}]
+    assert mock_client.scan.call_args_list[-2].kwargs["ExclusiveStartKey"] == {"id": {"B": b"1"}}
+
+
+def test_get_items_parallel_scan_resume_token(mock_client, dynamodb_instance):
+    def scan(**kwargs):
+        if kwargs["Segment"] == 0:
+            return {"Items": [{"id": {"S": "0"}}]}
+        if "ExclusiveStartKey" not in kwargs:
+            return {"Items": [{"id": {"S": "1a"}}], "LastEvaluatedKey": {"id": {"S": "1a"}}}
+        return {"Items": [{"id": {"S": "1b"}}]}
+
+    mock_client.scan.side_effect = scan
+    tokens = []
+
+    all_items = list(
+        dynamodb_instance.get_items("table", total_segments=2, on_checkpoint=tokens.append)
+    )
+
+    assert sorted(item["id"] for item in all_items) == ["0", "1a", "1b"]
+    assert len(tokens) == 3
+
+    # Resume from the first checkpoint, whichever segment produced it
+    mock_client.scan.reset_mock()
+    resumed = list(dynamodb_instance.get_items("table", total_segments=2, resume_token=tokens[0]))
+
+    assert len(resumed) == 2
+    assert mock_client.scan.call_count == 2
+
+
+def test_get_items_checkpoint_file(mock_client, dynamodb_instance, tmp_path):
+    checkpoint_file = tmp_path / "scan.checkpoint"
+    mock_client.scan.side_effect = [
+        {"Items": [{"id": {"S": "1"}}], "LastEvaluatedKey": {"id": {"S": "1"}}},
+        botocore.exceptions.ClientError(
+            {"Error": {"Code": "ProvisionedThroughputExceededException", "Message": "slow"}},
+            "Scan",
+        ),
+        {"Items": [{"id": {"S": "2"}}]},
+    ]
+    items = []
+
+    with pytest.raises(Exception):
+        for item in dynamodb_instance.get_items("table", checkpoint_file=checkpoint_file):
+            items.append(item)
+
+    assert checkpoint_file.exists()
+    items.extend(dynamodb_instance.get_items("table", checkpoint_file=checkpoint_file))
+
+    assert [item["id"] for item in items] == ["1", "2"]
+    assert mock_client.scan.call_args.kwargs["ExclusiveStartKey"] == {"id": {"S": "1"}}
+    assert not checkpoint_file.exists()
+
+
+@pytest.mark.parametrize("resume_token", ["not-a-token", "e30="])
+def test_get_items_invalid_resume_token(mock_client, dynamodb_instance, resume_token):
+    from carlogtt_python_library import exceptions
+
+    with pytest.raises(exceptions.DynamoDBError):
+        list(dynamodb_instance.get_items("table", resume_token=resume_token))
+
+
+def test_get_items_resume_token_other_scan(mock_client, dynamodb_instance):
+    from carlogtt_python_library import exceptions
+
+    mock_client.scan.side_effect = [{"Items": [], "LastEvaluatedKey": {"id": {"S": "1"}}}, {}]
+    tokens = []
+    list(dynamodb_instance.get_items("table", on_checkpoint=tokens.append))
+
+    with pytest.raises(exceptions.DynamoDBError):
+        list(dynamodb_instance.get_items("other_table", resume_token=tokens[0]))
+
+    with pytest.raises(exceptions.DynamoDBError):
+        list(dynamodb_instance.get_items("table", total_segments=2, resume_token=tokens[0]))
+
+
+@pytest.fixture
+def cached_dynamodb_instance(mock_client):
+    from carlogtt_python_library.database.database_dynamo import DynamoDB
+
+    return DynamoDB(aws_region_name="us-east-1", caching=True, item_cache_max_items=2)
+
+
+def test_get_item_cache_hit_and_miss(mock_client, cached_dynamodb_instance):
+    mock_client.get_item.return_value = {"Item": {"id": {"S": "1"}, "v": {"N": "1"}}}
+
+    first = cached_dynamodb_instance.get_item("table", "id", "1")
+    first["v"] = 99
+    second = cached_dynamodb_instance.get_item("table", "id", "1")
+    cached_dynamodb_instance.get_item("table", "id", "1", projection=["v"])
+
+    assert second == {"id": "1", "v": 1}
+    assert mock_client.get_item.call_count == 2
+    stats = cached_dynamodb_instance.get_item_cache_stats()
+    assert (stats["Hits"], stats["Misses"], stats["Items"]) == (1, 1, 1)
+    assert stats["Bytes"] == len("id") + 1 + len("v") + 1
+
+
+def test_get_item_cache_lru_eviction_and_ttl(mock_client):
+    from carlogtt_python_library.database.database_dynamo import DynamoDB
+
+    instance = DynamoDB(
+        aws_region_name="us-east-1", caching=True, item_cache_max_items=2, item_cache_ttl=0
+    )
+    mock_client.get_item.side_effect = lambda **kwargs: {"Item": kwargs["Key"]}
+
+    instance.get_item("table", "id", "1")
+    instance.get_item("table", "id", "1")
+
+    assert instance.get_item_cache_stats()["Expirations"] == 1
+
+    lru = DynamoDB(aws_region_name="us-east-1", caching=True, item_cache_max_items=2)
+    for key in ["1", "2", "1", "3", "1"]:
+        lru.get_item("table", "id", key)
+
+    stats = lru.get_item_cache_stats()
+    assert (stats["Hits"], stats["Evictions"], stats["Items"]) == (2, 1, 2)
+
+
+def test_get_item_cache_invalidated_by_writes(mock_client, cached_dynamodb_instance):
+    mock_client.get_item.return_value = {"Item": {"id": {"S": "1"}}}
+    mock_client.update_item.return_value = {"Attributes": {}}
+    mock_client.delete_item.return_value = {"Attributes": {}}
+    mock_client.describe_table.return_value = {
+        "Table": {
+            "KeySchema": [{"AttributeName": "id", "KeyType": "HASH"}],
+            "AttributeDefinitions": [{"AttributeName": "id", "AttributeType": "S"}],
+        }
+    }
+    writes = [
+        lambda: cached_dynamodb_instance.update_item("table", {"id": "1"}, name="x"),
+        lambda: cached_dynamodb_instance.delete_item("table", "id", "1"),
+        lambda: cached_dynamodb_instance.atomic_writes(
+            put=[{
+                "TableName": "table",
+                "PartitionKeyKey": "id",
+                "PartitionKeyValue": "1",
+                "Items": {},
+            }]
+        ),
+    ]
+
+    for write in writes:
+        cached_dynamodb_instance.get_item("table", "id", "1")
+        write()
+        cached_dynamodb_instance.get_item("table", "id", "1")
+
+    # The first read and the read after every write miss the cache
+    assert mock_client.get_item.call_count == 4
+    stats = cached_dynamodb_instance.get_item_cache_stats()
+    assert (stats["Hits"], stats["Invalidations"]) == (2, 3)
+
+
+def test_get_item_cache_invalidated_by_failed_writes(mock_client, cached_dynamodb_instance):
+    from carlogtt_python_library import exceptions
+
+    mock_client.get_item.return_value = {"Item": {"id": {"S": "1"}}}
+    error = botocore.exceptions.ClientError(
+        {"Error": {"Code": "InternalServerError", "Message": "timeout"}}, "UpdateItem"
+    )
+    mock_client.update_item.side_effect = error
+    mock_client.delete_item.side_effect = error
+    writes = [
+        lambda: cached_dynamodb_instance.update_item("table", {"id": "1"}, name="x"),
+        lambda: cached_dynamodb_instance.delete_item("table", "id", "1"),
+        lambda: cached_dynamodb_instance.delete_item_att("table", "id", "1", ["name"]),
+    ]
+
+    for write in writes:
+        cached_dynamodb_instance.get_item("table", "id", "1")
+        with pytest.raises(exceptions.DynamoDBError):
+            write()
+
+    # A failed write may have been applied, so every read misses
+    assert mock_client.get_item.call_count == 3
+    assert cached_dynamodb_instance.get_item_cache_stats()["Invalidations"] == 3
+
+
+@pytest.mark.parametrize("cache_option", [{"item_cache_max_bytes": 1024}, {"item_cache_ttl": 10}])
+def test_item_cache_options_require_max_items(mock_client, cache_option):
+    from carlogtt_python_library import exceptions
+    from carlogtt_python_library.database.database_dynamo import DynamoDB
+
+    with pytest.raises(exceptions.DynamoDBError, match="require item_cache_max_items"):
+        DynamoDB(aws_region_name="us-east-1", caching=True, **cache_option)
+
+
+def test_get_item_cache_skips_item_written_during_read(mock_client, cached_dynamodb_instance):
+    def get_item(**kwargs):
+        # Another thread writes the item while it is being read
+        cached_dynamodb_instance._invalidate_cached_keys("table", [kwargs["Key"]])
+        return {"Item": kwargs["Key"]}
+
+    mock_client.get_item.side_effect = get_item
+
+    cached_dynamodb_instance.get_item("table", "id", "1")
+
+    assert cached_dynamodb_instance.get_item_cache_stats()["Items"] == 0
+
+
+def test_get_item_cache_skips_item_read_during_batch_write(mock_client, cached_dynamodb_instance):
+    mock_client.describe_table.return_value = PK_ONLY_TABLE_DESCRIPTION
+    mock_client.get_item.return_value = {"Item": {"pk": {"S": "1"}, "v": {"N": "1"}}}
+
+    def batch_write_item(**kwargs):
+        # Another thread reads the item while the write is in flight
+        cached_dynamodb_instance.get_item("table", "pk", "1")
+        return {"UnprocessedItems": {}}
+
+    mock_client.batch_write_item.side_effect = batch_write_item
+
+    cached_dynamodb_instance.batch_write_items("table", put=[{"pk": "1", "v": 2}])
+
+    assert cached_dynamodb_instance.get_item_cache_stats()["Items"] == 0
+
+
+def test_get_atomic_counter_bypasses_item_cache(mock_client, cached_dynamodb_instance):
+    mock_client.get_item.side_effect = [
+        {
+            "Item": {
+                "pk_id": {"S": "__PK_VALUE_COUNTER__"},
+                "current_counter_value": {"N": str(value)},
+                "last_modified_timestamp": {"N": str(value)},
+            }
+        }
+        for value in (1, 2)
+    ]
+
+    assert cached_dynamodb_instance._get_atomic_counter("table") == (1, 1)
+    assert cached_dynamodb_instance._get_atomic_counter("table") == (2, 2)
+    assert mock_client.get_item.call_args.kwargs["TableName"] == "table_SysItems"
+    assert cached_dynamodb_instance.get_item_cache_stats()["Items"] == 0
+
+
+def test_get_item_cache_stats_disabled(dynamodb_instance):
+    from carlogtt_python_library import exceptions
+
+    with pytest.raises(exceptions.DynamoDBError):
+        dynamodb_instance.get_item_cache_stats()
+
+
+def test_capacity_limit_charges_consumed_capacity(mock_client):
+    from carlogtt_python_library.database.database_dynamo import DynamoDB
+
+    instance = DynamoDB(
+        aws_region_name="us-east-1",
+        caching=True,
+        capacity_limits={"table": {"ReadCapacityUnits": 10}},
+    )
+    mock_client.get_item.return_value = {
+        "Item": {"id": {"S": "1"}},
+        "ConsumedCapacity": {"TableName": "table", "CapacityUnits": 4.0},
+    }
+
+    with mock.patch("carlogtt_python_library.database.database_dynamo.time.sleep") as mock_sleep:
+        for _ in range(4):
+            instance.get_item("table", "id", "1")
+
+    assert mock_client.get_item.call_args.kwargs["ReturnConsumedCapacity"] == "TOTAL"
+    # 16 units consumed from a bucket of 10, the last calls had to wait
+    assert mock_sleep.called
+    instance.put_item("other_table", "id", "1")
+    assert "ReturnConsumedCapacity" not in mock_client.put_item.call_args.kwargs
+
+
+def test_capacity_limit_adapts_to_throttling(mock_client):
+    from carlogtt_python_library.database.database_dynamo import DynamoDB
+
+    instance = DynamoDB(aws_region_name="us-east-1", caching=True)
+    instance.set_capacity_limit("table", write_capacity_units=100)
+    limiter = instance._capacity_limiters[("table", "write")]
+    mock_client.put_item.side_effect = botocore.exceptions.ClientError(
+        {"Error": {"Code": "ProvisionedThroughputExceededException", "Message": "slow"}},
+        "PutItem",
+    )
+
+    for _ in range(2):
+        with pytest.raises(Exception):
+            instance.put_item("table", "id", "1")
+
+    assert limiter.rate == pytest.approx(25, rel=0.05)
+
+    instance.set_capacity_limit("table")
+    assert ("table", "write") not in instance._capacity_limiters
+
+
+def test_consumed_capacity_of_batch_response():
+    from carlogtt_python_library.database.database_dynamo import _consumed_capacity
+
+    ddb_response = {
+        "ConsumedCapacity": [
+            {"TableName": "table", "CapacityUnits": 2.5},
+            {"TableName": "other", "CapacityUnits": 9.0},
+        ]
+    }
+
+    assert _consumed_capacity(ddb_response, "table") == 2.5
+    assert _consumed_capacity({}, "table") == 0.0
+
+
+def test_metrics_aggregated_per_table_and_operation(mock_client):
+    from carlogtt_python_library.database.database_dynamo import DynamoDB
+
+    calls = []
+    instance = DynamoDB(aws_region_name="us-east-1", caching=True, metrics_callback=calls.append)
+    mock_client.scan.side_effect = [
+        {
+            "Items": [{"id": {"S": "1"}}, {"id": {"S": "2"}}],
+            "LastEvaluatedKey": {"id": {"S": "2"}},
+            "ConsumedCapacity": {"TableName": "table", "CapacityUnits": 1.5},
+        },
+        {"Items": [], "ConsumedCapacity": {"TableName": "table", "CapacityUnits": 0.5}},
+    ]
+    mock_client.put_item.side_effect = botocore.exceptions.ClientError(
+        {"Error": {"Code": "ThrottlingException", "Message": "slow"}}, "PutItem"
+    )
+
+    list(instance.get_items("table"))
+    with pytest.raises(Exception):
+        instance.put_item("table", "id", "3")
+
+    metrics = instance.get_metrics()
+    scan_metrics = metrics["table"]["scan"]
+    assert (scan_metrics["Calls"], scan_metrics["Pages"], scan_metrics["Items"]) == (2, 2, 2)
+    assert scan_metrics["Bytes"] == 2 * (len("id") + 1)
+    assert scan_metrics["ReadCapacityUnits"] == 2.0
+    assert sum(scan_metrics["LatencyHistogram"].values()) == 2
+    put_metrics = metrics["table"]["put_item"]
+    assert (put_metrics["Errors"], put_metrics["Throttles"]) == (1, 1)
+    assert [call["Operation"] for call in calls] == ["scan", "scan", "put_item"]
+    assert calls[-1]["Error"] == "ThrottlingException"
+    assert mock_client.scan.call_args.kwargs["ReturnConsumedCapacity"] == "TOTAL"
+
+    instance.reset_metrics()
+    assert instance.get_metrics() == {}
+
+
+def test_metrics_transact_write_items_per_table(mock_client):
+    from carlogtt_python_library.database.database_dynamo import DynamoDB
+
+    instance = DynamoDB(aws_region_name="us-east-1", caching=True, metrics=True)
+    mock_client.transact_write_items.return_value = {
+        "ConsumedCapacity": [
+            {"TableName": "t1", "CapacityUnits": 2.0},
+            {"TableName": "t2", "CapacityUnits": 4.0},
+        ]
+    }
+
+    instance.atomic_writes(
+        delete=[
+            {"TableName": "t1", "PartitionKey": {"id": "1"}},
+            {"TableName": "t2", "PartitionKey": {"id": "2"}},
+        ]
+    )
+
+    metrics = instance.get_metrics()
+    assert metrics["t1"]["transact_write_items"]["WriteCapacityUnits"] == 2.0
+    assert metrics["t2"]["transact_write_items"]["WriteCapacityUnits"] == 4.0
+
+
+def test_metrics_disabled(dynamodb_instance):
+    from carlogtt_python_library import exceptions
+
+    with pytest.raises(exceptions.DynamoDBError):
+        dynamodb_instance.get_metrics()
+
+
+def test_get_items_lazy(mock_client, dynamodb_instance):
+    from carlogtt_python_library.database.database_dynamo import DynamoDbLazyItem
+
+    mock_client.scan.return_value = {
+        "Items": [{"id": {"S": "1"}, "info": {"M": {"tags": {"L": [{"S": "a"}]}}}}]
+    }
+
+    with mock.patch.object(
+        dynamodb_instance._serializer,
+        "deserialize_att",
+        wraps=dynamodb_instance._serializer.deserialize_att,
+    ) as mock_deserialize_att:
+        (item,) = list(dynamodb_instance.get_items("table", lazy=True))
+
+        assert isinstance(item, DynamoDbLazyItem)
+        assert len(item) == 2 and "info" in item and "other" not in item
+        assert item["id"] == "1"
+        assert item["id"] == "1"
+        assert mock_deserialize_att.call_count == 1
+
+        assert dict(item) == {"id": "1", "info": {"tags": ["a"]}}
+        assert item == {"id": "1", "info": {"tags": ["a"]}}
+
+    with pytest.raises(KeyError):
+        item["other"]
+    with pytest.raises(TypeError):
+        item["id"] = "2"
+
+
+def test_query_items_lazy(mock_client, dynamodb_instance):
+    from carlogtt_python_library.database.database_dynamo import DynamoDbLazyItem
+
+    mock_client.query.return_value = {"Items": [{"id": {"N": "7"}}]}
+
+    (item,) = list(dynamodb_instance.query_items("table", "id", 7, lazy=True))
+
+    assert isinstance(item, DynamoDbLazyItem)
+    assert item["id"] == 7
+
+
+def test_deserialize_row(dynamodb_instance):
+    serializer = dynamodb_instance._serializer
+
+    row = serializer.deserialize_row(
+        {"id": {"S": "1"}, "count": {"N": "2"}, "info": {"M": {"a": {"BOOL": True}}}},
+        ["id", "count", "missing", "info"],
+    )
+
+    assert row == ("1", 2, None, {"a": True})
+    assert (row.id, row.count, row.missing) == ("1", 2, None)
+    assert not hasattr(row, "__dict__")
+
+    other = serializer.deserialize_row({"id": {"S": "2"}}, ("id", "count", "missing", "info"))
+    assert type(other) is type(row)
+
+    # Names that aren't identifiers are still readable by position
+    odd_row = serializer.deserialize_row({"my-key": {"S": "v"}}, ["my-key", "class"])
+    assert tuple(odd_row) == ("v", None)
+
+
+def test_deserialize_row_invalid_schema(dynamodb_instance):
+    from carlogtt_python_library import exceptions
+
+    with pytest.raises(exceptions.DynamoDBError):
+        dynamodb_instance._serializer.deserialize_row({}, ["id", "id"])
+    with pytest.raises(exceptions.DynamoDBError):
+        dynamodb_instance._serializer.deserialize_row({}, [])
+
+
+def test_get_items_schema(mock_client, dynamodb_instance):
+    mock_client.scan.return_value = {
+        "Items": [{"id": {"S": "1"}, "count": {"N": "3"}}, {"id": {"S": "2"}}]
+    }
+
+    rows = list(dynamodb_instance.get_items("table", schema=["id", "count"]))
+
+    assert [tuple(row) for row in rows] == [("1", 3), ("2", None)]
+    assert rows[0].count == 3
+    scan_kwargs = mock_client.scan.call_args.kwargs
+    assert scan_kwargs["ProjectionExpression"] == "#att_0, #att_1"
+    assert scan_kwargs["ExpressionAttributeNames"] == {"#att_0": "id", "#att_1": "count"}
+
+
+def test_get_items_schema_keeps_explicit_projection(mock_client, dynamodb_instance):
+    mock_client.scan.return_value = {"Items": [{"a.b": {"S": "1"}}]}
+
+    (row,) = list(dynamodb_instance.get_items("table", schema=["a.b"]))
+
+    assert tuple(row) == ("1",)
+    assert "ProjectionExpression" not in mock_client.scan.call_args.kwargs
+
+    list(dynamodb_instance.get_items("table", schema=["id"], projection=["id", "other"]))
+
+    assert mock_client.scan.call_args.kwargs["ProjectionExpression"] == "#att_0, #att_1"
+
+
+def test_get_items_schema_and_lazy(mock_client, dynamodb_instance):
+    from carlogtt_python_library import exceptions
+
+    with pytest.raises(exceptions.DynamoDBError):
+        list(dynamodb_instance.get_items("table", schema=["id"], lazy=True))
+
+    mock_client.scan.assert_not_called()
+
+
+def test_query_items_schema(mock_client, dynamodb_instance):
+    mock_client.query.return_value = {"Items": [{"id": {"N": "7"}, "sk": {"S": "a"}}]}
+
+    (row,) = list(dynamodb_instance.query_items("table", "id", 7, schema=["sk"]))
+
+    assert tuple(row) == ("a",)
+    assert "ProjectionExpression" in mock_client.query.call_args.kwargs
+
+
+def test_get_items_columns(mock_client, dynamodb_instance):
+    from carlogtt_python_library import exceptions
+
+    mock_client.scan.side_effect = [
+        {
+            "Items": [{"id": {"S": "1"}, "n": {"N": "1"}}, {"id": {"S": "2"}}],
+            "LastEvaluatedKey": {"id": {"S": "2"}},
+        },
+        {"Items": [{"id": {"S": "3"}, "n": {"N": "3"}}]},
+    ]
+
+    batches = list(dynamodb_instance.get_items_columns("table", ["id", "n"], batch_size=2))
+
+    assert batches == [{"id": ["1", "2"], "n": [1, None]}, {"id": ["3"], "n": [3]}]
+
+    with pytest.raises(exceptions.DynamoDBError):
+        list(dynamodb_instance.get_items_columns("table", ["id"], batch_size=0))
+
+
+def _double_count(item):
+    return item["count"] * 2
+
+
+def test_get_items_processes(mock_client, dynamodb_instance):
+    pages = [
+        {
+            "Items": [{"id": {"S": str(i)}, "count": {"N": str(i)}} for i in range(page, page + 3)],
+            "LastEvaluatedKey": {"id": {"S": str(page + 2)}},
+        }
+        for page in range(0, 12, 3)
+    ]
+    pages[-1].pop("LastEvaluatedKey")
+    mock_client.scan.side_effect = pages
+    tokens = []
+
+    items = list(
+        dynamodb_instance.get_items(
+            "table", processes=2, item_transform=_double_count, on_checkpoint=tokens.append
+        )
+    )
+
+    assert items == [i * 2 for i in range(12)]
+    assert len(tokens) == 4
+
+
+def test_get_items_processes_schema(mock_client, dynamodb_instance):
+    mock_client.scan.return_value = {"Items": [{"id": {"S": "1"}}, {"id": {"S": "2"}}]}
+
+    rows = list(dynamodb_instance.get_items("table", processes=1, schema=["id", "count"]))
+
+    assert [(row.id, row.count) for row in rows] == [("1", None), ("2", None)]
+
+
+def test_get_items_item_transform(mock_client, dynamodb_instance):
+    mock_client.scan.return_value = {"Items": [{"count": {"N": "2"}}]}
+
+    assert list(dynamodb_instance.get_items("table", item_transform=_double_count)) == [4]
+
+
+def test_get_items_processes_invalid(mock_client, dynamodb_instance):
+    from carlogtt_python_library import exceptions
+
+    mock_client.scan.return_value = {"Items": []}
+
+    with pytest.raises(exceptions.DynamoDBError):
+        list(dynamodb_instance.get_items("table", processes=0))
+    with pytest.raises(exceptions.DynamoDBError):
+        list(dynamodb_instance.get_items("table", processes=2, lazy=True))
+
+
+def test_export_items_jsonl_rotation(mock_client, dynamodb_instance, tmp_path):
+    mock_client.scan.return_value = {
+        "Items": [
+            {"id": {"S": str(i)}, "tags": {"SS": ["b", "a"]}, "raw": {"B": b"\x00"}}
+            for i in range(5)
+        ]
+    }
+
+    stats = dynamodb_instance.export_items("table", str(tmp_path / "export"), max_file_bytes=80)
+
+    assert stats["Items"] == 5
+    assert stats["Files"] == [str(tmp_path / f"export-0000{i}.jsonl") for i in range(3)]
+    lines = [
+        json.loads(line)
+        for name in stats["Files"]
+        for line in pathlib.Path(name).read_text().splitlines()
+    ]
+    assert [line["id"] for line in lines] == ["0", "1", "2", "3", "4"]
+    assert lines[0] == {"id": "0", "tags": ["a", "b"], "raw": "AA=="}
+    assert stats["Bytes"] == sum(pathlib.Path(name).stat().st_size for name in stats["Files"])
+
+
+def test_export_items_csv_gzip(mock_client, dynamodb_instance, tmp_path):
+    import gzip
+
+    mock_client.scan.return_value = {
+        "Items": [
+            {"id": {"S": "1"}, "info": {"M": {"a": {"N": "1"}}}},
+            {"id": {"S": "2"}},
+        ]
+    }
+
+    stats = dynamodb_instance.export_items(
+        "table", str(tmp_path / "export"), format="csv", fields=["id", "info"], compress=True
+    )
+
+    (name,) = stats["Files"]
+    assert name.endswith("export-00000.csv.gz")
+    assert (
+        gzip.decompress(pathlib.Path(name).read_bytes()).decode() == 'id,info\n1,"{""a"":1}"\n2,\n'
+    )
+    assert mock_client.scan.call_args.kwargs["ProjectionExpression"] == "#att_0, #att_1"
+
+
+def test_export_items_s3(mock_client, dynamodb_instance):
+    s3 = mock.Mock()
+    s3.create_multipart_upload.return_value = {"UploadId": "upload-id"}
+    s3.upload_part.return_value = {"ETag": "etag"}
+    mock_client.query.return_value = {"Items": [{"id": {"N": "1"}}]}
+
+    stats = dynamodb_instance.export_items(
+        "table",
+        "prefix/export",
+        query={"partition_key_key": "id", "partition_key_value": 1},
+        s3=s3,
+        s3_bucket="bucket",
+    )
+
+    assert stats["Files"] == ["prefix/export-00000.jsonl"]
+    s3.upload_part.assert_called_once_with(
+        bucket="bucket",
+        filename="prefix/export-00000.jsonl",
+        upload_id="upload-id",
+        part_number=1,
+        body=b'{"id":1}\n',
+    )
+    s3.complete_multipart_upload.assert_called_once()
+    assert s3.complete_multipart_upload.call_args.kwargs["parts"] == [
+        {"ETag": "etag", "PartNumber": 1}
+    ]
+
+
+def test_export_items_failure_aborts(mock_client, dynamodb_instance):
+    from carlogtt_python_library import exceptions
+
+    s3 = mock.Mock()
+    s3.create_multipart_upload.return_value = {"UploadId": "upload-id"}
+    mock_client.scan.side_effect = [
+        {"Items": [{"id": {"S": "1"}}], "LastEvaluatedKey": {"id": {"S": "1"}}},
+        Exception("boom"),
+    ]
+
+    with pytest.raises(exceptions.DynamoDBError):
+        dynamodb_instance.export_items("table", "export", s3=s3, s3_bucket="bucket")
+
+    s3.abort_multipart_upload.assert_called_once()
+    s3.complete_multipart_upload.assert_not_called()
+
+
+def test_export_items_invalid_arguments(dynamodb_instance):
+    from carlogtt_python_library import exceptions
+
+    with pytest.raises(exceptions.DynamoDBError):
+        dynamodb_instance.export_items("table", "export", format="xml")
+    with pytest.raises(exceptions.DynamoDBError):
+        dynamodb_instance.export_items("table", "export", format="csv")
+    with pytest.raises(exceptions.DynamoDBError):
+        dynamodb_instance.export_items("table", "export", s3=mock.Mock())
+
+
+def test_copy_table(mock_client, dynamodb_instance):
+    mock_client.describe_table.return_value = PK_ONLY_TABLE_DESCRIPTION
+    mock_client.scan.side_effect = [
+        {
+            "Items": [{"pk": {"S": "1"}, "old": {"N": "1"}}, {"pk": {"S": "2"}}],
+            "LastEvaluatedKey": {"pk": {"S": "2"}},
+        },
+        {"Items": [{"pk": {"S": "3"}, "old": {"N": "3"}}]},
+    ]
+    mock_client.batch_write_item.return_value = {"UnprocessedItems": {}}
+    tokens = []
+
+    def _rename(item):
+        if "old" not in item:
+            return None
+        return {"pk": item["pk"], "new": item["old"] * 10}
+
+    stats = dynamodb_instance.copy_table(
+        "source", "destination", transform=_rename, on_checkpoint=tokens.append
+    )
+
+    assert (stats["Scanned"], stats["Written"], stats["Skipped"]) == (3, 2, 1)
+    assert stats["Failed"] == [] and stats["Verification"] is None
+    assert len(tokens) == 2
+    written = [
+        write_request["PutRequest"]["Item"]
+        for call in mock_client.batch_write_item.call_args_list
+        for write_request in call.kwargs["RequestItems"]["destination"]
+    ]
+    assert written == [
+        {"pk": {"S": "1"}, "new": {"N": "10"}},
+        {"pk": {"S": "3"}, "new": {"N": "30"}},
+    ]
+
+
+def test_copy_table_raw_resume_and_verify(mock_client, dynamodb_instance):
+    from carlogtt_python_library.database.database_dynamo import _encode_resume_token
+
+    mock_client.describe_table.return_value = PK_ONLY_TABLE_DESCRIPTION
+    ddb_items = [{"pk": {"S": str(i)}, "my-att": {"S": "value"}} for i in range(3)]
+    copy_page = {"Items": ddb_items}
+    count_page = {"Count": 3}
+    mock_client.scan.side_effect = [copy_page, count_page, count_page]
+    mock_client.batch_write_item.return_value = {"UnprocessedItems": {}}
+    mock_client.batch_get_item.return_value = {"Responses": {"destination": ddb_items[:2]}}
+    resume_token = _encode_resume_token({
+        "Table": "source",
+        "TotalSegments": None,
+        "Segments": [{"ExclusiveStartKey": {"pk": {"S": "0"}}}],
+    })
+
+    stats = dynamodb_instance.copy_table(
+        "source",
+        "destination",
+        resume_token=resume_token,
+        read_capacity_units=100,
+        verify=True,
+    )
+
+    assert mock_client.scan.call_args_list[0].kwargs["ExclusiveStartKey"] == {"pk": {"S": "0"}}
+    (call,) = mock_client.batch_write_item.call_args_list
+    assert [r["PutRequest"]["Item"] for r in call.kwargs["RequestItems"]["destination"]] == (
+        ddb_items
+    )
+    verification = stats["Verification"]
+    assert (verification["SourceCount"], verification["DestinationCount"]) == (3, 3)
+    assert verification["Sampled"] == 3
+    assert verification["Mismatched"] == [{"pk": "2"}]
+    assert verification["Passed"] is False
+
+
+def test_copy_table_capacity_budget_leaves_table_limits(mock_client, dynamodb_instance):
+    mock_client.describe_table.return_value = PK_ONLY_TABLE_DESCRIPTION
+    dynamodb_instance.set_capacity_limit("source", read_capacity_units=5)
+    table_limiter = dynamodb_instance._capacity_limiters[("source", "read")]
+    limiters_during_copy = []
+
+    def scan(**kwargs):
+        limiters_during_copy.append(dict(dynamodb_instance._capacity_limiters))
+        return {"Items": [{"pk": {"S": "1"}}], "ConsumedCapacity": {"CapacityUnits": 1}}
+
+    mock_client.scan.side_effect = scan
+    mock_client.batch_write_item.return_value = {"UnprocessedItems": {}}
+
+    with mock.patch.object(table_limiter, "call", wraps=table_limiter.call) as table_call:
+        dynamodb_instance.copy_table(
+            "source", "destination", read_capacity_units=100, write_capacity_units=100
+        )
+
+    # The copy uses its own limiters, the limits of the tables are
+    # neither used nor replaced
+    table_call.assert_not_called()
+    assert limiters_during_copy == [{("source", "read"): table_limiter}]
+    assert dynamodb_instance._capacity_limiters == {("source", "read"): table_limiter}
+
+
+def test_copy_table_raw_sharded_compressed_tables(mock_client):
+    import zlib
+
+    from carlogtt_python_library.database.database_dynamo import DynamoDB
+
+    instance = DynamoDB(
+        aws_region_name="us-east-1",
+        caching=True,
+        write_shards={"source": 2, "destination": 4},
+        compression={"destination": {"MinSizeBytes": 100}},
+    )
+    mock_client.describe_table.return_value = PK_SK_TABLE_DESCRIPTION
+    body = "x" * 1000
+    mock_client.scan.side_effect = [
+        {"Items": [{"pk": {"S": "user#1"}, "sk": {"N": "7"}, "body": {"S": body}}]},
+        {"Count": 1},
+        {"Count": 1},
+    ]
+    mock_client.batch_write_item.return_value = {"UnprocessedItems": {}}
+    mock_client.batch_get_item.side_effect = lambda **kwargs: {
+        "Responses": {
+            "destination": [_written_requests(mock_client, "destination")[0]["PutRequest"]["Item"]]
+        }
+    }
+
+    stats = instance.copy_table("source", "destination", verify=True)
+
+    (written_item,) = [
+        r["PutRequest"]["Item"] for r in _written_requests(mock_client, "destination")
+    ]
+    shard_pk = {"S": f"user#{zlib.crc32(b'7') % 4}"}
+    assert written_item["pk"] == shard_pk
+    assert set(written_item["body"]) == {"B"}
+    keys = mock_client.batch_get_item.call_args.kwargs["RequestItems"]["destination"]["Keys"]
+    assert keys == [{"pk": shard_pk, "sk": {"N": "7"}}]
+    assert stats["Verification"]["Mismatched"] == []
+    assert stats["Verification"]["Passed"] is True
+
+
+def test_copy_table_verify_random_shard_destination(mock_client):
+    from carlogtt_python_library.database.database_dynamo import DynamoDB
+
+    instance = DynamoDB(aws_region_name="us-east-1", caching=True, write_shards={"destination": 3})
+    mock_client.describe_table.return_value = PK_ONLY_TABLE_DESCRIPTION
+    mock_client.scan.side_effect = [
+        {"Items": [{"pk": {"S": "a"}}, {"pk": {"S": "b"}}]},
+        {"Count": 2},
+        {"Count": 2},
+    ]
+    mock_client.batch_write_item.return_value = {"UnprocessedItems": {}}
+    # Only the first item lands in the destination
+    mock_client.batch_get_item.side_effect = lambda **kwargs: {
+        "Responses": {
+            "destination": [_written_requests(mock_client, "destination")[0]["PutRequest"]["Item"]]
+        }
+    }
+
+    stats = instance.copy_table("source", "destination", verify=True)
+
+    assert stats["Verification"]["Sampled"] == 2
+    assert stats["Verification"]["Mismatched"] == [{"pk": "b"}]
+
+
+def test_copy_table_transform_sharded_compressed_destination(mock_client):
+    from carlogtt_python_library.database.database_dynamo import DynamoDB
+
+    instance = DynamoDB(
+        aws_region_name="us-east-1",
+        caching=True,
+        write_shards={"destination": 4},
+        compression={"destination": {"MinSizeBytes": 100}},
+    )
+    mock_client.describe_table.return_value = PK_SK_TABLE_DESCRIPTION
+    body = "x" * 1000
+    mock_client.scan.side_effect = [
+        {
+            "Items": [{"pk": {"S": "user"}, "sk": {"N": "1"}, "body": {"S": body}}],
+            "LastEvaluatedKey": {"pk": {"S": "user"}, "sk": {"N": "1"}},
+        },
+        {"Items": [{"pk": {"S": "user"}, "sk": {"N": "2"}, "body": {"S": body}}]},
+        {"Count": 2},
+        {"Count": 1},
+    ]
+    mock_client.batch_write_item.side_effect = [
+        {"UnprocessedItems": {}},
+        botocore.exceptions.ClientError(
+            {"Error": {"Code": "ValidationException", "Message": "bad"}}, "BatchWriteItem"
+        ),
+    ]
+    # Only the write of the first page lands in the destination
+    mock_client.batch_get_item.side_effect = lambda **kwargs: {
+        "Responses": {
+            "destination": [_written_requests(mock_client, "destination")[0]["PutRequest"]["Item"]]
+        }
+    }
+
+    stats = instance.copy_table("source", "destination", transform=dict, verify=True)
+
+    written_item = _written_requests(mock_client, "destination")[0]["PutRequest"]["Item"]
+    assert written_item["pk"]["S"].startswith("user#")
+    assert set(written_item["body"]) == {"B"}
+    assert [f["Item"] for f in stats["Failed"]] == [{"pk": "user", "sk": 2, "body": body}]
+    # The item whose write failed is left out of the verification
+    assert stats["Verification"]["Sampled"] == 1
+    assert stats["Verification"]["Mismatched"] == []
+
+
+def test_copy_table_invalid_arguments(dynamodb_instance):
+    from carlogtt_python_library import exceptions
+
+    with pytest.raises(exceptions.DynamoDBError):
+        dynamodb_instance.copy_table("source", "destination", write_workers=0)
+    with pytest.raises(exceptions.DynamoDBError):
+        dynamodb_instance.copy_table("source", "destination", write_capacity_units=0)
+
+
+def _written_requests(mock_client, table):
+    return [
+        write_request
+        for call in mock_client.batch_write_item.call_args_list
+        for write_request in call.kwargs["RequestItems"][table]
+    ]
+
+
+def test_buffered_writer_coalesces_and_flushes_on_close(mock_client, dynamodb_instance):
+    mock_client.describe_table.return_value = PK_ONLY_TABLE_DESCRIPTION
+    mock_client.batch_write_item.return_value = {"UnprocessedItems": {}}
+
+    with dynamodb_instance.buffered_writer("table", max_age_secs=60) as writer:
+        writer.put({"pk": "1", "value": 1})
+        writer.put({"pk": "2", "value": 2})
+        writer.put({"pk": "1", "value": 3})
+        writer.delete({"pk": "2"})
+
+        assert mock_client.batch_write_item.call_count == 0
+
+    assert _written_requests(mock_client, "table") == [
+        {"PutRequest": {"Item": {"pk": {"S": "1"}, "value": {"N": "3"}}}},
+        {"DeleteRequest": {"Key": {"pk": {"S": "2"}}}},
+    ]
+    stats = writer.get_stats()
+    assert (stats["Put"], stats["Delete"], stats["Coalesced"], stats["Flushes"]) == (1, 1, 2, 1)
+    assert stats["Buffered"] == 0
+
+
+def test_buffered_writer_invalidates_item_cache_after_flush(mock_client, cached_dynamodb_instance):
+    mock_client.describe_table.return_value = PK_ONLY_TABLE_DESCRIPTION
+    mock_client.batch_write_item.return_value = {"UnprocessedItems": {}}
+    mock_client.get_item.return_value = {"Item": {"pk": {"S": "1"}, "value": {"N": "1"}}}
+
+    with cached_dynamodb_instance.buffered_writer("table", max_age_secs=60) as writer:
+        writer.put({"pk": "1", "value": 2})
+        # Read while the write is still buffered
+        cached_dynamodb_instance.get_item("table", "pk", "1")
+
+        assert cached_dynamodb_instance.get_item_cache_stats()["Items"] == 1
+
+    assert cached_dynamodb_instance.get_item_cache_stats()["Items"] == 0
+
+
+def test_buffered_writer_flush_thresholds(mock_client, dynamodb_instance):
+    mock_client.describe_table.return_value = PK_ONLY_TABLE_DESCRIPTION
+    mock_client.batch_write_item.return_value = {"UnprocessedItems": {}}
+
+    writer = dynamodb_instance.buffered_writer("table", flush_items=30, max_age_secs=60)
+    for i in range(30):
+        writer.put({"pk": str(i)})
+    writer.flush()
+
+    # 30 writes flushed in chunks of at most 25
+    assert sorted(
+        len(call.kwargs["RequestItems"]["table"])
+        for call in mock_client.batch_write_item.call_args_list
+    ) == [5, 25]
+
+    aged_writer = dynamodb_instance.buffered_writer("table", max_age_secs=0.05)
+    aged_writer.put({"pk": "aged"})
+    deadline = time.monotonic() + 5
+    while aged_writer.get_stats()["Flushes"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert aged_writer.get_stats()["Put"] == 1
+    writer.close()
+    aged_writer.close()
+
+
+def test_buffered_writer_failures(mock_client, dynamodb_instance):
+    from carlogtt_python_library import exceptions
+
+    mock_client.describe_table.return_value = PK_ONLY_TABLE_DESCRIPTION
+    mock_client.batch_write_item.side_effect = Exception("boom")
+    reported = []
+
+    with dynamodb_instance.buffered_writer("table", on_failure=reported.extend) as writer:
+        writer.put({"pk": "1"})
+
+    assert reported == [{"Operation": "Put", "Item": {"pk": "1"}, "Error": "boom"}]
+
+    writer = dynamodb_instance.buffered_writer("table")
+    writer.put({"pk": "1"})
+
+    with pytest.raises(exceptions.DynamoDBError, match="1 buffered writes"):
+        writer.close()
+
+    assert len(writer.failures) == 1
+    with pytest.raises(exceptions.DynamoDBError):
+        writer.put({"pk": "2"})
+
+    with dynamodb_instance.buffered_writer("table") as writer:
+        with pytest.raises(exceptions.DynamoDBError):
+            writer.put({"value": 1})
+
+
+def _fan_out_query(pages_by_pk):
+    def _query(**kwargs):
+        pk_value = kwargs["ExpressionAttributeValues"][":partition_key_value_placeholder"]["S"]
+        pages = pages_by_pk[pk_value]
+        page_index = int(kwargs.get("ExclusiveStartKey", {}).get("page", {}).get("N", "0"))
+        page = {"Items": pages[page_index]}
+        if page_index + 1 < len(pages):
+            page["LastEvaluatedKey"] = {"page": {"N": str(page_index + 1)}}
+        return page
+
+    return _query
+
+
+def _sk_items(pk, *sort_keys):
+    return [{"pk": {"S": pk}, "sk": {"N": str(sk)}} for sk in sort_keys]
+
+
+def test_query_items_fan_out_ordered(mock_client, dynamodb_instance):
+    mock_client.describe_table.return_value = PK_SK_TABLE_DESCRIPTION
+    mock_client.query.side_effect = _fan_out_query({
+        "a": [_sk_items("a", 1, 4), _sk_items("a", 7)],
+        "b": [_sk_items("b", 2, 3)],
+        "c": [[], _sk_items("c", 5, 6)],
+    })
+
+    items = list(dynamodb_instance.query_items_fan_out("table", "pk", ["a", "b", "c", "a"]))
+
+    assert [item["sk"] for item in items] == [1, 2, 3, 4, 5, 6, 7]
+    # Duplicate partition key values are queried once
+    assert mock_client.query.call_count == 5
+
+
+def test_query_items_fan_out_unordered_and_limit(mock_client, dynamodb_instance):
+    mock_client.query.side_effect = _fan_out_query({
+        "a": [_sk_items("a", 1, 4), _sk_items("a", 7)],
+        "b": [_sk_items("b", 2, 3)],
+    })
+
+    items = list(
+        dynamodb_instance.query_items_fan_out(
+            "table", "pk", ["a", "b"], sort_key_key="sk", ordered=False, max_workers=2
+        )
+    )
+
+    assert sorted(item["sk"] for item in items) == [1, 2, 3, 4, 7]
+
+    mock_client.query.reset_mock()
+    items = list(
+        dynamodb_instance.query_items_fan_out(
+            "table", "pk", ["a", "b"], sort_key_key="sk", ascending=True, limit=2
+        )
+    )
+
+    assert [item["sk"] for item in items] == [1, 2]
+    assert all(call.kwargs["Limit"] == 2 for call in mock_client.query.call_args_list)
+
+
+def test_query_items_fan_out_invalid_arguments(mock_client, dynamodb_instance):
+    from carlogtt_python_library import exceptions
+
+    mock_client.describe_table.return_value = PK_ONLY_TABLE_DESCRIPTION
+
+    with pytest.raises(exceptions.DynamoDBError):
+        list(dynamodb_instance.query_items_fan_out("table", "pk", ["a"]))
+    with pytest.raises(exceptions.DynamoDBError):
+        list(dynamodb_instance.query_items_fan_out("table", "pk", ["a"], limit=0))
+    assert list(dynamodb_instance.query_items_fan_out("table", "pk", [], ordered=False)) == []
+
+
+@pytest.fixture
+def sharded_dynamodb_instance(mock_client):
+    from carlogtt_python_library.database.database_dynamo import DynamoDB
+
+    mock_client.describe_table.return_value = PK_SK_TABLE_DESCRIPTION
+
+    return DynamoDB(aws_region_name="us-east-1", caching=True, write_shards={"table": 4})
+
+
+def test_write_shards_put_get_update_delete(mock_client, sharded_dynamodb_instance):
+    import zlib
+
+    shard_pk = f"user#{zlib.crc32(b'7') % 4}"
+    mock_client.put_item.return_value = {}
+
+    item = sharded_dynamodb_instance.put_item("table", "pk", "user", "sk", 7, name="a")
+
+    assert item == {"pk": "user", "sk": 7, "name": "a"}
+    assert mock_client.put_item.call_args.kwargs["Item"]["pk"] == {"S": shard_pk}
+
+    mock_client.get_item.return_value = {"Item": {"pk": {"S": shard_pk}, "sk": {"N": "7"}}}
+
+    assert sharded_dynamodb_instance.get_item("table", "pk", "user", "sk", 7.0) == {
+        "pk": "user",
+        "sk": 7,
+    }
+    assert mock_client.get_item.call_args.kwargs["Key"]["pk"] == {"S": shard_pk}
+
+    mock_client.update_item.return_value = {"Attributes": {}}
+    updated = sharded_dynamodb_instance.update_item("table", {"pk": "user"}, {"sk": 7}, name="b")
+
+    assert updated["pk"] == "user"
+    assert mock_client.update_item.call_args.kwargs["Key"]["pk"] == {"S": shard_pk}
+
+    mock_client.delete_item.return_value = {"Attributes": {}}
+    (deleted,) = sharded_dynamodb_instance.delete_item("table", "pk", "user", "sk", 7)
+
+    assert deleted["pk"] == "user"
+    assert mock_client.delete_item.call_args.kwargs["Key"]["pk"] == {"S": shard_pk}
+    assert sharded_dynamodb_instance.get_table_metadata("table")["WriteShards"] == 4
+
+
+def test_write_shards_query_scatter_gather(mock_client, sharded_dynamodb_instance):
+    mock_client.query.side_effect = _fan_out_query({
+        "user#0": [_sk_items("user#0", 3)],
+        "user#1": [_sk_items("user#1", 1, 5)],
+        "user#2": [[]],
+        "user#3": [_sk_items("user#3", 2), _sk_items("user#3", 4)],
+    })
+
+    items = list(sharded_dynamodb_instance.query_items("table", "pk", "user", ascending=True))
+
+    assert [(item["pk"], item["sk"]) for item in items] == [("user", sk) for sk in range(1, 6)]
+    assert mock_client.query.call_count == 5
+
+
+def test_write_shards_get_items(mock_client, sharded_dynamodb_instance):
+    mock_client.scan.return_value = {"Items": _sk_items("user#2", 1) + _sk_items("other#0", 2)}
+
+    items = list(sharded_dynamodb_instance.get_items("table"))
+
+    assert [item["pk"] for item in items] == ["user", "other"]
+
+
+def test_write_shards_query_projection_and_prefetch(mock_client, sharded_dynamodb_instance):
+    from carlogtt_python_library import exceptions
+
+    mock_client.query.side_effect = _fan_out_query({
+        "user#0": [_sk_items("user#0", 3)],
+        "user#1": [_sk_items("user#1", 1), _sk_items("user#1", 5)],
+        "user#2": [[]],
+        "user#3": [_sk_items("user#3", 2, 4)],
+    })
+
+    items = list(
+        sharded_dynamodb_instance.query_items("table", "pk", "user", projection=["pk"], prefetch=2)
+    )
+
+    # The sort key is read to merge the shards but not returned
+    assert items == [{"pk": "user"}] * 5
+    for call in mock_client.query.call_args_list:
+        assert "sk" in call.kwargs["ExpressionAttributeNames"].values()
+
+    with pytest.raises(exceptions.DynamoDBError):
+        list(sharded_dynamodb_instance.query_items("table", "pk", "user", prefetch=-1))
+
+
+def test_write_shards_batch_get_items(mock_client, sharded_dynamodb_instance):
+    import zlib
+
+    shard_pks = [f"user#{zlib.crc32(str(sk).encode()) % 4}" for sk in (1, 2)]
+    mock_client.batch_get_item.return_value = {
+        "Responses": {"table": _sk_items(shard_pks[0], 1) + _sk_items(shard_pks[1], 2)}
+    }
+
+    items = list(
+        sharded_dynamodb_instance.batch_get_items(
+            "table", keys=[{"pk": "user", "sk": 1}, {"pk": "user", "sk": 2}]
+        )
+    )
+
+    assert items == [{"pk": "user", "sk": 1}, {"pk": "user", "sk": 2}]
+    request = mock_client.batch_get_item.call_args.kwargs["RequestItems"]["table"]
+    assert [key["pk"] for key in request["Keys"]] == [{"S": shard_pk} for shard_pk in shard_pks]
+
+
+def test_write_shards_without_sort_key(mock_client):
+    from carlogtt_python_library import exceptions
+    from carlogtt_python_library.database.database_dynamo import DynamoDB
+
+    instance = DynamoDB(aws_region_name="us-east-1", caching=True)
+    instance.set_write_shards("table", 3)
+    mock_client.put_item.return_value = {}
+
+    for _ in range(10):
+        assert instance.put_item("table", "pk", "counter", count=1)["pk"] == "counter"
+
+    shards = {call.kwargs["Item"]["pk"]["S"] for call in mock_client.put_item.call_args_list}
+    assert shards <= {"counter#0", "counter#1", "counter#2"}
+
+    with pytest.raises(exceptions.DynamoDBError):
+        instance.get_item("table", "pk", "counter")
+    with pytest.raises(exceptions.DynamoDBError):
+        instance.put_item("table", "pk", 1, count=1)
+    with pytest.raises(exceptions.DynamoDBError):
+        instance.put_item("table", "pk", auto_generate_partition_key_value=True)
+    with pytest.raises(exceptions.DynamoDBError):
+        instance.set_write_shards("table", 0)
+
+    instance.set_write_shards("table", None)
+    instance.put_item("table", "pk", "counter", count=1)
+
+    assert mock_client.put_item.call_args.kwargs["Item"]["pk"] == {"S": "counter"}
+
+
+def test_compress_att_round_trip(dynamodb_instance):
+    from carlogtt_python_library import exceptions
+
+    serializer = dynamodb_instance._serializer
+    text = "lorem ipsum " * 200
+
+    compressed = serializer.compress_att({"S": text})
+    compressed_bytes = serializer.compress_att({"B": text.encode()}, min_size_bytes=10, level=9)
+
+    assert set(compressed) == {"B"} and len(compressed["B"]) < len(text)
+    assert serializer.decompress_att(compressed) == {"S": text}
+    assert serializer.decompress_item({"body": compressed_bytes}, {}) == {
+        "body": {"B": text.encode()}
+    }
+    assert serializer.decompress_item({"body": compressed}, {"Attributes": ["other"]}) == {
+        "body": compressed
+    }
+    # Deserialization never decompresses, binary values are returned
+    # as stored
+    assert serializer.deserialize_att(compressed) == compressed["B"]
+
+    # Small, incompressible and non string values are left unchanged
+    random_bytes = os.urandom(2048)
+    assert serializer.compress_att({"S": "short"}) == {"S": "short"}
+    assert serializer.compress_att({"B": random_bytes}) == {"B": random_bytes}
+    assert serializer.compress_att({"N": "1" * 2000}) == {"N": "1" * 2000}
+    assert serializer.decompress_att({"B": b"plain"}) == {"B": b"plain"}
+
+    with pytest.raises(exceptions.DynamoDBError):
+        serializer.decompress_att({"B": compressed["B"][:-4]})
+
+
+def test_compression_reads_decompress_only_compressed_tables(mock_client):
+    import zlib
+
+    from carlogtt_python_library.database.database_dynamo import (
+        _COMPRESSED_ATTRIBUTE_PREFIX,
+        DynamoDB,
+    )
+
+    mock_client.describe_table.return_value = PK_ONLY_TABLE_DESCRIPTION
+    instance = DynamoDB(aws_region_name="us-east-1", caching=True)
+    body = "x" * 2000
+    compressed = instance._serializer.compress_att({"S": body})["B"]
+    # User bytes that happen to start with the compression prefix
+    garbage = _COMPRESSED_ATTRIBUTE_PREFIX + b"Sgarbage"
+    lookalike = _COMPRESSED_ATTRIBUTE_PREFIX + b"S" + zlib.compress(b"x")
+    ddb_item = {
+        "pk": {"S": "1"},
+        "a": {"B": garbage},
+        "b": {"B": lookalike},
+        "c": {"B": compressed},
+    }
+    mock_client.get_item.return_value = {"Item": ddb_item}
+    mock_client.scan.return_value = {"Items": [ddb_item]}
+    mock_client.batch_get_item.return_value = {"Responses": {"table": [ddb_item]}}
+    reads = [
+        lambda: instance.get_item("table", "pk", "1"),
+        lambda: next(instance.get_items("table")),
+        lambda: next(instance.batch_get_items("table", keys=[{"pk": "1"}])),
+    ]
+
+    for read in reads:
+        assert read() == {"pk": "1", "a": garbage, "b": lookalike, "c": compressed}
+
+    instance.set_compression("table", {"Attributes": ["c"]})
+
+    for read in reads:
+        assert read() == {"pk": "1", "a": garbage, "b": lookalike, "c": body}
+
+
+def test_compression_put_and_update(mock_client):
+    from carlogtt_python_library.database.database_dynamo import DynamoDB
+
+    mock_client.describe_table.return_value = PK_SK_TABLE_DESCRIPTION
+    mock_client.put_item.return_value = {}
+    mock_client.update_item.return_value = {}
+    instance = DynamoDB(
+        aws_region_name="us-east-1", caching=True, compression={"table": {"MinSizeBytes": 100}}
+    )
+    body = "x" * 1000
+
+    item = instance.put_item("table", "pk", "user", "sk", 1, body=body, gsi_sk=body, name="a")
+
+    item_ser = mock_client.put_item.call_args.kwargs["Item"]
+    assert item == {"pk": "user", "sk": 1, "body": body, "gsi_sk": body, "name": "a"}
+    assert set(item_ser["body"]) == {"B"}
+    assert item_ser["gsi_sk"] == {"S": body}
+    assert item_ser["name"] == {"S": "a"}
+
+    instance.update_item("table", {"pk": "user"}, {"sk": 1}, {"name": "a"}, body=body)
+
+    values = mock_client.update_item.call_args.kwargs["ExpressionAttributeValues"]
+    assert set(values[":body_placeholder"]) == {"B"}
+    assert values[":condition_attribute_value_placeholder"] == {"S": "a"}
+
+    instance.set_compression("table", {"MinSizeBytes": 100, "Attributes": ["other"]})
+    instance.put_item("table", "pk", "user", "sk", 2, body=body)
+
+    assert mock_client.put_item.call_args.kwargs["Item"]["body"] == {"S": body}
+
+    instance.set_compression("table", None)
+    mock_client.batch_write_item.return_value = {"UnprocessedItems": {}}
+    instance.batch_write_items("table", put=[{"pk": "user", "sk": 3, "body": body}])
+
+    assert _written_requests(mock_client, "table")[0]["PutRequest"]["Item"]["body"] == {"S": body}
+
+
+def test_compression_write_results_decompressed(mock_client):
+    from carlogtt_python_library.database.database_dynamo import DynamoDB
+
+    mock_client.describe_table.return_value = PK_SK_TABLE_DESCRIPTION
+    instance = DynamoDB(
+        aws_region_name="us-east-1", caching=True, compression={"table": {"MinSizeBytes": 100}}
+    )
+    body = "x" * 1000
+    mock_client.update_item.return_value = {
+        "Attributes": {"other": instance._serializer.compress_att({"S": body})}
+    }
+    mock_client.transact_write_items.return_value = {}
+
+    updated = instance.update_item("table", {"pk": "user"}, {"sk": 1}, name="a")
+    response = instance.atomic_writes(
+        put=[{
+            "TableName": "table",
+            "PartitionKeyKey": "pk",
+            "PartitionKeyValue": "user",
+            "SortKeyKey": "sk",
+            "SortKeyValue": 1,
+            "Items": {"body": body},
+        }],
+        update=[{
+            "TableName": "table",
+            "PartitionKey": {"pk": "user"},
+            "SortKey": {"sk": 1},
+            "Items": {"body": body},
+            "ConditionAttribute": {"name": "a"},
+        }],
+    )
+
+    assert updated["other"] == body
+    assert response["Put"] == [{"pk": "user", "sk": 1, "body": body}]
+    assert response["Update"] == [{"pk": "user", "sk": 1, "body": body}]
+    transact_items = mock_client.transact_write_items.call_args.kwargs["TransactItems"]
+    assert set(transact_items[0]["Put"]["Item"]["body"]) == {"B"}
+
+
+def test_estimate_item_size(mock_client, dynamodb_instance):
+    from carlogtt_python_library import exceptions
+
+    mock_client.describe_table.return_value = PK_ONLY_TABLE_DESCRIPTION
+    item = {"pk": "user", "body": "x" * 5000}
+
+    assert dynamodb_instance.estimate_item_size("table", item) == {
+        "SizeBytes": 5010,
+        "CompressedSizeBytes": 5010,
+        "ReadCapacityUnits": 2,
+        "CompressedReadCapacityUnits": 2,
+        "WriteCapacityUnits": 5,
+        "CompressedWriteCapacityUnits": 5,
+    }
+
+    dynamodb_instance.set_compression("table", {"Level": 9})
+    estimate = dynamodb_instance.estimate_item_size("table", item)
+
+    assert estimate["CompressedSizeBytes"] < 100
+    assert estimate["CompressedReadCapacityUnits"] == 1
+    assert estimate["CompressedWriteCapacityUnits"] == 1
+
+    with pytest.raises(exceptions.DynamoDBError):
+        dynamodb_instance.set_compression("table", {"Level": 10})
+    with pytest.raises(exceptions.DynamoDBError):
+        dynamodb_instance.set_compression("table", {"MinSizeBytes": 0})
+
+
+def test_serialize_update_template_cached(dynamodb_instance):
+    serializer = dynamodb_instance._serializer
+
+    exp, names, placeholders = serializer.serialize_update_template(["name", "visitCount"])
+    names["#pk"] = "pk"
+
+    assert exp == "SET #name = :name_placeholder, #visit_count = :visit_count_placeholder"
+    assert placeholders == (":name_placeholder", ":visit_count_placeholder")
+    assert serializer.serialize_update_items(name="a", visitCount=2) == (
+        exp,
+        {"#name": "name", "#visit_count": "visit_count"},
+        {":name_placeholder": {"S": "a"}, ":visit_count_placeholder": {"N": "2"}},
+    )
+    assert serializer._update_templates.cache_info().hits == 1
+
+
+def test_update_plan_matches_update_item(mock_client, dynamodb_instance):
+    mock_client.describe_table.return_value = PK_SK_TABLE_DESCRIPTION
+    mock_client.update_item.return_value = {"Attributes": {"old": {"S": "old"}}}
+
+    expected = dynamodb_instance.update_item(
+        "table", {"pk": "user"}, {"sk": 1}, {"version": 3}, name="a", visitCount=2
+    )
+    expected_args = mock_client.update_item.call_args.kwargs
+
+    plan = dynamodb_instance.prepare_update(
+        "table", "pk", ["name", "visitCount"], sort_key_key="sk", condition_attribute_key="version"
+    )
+
+    for _ in range(2):
+        assert plan.execute("user", 1, condition_attribute_value=3, name="a", visitCount=2) == (
+            expected
+        )
+        assert mock_client.update_item.call_args.kwargs == expected_args
+
+    dynamodb_instance.upsert_item("table", {"pk": "user"}, {"sk": 1}, name="a", visitCount=2)
+    expected_args = mock_client.update_item.call_args.kwargs
+
+    upsert_plan = dynamodb_instance.prepare_update(
+        "table", "pk", ["name", "visitCount"], sort_key_key="sk", upsert=True
+    )
+    upsert_plan.execute("user", 1, name="a", visitCount=2)
+
+    assert mock_client.update_item.call_args.kwargs == expected_args
+    assert "ConditionExpression" not in expected_args
+
+
+def test_update_plan_invalid_arguments(mock_client, dynamodb_instance):
+    from carlogtt_python_library import exceptions
+
+    mock_client.describe_table.return_value = PK_SK_TABLE_DESCRIPTION
+    plan = dynamodb_instance.prepare_update(
+        "table", "pk", ["name"], sort_key_key="sk", condition_attribute_key="version"
+    )
+
+    with pytest.raises(exceptions.DynamoDBError):
+        dynamodb_instance.prepare_update("table", "pk", [])
+    with pytest.raises(exceptions.DynamoDBError):
+        plan.execute("user", 1, condition_attribute_value=None, other="a")
+    with pytest.raises(exceptions.DynamoDBError):
+        plan.execute("user", 1, condition_attribute_value=None, name="a", other="b")
+    with pytest.raises(exceptions.DynamoDBError):
+        plan.execute("user", condition_attribute_value=None, name="a")
+    with pytest.raises(exceptions.DynamoDBError):
+        plan.execute("user", 1, name="a")
+
+    mock_client.update_item.assert_not_called()
+
+
+def test_write_shards_batch_and_atomic_writes(mock_client, sharded_dynamodb_instance):
+    import zlib
+
+    shard_pk = {"S": f"user#{zlib.crc32(b'7') % 4}"}
+    other_shard_pk = {"S": f"user#{zlib.crc32(b'8') % 4}"}
+    mock_client.batch_write_item.return_value = {"UnprocessedItems": {}}
+    mock_client.update_item.return_value = {"Attributes": {"pk": shard_pk, "sk": {"N": "7"}}}
+    mock_client.transact_write_items.return_value = {}
+
+    sharded_dynamodb_instance.batch_write_items(
+        "table", put=[{"pk": "user", "sk": 7, "v": 1}], delete=[{"pk": "user", "sk": 8}]
+    )
+    with sharded_dynamodb_instance.buffered_writer("table") as writer:
+        writer.put({"pk": "user", "sk": 7, "v": 1})
+        writer.delete({"pk": "user", "sk": 8})
+
+    sent = _written_requests(mock_client, "table")
+    assert [r["PutRequest"]["Item"]["pk"] for r in sent if "PutRequest" in r] == [shard_pk] * 2
+    assert [r["DeleteRequest"]["Key"]["pk"] for r in sent if "DeleteRequest" in r] == [
+        other_shard_pk
+    ] * 2
+
+    item = sharded_dynamodb_instance.delete_item_att("table", "pk", "user", ["v"], "sk", 7)
+
+    assert item == {"pk": "user", "sk": 7}
+    assert mock_client.update_item.call_args.kwargs["Key"]["pk"] == shard_pk
+
+    response = sharded_dynamodb_instance.atomic_writes(
+        put=[{
+            "TableName": "table",
+            "PartitionKeyKey": "pk",
+            "PartitionKeyValue": "user",
+            "SortKeyKey": "sk",
+            "SortKeyValue": 7,
+            "Items": {"v": 1},
+        }],
+        update=[{
+            "TableName": "table",
+            "PartitionKey": {"pk": "user"},
+            "SortKey": {"sk": 7},
+            "Items": {"v": 2},
+        }],
+        delete=[{"TableName": "table", "PartitionKey": {"pk": "user"}, "SortKey": {"sk": 7}}],
+    )
+
+    transact_items = mock_client.transact_write_items.call_args.kwargs["TransactItems"]
+    assert transact_items[0]["Put"]["Item"]["pk"] == shard_pk
+    assert transact_items[1]["Update"]["Key"]["pk"] == shard_pk
+    assert transact_items[2]["Delete"]["Key"]["pk"] == shard_pk
+    assert response["Put"] == [{"pk": "user", "sk": 7, "v": 1}]
+    assert response["Update"] == [{"pk": "user", "sk": 7, "v": 2}]
+    assert response["Delete"] == [{"pk": "user", "sk": 7}]
+
+
+def test_write_shards_batch_failures_report_logical_key(mock_client, sharded_dynamodb_instance):
+    mock_client.batch_write_item.side_effect = botocore.exceptions.ClientError(
+        {"Error": {"Code": "ValidationException", "Message": "bad"}}, "BatchWriteItem"
+    )
+
+    report = sharded_dynamodb_instance.batch_write_items("table", delete=[{"pk": "user", "sk": 1}])
+
+    assert [f["Item"] for f in report["Failed"]] == [{"pk": "user", "sk": 1}]